@@ -0,0 +1,568 @@
+"""多指挥官混编部队模型
+
+把格式塔零（先驱者/渗透者）和托什（死神、夜枭、运输船）单位统一为UnitProfile，
+部队只是各单位的数量。指挥官加成（托什20%伤害、格式塔零军衔攻速）作为可插拔的
+修正层，按部队上下文（编队护甲减免、是否有夜枭安全力场）作用在单位属性上。
+
+部队DPS由一个批量内核计算：
+    DPS[部队, 目标] = Σ_单位 数量[部队, 单位] × 单兵DPS[上下文(部队), 单位, 目标]
+不同上下文的种类很少（护甲减免 × 光环组合），单兵DPS表只需为每种上下文算一次，
+因此可以一次评估成千上万种编队或两两配对的组合。
+exact=True 时单兵DPS表和部队DPS按 fixed_point 的整数定点数计算，结果与加法顺序无关、逐位可复现。
+注册了预计算表（见 shared_tables）时，单兵DPS表直接从表中切片，不再逐次作用修正层。
+
+单位写法与 dps_cli 一致：
+    marine.<武器名> / ghost.<武器名>   格式塔零单位（使用指定武器，须在 GestaltRank 的军衔下已解锁）
+    reaper / raven / medivac            托什单位
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gestalt_cooldown import rank_cooldown
+from gestalt_ghost import RANK_WEAPONS as GHOST_RANK_WEAPONS, GestaltGhost, WeaponType as GhostWeapon
+from gestalt_marine import RANK_WEAPONS as MARINE_RANK_WEAPONS, GestaltMarine, WeaponType as MarineWeapon
+from fixed_point import armored_damage, fixed_dps, from_fixed, ratio, scale_by, to_fixed
+from tosh_reaper import WeaponStats as ReaperWeaponStats, WeaponType as ReaperWeapon
+from tosh_reaper_squad_analysis import TOSH_DAMAGE_MULTIPLIER
+from unit_data import unit_attributes, unit_weapons
+
+DEFAULT_TARGET_TYPE = "普通"
+MAX_ATTACK_LEVEL = 3  # 托什攻击升级的最高等级（单位数据中的武器伤害按此等级计）
+
+# 光环（在AURAS中的位置即位掩码编号）
+AURA_SAFETY_FIELD = "safety_field"  # 夜枭安全力场
+AURA_TRANSPORT = "transport"  # 运输船
+AURAS = (AURA_SAFETY_FIELD, AURA_TRANSPORT)
+
+# 固定伤害武器，不受护甲影响
+ARMOR_PIERCING_WEAPONS = {GhostWeapon.FISSION_RIFLE}
+
+
+@dataclass(frozen=True)
+class UnitProfile:
+    """单位的战斗属性（修正层作用之前）"""
+    key: str  # 单位写法，如 marine.STORM_RIFLE
+    commander: str  # tosh / gestalt
+    damage: Dict[str, float] = field(default_factory=dict)  # 目标类型 -> 每次命中伤害，"普通"为默认值
+    multi_attack: int = 1  # 每次攻击命中次数（护甲按次结算）
+    attack_speed: float = 0.0  # 基础攻击间隔，0表示不攻击
+    armor_piercing: bool = False  # 是否无视护甲
+    armor_reduction: int = 0  # 为整支部队提供的护甲减免（不叠加，取最大值）
+    provides: Tuple[str, ...] = ()  # 提供的光环
+    can_attack_air: bool = True
+    can_attack_ground: bool = True
+    supply: float = 0.0
+    minerals: float = 0.0
+    gas: float = 0.0
+    min_rank: int = 0  # 格式塔零武器解锁所需的军衔，0表示没有要求
+    # 修正层可调整的属性
+    damage_multiplier: float = 1.0  # 作用在基础伤害上的倍率
+    flat_bonus: float = 0.0  # 倍率之后附加的固定伤害
+    cooldown: Optional[float] = None  # 实际攻击间隔，None表示等于attack_speed
+
+    def damage_against(self, target_type: str) -> float:
+        return self.damage.get(target_type, self.damage.get(DEFAULT_TARGET_TYPE, 0.0))
+
+
+@dataclass(frozen=True)
+class ArmyContext:
+    """部队上下文：决定修正层如何作用"""
+    armor_reduction: int = 0
+    auras: frozenset = frozenset()
+
+
+class Modifier(ABC):
+    """修正层基类：按部队上下文调整单位属性"""
+    @abstractmethod
+    def apply(self, profile: UnitProfile, context: ArmyContext) -> UnitProfile:
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class ToshDamageBonus(Modifier):
+    """托什指挥官伤害加成（作用在基础伤害上）"""
+    multiplier: float = TOSH_DAMAGE_MULTIPLIER
+
+    def apply(self, profile: UnitProfile, context: ArmyContext) -> UnitProfile:
+        if profile.commander != "tosh" or not profile.damage:
+            return profile
+        return replace(profile, damage_multiplier=profile.damage_multiplier * self.multiplier)
+
+
+@dataclass(frozen=True)
+class SafetyField(Modifier):
+    """夜枭安全力场：部队中有夜枭时托什单位每次攻击附加固定伤害"""
+    bonus_per_attack: float = 10.0  # 5层×1点，死神一次攻击两发
+
+    def apply(self, profile: UnitProfile, context: ArmyContext) -> UnitProfile:
+        if profile.commander != "tosh" or not profile.damage or AURA_SAFETY_FIELD not in context.auras:
+            return profile
+        return replace(profile, flat_bonus=profile.flat_bonus + self.bonus_per_attack)
+
+
+@dataclass(frozen=True)
+class GestaltRank(Modifier):
+    """格式塔零军衔与攻速buff"""
+    rank: int = 3
+    buff_stacks: int = 0
+
+    def apply(self, profile: UnitProfile, context: ArmyContext) -> UnitProfile:
+        if profile.commander != "gestalt" or not profile.attack_speed:
+            return profile
+        return replace(profile, cooldown=rank_cooldown(profile.attack_speed, self.rank, self.buff_stacks))
+
+
+@dataclass(frozen=True)
+class AttackUpgrade(Modifier):
+    """托什攻击升级等级
+
+    单位目录中死神的武器属性按3级攻击计，每少一级每发伤害-1（一次攻击两发）。
+    """
+    level: int = MAX_ATTACK_LEVEL
+    per_attack: float = 2.0
+
+    def apply(self, profile: UnitProfile, context: ArmyContext) -> UnitProfile:
+        if profile.commander != "tosh" or not profile.damage or self.level == MAX_ATTACK_LEVEL:
+            return profile
+        delta = (MAX_ATTACK_LEVEL - self.level) * self.per_attack
+        return replace(profile, damage={k: v - delta for k, v in profile.damage.items()})
+
+
+DEFAULT_MODIFIERS: Tuple[Modifier, ...] = (ToshDamageBonus(), SafetyField(), GestaltRank())
+
+
+def _gestalt_profiles(prefix: str, unit_cls, weapon_enum, rank_weapons) -> List[UnitProfile]:
+    unit = unit_cls()
+    supply = unit_attributes(f"gestalt_{prefix}")["supply"]
+    profiles = []
+    for weapon_type, weapon in unit.weapons.items():
+        profiles.append(UnitProfile(
+            key=f"{prefix}.{weapon_type.name}",
+            commander="gestalt",
+            damage={DEFAULT_TARGET_TYPE: weapon.base_damage, **weapon.bonus_damage},
+            multi_attack=getattr(weapon, "multi_attack", 1),
+            attack_speed=weapon.attack_speed,
+            armor_piercing=weapon_type in ARMOR_PIERCING_WEAPONS,
+            armor_reduction=getattr(weapon, "armor_reduction", 0),
+            can_attack_air=getattr(weapon, "can_attack_air", True),
+            can_attack_ground=getattr(weapon, "can_attack_ground", True),
+            supply=supply,
+            min_rank=min(rank for rank, weapons in rank_weapons.items() if weapon_type in weapons),
+        ))
+    return profiles
+
+
+def _tosh_profiles() -> List[UnitProfile]:
+    reaper = unit_attributes("tosh_reaper")
+    # 与 gestalt_squad_analysis.calculate_reaper_dps 一致：P55镰刀电磁枪（含3级攻击升级）对普通目标8、
+    # 对轻甲18，一次攻击两发合并结算护甲
+    p55 = unit_weapons("tosh_reaper", ReaperWeapon, ReaperWeaponStats)[ReaperWeapon.P55_SCYTHE]
+    raven = unit_attributes("tosh_raven")
+    medivac = unit_attributes("tosh_medivac")
+    return [
+        UnitProfile("reaper", "tosh", damage={DEFAULT_TARGET_TYPE: p55.min_damage * 2, "轻甲": p55.max_damage * 2},
+                    attack_speed=p55.attack_speed, can_attack_air=getattr(p55, "can_attack_air", True),
+                    can_attack_ground=getattr(p55, "can_attack_ground", True), supply=reaper["supply"],
+                    minerals=reaper["cost_minerals"], gas=reaper["cost_gas"]),
+        UnitProfile("raven", "tosh", provides=(AURA_SAFETY_FIELD,), supply=raven["supply"],
+                    minerals=raven["cost_minerals"], gas=raven["cost_gas"]),
+        UnitProfile("medivac", "tosh", provides=(AURA_TRANSPORT,), supply=medivac["supply"],
+                    minerals=medivac["cost_minerals"], gas=medivac["cost_gas"]),
+    ]
+
+
+class UnitCatalog:
+    """单位目录：单位写法与数组列的对应关系"""
+    def __init__(self, profiles: Sequence[UnitProfile]):
+        self.profiles = list(profiles)
+        self.index: Dict[str, int] = {p.key: i for i, p in enumerate(self.profiles)}
+        self.armor_reduction = np.array([p.armor_reduction for p in self.profiles])
+        self.aura_bits = np.array([sum(1 << AURAS.index(a) for a in p.provides) for p in self.profiles])
+        self.supply = np.array([p.supply for p in self.profiles], dtype=np.float64)
+        self.minerals = np.array([p.minerals for p in self.profiles], dtype=np.float64)
+        self.gas = np.array([p.gas for p in self.profiles], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def vector(self, counts: Dict[str, int]) -> np.ndarray:
+        """把 {单位写法: 数量} 转换为数量向量
+
+        Raises:
+            ValueError: 未知单位
+        """
+        vector = np.zeros(len(self.profiles))
+        for key, count in counts.items():
+            if key not in self.index:
+                raise ValueError(f"未知单位 {key}")
+            vector[self.index[key]] += count
+        return vector
+
+
+@lru_cache(maxsize=None)
+def default_catalog() -> UnitCatalog:
+    """默认单位目录（所有格式塔零武器 + 托什单位）"""
+    return UnitCatalog(_gestalt_profiles("marine", GestaltMarine, MarineWeapon, MARINE_RANK_WEAPONS)
+                       + _gestalt_profiles("ghost", GestaltGhost, GhostWeapon, GHOST_RANK_WEAPONS)
+                       + _tosh_profiles())
+
+
+@dataclass
+class Army:
+    """部队：各单位的数量"""
+    units: Dict[str, int] = field(default_factory=dict)
+    name: str = ""
+
+    def add(self, key: str, count: int = 1) -> "Army":
+        self.units[key] = self.units.get(key, 0) + count
+        return self
+
+    def __add__(self, other: "Army") -> "Army":
+        merged = dict(self.units)
+        for key, count in other.units.items():
+            merged[key] = merged.get(key, 0) + count
+        return Army(merged, f"{self.name}+{other.name}" if self.name and other.name else self.name or other.name)
+
+    def supply(self, catalog: Optional[UnitCatalog] = None) -> float:
+        catalog = catalog or default_catalog()
+        return float(catalog.vector(self.units) @ catalog.supply)
+
+    def cost(self, catalog: Optional[UnitCatalog] = None) -> Dict[str, float]:
+        catalog = catalog or default_catalog()
+        vector = catalog.vector(self.units)
+        return {"minerals": float(vector @ catalog.minerals), "gas": float(vector @ catalog.gas)}
+
+
+def check_ranks(counts: np.ndarray, catalog: UnitCatalog, modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS):
+    """检查部队中的格式塔零武器在修正层给定的军衔下是否已解锁（见 RANK_WEAPONS）
+
+    Args:
+        counts: (部队数, 单位数) 数量矩阵
+        catalog: 单位目录
+        modifiers: 修正层，没有 GestaltRank 时不检查
+
+    Raises:
+        ValueError: 有部队使用了尚未解锁的武器
+    """
+    ranks = [m.rank for m in modifiers if isinstance(m, GestaltRank)]
+    if not ranks:
+        return
+    locked = np.array([p.min_rank > ranks[-1] for p in catalog.profiles], dtype=bool)
+    if not locked.any():
+        return
+    used = (np.atleast_2d(counts)[:, locked] > 0).any(axis=0)
+    if used.any():
+        keys = [p.key for p, lock in zip(catalog.profiles, locked) if lock]
+        names = [f"{k}（{catalog.profiles[catalog.index[k]].min_rank}级）" for k, u in zip(keys, used) if u]
+        raise ValueError(f"军衔{ranks[-1]}尚未解锁: {', '.join(names)}")
+
+
+def _context_keys(counts: np.ndarray, catalog: UnitCatalog) -> Tuple[np.ndarray, np.ndarray]:
+    """每支部队的 (护甲减免, 光环位掩码)"""
+    present = counts > 0
+    reduction = np.where(present, catalog.armor_reduction, 0).max(axis=1, initial=0)
+    auras = np.bitwise_or.reduce(np.where(present, catalog.aura_bits, 0), axis=1)
+    return reduction.astype(np.int64), auras.astype(np.int64)
+
+
+def _unique_contexts(reduction: np.ndarray, auras: np.ndarray) -> Tuple[List[ArmyContext], np.ndarray]:
+    codes = reduction * (1 << len(AURAS)) + auras
+    unique, inverse = np.unique(codes, return_inverse=True)
+    contexts = [ArmyContext(int(code >> len(AURAS)),
+                            frozenset(a for i, a in enumerate(AURAS) if code >> i & 1))
+                for code in unique]
+    return contexts, inverse.reshape(codes.shape)
+
+
+def army_contexts(counts: np.ndarray, catalog: UnitCatalog) -> Tuple[List[ArmyContext], np.ndarray]:
+    """计算每支部队的上下文
+
+    Args:
+        counts: (部队数, 单位数) 数量矩阵
+        catalog: 单位目录
+
+    Returns:
+        (不同上下文列表, 每支部队的上下文编号)
+    """
+    return _unique_contexts(*_context_keys(counts, catalog))
+
+
+class TableSource(ABC):
+    """预计算的单兵DPS表（如 shared_tables 的内存映射表）"""
+    @abstractmethod
+    def lookup(self, catalog: UnitCatalog, context: ArmyContext, targets: Sequence[Tuple[str, int]],
+               modifiers: Sequence[Modifier], exact: bool = False) -> Optional[np.ndarray]:
+        """返回与 unit_dps_table（exact=True时为 unit_dps_table_fixed）逐位相同的结果，不覆盖时返回None"""
+        raise NotImplementedError
+
+
+_TABLE_SOURCES: List[TableSource] = []
+
+
+def register_table_source(source: TableSource):
+    """注册预计算表，之后 unit_dps_table / unit_dps_table_fixed 先查表，表中没有的参数再计算"""
+    if source not in _TABLE_SOURCES:
+        _TABLE_SOURCES.append(source)
+
+
+def unregister_table_source(source: TableSource):
+    if source in _TABLE_SOURCES:
+        _TABLE_SOURCES.remove(source)
+
+
+def _from_sources(catalog: UnitCatalog, context: ArmyContext, targets: Sequence[Tuple[str, int]],
+                  modifiers: Sequence[Modifier], exact: bool) -> Optional[np.ndarray]:
+    for source in _TABLE_SOURCES:
+        table = source.lookup(catalog, context, targets, modifiers, exact)
+        if table is not None:
+            return table
+    return None
+
+
+def apply_modifiers(catalog: UnitCatalog, context: ArmyContext,
+                    modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS) -> List[UnitProfile]:
+    """某个上下文下目录中每个单位作用修正层之后的属性"""
+    profiles = []
+    for profile in catalog.profiles:
+        for modifier in modifiers:
+            profile = modifier.apply(profile, context)
+        profiles.append(profile)
+    return profiles
+
+
+def unit_dps_table(catalog: UnitCatalog, context: ArmyContext, targets: Sequence[Tuple[str, int]],
+                   modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS) -> np.ndarray:
+    """某个上下文下每个单位对每个目标的单兵DPS
+
+    Args:
+        catalog: 单位目录
+        context: 部队上下文
+        targets: (目标类型, 护甲) 列表
+        modifiers: 修正层（按顺序作用）
+
+    Returns:
+        (单位数, 目标数) 单兵DPS
+    """
+    table = _from_sources(catalog, context, targets, modifiers, exact=False)
+    if table is not None:
+        return table
+    return compute_unit_dps_table(catalog, context, targets, modifiers)
+
+
+def compute_unit_dps_table(catalog: UnitCatalog, context: ArmyContext, targets: Sequence[Tuple[str, int]],
+                           modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS) -> np.ndarray:
+    """unit_dps_table 的计算部分（不查预计算表）"""
+    profiles = apply_modifiers(catalog, context, modifiers)
+
+    types = sorted({t for t, _ in targets})
+    damage = np.array([[p.damage_against(t) for t in types] for p in profiles]).reshape(len(profiles), len(types))
+    damage = (damage * np.array([p.damage_multiplier for p in profiles])[:, None]
+              + np.array([p.flat_bonus for p in profiles])[:, None])
+    damage = damage[:, [types.index(t) for t, _ in targets]]  # (单位, 目标)
+
+    effective_armor = np.array([a for _, a in targets], dtype=np.float64)[None, :] - context.armor_reduction
+    # 与 calculate_actual_damage 相同：正护甲减伤（最低0.5），负护甲增伤
+    armored = np.where(effective_armor >= 0, np.maximum(0.5, damage - effective_armor), damage - effective_armor)
+    piercing = np.array([p.armor_piercing for p in profiles])[:, None]
+    per_hit = np.where(piercing, damage, armored)
+
+    cooldown = np.array([p.cooldown if p.cooldown is not None else p.attack_speed for p in profiles])
+    attacks = np.array([p.multi_attack for p in profiles]) * (cooldown > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(cooldown > 0, attacks / np.where(cooldown > 0, cooldown, 1), 0.0)
+    return per_hit * rate[:, None]
+
+
+def unit_dps_table_fixed(catalog: UnitCatalog, context: ArmyContext, targets: Sequence[Tuple[str, int]],
+                         modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS) -> np.ndarray:
+    """unit_dps_table 的定点数版本：伤害、倍率、护甲和攻击间隔都按整数结算
+
+    Returns:
+        (单位数, 目标数) 单兵DPS（int64，单位为 1/fixed_point.SCALE）
+    """
+    table = _from_sources(catalog, context, targets, modifiers, exact=True)
+    if table is not None:
+        return table
+    return compute_unit_dps_table_fixed(catalog, context, targets, modifiers)
+
+
+def compute_unit_dps_table_fixed(catalog: UnitCatalog, context: ArmyContext, targets: Sequence[Tuple[str, int]],
+                                 modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS) -> np.ndarray:
+    """unit_dps_table_fixed 的计算部分（不查预计算表）"""
+    profiles = apply_modifiers(catalog, context, modifiers)
+
+    types = sorted({t for t, _ in targets})
+    damage = to_fixed([[p.damage_against(t) for t in types] for p in profiles]).reshape(len(profiles), len(types))
+    numerator, denominator = np.array([ratio(p.damage_multiplier) for p in profiles], dtype=np.int64).reshape(-1, 2).T
+    damage = (scale_by(damage, numerator[:, None], denominator[:, None])
+              + to_fixed([p.flat_bonus for p in profiles])[:, None])
+    damage = damage[:, [types.index(t) for t, _ in targets]]  # (单位, 目标)
+
+    effective_armor = to_fixed([a - context.armor_reduction for _, a in targets])[None, :]
+    piercing = np.array([p.armor_piercing for p in profiles])[:, None]
+    per_hit = np.where(piercing, damage, armored_damage(damage, effective_armor))
+
+    cooldown = to_fixed([p.cooldown if p.cooldown is not None else p.attack_speed for p in profiles])
+    return fixed_dps(per_hit, np.array([p.multi_attack for p in profiles], dtype=np.int64), cooldown)
+
+
+def evaluate_counts_fixed(counts: np.ndarray, targets: Sequence[Tuple[str, int]],
+                          catalog: Optional[UnitCatalog] = None,
+                          modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS) -> np.ndarray:
+    """批量内核的定点数版本（数量取整），结果可直接用作缓存键或按行去重
+
+    Returns:
+        (部队数, 目标数) 部队DPS（int64，单位为 1/fixed_point.SCALE）
+    """
+    catalog = catalog or default_catalog()
+    counts = np.rint(np.atleast_2d(np.asarray(counts, dtype=np.float64))).astype(np.int64)
+    check_ranks(counts, catalog, modifiers)
+    contexts, context_index = army_contexts(counts, catalog)
+    result = np.empty((len(counts), len(targets)), dtype=np.int64)
+    for c, context in enumerate(contexts):
+        rows = context_index == c
+        result[rows] = counts[rows] @ unit_dps_table_fixed(catalog, context, targets, modifiers)
+    return result
+
+
+def evaluate_counts(counts: np.ndarray, targets: Sequence[Tuple[str, int]],
+                    catalog: Optional[UnitCatalog] = None,
+                    modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS, exact: bool = False) -> np.ndarray:
+    """批量内核：数量矩阵 -> 部队DPS
+
+    Args:
+        counts: (部队数, 单位数) 数量矩阵
+        targets: (目标类型, 护甲) 列表
+        catalog: 单位目录
+        modifiers: 修正层
+        exact: 按定点数计算（见 evaluate_counts_fixed），结果逐位可复现
+
+    Returns:
+        (部队数, 目标数) 部队DPS
+
+    Raises:
+        ValueError: 部队使用了修正层军衔下尚未解锁的武器
+    """
+    if exact:
+        return from_fixed(evaluate_counts_fixed(counts, targets, catalog, modifiers))
+    catalog = catalog or default_catalog()
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+    check_ranks(counts, catalog, modifiers)
+    contexts, context_index = army_contexts(counts, catalog)
+    tables = np.stack([unit_dps_table(catalog, c, targets, modifiers) for c in contexts])
+    result = np.empty((len(counts), len(targets)))
+    for c in range(len(contexts)):
+        rows = context_index == c
+        result[rows] = counts[rows] @ tables[c]
+    return result
+
+
+def evaluate_armies(armies: Sequence[Army], targets: Sequence[Tuple[str, int]],
+                    catalog: Optional[UnitCatalog] = None,
+                    modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS, exact: bool = False) -> np.ndarray:
+    """计算多支部队对多个目标的DPS
+
+    Returns:
+        (部队数, 目标数) 部队DPS
+    """
+    catalog = catalog or default_catalog()
+    counts = np.array([catalog.vector(a.units) for a in armies]).reshape(len(armies), len(catalog))
+    return evaluate_counts(counts, targets, catalog, modifiers, exact)
+
+
+def pairing_matrix(left: Sequence[Army], right: Sequence[Army], targets: Sequence[Tuple[str, int]],
+                   catalog: Optional[UnitCatalog] = None,
+                   modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS) -> np.ndarray:
+    """合作配对分析：两位指挥官各出一支部队，所有组合的合计DPS
+
+    两支部队合并后共享上下文（托什的夜枭安全力场只作用于托什单位，
+    格式塔零裂解步枪的护甲减免作用于整支部队）。DPS在同一上下文下是线性的，
+    所以先分别算出两侧在每种上下文下的DPS，再按配对的上下文相加，
+    不需要构造 左×右 的数量矩阵。
+
+    Returns:
+        (左侧部队数, 右侧部队数, 目标数) 合计DPS
+    """
+    catalog = catalog or default_catalog()
+    a = np.array([catalog.vector(x.units) for x in left]).reshape(len(left), len(catalog))
+    b = np.array([catalog.vector(x.units) for x in right]).reshape(len(right), len(catalog))
+    check_ranks(np.concatenate([a, b]), catalog, modifiers)
+    reduction_a, auras_a = _context_keys(a, catalog)
+    reduction_b, auras_b = _context_keys(b, catalog)
+    contexts, pair_context = _unique_contexts(np.maximum.outer(reduction_a, reduction_b),
+                                              np.bitwise_or.outer(auras_a, auras_b))
+    tables = [unit_dps_table(catalog, c, targets, modifiers) for c in contexts]
+    left_dps = np.stack([a @ t for t in tables])  # (上下文, 左, 目标)
+    right_dps = np.stack([b @ t for t in tables])  # (上下文, 右, 目标)
+    rows = np.arange(len(left))[:, None]
+    columns = np.arange(len(right))[None, :]
+    return left_dps[pair_context, rows] + right_dps[pair_context, columns]
+
+
+def composition_counts(keys: Sequence[str], supply: float, step: int = 1,
+                       catalog: Optional[UnitCatalog] = None) -> np.ndarray:
+    """枚举给定人口内若干单位的所有编队（每种单位数量按step递增）
+
+    逐个单位展开并立即按人口剪枝，不生成超出人口的组合，适合百万级的枚举。
+
+    Returns:
+        (编队数, len(keys)) 数量矩阵，按keys的字典序排列，不含空编队
+    """
+    catalog = catalog or default_catalog()
+    unit_supply = np.array([catalog.profiles[catalog.index[k]].supply for k in keys], dtype=np.float64)
+    counts = np.zeros((1, 0), dtype=np.int64)
+    used = np.zeros(1)
+    for s in unit_supply:
+        options = np.arange(0, int(supply // s) + 1 if s else 1, step)
+        used = np.repeat(used, len(options)) + np.tile(options * s, len(counts))
+        counts = np.column_stack([np.repeat(counts, len(options), axis=0), np.tile(options, len(counts))])
+        keep = used <= supply
+        counts, used = counts[keep], used[keep]
+    return counts[used > 0]
+
+
+def expand_counts(counts: np.ndarray, keys: Sequence[str], catalog: Optional[UnitCatalog] = None) -> np.ndarray:
+    """把 composition_counts 的结果扩展为目录列顺序的数量矩阵"""
+    catalog = catalog or default_catalog()
+    full = np.zeros((len(counts), len(catalog)))
+    full[:, [catalog.index[k] for k in keys]] = counts
+    return full
+
+
+def supply_compositions(keys: Sequence[str], supply: float, step: int = 1,
+                        catalog: Optional[UnitCatalog] = None) -> List[Army]:
+    """枚举给定人口内若干单位的所有编队（每种单位数量按step递增）"""
+    return [Army({k: int(c) for k, c in zip(keys, combo) if c})
+            for combo in composition_counts(keys, supply, step, catalog)]
+
+
+def _format_army(army: Army) -> str:
+    return " + ".join(f"{count}{key}" for key, count in army.units.items())
+
+
+if __name__ == "__main__":
+    import time
+
+    targets = [("普通", a) for a in range(0, 9, 2)] + [("轻甲", 1), ("重甲", 2)]
+    squads = [
+        Army({"ghost.FISSION_RIFLE": 5, "marine.STORM_RIFLE": 30}, "风暴裂解5+30"),
+        Army({"marine.HEAVY_LASER": 35}, "7枪重型激光炮"),
+        Army({"ghost.HELLFIRE": 35}, "7鬼炼狱火"),
+        Army({"reaper": 128, "raven": 1}, "死神船队"),
+    ]
+    print("目标: " + "  ".join(f"{t}{a}" for t, a in targets))
+    for army, row in zip(squads, evaluate_armies(squads, targets)):
+        print(f"{army.name:<10} 人口{army.supply():>5.0f}  " + "  ".join(f"{v:>7.0f}" for v in row))
+
+    tosh = supply_compositions(["reaper", "raven", "medivac"], 100, step=4)
+    gestalt = supply_compositions(["marine.STORM_RIFLE", "ghost.FISSION_RIFLE", "marine.HEAVY_LASER"], 100, step=4)
+    start = time.perf_counter()
+    matrix = pairing_matrix(tosh, gestalt, [("普通", 2)])[:, :, 0]
+    elapsed = time.perf_counter() - start
+    i, j = np.unravel_index(np.argmax(matrix), matrix.shape)
+    print(f"\n{len(tosh)}×{len(gestalt)}={matrix.size}种配对，用时{elapsed * 1000:.1f}ms")
+    print(f"护甲2最优配对: 托什[{_format_army(tosh[i])}] + 格式塔零[{_format_army(gestalt[j])}]  DPS {matrix[i, j]:.0f}")
@@ -0,0 +1,163 @@
+"""离散事件战斗模拟
+
+我方部队（army.Army）对一波敌军（survivability.EnemyProfile 列表）逐次攻击结算：
+每个单位按自己的攻击间隔产生攻击事件（事件按时间放在堆中），双方都集火
+最前面的存活单位，生命恢复在受击时按经过的时间补算。
+单次攻击伤害与解析模型使用同一套数据：
+    我方 -> 敌方: army.unit_dps_table × 攻击间隔（含修正层和护甲结算）
+    敌方 -> 我方: survivability.durability_table 的承受DPS ÷ 攻击频率（含防御修正层）
+用于校准 lanchester 的解析估计，不追求微操、溅射和走位等细节。
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+import heapq
+
+import numpy as np
+
+from army import DEFAULT_MODIFIERS, Army, Modifier, UnitCatalog, apply_modifiers, army_contexts, check_ranks, \
+    default_catalog, unit_dps_table
+from survivability import (DEFAULT_DEFENSE_MODIFIERS, DefenseModifier, EnemyProfile, defense_profiles,
+                           durability_table)
+
+SIDE_ARMY = "A"
+SIDE_ENEMY = "B"
+DRAW = "draw"
+
+
+@dataclass
+class BattleResult:
+    """一场模拟战斗的结果"""
+    winner: str  # "A"（我方）/ "B"（敌方）/ "draw"
+    duration: float  # 战斗时长（秒）
+    survivors: Dict[str, int] = field(default_factory=dict)  # 我方各单位存活数
+    enemy_survivors: List[int] = field(default_factory=list)  # 敌方各单位存活数（与波次顺序一致）
+    hp_fraction: float = 0.0  # 我方可被攻击单位的剩余生命比例
+    enemy_hp_fraction: float = 0.0  # 敌方剩余生命比例
+    events: int = 0  # 处理的攻击事件数
+
+
+def simulate_battle(army: Army, wave: Sequence[EnemyProfile], catalog: Optional[UnitCatalog] = None,
+                    modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS,
+                    defense_modifiers: Sequence[DefenseModifier] = DEFAULT_DEFENSE_MODIFIERS,
+                    seed: int = 0, max_time: float = 600.0) -> BattleResult:
+    """模拟一场战斗
+
+    Args:
+        army: 我方部队
+        wave: 敌方各单位（含数量）
+        catalog: 单位目录
+        modifiers: 输出修正层
+        defense_modifiers: 防御修正层
+        seed: 随机种子（只影响各单位首次攻击的错开时间）
+        max_time: 最长模拟时间，超时判为平局
+
+    Returns:
+        战斗结果
+    """
+    catalog = catalog or default_catalog()
+    wave = [e for e in wave if e.count > 0]
+    counts = catalog.vector(army.units)
+    check_ranks(counts, catalog, modifiers)
+    contexts, _ = army_contexts(counts[None, :], catalog)
+    context = contexts[0]
+
+    # 我方单兵属性
+    profiles = apply_modifiers(catalog, context, modifiers)
+    cooldown = np.array([p.cooldown if p.cooldown is not None else p.attack_speed for p in profiles])
+    attack_damage = unit_dps_table(catalog, context, [e.target for e in wave], modifiers) * cooldown[:, None]
+    defense = defense_profiles(catalog, context, defense_modifiers)
+    table = durability_table(defense, list(wave))
+    # 敌方单个单位一次攻击对我方各单位造成的伤害（承受DPS按该敌方单位数量和攻击间隔换算）
+    enemy_damage = table.incoming_dps * np.array([e.cooldown / e.count for e in wave])[None, :]
+    regen = np.array([p.hp_regen for p in defense])
+
+    # 展开为单个单位
+    a_type = np.repeat(np.arange(len(catalog)), counts.astype(np.int64))
+    a_max_hp = np.array([defense[t].hp for t in a_type], dtype=np.float64)
+    a_hp = a_max_hp.copy()
+    a_last = np.zeros(len(a_type))
+    b_type = np.repeat(np.arange(len(wave)), [e.count for e in wave])
+    b_hp = np.array([wave[t].hp for t in b_type], dtype=np.float64)
+    b_initial = b_hp.sum()
+    # 每种敌方单位能攻击的我方单位（按集火顺序）及当前指针
+    b_targets = [np.flatnonzero(table.targetable[a_type, e]) for e in range(len(wave))]
+    b_pointer = [0] * len(wave)
+    a_pointer = 0
+    targetable_any = table.targetable[a_type].any(axis=1) if len(wave) else np.zeros(len(a_type), dtype=bool)
+    a_initial = a_max_hp[targetable_any].sum()
+
+    rng = np.random.default_rng(seed)
+    heap = []
+    for i, t in enumerate(a_type):
+        if cooldown[t] > 0 and attack_damage[t].any():
+            heap.append((rng.uniform(0, cooldown[t]), 0, i))
+    for j, t in enumerate(b_type):
+        heap.append((rng.uniform(0, wave[t].cooldown), 1, j))
+    heapq.heapify(heap)
+
+    events = 0
+    now = 0.0
+    winner = DRAW
+    while heap:
+        now, side, index = heapq.heappop(heap)
+        if now > max_time:
+            now = max_time
+            break
+        events += 1
+        if side == 0:
+            if a_hp[index] <= 0:
+                continue
+            while a_pointer < len(b_hp) and b_hp[a_pointer] <= 0:
+                a_pointer += 1
+            if a_pointer == len(b_hp):
+                winner = SIDE_ARMY
+                break
+            b_hp[a_pointer] -= attack_damage[a_type[index], b_type[a_pointer]]
+            if (b_hp <= 0).all():
+                winner = SIDE_ARMY
+                break
+            heapq.heappush(heap, (now + cooldown[a_type[index]], 0, index))
+        else:
+            if b_hp[index] <= 0:
+                continue
+            e = b_type[index]
+            targets = b_targets[e]
+            while b_pointer[e] < len(targets) and a_hp[targets[b_pointer[e]]] <= 0:
+                b_pointer[e] += 1
+            if b_pointer[e] == len(targets):
+                continue  # 没有能攻击的目标，不再行动
+            target = targets[b_pointer[e]]
+            a_hp[target] = min(a_max_hp[target], a_hp[target] + regen[a_type[target]] * (now - a_last[target]))
+            a_last[target] = now
+            a_hp[target] -= enemy_damage[a_type[target], e]
+            if not (a_hp[targetable_any] > 0).any():
+                winner = SIDE_ENEMY
+                break
+            heapq.heappush(heap, (now + wave[e].cooldown, 1, index))
+
+    alive_a = a_hp > 0
+    alive_b = b_hp > 0
+    return BattleResult(
+        winner=winner,
+        duration=now,
+        survivors={catalog.profiles[t].key: int(n) for t, n in
+                   enumerate(np.bincount(a_type[alive_a], minlength=len(catalog))) if counts[t]},
+        enemy_survivors=np.bincount(b_type[alive_b], minlength=len(wave)).tolist(),
+        hp_fraction=float(np.clip(a_hp[targetable_any & alive_a], 0, None).sum() / a_initial) if a_initial else 0.0,
+        enemy_hp_fraction=float(b_hp[alive_b].sum() / b_initial) if b_initial else 0.0,
+        events=events,
+    )
+
+
+if __name__ == "__main__":
+    import time
+
+    from survivability import ENEMY_PROFILES
+
+    wave = [ENEMY_PROFILES["刺蛇"].scaled(30), ENEMY_PROFILES["雷兽"].scaled(4)]
+    for army in [Army({"reaper": 64, "raven": 1}, "64死神+夜枭"), Army({"marine.HEAVY_LASER": 35}, "7枪重型激光炮")]:
+        start = time.perf_counter()
+        result = simulate_battle(army, wave)
+        elapsed = time.perf_counter() - start
+        print(f"{army.name}: 胜方{result.winner}  {result.duration:.1f}s  我方存活{result.survivors}  "
+              f"敌方存活{result.enemy_survivors}  ({result.events}个事件，{elapsed * 1000:.1f}ms)")
@@ -0,0 +1,252 @@
+"""建造顺序搜索
+
+在给定时间点（如6:00第一波进攻）最大化死神部队DPS的建造顺序搜索。
+使用束搜索：每层保留预计最终DPS（剩余资源全部造死神）最高的若干状态；
+相同兵力构成的状态只保留不被支配的那些（开工更早、建筑更早空闲、升级更早完成的状态支配其他状态）；
+再用乐观上界剪掉不可能超过当前最优解的分支。每层的扩展可以分发到进程池。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from economy_sim import (BuildItem, BuildResult, BuildState, Economy, item_catalog,
+                         per_reaper_dps)
+
+DEFAULT_BEAM_WIDTH = 64
+
+
+@dataclass
+class SearchOptions:
+    """搜索参数"""
+    deadline: float = 360.0  # 截止时间（秒）
+    target_type: str = "轻甲"
+    beam_width: int = DEFAULT_BEAM_WIDTH
+    allow_upgrades: bool = True  # 是否允许攻击升级
+    max_ravens: int = 1  # 渡鸦数量上限（一只即可提供安全力场）
+    require_transport: bool = False  # 死神是否需要运输船装载才计入DPS
+
+
+@dataclass
+class SearchResult:
+    """搜索结果"""
+    build_order: List[str]
+    dps: float
+    result: BuildResult
+    explored: int  # 扩展过的状态数
+    pruned: int  # 被支配或上界剪掉的状态数
+
+
+def _army_at(state: BuildState, deadline: float) -> Tuple[int, int, bool, int]:
+    """截止时间前完成的 (死神数, 攻击等级, 是否有渡鸦, 运输船数)"""
+    reapers = medivacs = level = 0
+    raven = False
+    for e in state.events:
+        if e.finish > deadline:
+            continue
+        if e.name == "reaper":
+            reapers += 1
+        elif e.name == "medivac":
+            medivacs += 1
+        elif e.name == "raven":
+            raven = True
+        elif e.name.startswith("attack_"):
+            level = max(level, int(e.name[-1]))
+    return reapers, level, raven, medivacs
+
+
+def score_state(state: BuildState, options: SearchOptions) -> float:
+    """状态在截止时间的DPS"""
+    reapers, level, raven, medivacs = _army_at(state, options.deadline)
+    if options.require_transport:
+        reapers = min(reapers, medivacs * 8)
+    key = "heavy_armor" if options.target_type == "重甲" else "light_armor"
+    return reapers * per_reaper_dps(key)[level, int(raven)]
+
+
+def _extra_reapers(state: BuildState, economy: Economy, options: SearchOptions,
+                   catalog: Dict[str, BuildItem]) -> int:
+    """剩余资源和兵营时间在截止时间前最多还能造的死神数"""
+    reaper = catalog["reaper"]
+    deadline = options.deadline
+    minerals = economy.minerals + economy.mineral_rate * deadline - state.spent_minerals
+    gas = economy.gas + economy.gas_rate * deadline - state.spent_gas
+    by_resources = min(minerals // reaper.minerals if reaper.minerals else float("inf"),
+                       gas // reaper.gas if reaper.gas else float("inf"))
+    by_time = sum(max(0, int((deadline - max(free, state.now)) // reaper.time))
+                  for free in state.free_at.get(reaper.structure, []))
+    return max(0, int(min(by_resources, by_time)))
+
+
+def upper_bound(state: BuildState, economy: Economy, options: SearchOptions,
+                catalog: Dict[str, BuildItem]) -> float:
+    """乐观上界：剩余资源和兵营时间全部用来造满buff满升级的死神"""
+    reapers_done, _, _, _ = _army_at(state, options.deadline)
+    extra = _extra_reapers(state, economy, options, catalog)
+    key = "heavy_armor" if options.target_type == "重甲" else "light_armor"
+    return (reapers_done + extra) * per_reaper_dps(key).max()
+
+
+def completion_estimate(state: BuildState, economy: Economy, options: SearchOptions,
+                        catalog: Dict[str, BuildItem]) -> float:
+    """估计状态最终能达到的DPS：剩余资源和兵营时间全部用来造死神，攻击等级和渡鸦保持当前已安排的
+
+    束搜索按这个值排序。只按已完成的DPS排序时，刚投入升级或渡鸦的状态暂时没有收益，
+    会在升级生效之前被挤出束。
+    """
+    reapers, level, raven, medivacs = _army_at(state, options.deadline)
+    reapers += _extra_reapers(state, economy, options, catalog)
+    if options.require_transport:
+        reapers = min(reapers, medivacs * 8)
+    key = "heavy_armor" if options.target_type == "重甲" else "light_armor"
+    return reapers * per_reaper_dps(key)[level, int(raven)]
+
+
+def _signature(state: BuildState) -> Tuple:
+    counts: Dict[str, int] = {}
+    for e in state.events:
+        counts[e.name] = counts.get(e.name, 0) + 1
+    return tuple(sorted(counts.items()))
+
+
+def _dominates(a: BuildState, b: BuildState) -> bool:
+    """兵力构成相同时，a的各项时间都不晚于b则a支配b"""
+    if a.now > b.now:
+        return False
+    for name, queue in a.free_at.items():
+        if any(x > y for x, y in zip(sorted(queue), sorted(b.free_at[name]))):
+            return False
+    return all(a.finished[name] <= b.finished[name] for name in b.finished)
+
+
+def _candidates(state: BuildState, options: SearchOptions) -> List[str]:
+    """当前状态可选的下一项"""
+    names = ["reaper"]
+    built = state.finished
+    ravens = sum(1 for e in state.events if e.name == "raven")
+    if ravens < options.max_ravens:
+        names.append("raven")
+    if options.require_transport:
+        names.append("medivac")
+    if options.allow_upgrades:
+        for level in range(1, 4):
+            name = f"attack_{level}"
+            if name not in built:
+                names.append(name)
+                break
+    return names
+
+
+def _expand(states: List[BuildState], economy: Economy, options: SearchOptions) -> List[BuildState]:
+    """扩展一批状态，丢弃截止时间前无法完成的项目"""
+    catalog = item_catalog()
+    children = []
+    for state in states:
+        for name in _candidates(state, options):
+            item = catalog[name]
+            if state.start_time(item, economy) + item.time > options.deadline:
+                continue
+            child = state.copy()
+            child.add(item, economy)
+            children.append(child)
+    return children
+
+
+def _expand_chunk(args: Tuple[List[BuildState], Economy, SearchOptions]) -> List[BuildState]:
+    return _expand(*args)
+
+
+def search_build_order(economy: Optional[Economy] = None, options: Optional[SearchOptions] = None,
+                       workers: int = 1) -> SearchResult:
+    """搜索截止时间DPS最高的建造顺序
+
+    Args:
+        economy: 经济参数
+        options: 搜索参数
+        workers: 进程数，大于1时每层扩展分发到进程池
+
+    Returns:
+        最优建造顺序及其DPS
+    """
+    economy = economy or Economy()
+    options = options or SearchOptions()
+    catalog = item_catalog()
+
+    root = BuildState(economy)
+    best_state, best_score = root, 0.0
+    beam = [root]
+    frontier: Dict[Tuple, List[BuildState]] = {}  # 兵力构成 -> 不被支配的状态
+    explored = pruned = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while beam:
+            if executor is not None and len(beam) >= workers * 4:
+                size = (len(beam) + workers - 1) // workers
+                chunks = [(beam[i:i + size], economy, options) for i in range(0, len(beam), size)]
+                children = [c for part in executor.map(_expand_chunk, chunks) for c in part]
+            else:
+                children = _expand(beam, economy, options)
+            explored += len(children)
+
+            survivors = []
+            for child in children:
+                if upper_bound(child, economy, options, catalog) < best_score:
+                    pruned += 1
+                    continue
+                peers = frontier.setdefault(_signature(child), [])
+                if any(_dominates(peer, child) for peer in peers):
+                    pruned += 1
+                    continue
+                peers[:] = [peer for peer in peers if not _dominates(child, peer)]
+                peers.append(child)
+                survivors.append(child)
+
+            for state in survivors:
+                score = score_state(state, options)
+                if score > best_score:
+                    best_score, best_state = score, state
+            # 按预计的最终DPS排序，而不是已完成的DPS
+            ranked = sorted(((completion_estimate(s, economy, options, catalog), -s.now, s) for s in survivors),
+                            key=lambda x: (x[0], x[1]), reverse=True)
+            beam = [s for _, _, s in ranked[:options.beam_width]]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return SearchResult(
+        build_order=[e.name for e in best_state.events],
+        dps=best_score,
+        result=BuildResult(best_state.events),
+        explored=explored,
+        pruned=pruned,
+    )
+
+
+def compare_upgrades_vs_units(deadlines: Sequence[float], economy: Optional[Economy] = None,
+                              beam_width: int = DEFAULT_BEAM_WIDTH) -> List[Dict[str, float]]:
+    """比较各截止时间下"纯造兵"与"允许升级"的最优DPS
+
+    Returns:
+        每个截止时间一行 {deadline, units_only, with_upgrades}
+    """
+    rows = []
+    for deadline in deadlines:
+        units_only = search_build_order(economy, SearchOptions(deadline, beam_width=beam_width,
+                                                               allow_upgrades=False, max_ravens=0))
+        with_upgrades = search_build_order(economy, SearchOptions(deadline, beam_width=beam_width))
+        rows.append({"deadline": deadline, "units_only": units_only.dps, "with_upgrades": with_upgrades.dps})
+    return rows
+
+
+if __name__ == "__main__":
+    from economy_sim import format_timeline
+
+    economy = Economy(mineral_rate=20, gas_rate=8, structures={"barracks": 2, "starport": 1, "engineering_bay": 1})
+    best = search_build_order(economy, SearchOptions(deadline=360))
+    print(f"6:00最优建造顺序（DPS {best.dps:.1f}，扩展{best.explored}个状态，剪枝{best.pruned}个）：")
+    print(format_timeline(best.result))
+
+    print("\n纯造兵 vs 允许升级：")
+    for row in compare_upgrades_vs_units([300, 480, 600, 900], economy):
+        print(f"{int(row['deadline']) // 60}:{int(row['deadline']) % 60:02d}  "
+              f"纯造兵 {row['units_only']:.1f}  允许升级 {row['with_upgrades']:.1f}")
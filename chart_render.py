@@ -0,0 +1,371 @@
+"""图表渲染层
+
+绘图函数只负责准备数据，组装成 ChartSpec 后交给渲染器：
+    - 复用 Figure 对象（按尺寸缓存，不经过 pyplot 全局状态，每次只清空重画）
+    - 标注点按组用一个 scatter 集合绘制，不再逐点 plt.plot（数值标签仍是每点一个Text）
+    - 输出分辨率和格式可选（png/svg/pdf），可额外输出交互式HTML（数据只嵌入一次）
+
+环境变量（作为默认渲染选项）：
+    DPS_CHART_DPI: 栅格图分辨率，默认300
+    DPS_CHART_FORMATS: 额外输出的格式，逗号分隔（如 "svg,pdf"）
+    DPS_CHART_HTML: 设为1时同时输出交互式HTML
+"""
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import html
+import json
+import os
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+from profiling import profiled, stage
+
+DEFAULT_DPI = int(os.environ.get("DPS_CHART_DPI", "300"))
+DEFAULT_FORMATS = tuple(f.strip() for f in os.environ.get("DPS_CHART_FORMATS", "").split(",") if f.strip())
+DEFAULT_HTML = os.environ.get("DPS_CHART_HTML", "0") not in ("", "0")
+
+
+@dataclass
+class Series:
+    """一条曲线"""
+    label: str
+    x: Sequence[float]
+    y: Sequence[float]
+    color: str
+    linestyle: str = "-"  # 空字符串表示只画标记点
+    linewidth: float = 2.0
+    marker: Optional[str] = None
+    markersize: float = 6.0
+
+
+@dataclass
+class PointLabels:
+    """一组标注点：同一颜色的标记点和数值标签"""
+    x: Sequence[float]
+    y: Sequence[float]
+    color: str
+    texts: Optional[Sequence[str]] = None  # 默认为取整后的y值
+    markersize: float = 6.0
+    fontsize: float = 10.0
+
+
+@dataclass
+class NoteBox:
+    """坐标轴内的说明文本框（位置为坐标轴比例坐标）"""
+    text: str
+    x: float = 0.02
+    y: float = 0.98
+    fontsize: float = 10.0
+    boxstyle: Optional[str] = None  # 如 "round"
+
+
+@dataclass
+class ChartSpec:
+    """一张折线图的全部内容（与绘图后端无关）"""
+    title: str
+    xlabel: str
+    ylabel: str
+    series: List[Series] = field(default_factory=list)
+    points: List[PointLabels] = field(default_factory=list)
+    notes: List[NoteBox] = field(default_factory=list)
+    figsize: Tuple[float, float] = (12, 8)
+    facecolor: str = "white"  # 图片背景
+    axes_facecolor: str = "white"
+    title_fontsize: float = 16
+    title_pad: float = 20
+    label_fontsize: float = 14
+    tick_fontsize: Optional[float] = None
+    bold_labels: bool = False
+    grid: Dict[str, Any] = field(default_factory=lambda: {"linestyle": "--", "alpha": 0.3})
+    legend: Dict[str, Any] = field(default_factory=lambda: {"loc": "upper left"})
+    number_ticks: bool = False  # 刻度和标注使用 Times New Roman 数字（mathtext）
+    ylim: Optional[Tuple[float, float]] = None
+    right_margin: Optional[float] = None  # 图例放在坐标轴外时留出的右边距
+
+
+@dataclass
+class RenderOptions:
+    dpi: int = DEFAULT_DPI
+    formats: Tuple[str, ...] = DEFAULT_FORMATS  # 除输出路径本身的格式外额外输出的格式
+    html: bool = DEFAULT_HTML
+
+
+def output_paths(path: str, options: Optional[RenderOptions] = None) -> List[str]:
+    """按渲染选项，一张图表会写出的全部文件（第一个为path本身，输出HTML时最后一个为.html）"""
+    options = options or RenderOptions()
+    base, ext = os.path.splitext(path)
+    outputs = [path] + [f"{base}.{fmt}" for fmt in options.formats if f".{fmt}" != ext]
+    if options.html:
+        outputs.append(f"{base}.html")
+    return outputs
+
+
+def _number(value: float) -> str:
+    return f"$\\mathregular{{{value:.0f}}}$"
+
+
+class ChartRenderer:
+    """matplotlib渲染器：按图片尺寸复用Figure"""
+    def __init__(self):
+        self._figures: Dict[Tuple[float, float], Figure] = {}
+
+    def figure(self, figsize: Tuple[float, float]) -> Figure:
+        fig = self._figures.get(tuple(figsize))
+        if fig is None:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            self._figures[tuple(figsize)] = fig
+        fig.clear()
+        return fig
+
+    def draw(self, spec: ChartSpec) -> Figure:
+        """把图表画到（复用的）Figure上"""
+        fig = self.figure(spec.figsize)
+        fig.set_facecolor(spec.facecolor)
+        ax = fig.add_subplot()
+        ax.set_facecolor(spec.axes_facecolor)
+        if spec.number_ticks:
+            formatter = FuncFormatter(lambda x, _: _number(x))
+            ax.xaxis.set_major_formatter(formatter)
+            ax.yaxis.set_major_formatter(formatter)
+
+        for s in spec.series:
+            ax.plot(s.x, s.y, linestyle=s.linestyle or "none", label=s.label, color=s.color, linewidth=s.linewidth,
+                    marker=s.marker, markersize=s.markersize)
+        for group in spec.points:
+            # 一组标记点只生成一个集合对象
+            ax.scatter(group.x, group.y, s=group.markersize ** 2, color=group.color, zorder=3)
+            texts = group.texts if group.texts is not None else [
+                _number(v) if spec.number_ticks else f"{v:.0f}" for v in group.y]
+            for x, y, text in zip(group.x, group.y, texts):
+                ax.text(x, y, text, ha="center", va="bottom", fontsize=group.fontsize)
+        for note in spec.notes:
+            bbox = dict(facecolor="white", alpha=0.8, edgecolor="none")
+            if note.boxstyle:
+                bbox = dict(boxstyle=note.boxstyle, facecolor="white", alpha=0.8)
+            ax.text(note.x, note.y, note.text, transform=ax.transAxes, verticalalignment="top",
+                    bbox=bbox, fontsize=note.fontsize)
+
+        weight = "bold" if spec.bold_labels else "normal"
+        ax.set_title(spec.title, fontsize=spec.title_fontsize, pad=spec.title_pad, fontweight=weight)
+        ax.set_xlabel(spec.xlabel, fontsize=spec.label_fontsize, fontweight=weight)
+        ax.set_ylabel(spec.ylabel, fontsize=spec.label_fontsize, fontweight=weight)
+        ax.grid(True, **spec.grid)
+        if spec.tick_fontsize is not None:
+            ax.tick_params(axis="both", which="major", labelsize=spec.tick_fontsize)
+        if spec.ylim is not None:
+            ax.set_ylim(*spec.ylim)
+        if spec.series:
+            ax.legend(**{"frameon": True, **spec.legend})
+        if spec.right_margin is not None:
+            fig.subplots_adjust(right=spec.right_margin)
+        else:
+            fig.tight_layout()
+        return fig
+
+    @profiled
+    def render(self, spec: ChartSpec, path: str, options: Optional[RenderOptions] = None) -> List[str]:
+        """渲染并保存图表
+
+        Args:
+            spec: 图表内容
+            path: 输出路径（格式由扩展名决定）
+            options: 渲染选项，默认使用环境变量给出的设置
+
+        Returns:
+            写出的文件路径
+        """
+        options = options or RenderOptions()
+        fig = self.draw(spec)
+        outputs = output_paths(path, options)
+        with stage("savefig"):
+            for output in outputs:
+                if not output.endswith(".html"):
+                    fig.savefig(output, dpi=options.dpi, bbox_inches="tight", facecolor=spec.facecolor)
+        if options.html:
+            render_html(spec, outputs[-1])
+        return outputs
+
+
+_renderer: Optional[ChartRenderer] = None
+
+
+def get_renderer() -> ChartRenderer:
+    """默认渲染器（进程内共享，Figure跨图表复用）"""
+    global _renderer
+    if _renderer is None:
+        _renderer = ChartRenderer()
+    return _renderer
+
+
+def render_chart(spec: ChartSpec, path: str, options: Optional[RenderOptions] = None) -> List[str]:
+    """用默认渲染器渲染并保存图表"""
+    return get_renderer().render(spec, path, options)
+
+
+# ---------------------------------------------------------------------------
+# 交互式HTML
+# ---------------------------------------------------------------------------
+
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 16px; }}
+#tip {{ position: absolute; pointer-events: none; background: #fff; border: 1px solid #999;
+        padding: 4px 6px; font-size: 12px; display: none; white-space: pre; }}
+.legend span {{ display: inline-block; margin-right: 14px; cursor: pointer; font-size: 13px; }}
+.legend span.off {{ opacity: 0.3; }}
+</style>
+</head>
+<body>
+<h3>{title}</h3>
+<svg id="chart" width="960" height="560"></svg>
+<div class="legend" id="legend"></div>
+<div id="tip"></div>
+<script>
+const DATA = {data};
+const svg = document.getElementById("chart"), tip = document.getElementById("tip");
+const W = 960, H = 560, M = {{l: 70, r: 20, t: 20, b: 50}};
+const hidden = new Set();
+const NS = "http://www.w3.org/2000/svg";
+function el(name, attrs, text) {{
+  const e = document.createElementNS(NS, name);
+  for (const k in attrs) e.setAttribute(k, attrs[k]);
+  if (text !== undefined) e.textContent = text;
+  svg.appendChild(e);
+  return e;
+}}
+function ticks(lo, hi, n) {{
+  const step = Math.pow(10, Math.floor(Math.log10((hi - lo) / n || 1)));
+  const k = [1, 2, 5, 10].find(m => (hi - lo) / (step * m) <= n) * step;
+  const out = [];
+  for (let v = Math.ceil(lo / k) * k; v <= hi + 1e-9; v += k) out.push(v);
+  return out;
+}}
+function draw() {{
+  svg.innerHTML = "";
+  const shown = DATA.series.filter((s, i) => !hidden.has(i));
+  const xs = shown.flatMap(s => s.x), ys = shown.flatMap(s => s.y);
+  const x0 = Math.min(...xs), x1 = Math.max(...xs);
+  const y0 = DATA.ylim ? DATA.ylim[0] : Math.min(0, ...ys), y1 = DATA.ylim ? DATA.ylim[1] : Math.max(...ys) * 1.05;
+  const sx = v => M.l + (v - x0) / ((x1 - x0) || 1) * (W - M.l - M.r);
+  const sy = v => H - M.b - (v - y0) / ((y1 - y0) || 1) * (H - M.t - M.b);
+  for (const v of ticks(x0, x1, 10)) {{
+    el("line", {{x1: sx(v), x2: sx(v), y1: M.t, y2: H - M.b, stroke: "#ddd"}});
+    el("text", {{x: sx(v), y: H - M.b + 18, "text-anchor": "middle", "font-size": 12}}, +v.toFixed(6));
+  }}
+  for (const v of ticks(y0, y1, 8)) {{
+    el("line", {{x1: M.l, x2: W - M.r, y1: sy(v), y2: sy(v), stroke: "#ddd"}});
+    el("text", {{x: M.l - 6, y: sy(v) + 4, "text-anchor": "end", "font-size": 12}}, +v.toFixed(6));
+  }}
+  el("text", {{x: (W + M.l) / 2, y: H - 10, "text-anchor": "middle"}}, DATA.xlabel);
+  el("text", {{x: 16, y: H / 2, transform: `rotate(-90 16 ${{H / 2}})`, "text-anchor": "middle"}}, DATA.ylabel);
+  DATA.series.forEach((s, i) => {{
+    if (hidden.has(i)) return;
+    if (s.linestyle === "") {{
+      s.x.forEach((x, j) => el("circle", {{cx: sx(x), cy: sy(s.y[j]), r: 3, fill: s.color}}));
+      return;
+    }}
+    const d = s.x.map((x, j) => `${{j ? "L" : "M"}}${{sx(x)}},${{sy(s.y[j])}}`).join("");
+    el("path", {{d, fill: "none", stroke: s.color, "stroke-width": s.linewidth,
+                "stroke-dasharray": s.linestyle === "--" ? "8,5" : ""}});
+  }});
+  svg.onmousemove = ev => {{
+    const r = svg.getBoundingClientRect(), px = ev.clientX - r.left;
+    let best = null;
+    DATA.series.forEach((s, i) => {{
+      if (hidden.has(i)) return;
+      s.x.forEach((x, j) => {{
+        const d = Math.abs(sx(x) - px) + Math.abs(sy(s.y[j]) - (ev.clientY - r.top)) * 0.2;
+        if (!best || d < best.d) best = {{d, s, j}};
+      }});
+    }});
+    if (!best) return;
+    tip.style.display = "block";
+    tip.style.left = ev.pageX + 12 + "px";
+    tip.style.top = ev.pageY + 12 + "px";
+    tip.textContent = `${{best.s.label}}\\n${{DATA.xlabel}}: ${{best.s.x[best.j]}}\\n${{DATA.ylabel}}: ${{best.s.y[best.j].toFixed(1)}}`;
+  }};
+  svg.onmouseleave = () => {{ tip.style.display = "none"; }};
+}}
+const legend = document.getElementById("legend");
+DATA.series.forEach((s, i) => {{
+  const item = document.createElement("span");
+  item.innerHTML = `<b style="color:${{s.color}}">━━</b> `;
+  item.appendChild(document.createTextNode(s.label));
+  item.onclick = () => {{ hidden.has(i) ? hidden.delete(i) : hidden.add(i); item.classList.toggle("off"); draw(); }};
+  legend.appendChild(item);
+}});
+draw();
+</script>
+</body>
+</html>
+"""
+
+
+def _html_color(color: str) -> str:
+    from matplotlib.colors import to_hex
+    return to_hex(color)
+
+
+def render_html(spec: ChartSpec, path: str) -> str:
+    """输出交互式HTML（SVG绘制，悬停显示数值，点击图例隐藏曲线，不依赖外部脚本）
+
+    Returns:
+        输出文件路径
+    """
+    data = {
+        "xlabel": spec.xlabel,
+        "ylabel": spec.ylabel,
+        "ylim": list(spec.ylim) if spec.ylim is not None else None,
+        "series": [{
+            "label": s.label.replace("\n", " "),
+            "x": np.asarray(s.x, dtype=np.float64).round(6).tolist(),
+            "y": np.asarray(s.y, dtype=np.float64).round(6).tolist(),
+            "color": _html_color(s.color),
+            "linestyle": s.linestyle,
+            "linewidth": s.linewidth,
+        } for s in spec.series],
+    }
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_HTML_TEMPLATE.format(title=html.escape(spec.title.strip()), data=payload))
+    return path
+
+
+def spec_to_dict(spec: ChartSpec) -> Dict[str, Any]:
+    """图表内容转为可序列化的字典（数组转为列表）"""
+    def convert(value: Any) -> Any:
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, dict):
+            return {k: convert(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [convert(v) for v in value]
+        return value
+    return convert(asdict(spec))
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    x = np.arange(1, 161)
+    spec = ChartSpec("示例", "人口数", "DPS",
+                     series=[Series(f"曲线{i}", x, x * (i + 1), color=c)
+                             for i, c in enumerate(("#2878B5", "#C82423", "#6956E5"))],
+                     points=[PointLabels(x[::40], x[::40] * 3, "#C82423")])
+    with tempfile.TemporaryDirectory() as directory:
+        for dpi in (100, 300):
+            start = time.perf_counter()
+            for i in range(5):
+                render_chart(spec, os.path.join(directory, f"chart{i}.png"), RenderOptions(dpi=dpi, formats=("svg",)))
+            print(f"dpi={dpi}: {(time.perf_counter() - start) / 5 * 1000:.0f}ms/张 (png+svg)")
+        path = render_html(spec, os.path.join(directory, "chart.html"))
+        print(f"HTML {os.path.getsize(path)}字节")
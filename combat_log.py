@@ -0,0 +1,630 @@
+"""战斗日志回放分析
+
+读取录制的伤害事件日志，统计每种单位/武器在各时间窗口的实际DPS，
+并与模型预测（calculate_reaper_squad_dps / gestalt_unit_dps）对照。
+
+日志格式（CSV，首行为表头）：
+    time,source,source_id,weapon,target,target_id,damage
+    12.350,tosh_reaper,17,P55_SCYTHE,zerg_zergling,204,19.2
+
+数值列只支持普通十进制写法（不支持科学计数法）。
+
+首次分析时把日志以内存映射方式分块读入，用NumPy按字节向量化解析，
+编译为定长二进制事件表（<日志>.events.bin + <日志>.events.json）；
+之后直接内存映射事件表，按块聚合，内存占用与日志大小无关。
+日志文件大小或修改时间变化后自动重新编译。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import json
+import mmap
+import os
+
+import numpy as np
+
+LOG_COLUMNS = ("time", "source", "source_id", "weapon", "target", "target_id", "damage")
+CATEGORY_COLUMNS = ("source", "weapon", "target")
+EVENT_DTYPE = np.dtype([("time", "f8"), ("source", "u2"), ("source_id", "i4"), ("weapon", "u2"),
+                        ("target", "u2"), ("target_id", "i4"), ("damage", "f4")])
+
+CHUNK_BYTES = 64 * 1024 * 1024  # 每次解析的日志字节数
+CHUNK_ROWS = 4 * 1024 * 1024  # 每次聚合的事件数
+MAX_CATEGORIES = np.iinfo(EVENT_DTYPE["source"]).max + 1  # 每个字符串列最多的名称种类（编号为uint16）
+_ID_OFFSET = -np.iinfo(EVENT_DTYPE["source_id"]).min  # 单位编号加上偏移后非负（日志允许负编号）
+_ID_RANGE = 1 << 32
+
+_COMMA, _NEWLINE, _CR, _MINUS, _DOT = ord(","), ord("\n"), ord("\r"), ord("-"), ord(".")
+
+
+# ---------------------------------------------------------------- 解析
+
+def _field_bounds(buf: np.ndarray, line_offset: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """定位每行每个字段的起止位置
+
+    Args:
+        buf: 以换行结尾的若干完整行
+        line_offset: 第一行在日志中的行号（用于错误信息）
+
+    Returns:
+        (起始位置, 结束位置)，形状均为 (行数, 列数)
+    """
+    separators = np.flatnonzero((buf == _COMMA) | (buf == _NEWLINE))
+    newlines = np.flatnonzero(buf[separators] == _NEWLINE)
+    columns = len(LOG_COLUMNS)
+    per_row = np.diff(np.concatenate(([-1], newlines)))
+    # 空行（只有换行符，或CRLF下只有\r）直接跳过
+    line_ends = separators[newlines]
+    line_starts = np.concatenate(([0], line_ends + 1))[:-1]
+    line_length = line_ends - line_starts
+    blank = (per_row == 1) & ((line_length == 0)
+                              | ((line_length == 1) & (buf[np.maximum(line_ends - 1, 0)] == _CR)))
+    if np.any(per_row[~blank] != columns):
+        bad = int(np.flatnonzero(~blank & (per_row != columns))[0])
+        raise ValueError(f"第{line_offset + bad + 1}行应有{columns}列")
+    if np.any(blank):
+        separators = np.delete(separators, newlines[blank])
+    ends = separators.reshape(-1, columns)
+    starts = np.empty_like(ends)
+    starts[:, 0] = line_starts[~blank]
+    starts[:, 1:] = ends[:, :-1] + 1
+    # 兼容CRLF换行
+    has_cr = (ends[:, -1] > starts[:, -1]) & (buf[np.maximum(ends[:, -1] - 1, 0)] == _CR)
+    ends[has_cr, -1] -= 1
+    return starts, ends
+
+
+def _columns(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """逐个字节位置取出所有字段的第k个字节（buf末尾需留有足够的填充）
+
+    Yields:
+        (第k个字节, 该位置是否在字段内)
+    """
+    for k in range(int((ends - starts).max(initial=0))):
+        position = starts + k
+        yield buf[position], position < ends
+
+
+def _parse_numbers(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray, column: str,
+                   line_offset: int = 0) -> np.ndarray:
+    """向量化解析十进制数"""
+    n = len(starts)
+    value = np.zeros(n)
+    decimals = np.zeros(n, dtype=np.int64)
+    digit_count = np.zeros(n, dtype=np.int64)
+    dots = np.zeros(n, dtype=np.int64)
+    bad = np.zeros(n, dtype=bool)
+    negative = np.zeros(n, dtype=bool)
+    for k, (chars, valid) in enumerate(_columns(buf, starts, ends)):
+        digit = chars - np.uint8(ord("0"))  # 非数字字符会回绕为大于9的值
+        is_digit = valid & (digit <= 9)
+        value = np.where(is_digit, value * 10 + digit, value)
+        decimals += is_digit & (dots > 0)
+        digit_count += is_digit
+        is_dot = valid & (chars == _DOT)
+        dots += is_dot
+        other = valid & ~is_digit & ~is_dot
+        if k == 0:
+            negative = other & (chars == _MINUS)
+            other &= ~negative
+        bad |= other
+    bad |= (dots > 1) | (digit_count == 0)
+    if bad.any():
+        row = int(np.flatnonzero(bad)[0])
+        raise ValueError(f"第{line_offset + row + 1}行{column}列不是数字: {bytes(buf[starts[row]:ends[row]])!r}")
+    value /= 10.0 ** decimals
+    return np.where(negative, -value, value)
+
+
+def _parse_categories(words: np.ndarray, buf: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                      names: Dict[bytes, int]) -> np.ndarray:
+    """把字符串字段映射为编号（names为全局的 名称 -> 编号 表，会被更新）
+
+    每次取8个字节做64位FNV式哈希，再逐字节核对同一哈希下的名称都相同。
+
+    Raises:
+        ValueError: 哈希碰撞，或名称种类超过 MAX_CATEGORIES
+    """
+    length = ends - starts
+    h = length.astype(np.uint64)
+    prime = np.uint64(1099511628211)
+    masks = []
+    for k in range(0, int(length.max(initial=0)), 8):
+        remaining = np.clip(length - k, 0, 8).astype(np.uint64)
+        masks.append(np.where(remaining == 8, np.uint64(0xFFFFFFFFFFFFFFFF),
+                              (np.uint64(1) << (remaining * np.uint64(8))) - np.uint64(1)))
+        h = (h ^ (words[starts + k] & masks[-1])) * prime
+    unique, first, inverse = np.unique(h, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    # 与同一哈希下首次出现的名称逐字比较（长度相同时掩码也相同）
+    rep = starts[first][inverse]
+    same = length == length[first][inverse]
+    for k, mask in enumerate(masks):
+        same &= (words[starts + k * 8] & mask) == (words[rep + k * 8] & mask)
+    if not same.all():
+        row = int(np.flatnonzero(~same)[0])
+        raise ValueError(f"名称哈希碰撞: {bytes(buf[starts[row]:ends[row]])!r}")
+    codes = np.empty(len(unique), dtype=np.uint16)
+    for i in np.argsort(first):  # 按首次出现的顺序编号
+        row = first[i]
+        codes[i] = _category_code(names, bytes(buf[starts[row]:ends[row]]))
+    return codes[inverse]
+
+
+def _category_code(names: Dict[bytes, int], name: bytes) -> int:
+    """名称的编号，新名称追加到表末尾
+
+    Raises:
+        ValueError: 名称种类超过 MAX_CATEGORIES
+    """
+    code = names.setdefault(name, len(names))
+    if code >= MAX_CATEGORIES:
+        raise ValueError(f"名称种类超过{MAX_CATEGORIES}个: {name!r}")
+    return code
+
+
+def parse_events(buf: np.ndarray, categories: Dict[str, Dict[bytes, int]], line_offset: int = 0) -> np.ndarray:
+    """解析若干完整行为事件数组
+
+    Args:
+        buf: 以换行结尾的日志字节（uint8数组）
+        categories: 每个字符串列的 名称 -> 编号 表（会被更新）
+        line_offset: 第一行在日志中的行号
+
+    Returns:
+        EVENT_DTYPE结构化数组
+    """
+    starts, ends = _field_bounds(buf, line_offset)
+    # 末尾填充8字节，按字/按字节取值时不会越界
+    padded = np.concatenate((buf, np.zeros(8, dtype=np.uint8)))
+    # 每个字节偏移处的8字节小端整数（非对齐视图，不复制）
+    words = np.ndarray(shape=(len(buf),), dtype="<u8", buffer=padded, strides=(1,))
+    events = np.empty(len(starts), dtype=EVENT_DTYPE)
+    for i, column in enumerate(LOG_COLUMNS):
+        if column in CATEGORY_COLUMNS:
+            events[column] = _parse_categories(words, padded, starts[:, i], ends[:, i], categories[column])
+        else:
+            events[column] = _parse_numbers(padded, starts[:, i], ends[:, i], column, line_offset)
+    return events
+
+
+def _map_log(path: str) -> np.ndarray:
+    """内存映射日志文件并检查表头
+
+    Returns:
+        整个文件的字节视图（空文件返回空数组）
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return np.zeros(0, dtype=np.uint8)
+        # 映射在所有视图释放后由垃圾回收解除，文件描述符可以先关闭
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header_end = mm.find(b"\n")
+    header = (mm[:header_end] if header_end >= 0 else mm[:]).decode("utf-8").strip().split(",")
+    if tuple(h.strip() for h in header) != LOG_COLUMNS:
+        raise ValueError(f"{path}: 表头应为 {','.join(LOG_COLUMNS)}")
+    return np.frombuffer(mm, dtype=np.uint8)
+
+
+def log_chunk_ranges(path: str, chunk_bytes: int = CHUNK_BYTES) -> List[Tuple[int, int, int]]:
+    """把日志按行边界切成若干块
+
+    Returns:
+        每块的 (起始字节, 结束字节, 首行行号)
+    """
+    data = _map_log(path)
+    if len(data) == 0:
+        return []
+    newline_positions = np.flatnonzero(data[:min(len(data), 1 << 16)] == _NEWLINE)
+    if len(newline_positions) == 0:
+        return []
+    ranges = []
+    position, line = int(newline_positions[0]) + 1, 1
+    while position < len(data):
+        end = min(position + chunk_bytes, len(data))
+        if end < len(data):
+            cut = np.flatnonzero(data[position:end] == _NEWLINE)
+            if len(cut):
+                end = position + int(cut[-1]) + 1
+            else:  # 单行超过块大小
+                following = np.flatnonzero(data[end:] == _NEWLINE)
+                end = end + int(following[0]) + 1 if len(following) else len(data)
+        ranges.append((position, end, line))
+        line += int(np.count_nonzero(data[position:end] == _NEWLINE))
+        position = end
+    return ranges
+
+
+def _chunk_bytes(data: np.ndarray, start: int, end: int) -> np.ndarray:
+    chunk = data[start:end]
+    if chunk[-1] != _NEWLINE:  # 最后一行没有换行符
+        chunk = np.append(chunk, np.uint8(_NEWLINE))
+    return chunk
+
+
+def iter_log_chunks(path: str, chunk_bytes: int = CHUNK_BYTES) -> Iterator[Tuple[np.ndarray, int]]:
+    """以内存映射方式按块读取日志（每块都在行边界结束，不复制文件内容）
+
+    Yields:
+        (块字节, 块首行行号)
+    """
+    data = _map_log(path)
+    for start, end, line in log_chunk_ranges(path, chunk_bytes):
+        yield _chunk_bytes(data, start, end), line
+
+
+# ---------------------------------------------------------------- 编译后的事件表
+
+@dataclass
+class EventLog:
+    """编译后的事件表"""
+    events: np.ndarray  # EVENT_DTYPE，内存映射
+    categories: Dict[str, List[str]]  # 列名 -> 编号对应的名称
+
+    def code(self, column: str, name: str) -> int:
+        """名称对应的编号，不存在时为-1"""
+        names = self.categories[column]
+        return names.index(name) if name in names else -1
+
+
+def _compiled_paths(log_path: str) -> Tuple[str, str]:
+    return log_path + ".events.bin", log_path + ".events.json"
+
+
+def _source_stamp(log_path: str) -> Dict[str, int]:
+    stat = os.stat(log_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _compile_chunk(args: Tuple[str, int, int, int, str]) -> Tuple[int, Dict[str, List[bytes]]]:
+    """进程池任务：解析一块日志写入分片文件（编号为分片内局部编号）"""
+    log_path, start, end, line, part_path = args
+    categories: Dict[str, Dict[bytes, int]] = {column: {} for column in CATEGORY_COLUMNS}
+    events = parse_events(_chunk_bytes(_map_log(log_path), start, end), categories, line)
+    events.tofile(part_path)
+    return len(events), {column: list(names) for column, names in categories.items()}
+
+
+def compile_log(log_path: str, chunk_bytes: int = CHUNK_BYTES, workers: int = 1) -> EventLog:
+    """解析日志并写出二进制事件表
+
+    Args:
+        log_path: 日志文件
+        chunk_bytes: 每块解析的字节数
+        workers: 进程数，大于1时各块分发到进程池并行解析
+
+    Returns:
+        编译后的事件表
+    """
+    bin_path, meta_path = _compiled_paths(log_path)
+    categories: Dict[str, Dict[bytes, int]] = {column: {} for column in CATEGORY_COLUMNS}
+    rows = 0
+    tmp_path = f"{bin_path}.{os.getpid()}.tmp"
+    ranges = log_chunk_ranges(log_path, chunk_bytes)
+    with open(tmp_path, "wb") as out:
+        if workers > 1 and len(ranges) > 1:
+            parts = [(log_path, start, end, line, f"{tmp_path}.{i}") for i, (start, end, line) in enumerate(ranges)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for (_, _, _, _, part_path), (count, local) in zip(parts, executor.map(_compile_chunk, parts)):
+                    # 把分片内的局部编号映射为全局编号
+                    events = np.fromfile(part_path, dtype=EVENT_DTYPE, count=count)
+                    for column in CATEGORY_COLUMNS:
+                        remap = np.array([_category_code(categories[column], name)
+                                          for name in local[column]], dtype=np.uint16)
+                        if len(remap):
+                            events[column] = remap[events[column]]
+                    events.tofile(out)
+                    rows += count
+                    os.remove(part_path)
+        else:
+            data = _map_log(log_path)
+            for start, end, line in ranges:
+                events = parse_events(_chunk_bytes(data, start, end), categories, line)
+                events.tofile(out)
+                rows += len(events)
+    os.replace(tmp_path, bin_path)
+    meta = {
+        "source": _source_stamp(log_path),
+        "rows": rows,
+        "categories": {column: [name.decode("utf-8") for name in sorted(names, key=names.get)]
+                       for column, names in categories.items()},
+    }
+    # 元数据最后写入，读到元数据即说明事件表已写完
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+    return load_log(log_path)
+
+
+def load_log(log_path: str, workers: int = 1) -> EventLog:
+    """加载事件表（内存映射），日志变化或尚未编译时先编译"""
+    bin_path, meta_path = _compiled_paths(log_path)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        up_to_date = meta["source"] == _source_stamp(log_path)
+    except (OSError, ValueError, KeyError):
+        up_to_date = False
+    if not up_to_date:
+        return compile_log(log_path, workers=workers)
+    if meta["rows"] == 0:
+        events = np.empty(0, dtype=EVENT_DTYPE)
+    else:
+        events = np.memmap(bin_path, dtype=EVENT_DTYPE, mode="r", shape=(meta["rows"],))
+    return EventLog(events, meta["categories"])
+
+
+# ---------------------------------------------------------------- 聚合
+
+@dataclass
+class DPSReport:
+    """按时间窗口统计的实际DPS"""
+    groups: List[Tuple[str, str]]  # (单位, 武器)
+    window: float  # 窗口长度（秒）
+    window_starts: np.ndarray  # 各窗口起始时间
+    damage: np.ndarray  # (组数, 窗口数) 总伤害
+    attackers: np.ndarray  # (组数, 窗口数) 窗口内造成过伤害的单位数
+    present: np.ndarray  # (组数, 窗口数) 窗口内在场的单位数（在该单位首次与最后一次出现之间）
+
+    @property
+    def total_dps(self) -> np.ndarray:
+        return self.damage / self.window
+
+    @property
+    def unit_dps(self) -> np.ndarray:
+        """每个在场单位的平均DPS（未命中、空闲的单位也计入分母；无单位在场的窗口为NaN）"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.present > 0, self.damage / self.window / self.present, np.nan)
+
+
+def _merge_spans(units: np.ndarray, first: np.ndarray,
+                 last: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """合并同一单位的出现区间
+
+    Returns:
+        (单位键, 最早窗口, 最晚窗口)，每个单位一项
+    """
+    units, inverse = np.unique(units, return_inverse=True)
+    merged_first = np.full(len(units), np.iinfo(np.int64).max)
+    merged_last = np.full(len(units), -1, dtype=np.int64)
+    np.minimum.at(merged_first, inverse, first)
+    np.maximum.at(merged_last, inverse, last)
+    return units, merged_first, merged_last
+
+
+def _pack(index: np.ndarray, source_id: np.ndarray, size: int) -> np.ndarray:
+    """(格子或组, 单位编号) -> 非负int64键，编号可为负
+
+    Raises:
+        ValueError: 键超出int64范围
+    """
+    return np.ravel_multi_index((index, source_id.astype(np.int64) + _ID_OFFSET), (size, _ID_RANGE))
+
+
+def realized_dps(log: EventLog, window: float = 1.0, target: Optional[str] = None,
+                 chunk_rows: int = CHUNK_ROWS) -> DPSReport:
+    """按 (单位, 武器, 时间窗口) 统计实际DPS
+
+    Args:
+        log: 事件表
+        window: 时间窗口长度（秒）
+        target: 只统计对某种目标造成的伤害
+        chunk_rows: 每次聚合的事件数
+
+    Returns:
+        统计结果
+    """
+    events = log.events
+    n_sources = max(len(log.categories["source"]), 1)
+    n_weapons = max(len(log.categories["weapon"]), 1)
+    groups = [(s, w) for s in log.categories["source"] for w in log.categories["weapon"]]
+    if len(events) == 0:
+        empty = np.zeros((len(groups), 0))
+        return DPSReport(groups, window, np.zeros(0), empty, empty, empty)
+
+    # 先扫一遍时间范围（日志通常按时间排序，但不依赖这一点）
+    t0, t1 = np.inf, -np.inf
+    for i in range(0, len(events), chunk_rows):
+        times = events["time"][i:i + chunk_rows]
+        t0, t1 = min(t0, float(times.min())), max(t1, float(times.max()))
+    n_windows = int((t1 - t0) // window) + 1
+    n_cells = n_sources * n_weapons * n_windows
+
+    target_code = log.code("target", target) if target is not None else None
+    n_groups = n_sources * n_weapons
+    damage = np.zeros(n_cells)
+    # 每块处理完即与已有结果合并去重，内存只与 (格子, 单位) 组合数有关，与日志长度无关
+    attacker_keys = np.zeros(0, dtype=np.int64)
+    spans = (np.zeros(0, dtype=np.int64),) * 3
+    for i in range(0, len(events), chunk_rows):
+        chunk = events[i:i + chunk_rows]
+        # 在场时间按单位的所有事件计算（不受target筛选影响）
+        group = chunk["source"].astype(np.int64) * n_weapons + chunk["weapon"]
+        windows = ((chunk["time"] - t0) // window).astype(np.int64)
+        units = _pack(group, chunk["source_id"], n_groups)
+        spans = _merge_spans(*(np.concatenate(pair) for pair in zip(spans, (units, windows, windows))))
+        if target_code is not None:
+            hit = chunk["target"] == target_code
+            chunk, group, windows = chunk[hit], group[hit], windows[hit]
+        cell = group * n_windows + windows
+        damage += np.bincount(cell, weights=chunk["damage"], minlength=n_cells)
+        # (格子, 单位编号) 去重后得到每个格子里出手的单位
+        attacker_keys = np.union1d(attacker_keys, _pack(cell, chunk["source_id"], n_cells))
+    attackers = np.bincount(attacker_keys // _ID_RANGE, minlength=n_cells)
+
+    # 每个单位从首次到最后一次出现的窗口都算在场：差分后累加
+    units, first, last = spans
+    group = units // _ID_RANGE
+    delta = np.zeros((n_groups, n_windows + 1), dtype=np.int64)
+    np.add.at(delta, (group, first), 1)
+    np.add.at(delta, (group, last + 1), -1)
+    present = np.cumsum(delta[:, :-1], axis=1)
+
+    shape = (n_sources * n_weapons, n_windows)
+    return DPSReport(groups, window, t0 + np.arange(n_windows) * window,
+                     damage.reshape(shape), attackers.reshape(shape), present)
+
+
+def rolling_stats(values: np.ndarray, span: int) -> Dict[str, np.ndarray]:
+    """滑动窗口均值和标准差（忽略NaN）
+
+    Args:
+        values: 一维序列（如某组的unit_dps）
+        span: 滑动窗口包含的采样数
+
+    Returns:
+        {"mean": ..., "std": ...}，前span-1个位置为NaN
+    """
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+
+    def window_sum(x: np.ndarray) -> np.ndarray:
+        c = np.concatenate(([0.0], np.cumsum(x)))
+        out = np.full(len(x), np.nan)
+        out[span - 1:] = c[span:] - c[:-span]
+        return out
+
+    n = window_sum(present.astype(float))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = window_sum(filled) / n
+        var = window_sum(filled ** 2) / n - mean ** 2
+    return {"mean": mean, "std": np.sqrt(np.maximum(var, 0.0))}
+
+
+def summarize(report: DPSReport, rolling: int = 10) -> List[Dict[str, float]]:
+    """每个 (单位, 武器) 组的DPS统计
+
+    Returns:
+        每组一行 {source, weapon, damage, unit_dps_mean, unit_dps_p50, unit_dps_p95,
+        rolling_peak, squad_dps_peak}
+    """
+    rows = []
+    unit_dps = report.unit_dps
+    for g, (source, weapon) in enumerate(report.groups):
+        active = unit_dps[g][~np.isnan(unit_dps[g])]
+        if len(active) == 0:
+            continue
+        smoothed = rolling_stats(unit_dps[g], min(rolling, len(unit_dps[g])))["mean"]
+        rows.append({
+            "source": source,
+            "weapon": weapon,
+            "damage": float(report.damage[g].sum()),
+            "unit_dps_mean": float(active.mean()),
+            "unit_dps_p50": float(np.percentile(active, 50)),
+            "unit_dps_p95": float(np.percentile(active, 95)),
+            "rolling_peak": float(np.nanmax(smoothed)) if np.any(~np.isnan(smoothed)) else float("nan"),
+            "squad_dps_peak": float(report.total_dps[g].max()),
+        })
+    return rows
+
+
+# ---------------------------------------------------------------- 与模型对照
+
+def predicted_unit_dps(source: str, weapon: str, target_type: str = "普通", target_armor: int = 0) -> Optional[float]:
+    """模型预测的单兵DPS，未建模的单位返回None
+
+    托什死神使用 calculate_reaper_squad_dps（满升级+安全力场），
+    格式塔零单位使用 dps_cli.gestalt_unit_dps（三级军衔、无攻速buff）。
+    """
+    if source == "tosh_reaper":
+        from gestalt_squad_analysis import calculate_reaper_squad_dps
+        normal, light = calculate_reaper_squad_dps(target_armor)
+        return (light if target_type == "轻甲" else normal) / 128
+    unit = {"gestalt_marine": "marine", "gestalt_ghost": "ghost"}.get(source)
+    if unit is None:
+        return None
+    from dps_cli import GESTALT_UNITS, gestalt_unit_dps
+    if weapon not in GESTALT_UNITS[unit][1].__members__:
+        return None
+    return gestalt_unit_dps(unit, weapon, 3, 0, target_type, target_armor, 0)
+
+
+def compare_with_model(rows: List[Dict[str, float]], target_type: str = "普通",
+                       target_armor: int = 0) -> List[Dict[str, float]]:
+    """在统计结果中加入模型预测和实际/预测比值"""
+    compared = []
+    for row in rows:
+        predicted = predicted_unit_dps(row["source"], row["weapon"], target_type, target_armor)
+        compared.append({**row,
+                         "predicted": predicted if predicted is not None else float("nan"),
+                         "efficiency": row["unit_dps_mean"] / predicted if predicted else float("nan")})
+    return compared
+
+
+def format_comparison(rows: List[Dict[str, float]]) -> str:
+    """格式化对照表"""
+    lines = [f"{'单位':<16}{'武器':<14}{'总伤害':>12}{'实际均值':>10}{'P95':>10}{'滑动峰值':>10}{'模型':>10}{'实际/模型':>10}"]
+    for r in rows:
+        lines.append(f"{r['source']:<18}{r['weapon']:<16}{r['damage']:>15.0f}{r['unit_dps_mean']:>14.1f}"
+                     f"{r['unit_dps_p95']:>13.1f}{r['rolling_peak']:>14.1f}{r['predicted']:>12.1f}"
+                     f"{r['efficiency']:>13.0%}")
+    return "\n".join(lines)
+
+
+def write_synthetic_log(path: str, seconds: float = 120.0, seed: int = 0,
+                        units: Sequence[Tuple[str, str, int, float]] = (
+                            ("tosh_reaper", "P55_SCYTHE", 40, 0.8),
+                            ("gestalt_marine", "STORM_RIFLE", 30, 0.7),
+                            ("gestalt_ghost", "FISSION_RIFLE", 5, 0.9),
+                        )) -> int:
+    """生成合成战斗日志（用于演示和基准）
+
+    每个单位按预测DPS乘以命中率出手，攻击间隔带少量抖动。
+
+    Args:
+        path: 输出文件
+        seconds: 战斗时长
+        seed: 随机种子
+        units: (单位, 武器, 数量, 命中率)
+
+    Returns:
+        事件数
+    """
+    rng = np.random.default_rng(seed)
+    parts = []
+    next_id = 0
+    for source, weapon, count, hit_rate in units:
+        dps = predicted_unit_dps(source, weapon) or 10.0
+        interval = 1.0
+        hits = int(seconds / interval)
+        times = (np.arange(hits)[None, :] * interval + rng.uniform(0, interval, (count, 1))
+                 + rng.normal(0, 0.05, (count, hits))).ravel()
+        ids = np.repeat(np.arange(next_id, next_id + count), hits)
+        landed = rng.random(len(times)) < hit_rate
+        parts.append((times[landed], source, ids[landed], weapon, dps * interval))
+        next_id += count
+    rows = []
+    for times, source, ids, weapon, damage in parts:
+        targets = rng.integers(10000, 10100, len(times))
+        rows.extend(zip(times.tolist(), [source] * len(times), ids.tolist(), [weapon] * len(times),
+                        ["zerg_zergling"] * len(times), targets.tolist(), [damage] * len(times)))
+    rows.sort(key=lambda r: r[0])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(LOG_COLUMNS) + "\n")
+        f.writelines(f"{max(t, 0.0):.3f},{s},{i},{w},{tg},{ti},{d:.2f}\n" for t, s, i, w, tg, ti, d in rows)
+    return len(rows)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="战斗日志实际DPS分析")
+    parser.add_argument("log", help="战斗日志（CSV）")
+    parser.add_argument("--window", type=float, default=1.0, help="时间窗口长度（秒）")
+    parser.add_argument("--rolling", type=int, default=10, help="滑动统计包含的窗口数")
+    parser.add_argument("--target", help="只统计对某种目标的伤害")
+    parser.add_argument("--target-type", default="普通", help="模型预测使用的目标类型")
+    parser.add_argument("--target-armor", type=int, default=0, help="模型预测使用的目标护甲")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="编译日志时的进程数")
+    parser.add_argument("--generate", type=float, metavar="SECONDS", help="先生成指定时长的合成日志")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        print(f"已生成 {write_synthetic_log(args.log, args.generate)} 条事件")
+    report = realized_dps(load_log(args.log, args.workers), args.window, args.target)
+    rows = compare_with_model(summarize(report, args.rolling), args.target_type, args.target_armor)
+    print(format_comparison(rows))
+
+
+if __name__ == "__main__":
+    main()
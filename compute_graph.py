@@ -0,0 +1,245 @@
+"""依赖追踪的增量计算图
+
+属性 → 单兵DPS → 编队DPS → 护甲扫描表 → 图表，每一层都是图中的节点。
+修改某个属性时只把它下游的节点标记为脏，取值时才重新计算；
+重新计算后结果不变的节点不会继续让下游失效（提前截断）。
+调整一个数值后通常只有几个节点需要重算，耗时在毫秒级。
+"""
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+import time
+
+import numpy as np
+
+from army import (AURA_SAFETY_FIELD, DEFAULT_TARGET_TYPE, ArmyContext, GestaltRank, SafetyField, ToshDamageBonus,
+                  UnitCatalog, default_catalog, unit_dps_table)
+from tosh_reaper_squad_analysis import TOSH_DAMAGE_MULTIPLIER
+
+ARMOR_VALUES = np.arange(0, 9)  # 护甲扫描范围0-8
+
+
+def _equal(a: Any, b: Any) -> bool:
+    """比较新旧结果（支持NumPy数组和包含数组的字典）"""
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return isinstance(a, np.ndarray) and isinstance(b, np.ndarray) and np.array_equal(a, b)
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_equal(a[k], b[k]) for k in a)
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+class _Node:
+    __slots__ = ("name", "func", "deps", "value", "version", "dep_versions", "dirty", "dependents")
+
+    def __init__(self, name: str, func: Optional[Callable[..., Any]], deps: Sequence[str]):
+        self.name = name
+        self.func = func  # None表示输入节点
+        self.deps = list(deps)
+        self.value: Any = None
+        self.version = 0  # 值发生变化的次数
+        self.dep_versions: Optional[List[int]] = None  # 上次计算时依赖的版本
+        self.dirty = func is not None
+        self.dependents: Set[str] = set()
+
+
+class ComputeGraph:
+    """增量计算图"""
+    def __init__(self):
+        self.nodes: Dict[str, _Node] = {}
+        self.recomputed: List[str] = []  # 最近一次取值过程中重新计算的节点
+
+    def input(self, name: str, value: Any) -> "ComputeGraph":
+        """添加输入节点"""
+        node = _Node(name, None, ())
+        node.value = value
+        self.nodes[name] = node
+        return self
+
+    def node(self, name: str, func: Callable[..., Any], deps: Sequence[str]) -> "ComputeGraph":
+        """添加计算节点，func按deps的顺序接收依赖节点的值"""
+        for dep in deps:
+            if dep not in self.nodes:
+                raise KeyError(f"节点{name}的依赖{dep}不存在")
+            self.nodes[dep].dependents.add(name)
+        self.nodes[name] = _Node(name, func, deps)
+        return self
+
+    def set(self, name: str, value: Any):
+        """修改输入节点，只把下游标记为脏"""
+        node = self.nodes[name]
+        if node.func is not None:
+            raise ValueError(f"{name}不是输入节点")
+        if _equal(node.value, value):
+            return
+        node.value = value
+        node.version += 1
+        stack = list(node.dependents)
+        while stack:
+            dependent = self.nodes[stack.pop()]
+            if not dependent.dirty:
+                dependent.dirty = True
+                stack.extend(dependent.dependents)
+
+    def get(self, name: str) -> Any:
+        """获取节点的最新值"""
+        self.recomputed = []
+        return self._pull(self.nodes[name])
+
+    def _pull(self, node: _Node) -> Any:
+        if not node.dirty:
+            return node.value
+        values = [self._pull(self.nodes[dep]) for dep in node.deps]
+        versions = [self.nodes[dep].version for dep in node.deps]
+        if versions != node.dep_versions:
+            value = node.func(*values)
+            self.recomputed.append(node.name)
+            if node.dep_versions is None or not _equal(value, node.value):
+                node.value = value
+                node.version += 1
+            node.dep_versions = versions
+        node.dirty = False
+        return node.value
+
+    def downstream(self, name: str) -> Set[str]:
+        """某个节点的所有下游节点"""
+        result: Set[str] = set()
+        stack = list(self.nodes[name].dependents)
+        while stack:
+            current = stack.pop()
+            if current not in result:
+                result.add(current)
+                stack.extend(self.nodes[current].dependents)
+        return result
+
+
+# ---------------------------------------------------------------- 平衡性分析图
+
+# 编队定义：名称 -> [(单位, 武器, 数量)]，与gestalt_squad_analysis.plot_dps_comparison一致
+SQUADS = {
+    "风暴裂解5+30": [("ghost", "FISSION_RIFLE", 5), ("marine", "STORM_RIFLE", 30)],
+    "7枪重型激光炮": [("marine", "HEAVY_LASER", 35)],
+    "7鬼炼狱火": [("ghost", "HELLFIRE", 35)],
+}
+REAPER_COUNT = 128
+STAT_FIELDS = ("base_damage", "attack_speed", "multi_attack", "armor_reduction")
+
+
+def _unit_armor_dps(key: str, reduction: int, auras: frozenset, damage_multiplier: float, target_type: str,
+                    **stats: Any) -> np.ndarray:
+    """单兵在0-8护甲下对某种目标的DPS（army批量内核）
+
+    Args:
+        key: 单位写法（如 marine.STORM_RIFLE）
+        reduction: 编队提供的护甲减免
+        auras: 编队中的光环
+        damage_multiplier: 托什伤害倍率
+        target_type: 目标类型（对该类型的额外伤害取单位数据中的值）
+        stats: 覆盖目录中的属性（base_damage 为对"普通"目标的伤害）
+    """
+    profile = default_catalog().profiles[default_catalog().index[key]]
+    if "base_damage" in stats:
+        profile = replace(profile, damage={**profile.damage, DEFAULT_TARGET_TYPE: stats.pop("base_damage")})
+    profile = replace(profile, **stats)
+    targets = [(target_type, int(a)) for a in ARMOR_VALUES]
+    modifiers = (ToshDamageBonus(damage_multiplier), SafetyField(), GestaltRank())
+    return unit_dps_table(UnitCatalog([profile]), ArmyContext(reduction, auras), targets, modifiers)[0]
+
+
+def build_balance_graph() -> ComputeGraph:
+    """构建平衡性分析计算图
+
+    单兵DPS都由 army.unit_dps_table 计算（含对各目标类型的额外伤害）。
+
+    输入节点：
+        stat:<unit>.<WEAPON>.<field>  格式塔零武器属性（如 stat:marine.STORM_RIFLE.attack_speed）
+        stat:tosh.damage_multiplier   托什伤害倍率
+        target_type                   目标类型（默认"普通"，可改为"重甲"、"机械"等）
+    计算节点：
+        unit_dps:<unit>.<WEAPON>      单兵护甲扫描DPS
+        squad:<名称>                  编队护甲扫描DPS
+        sweep                         所有编队的扫描表
+    """
+    graph = ComputeGraph()
+    catalog = default_catalog()
+
+    used = {(unit, weapon) for members in SQUADS.values() for unit, weapon, _ in members}
+    for unit, weapon in sorted(used):
+        profile = catalog.profiles[catalog.index[f"{unit}.{weapon}"]]
+        values = {"base_damage": profile.damage_against(DEFAULT_TARGET_TYPE), "attack_speed": profile.attack_speed,
+                  "multi_attack": profile.multi_attack, "armor_reduction": profile.armor_reduction}
+        for field in STAT_FIELDS:
+            graph.input(f"stat:{unit}.{weapon}.{field}", values[field])
+    graph.input("stat:tosh.damage_multiplier", TOSH_DAMAGE_MULTIPLIER)
+    graph.input("target_type", DEFAULT_TARGET_TYPE)
+
+    for name, members in SQUADS.items():
+        # 编队护甲减免取成员武器的最大值（多个减免不叠加）
+        reduction_deps = [f"stat:{unit}.{weapon}.armor_reduction" for unit, weapon, _ in members]
+        graph.node(f"reduction:{name}", lambda *values: max(values), reduction_deps)
+        member_nodes = []
+        for unit, weapon, count in members:
+            node_name = f"unit_dps:{unit}.{weapon}@{name}"
+            graph.node(
+                node_name,
+                lambda base, speed, multi, reduction, target_type, key=f"{unit}.{weapon}":
+                    _unit_armor_dps(key, reduction, frozenset(), TOSH_DAMAGE_MULTIPLIER, target_type,
+                                    base_damage=base, attack_speed=speed, multi_attack=multi),
+                [f"stat:{unit}.{weapon}.base_damage", f"stat:{unit}.{weapon}.attack_speed",
+                 f"stat:{unit}.{weapon}.multi_attack", f"reduction:{name}", "target_type"],
+            )
+            member_nodes.append((node_name, count))
+        graph.node(
+            f"squad:{name}",
+            lambda *arrays, counts=[c for _, c in member_nodes]: sum(a * c for a, c in zip(arrays, counts)),
+            [n for n, _ in member_nodes],
+        )
+
+    # 死神船队带夜枭（安全力场），3级攻击
+    graph.node("unit_dps:reaper",
+               lambda multiplier, target_type: _unit_armor_dps("reaper", 0, frozenset({AURA_SAFETY_FIELD}),
+                                                               multiplier, target_type),
+               ["stat:tosh.damage_multiplier", "target_type"])
+    graph.node("squad:托什死神船队", lambda dps: dps * REAPER_COUNT, ["unit_dps:reaper"])
+
+    squad_names = list(SQUADS) + ["托什死神船队"]
+    graph.node("sweep", lambda *arrays: dict(zip(squad_names, arrays)), [f"squad:{n}" for n in squad_names])
+    return graph
+
+
+def add_chart_node(graph: ComputeGraph, output_path: str = "平衡性调整DPS对比.png") -> ComputeGraph:
+    """添加图表节点，扫描表不变时不会重新绘制"""
+    def render(sweep: Dict[str, np.ndarray]) -> str:
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(12, 8))
+        for name, values in sweep.items():
+            ax.plot(ARMOR_VALUES, values, marker="o", label=name)
+        ax.set_xlabel("敌方单位护甲值")
+        ax.set_ylabel("DPS输出")
+        ax.legend()
+        fig.savefig(output_path, dpi=150, bbox_inches="tight")
+        plt.close(fig)
+        return output_path
+
+    return graph.node("chart", render, ["sweep"])
+
+
+if __name__ == "__main__":
+    graph = build_balance_graph()
+    start = time.perf_counter()
+    graph.get("sweep")
+    print(f"首次计算: {(time.perf_counter() - start) * 1000:.2f}ms，{len(graph.recomputed)}个节点")
+
+    for stat, value in (("stat:marine.STORM_RIFLE.attack_speed", 0.25),
+                        ("stat:tosh.damage_multiplier", 1.3),
+                        ("stat:ghost.HELLFIRE.base_damage", 60),  # 数值未变，不触发重算
+                        ("target_type", "重甲")):
+        graph.set(stat, value)
+        start = time.perf_counter()
+        sweep = graph.get("sweep")
+        print(f"修改{stat}={value}: {(time.perf_counter() - start) * 1000:.2f}ms，"
+              f"重算{graph.recomputed}")
+    for name, values in sweep.items():
+        print(f"{name}: " + " ".join(f"{v:.0f}" for v in values))
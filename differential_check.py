@@ -0,0 +1,692 @@
+"""DPS实现的差分检查
+
+同一个量在仓库里有多套实现：单位类上的 get_weapon_dps、dps_cli 的缓存查询、
+army 的向量化内核（浮点和定点两种）、shared_tables 的预计算表、enemy_waves 的预计算矩阵、
+几个 calculate_reaper_dps，以及帕累托排序和编队枚举这类优化过的算法。这里为每个量写一个逐项展开、用 Fraction 精确计算的
+参考实现，随机生成 武器/护甲/升级/buff/编队 参数，逐一比较各优化实现与参考实现：
+
+    - 结果不一致（或只有一方抛出异常）时自动缩小参数，报告最小的反例
+    - 同时统计参考实现和优化实现的总耗时，给出加速比
+    - 只在部分参数下等价的实现（如不计护甲的 get_weapon_dps）用 applies 限定比较范围
+    - 参考实现只依赖单位数据和手写的游戏设定（SPEC_*），不导入被测代码的常量，也不照搬其简化
+      （如死神两发合并结算护甲）；每个量只有一个参考实现，口径不同的实现报告为不一致
+
+用法：
+    python differential_check.py --cases 200 --seed 1
+    python differential_check.py --only army_counts non_dominated
+有不一致时退出码为1。
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import contextlib
+import io
+import itertools
+import random
+import sys
+import time
+
+import numpy as np
+
+import gestalt_squad_analysis
+import tosh_reaper_damage_calc
+import tosh_reaper_squad_analysis
+from army import (AURA_SAFETY_FIELD, DEFAULT_TARGET_TYPE, ArmyContext, AttackUpgrade, GestaltRank, SafetyField,
+                  ToshDamageBonus, composition_counts, default_catalog, evaluate_counts, unit_dps_table,
+                  unit_dps_table_fixed)
+from dps_cli import gestalt_unit_dps
+from enemy_waves import default_waves
+from fixed_point import from_fixed
+from gestalt_ghost import GestaltGhost, WeaponType as GhostWeapon
+from gestalt_marine import GestaltMarine, WeaponType as MarineWeapon
+from pareto import non_dominated
+from shared_tables import load_shared_table, table_modifiers
+from supply_curve import max_dps_at_supply, medivac_rule, unit_footprint
+from tosh_reaper import ToshReaper, WeaponStats as ReaperWeaponStats, WeaponType as ReaperWeapon
+from unit_data import unit_weapons
+
+TARGET_TYPES = ("普通", "轻甲", "重甲", "生物", "机械", "英雄")
+GESTALT_UNITS = {"marine": (GestaltMarine, MarineWeapon), "ghost": (GestaltGhost, GhostWeapon)}
+UNIT_KEYS = tuple(p.key for p in default_catalog().profiles)
+
+
+# ---------------------------------------------------------------------------
+# 参数生成与缩小
+# ---------------------------------------------------------------------------
+
+class Strategy(ABC):
+    """参数生成策略：随机取值，并给出比某个值更简单的候选值"""
+    @abstractmethod
+    def draw(self, rng: random.Random) -> Any:
+        raise NotImplementedError
+
+    def shrink(self, value: Any) -> Iterator[Any]:
+        """由简到繁产出更简单的值"""
+        return iter(())
+
+
+@dataclass(frozen=True)
+class Integers(Strategy):
+    lo: int
+    hi: int
+
+    def draw(self, rng: random.Random) -> int:
+        return rng.randint(self.lo, self.hi)
+
+    def shrink(self, value: int) -> Iterator[int]:
+        # 向0（或最接近0的边界）靠拢：直接取目标值、减半、逐步逼近
+        target = min(max(0, self.lo), self.hi)
+        seen = {value}
+        step = 1 if value > target else -1
+        for candidate in (target, value - (value - target) // 2, value - step):
+            if candidate not in seen and abs(candidate - target) < abs(value - target):
+                seen.add(candidate)
+                yield candidate
+
+
+@dataclass(frozen=True)
+class SampledFrom(Strategy):
+    options: Tuple[Any, ...]  # 越靠前越简单
+
+    def draw(self, rng: random.Random) -> Any:
+        return rng.choice(self.options)
+
+    def shrink(self, value: Any) -> Iterator[Any]:
+        for option in self.options:
+            if option == value:
+                return
+            yield option
+
+
+@dataclass(frozen=True)
+class Booleans(Strategy):
+    def draw(self, rng: random.Random) -> bool:
+        return rng.random() < 0.5
+
+    def shrink(self, value: bool) -> Iterator[bool]:
+        if value:
+            yield False
+
+
+@dataclass(frozen=True)
+class Tuples(Strategy):
+    elements: Tuple[Strategy, ...]
+
+    def draw(self, rng: random.Random) -> tuple:
+        return tuple(e.draw(rng) for e in self.elements)
+
+    def shrink(self, value: tuple) -> Iterator[tuple]:
+        for i, element in enumerate(self.elements):
+            for simpler in element.shrink(value[i]):
+                yield value[:i] + (simpler,) + value[i + 1:]
+
+
+@dataclass(frozen=True)
+class Lists(Strategy):
+    element: Strategy
+    min_size: int = 0
+    max_size: int = 8
+
+    def draw(self, rng: random.Random) -> list:
+        return [self.element.draw(rng) for _ in range(rng.randint(self.min_size, self.max_size))]
+
+    def shrink(self, value: list) -> Iterator[list]:
+        # 先整段删除（前半、后半），再逐个删除，最后缩小单个元素
+        n = len(value)
+        if n // 2 >= self.min_size and n > 1:
+            yield value[:n // 2]
+            yield value[n // 2:]
+        if n > self.min_size:
+            for i in range(n):
+                yield value[:i] + value[i + 1:]
+        for i, item in enumerate(value):
+            for simpler in self.element.shrink(item):
+                yield value[:i] + [simpler] + value[i + 1:]
+
+
+# ---------------------------------------------------------------------------
+# 参考实现（逐项展开，Fraction精确计算）
+# ---------------------------------------------------------------------------
+
+# 参考实现使用的游戏设定：按设定手写，不从被测代码导入，被测代码改动常量时能被发现
+SPEC_RANK_COOLDOWN = {1: Fraction(1), 2: Fraction(1), 3: Fraction("0.83")}  # 军衔攻击间隔倍率
+SPEC_ATTACK_SPEED_PER_STACK = Fraction("0.1")  # 攻速buff每层
+SPEC_TOSH_MULTIPLIER = Fraction("1.2")  # 托什伤害加成
+SPEC_REAPER_SHOTS = 2  # 死神一次攻击两发
+SPEC_SAFETY_FIELD_PER_SHOT = 5  # 5层安全力场，每发+1点
+SPEC_MAX_ATTACK_LEVEL = 3  # 数据中死神武器伤害按3级攻击升级计，每少一级每发-1
+
+
+def _armor(damage: Fraction, target_armor: int, armor_reduction: int = 0) -> Fraction:
+    effective = target_armor - armor_reduction
+    if effective >= 0:
+        return max(Fraction(1, 2), damage - effective)
+    return damage - effective
+
+
+def _gestalt_weapon(key: str):
+    unit, _, weapon_name = key.partition(".")
+    unit_cls, weapon_enum = GESTALT_UNITS[unit]
+    return unit_cls().weapons[weapon_enum[weapon_name]], weapon_enum[weapon_name]
+
+
+def reference_unit_dps(key: str, target_type: str, target_armor: int, armor_reduction: int = 0,
+                       raven: bool = False, attack_level: int = 3, rank: int = 3, buff_stacks: int = 0,
+                       multiplier: Fraction = SPEC_TOSH_MULTIPLIER) -> Fraction:
+    """单个单位对单个目标的DPS
+
+    格式塔零：每发伤害 = 对该目标类型的伤害（裂解步枪无视护甲），逐发结算护甲，
+              攻击间隔 = 基础间隔 × 军衔倍率 / (1 + 层数 × 攻速加成)
+    死神：每次攻击两发，每发 (对该目标类型的伤害 - 未升级的攻击) × 托什倍率 + 安全力场5点，
+          逐发结算护甲；DPS = 两发伤害 / 攻击间隔
+    """
+    if key.partition(".")[0] in GESTALT_UNITS:
+        weapon, weapon_type = _gestalt_weapon(key)
+        damage = Fraction(weapon.bonus_damage.get(target_type, weapon.base_damage))
+        if weapon_type != GhostWeapon.FISSION_RIFLE:
+            damage = _armor(damage, target_armor, armor_reduction)
+        cooldown = (Fraction(weapon.attack_speed) * SPEC_RANK_COOLDOWN[rank]
+                    / (1 + buff_stacks * SPEC_ATTACK_SPEED_PER_STACK))
+        return damage * getattr(weapon, "multi_attack", 1) / cooldown
+    if key == "reaper":
+        p55 = unit_weapons("tosh_reaper", ReaperWeapon, ReaperWeaponStats)[ReaperWeapon.P55_SCYTHE]
+        base = p55.max_damage if target_type == "轻甲" else p55.min_damage
+        shot = (base - (SPEC_MAX_ATTACK_LEVEL - attack_level)) * Fraction(multiplier)
+        if raven:
+            shot += SPEC_SAFETY_FIELD_PER_SHOT
+        return SPEC_REAPER_SHOTS * _armor(shot, target_armor, armor_reduction) / Fraction(p55.attack_speed)
+    return Fraction(0)  # 夜枭、运输船不攻击
+
+
+def reference_context(units: Dict[str, int]) -> Tuple[int, bool]:
+    """部队的 (护甲减免, 是否有安全力场)：减免取在场单位的最大值"""
+    reduction = 0
+    for key, count in units.items():
+        if count > 0 and key.partition(".")[0] in GESTALT_UNITS:
+            reduction = max(reduction, getattr(_gestalt_weapon(key)[0], "armor_reduction", 0))
+    return reduction, units.get("raven", 0) > 0
+
+
+def _merge(army: Sequence[Tuple[str, int]]) -> Dict[str, int]:
+    units: Dict[str, int] = {}
+    for key, count in army:
+        units[key] = units.get(key, 0) + count
+    return units
+
+
+def _counts(armies: Sequence[Sequence[Tuple[str, int]]]) -> np.ndarray:
+    catalog = default_catalog()
+    return np.array([catalog.vector(_merge(a)) for a in armies]).reshape(len(armies), len(catalog))
+
+
+# ---------------------------------------------------------------------------
+# 各个量的参考实现与优化实现
+# ---------------------------------------------------------------------------
+
+def _gestalt_key(unit: str, weapon: int) -> str:
+    return f"{unit}.{list(GESTALT_UNITS[unit][1])[weapon].name}"
+
+
+def ref_gestalt_unit(unit, weapon, rank, buff_stacks, target_type, target_armor, armor_reduction) -> float:
+    return float(reference_unit_dps(_gestalt_key(unit, weapon), target_type, target_armor, armor_reduction,
+                                    rank=rank, buff_stacks=buff_stacks))
+
+
+def _army_gestalt_unit(table: Callable, unit, weapon, rank, buff_stacks, target_type, target_armor,
+                       armor_reduction) -> float:
+    catalog = default_catalog()
+    dps = table(catalog, ArmyContext(armor_reduction), [(target_type, target_armor)],
+                (GestaltRank(rank, buff_stacks),))
+    return float(dps[catalog.index[_gestalt_key(unit, weapon)], 0])
+
+
+def _shared_gestalt_unit(unit, weapon, rank, buff_stacks, target_type, target_armor, armor_reduction) -> float:
+    catalog = default_catalog()
+    dps = load_shared_table().lookup(catalog, ArmyContext(armor_reduction), [(target_type, target_armor)],
+                                     table_modifiers(rank, buff_stacks, 3))
+    return float(dps[catalog.index[_gestalt_key(unit, weapon)], 0])
+
+
+def _weapon_dps(unit, weapon, rank, buff_stacks, target_type, target_armor, armor_reduction) -> float:
+    unit_cls, weapon_enum = GESTALT_UNITS[unit]
+    instance = unit_cls()
+    instance.rank = rank
+    return instance.get_weapon_dps(list(weapon_enum)[weapon], target_type, buff_stacks)
+
+
+def ref_reaper_unit(attack_level, raven, target_type, target_armor, armor_reduction, multiplier) -> float:
+    return float(reference_unit_dps("reaper", target_type, target_armor, armor_reduction, raven, attack_level,
+                                    multiplier=Fraction(str(multiplier))))
+
+
+def _reaper_modifiers(attack_level, multiplier):
+    return ToshDamageBonus(multiplier), SafetyField(), GestaltRank(), AttackUpgrade(attack_level)
+
+
+def _army_reaper_unit(table: Callable, attack_level, raven, target_type, target_armor, armor_reduction,
+                      multiplier) -> float:
+    catalog = default_catalog()
+    context = ArmyContext(armor_reduction, frozenset({AURA_SAFETY_FIELD} if raven else ()))
+    return float(table(catalog, context, [(target_type, target_armor)],
+                       _reaper_modifiers(attack_level, multiplier))[catalog.index["reaper"], 0])
+
+
+def _shared_reaper_unit(attack_level, raven, target_type, target_armor, armor_reduction, multiplier) -> float:
+    catalog = default_catalog()
+    context = ArmyContext(armor_reduction, frozenset({AURA_SAFETY_FIELD} if raven else ()))
+    dps = load_shared_table().lookup(catalog, context, [(target_type, target_armor)],
+                                     table_modifiers(3, 0, attack_level))
+    return float(dps[catalog.index["reaper"], 0])
+
+
+_ANALYSIS_KEYS = {"轻甲": "light_armor", "重甲": "heavy_armor"}
+
+
+def _tosh_analysis_reaper(attack_level, raven, target_type, target_armor, armor_reduction, multiplier) -> float:
+    """tosh_reaper_squad_analysis 的口径：不计护甲，只给出对轻甲/重甲的DPS"""
+    dps = tosh_reaper_squad_analysis.calculate_reaper_dps(attack_level, raven, multiplier)
+    return dps[_ANALYSIS_KEYS[target_type]]
+
+
+def _tosh_reaper_class(attack_level, raven, target_type, target_armor, armor_reduction, multiplier) -> float:
+    """单位类的口径：不计托什加成、安全力场和护甲，一次攻击两发，重甲减半"""
+    reaper = ToshReaper()
+    reaper.attack_upgrade = attack_level
+    dps = SPEC_REAPER_SHOTS * reaper.get_weapon_dps(ReaperWeapon.P55_SCYTHE)
+    return dps if target_type == "轻甲" else dps / 2
+
+
+def ref_damage_calc() -> Dict[str, str]:
+    low, high = Fraction(8 * 2), Fraction(18 * 2)
+    upgraded = (low + Fraction("6.6") * 2, high + Fraction("8.6") * 2)
+    final = tuple(d + 5 for d in upgraded)
+    dps = (final[0] + final[1]) / 2 * Fraction("1.1")
+    text = lambda d, digits=1: f"{float(d):.{digits}f}"
+    return {"基础伤害": f"{text(low, 0)}-{text(high, 0)}",
+            "攻防和20%加成后": f"{text(upgraded[0])}-{text(upgraded[1])}",
+            "最终伤害": f"{text(final[0])}-{text(final[1])}",
+            "DPS": text(dps)}
+
+
+def _damage_calc() -> Dict[str, str]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return tosh_reaper_damage_calc.calculate_damage()
+
+
+SUPPLY_MIXES = ({"reaper": 1}, {"reaper": 4, "raven": 1}, {"marine.STORM_RIFLE": 6, "ghost.FISSION_RIFLE": 1})
+
+
+def ref_supply_curve(mix, transport, supplies) -> Dict[str, list]:
+    """逐个增加组数直到超出人口"""
+    mix = SUPPLY_MIXES[mix]
+    rule = medivac_rule() if transport else None
+    group_supply = sum(unit_footprint(k)["supply"] * n for k, n in mix.items())
+    group_cargo = sum(unit_footprint(k)["cargo"] * n for k, n in mix.items())
+
+    def total(groups: int) -> Tuple[float, int]:
+        transports = -(-groups * group_cargo // rule.capacity) if rule and group_cargo else 0
+        return groups * group_supply + transports * (rule.supply if rule else 0), transports
+
+    result = {"groups": [], "supply": [], "transports": [], "dps": []}
+    for limit in supplies:
+        groups = 0
+        while total(groups + 1)[0] <= limit:
+            groups += 1
+        used, transports = total(groups) if groups else (0, 0)
+        for name, value in (("groups", groups), ("supply", used), ("transports", transports), ("dps", groups * 10.0)):
+            result[name].append(value)
+    return result
+
+
+def _supply_curve(mix, transport, supplies) -> Dict[str, list]:
+    curve = max_dps_at_supply(SUPPLY_MIXES[mix], {"dps": 10.0}, supplies, medivac_rule() if transport else None)
+    return {"groups": curve.groups.tolist(), "supply": curve.supply.tolist(),
+            "transports": curve.transports.tolist(), "dps": curve.dps["dps"].tolist()}
+
+
+def ref_army_counts(armies, targets) -> np.ndarray:
+    """逐支部队、逐个单位累加"""
+    result = np.zeros((len(armies), len(targets)))
+    for a, army in enumerate(armies):
+        units = _merge(army)
+        reduction, raven = reference_context(units)
+        for t, (target_type, armor) in enumerate(targets):
+            result[a, t] = float(sum(count * reference_unit_dps(key, target_type, armor, reduction, raven)
+                                     for key, count in units.items()))
+    return result
+
+
+def ref_wave_dps(armies) -> np.ndarray:
+    """对每个条目：各单位取敌方所有标签中伤害最高的，打不到空中/地面的为0"""
+    waves = default_waves()
+    result = np.zeros((len(armies), len(waves.entry_units)))
+    for a, army in enumerate(armies):
+        units = _merge(army)
+        reduction, raven = reference_context(units)
+        for e, enemy in enumerate(waves.entry_units):
+            total = Fraction(0)
+            for key, count in units.items():
+                profile = waves.catalog.profiles[waves.catalog.index[key]]
+                if not (profile.can_attack_air if enemy.is_air else profile.can_attack_ground):
+                    continue
+                total += count * max(reference_unit_dps(key, tag, enemy.armor, reduction, raven)
+                                     for tag in (DEFAULT_TARGET_TYPE,) + enemy.tags)
+            result[a, e] = float(total)
+    return result
+
+
+def _points(seed, n, dims, levels) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, levels, size=(n, dims)).astype(np.float64)
+
+
+def ref_non_dominated(seed, n, dims, levels, maximize) -> np.ndarray:
+    """逐点与所有点两两比较"""
+    values = _points(seed, n, dims, levels) * np.where(np.array(maximize[:dims]), 1.0, -1.0)
+    keep = np.ones(n, dtype=bool)
+    for i in range(n):
+        dominates = np.all(values >= values[i], axis=1) & np.any(values > values[i], axis=1)
+        keep[i] = not dominates.any()
+    return keep
+
+
+def ref_compositions(keys, supply, step) -> np.ndarray:
+    """itertools.product 穷举后按人口筛选"""
+    keys = list(dict.fromkeys(keys))
+    catalog = default_catalog()
+    unit_supply = [catalog.profiles[catalog.index[k]].supply for k in keys]
+    ranges = [range(0, int(supply // s) + 1 if s else 1, step) for s in unit_supply]
+    rows = [combo for combo in itertools.product(*ranges)
+            if 0 < sum(c * s for c, s in zip(combo, unit_supply)) <= supply]
+    return np.array(rows, dtype=np.int64).reshape(len(rows), len(keys))
+
+
+# ---------------------------------------------------------------------------
+# 检查定义
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Candidate:
+    """待验证的优化实现"""
+    name: str
+    func: Callable[..., Any]
+    rtol: float = 1e-9
+    atol: float = 1e-9
+    applies: Optional[Callable[..., bool]] = None  # 只在部分参数下与参考实现等价
+
+
+@dataclass(frozen=True)
+class Check:
+    """一个量：参数策略、参考实现和若干优化实现"""
+    name: str
+    description: str
+    params: Dict[str, Strategy]
+    reference: Callable[..., Any]
+    candidates: Tuple[Candidate, ...]
+
+
+ARMY = Lists(Tuples((SampledFrom(UNIT_KEYS), Integers(1, 40))), 0, 5)
+GESTALT_PARAMS = {
+    "unit": SampledFrom(tuple(GESTALT_UNITS)),
+    "weapon": Integers(0, 5),
+    "rank": Integers(1, 3),
+    "buff_stacks": Integers(0, 5),
+    "target_type": SampledFrom(TARGET_TYPES),
+    "target_armor": Integers(-3, 8),
+    "armor_reduction": SampledFrom((0, 4)),
+}
+# 定点数内核的攻击间隔精确到1e-4，相对误差在1e-3以内
+FIXED_RTOL = 1e-3
+
+CHECKS: Tuple[Check, ...] = (
+    Check("gestalt_unit", "格式塔零单兵DPS（武器 × 军衔 × 攻速buff × 目标）", GESTALT_PARAMS, ref_gestalt_unit, (
+        Candidate("dps_cli.gestalt_unit_dps",
+                  lambda **p: gestalt_unit_dps(p["unit"], list(GESTALT_UNITS[p["unit"]][1])[p["weapon"]].name,
+                                               p["rank"], p["buff_stacks"], p["target_type"], p["target_armor"],
+                                               p["armor_reduction"])),
+        Candidate("army.unit_dps_table", lambda **p: _army_gestalt_unit(unit_dps_table, **p)),
+        Candidate("army.unit_dps_table_fixed",
+                  lambda **p: float(from_fixed(_army_gestalt_unit(unit_dps_table_fixed, **p))), rtol=FIXED_RTOL),
+        Candidate("shared_tables.SharedDPSTable", _shared_gestalt_unit),
+        # get_weapon_dps 不计护甲：只在有效护甲为0或无视护甲的武器上比较
+        Candidate("get_weapon_dps", _weapon_dps,
+                  applies=lambda **p: (p["target_armor"] == p["armor_reduction"]
+                                       or _gestalt_key(p["unit"], p["weapon"]) == "ghost.FISSION_RIFLE")),
+    )),
+    # 死神DPS只有一个参考实现，各处实现（包括两个分析脚本）都与它比较，口径差异如实报告
+    Check("reaper_unit", "托什死神单兵DPS（攻击等级 × 安全力场 × 托什倍率 × 目标）", {
+        "attack_level": Integers(0, 3),
+        "raven": Booleans(),
+        "target_type": SampledFrom(("普通", "轻甲", "重甲")),
+        "target_armor": Integers(-3, 8),
+        "armor_reduction": SampledFrom((0, 4)),
+        "multiplier": SampledFrom((1.2, 1.0, 1.5)),
+    }, ref_reaper_unit, (
+        Candidate("army.unit_dps_table", lambda **p: _army_reaper_unit(unit_dps_table, **p)),
+        Candidate("army.unit_dps_table_fixed",
+                  lambda **p: float(from_fixed(_army_reaper_unit(unit_dps_table_fixed, **p))), rtol=FIXED_RTOL),
+        # 预计算表只有默认托什倍率
+        Candidate("shared_tables.SharedDPSTable", _shared_reaper_unit, applies=lambda **p: p["multiplier"] == 1.2),
+        # 格式塔零对比脚本中的死神固定为3级攻击、满安全力场，编队护甲减免并入目标护甲
+        Candidate("gestalt_squad_analysis.calculate_reaper_dps",
+                  lambda **p: gestalt_squad_analysis.calculate_reaper_dps(
+                      p["target_armor"] - p["armor_reduction"], p["target_type"], p["multiplier"]),
+                  applies=lambda **p: p["attack_level"] == 3 and p["raven"]),
+        # 以下两个实现不计护甲，只在有效护甲为0、目标为轻甲/重甲时比较
+        Candidate("tosh_reaper_squad_analysis.calculate_reaper_dps", _tosh_analysis_reaper,
+                  applies=lambda **p: p["target_type"] in _ANALYSIS_KEYS and p["target_armor"] == p["armor_reduction"]),
+        Candidate("ToshReaper.get_weapon_dps×2", _tosh_reaper_class,
+                  applies=lambda **p: (p["target_type"] in _ANALYSIS_KEYS and p["target_armor"] == p["armor_reduction"]
+                                       and not p["raven"] and p["multiplier"] == 1.0)),
+    )),
+    Check("tosh_damage_calc", "死神之首满buff伤害明细（定点数）", {}, ref_damage_calc, (
+        Candidate("tosh_reaper_damage_calc.calculate_damage", _damage_calc),
+    )),
+    Check("supply_curve", "人口上限内的最大组数、运输船数和DPS", {
+        "mix": Integers(0, len(SUPPLY_MIXES) - 1),
+        "transport": Booleans(),
+        "supplies": Lists(Integers(0, 300), 1, 12),
+    }, ref_supply_curve, (
+        Candidate("supply_curve.max_dps_at_supply", _supply_curve),
+    )),
+    Check("army_counts", "混编部队DPS（上下文分组 + 矩阵乘法）", {
+        "armies": Lists(ARMY, 1, 24),
+        "targets": Lists(Tuples((SampledFrom(TARGET_TYPES), Integers(-3, 8))), 1, 4),
+    }, ref_army_counts, (
+        Candidate("army.evaluate_counts", lambda armies, targets: evaluate_counts(_counts(armies), targets)),
+        Candidate("army.evaluate_counts(exact)",
+                  lambda armies, targets: evaluate_counts(_counts(armies), targets, exact=True), rtol=FIXED_RTOL),
+    )),
+    Check("wave_dps", "部队对各波次敌人的DPS（预计算矩阵）", {"armies": Lists(ARMY, 1, 16)}, ref_wave_dps, (
+        Candidate("enemy_waves.WaveCatalog.dps", lambda armies: default_waves().dps(_counts(armies))),
+    )),
+    Check("non_dominated", "帕累托前沿（分块非支配排序）", {
+        "seed": Integers(0, 10 ** 6),
+        "n": Integers(0, 2500),
+        "dims": Integers(1, 4),
+        "levels": Integers(1, 40),
+        "maximize": Tuples((Booleans(),) * 4),
+    }, ref_non_dominated, (
+        Candidate("pareto.non_dominated",
+                  lambda seed, n, dims, levels, maximize: non_dominated(_points(seed, n, dims, levels),
+                                                                        list(maximize[:dims]))),
+    )),
+    Check("composition_counts", "人口内编队枚举（逐单位剪枝）", {
+        "keys": Lists(SampledFrom(UNIT_KEYS), 1, 4),
+        "supply": Integers(0, 60),
+        "step": Integers(1, 4),
+    }, ref_compositions, (
+        Candidate("army.composition_counts",
+                  lambda keys, supply, step: composition_counts(list(dict.fromkeys(keys)), supply, step)),
+    )),
+)
+
+
+# ---------------------------------------------------------------------------
+# 运行
+# ---------------------------------------------------------------------------
+
+def _call(func: Callable[..., Any], case: Dict[str, Any]) -> Tuple[bool, Any]:
+    try:
+        return True, func(**case)
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}"
+
+
+def agree(expected: Any, actual: Any, rtol: float = 1e-9, atol: float = 1e-9) -> bool:
+    """比较两个结果（字典逐键、字符串精确、数值按容差）"""
+    if isinstance(expected, dict):
+        return (isinstance(actual, dict) and expected.keys() == actual.keys()
+                and all(agree(expected[k], actual[k], rtol, atol) for k in expected))
+    if isinstance(expected, str) or isinstance(actual, str):
+        return expected == actual
+    expected, actual = np.asarray(expected), np.asarray(actual)
+    if expected.shape != actual.shape:
+        return False
+    if expected.dtype == bool or actual.dtype == bool:
+        return bool(np.array_equal(expected, actual))
+    return bool(np.allclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True))
+
+
+def _disagrees(check: Check, candidate: Candidate, case: Dict[str, Any]) -> bool:
+    """参考实现与优化实现不一致（只有一方抛出异常也算不一致）"""
+    ref_ok, expected = _call(check.reference, case)
+    ok, actual = _call(candidate.func, case)
+    if not ref_ok or not ok:
+        return ref_ok != ok
+    return not agree(expected, actual, candidate.rtol, candidate.atol)
+
+
+def shrink(check: Check, candidate: Candidate, case: Dict[str, Any], max_steps: int = 2000) -> Dict[str, Any]:
+    """贪心缩小反例：逐个参数尝试更简单的值，仍不一致就接受，直到没有可缩小的参数"""
+    steps = 0
+    improved = True
+    while improved and steps < max_steps:
+        improved = False
+        for name, strategy in check.params.items():
+            for simpler in strategy.shrink(case[name]):
+                trial = {**case, name: simpler}
+                steps += 1
+                if (candidate.applies is None or candidate.applies(**trial)) and _disagrees(check, candidate, trial):
+                    case, improved = trial, True
+                    break
+                if steps >= max_steps:
+                    break
+            if improved or steps >= max_steps:
+                break
+    return case
+
+
+@dataclass
+class Failure:
+    case: Dict[str, Any]  # 缩小后的反例
+    expected: Any
+    actual: Any
+    original: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class CandidateReport:
+    check: str
+    candidate: str
+    cases: int = 0
+    mismatches: int = 0
+    failure: Optional[Failure] = None  # 第一个反例（已缩小）
+    reference_time: float = 0.0
+    candidate_time: float = 0.0
+
+    @property
+    def speedup(self) -> float:
+        return self.reference_time / self.candidate_time if self.candidate_time > 0 else float("inf")
+
+
+def run_check(check: Check, cases: int = 100, seed: int = 0) -> List[CandidateReport]:
+    """随机生成参数比较一个量的所有优化实现
+
+    Args:
+        check: 检查定义
+        cases: 随机参数组数（没有参数的检查只运行一次）
+        seed: 随机种子
+
+    Returns:
+        每个优化实现的报告
+    """
+    rng = random.Random(f"{check.name}:{seed}")
+    draws = [{name: s.draw(rng) for name, s in check.params.items()} for _ in range(cases if check.params else 1)]
+    reports = [CandidateReport(check.name, c.name) for c in check.candidates]
+    # 预热：目录、缓存表等一次性开销不计入耗时
+    _call(check.reference, draws[0])
+    for candidate in check.candidates:
+        _call(candidate.func, draws[0])
+
+    for case in draws:
+        start = time.perf_counter()
+        ref_ok, expected = _call(check.reference, case)
+        reference_time = time.perf_counter() - start
+        for candidate, report in zip(check.candidates, reports):
+            if candidate.applies is not None and not candidate.applies(**case):
+                continue
+            start = time.perf_counter()
+            ok, actual = _call(candidate.func, case)
+            report.candidate_time += time.perf_counter() - start
+            report.reference_time += reference_time
+            report.cases += 1
+            if (ref_ok != ok) or (ok and not agree(expected, actual, candidate.rtol, candidate.atol)):
+                report.mismatches += 1
+                if report.failure is None:
+                    small = shrink(check, candidate, case)
+                    report.failure = Failure(small, _call(check.reference, small)[1],
+                                             _call(candidate.func, small)[1], case)
+    return reports
+
+
+def run_all(checks: Sequence[Check] = CHECKS, cases: int = 100, seed: int = 0,
+            only: Optional[Sequence[str]] = None) -> List[CandidateReport]:
+    """Raises:
+        KeyError: only中有未知的检查名
+    """
+    names = {c.name for c in checks}
+    unknown = set(only or ()) - names
+    if unknown:
+        raise KeyError(f"未知检查 {sorted(unknown)}，可选 {sorted(names)}")
+    reports = []
+    for check in checks:
+        if only and check.name not in only:
+            continue
+        reports.extend(run_check(check, cases, seed))
+    return reports
+
+
+def _short(value: Any, limit: int = 200) -> str:
+    text = repr(value.tolist() if isinstance(value, np.ndarray) else value)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def format_reports(reports: Sequence[CandidateReport]) -> str:
+    lines = [f"{'检查':<22}{'优化实现':<46}{'用例':>6}{'不一致':>8}{'参考(ms)':>11}{'优化(ms)':>11}{'加速比':>9}"]
+    for r in reports:
+        lines.append(f"{r.check:<22}{r.candidate:<46}{r.cases:>6}{r.mismatches:>8}"
+                     f"{r.reference_time * 1000:>11.1f}{r.candidate_time * 1000:>11.1f}{r.speedup:>8.1f}x")
+    for r in reports:
+        if r.failure is not None:
+            lines.append(f"\n[{r.check} / {r.candidate}] 最小反例: {_short(r.failure.case)}")
+            lines.append(f"  参考实现: {_short(r.failure.expected)}")
+            lines.append(f"  优化实现: {_short(r.failure.actual)}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="DPS实现的差分检查")
+    parser.add_argument("--cases", type=int, default=100, help="每个检查的随机参数组数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="只运行这些检查")
+    args = parser.parse_args(argv)
+
+    reports = run_all(CHECKS, args.cases, args.seed, args.only)
+    print(format_reports(reports))
+    return 1 if any(r.mismatches for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""批量场景命令行工具
+
+从场景文件读取多组编队、升级、buff和目标，在一个进程内用共享的预计算表
+全部算完，输出表格或JSON。
+
+场景文件格式（JSON）：
+    {
+      "defaults": {"rank": 3, "attack_upgrade": 3, "has_raven_buff": true},
+      "targets": [{"type": "普通", "armor": 0}, {"type": "重甲", "armor": 2}],
+      "scenarios": [
+        {"name": "风暴裂解5+30", "units": {"ghost.FISSION_RIFLE": 5, "marine.STORM_RIFLE": 30}},
+        {"name": "死神船队", "units": {"reaper": 128}, "attack_upgrade": 2}
+      ]
+    }
+
+单位写法：
+    marine.<武器名> / ghost.<武器名>   格式塔零单位（使用指定武器）
+    reaper                             托什死神
+
+场景可以覆盖defaults中的任意参数，也可以自带targets。
+
+用法：
+    python dps_cli.py scenarios/example.json --format table
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import sys
+
+from gestalt_ghost import GestaltGhost, WeaponType as GhostWeapon
+from gestalt_marine import GestaltMarine, WeaponType as MarineWeapon
+from army import AURA_SAFETY_FIELD, DEFAULT_MODIFIERS, ArmyContext, AttackUpgrade, default_catalog, unit_dps_table
+from gestalt_squad_analysis import calculate_actual_damage
+
+DEFAULT_PARAMS = {
+    "rank": 3,  # 格式塔零单位军衔
+    "buff_stacks": 0,  # 攻速buff层数
+    "attack_upgrade": 3,  # 死神攻击升级
+    "has_raven_buff": True,  # 死神安全力场
+}
+DEFAULT_TARGETS = [{"type": "普通", "armor": 0}]
+
+GESTALT_UNITS = {  # 单位写法前缀 -> (单位类, 武器枚举)
+    "marine": (GestaltMarine, MarineWeapon),
+    "ghost": (GestaltGhost, GhostWeapon),
+}
+
+# 固定伤害武器，不受护甲影响
+ARMOR_PIERCING_WEAPONS = {GhostWeapon.FISSION_RIFLE}
+
+
+@lru_cache(maxsize=None)
+def _gestalt_instance(unit: str, rank: int):
+    unit_cls, _ = GESTALT_UNITS[unit]
+    instance = unit_cls()
+    instance.rank = rank
+    return instance
+
+
+@lru_cache(maxsize=None)
+def gestalt_unit_dps(unit: str, weapon_name: str, rank: int, buff_stacks: int,
+                     target_type: str, target_armor: int, armor_reduction: int) -> float:
+    """单个格式塔零单位对目标的DPS（按参数缓存，所有场景共享）
+
+    Args:
+        unit: marine或ghost
+        weapon_name: 武器枚举名
+        rank: 军衔
+        buff_stacks: 攻速buff层数
+        target_type: 目标类型
+        target_armor: 目标护甲
+        armor_reduction: 编队提供的护甲减免
+
+    Returns:
+        DPS值
+    """
+    instance = _gestalt_instance(unit, rank)
+    weapon_type = GESTALT_UNITS[unit][1][weapon_name]
+    weapon = instance.weapons[weapon_type]
+    damage = weapon.bonus_damage.get(target_type, weapon.base_damage)
+    if weapon_type not in ARMOR_PIERCING_WEAPONS:
+        damage = calculate_actual_damage(damage, target_armor, armor_reduction)
+    damage *= getattr(weapon, "multi_attack", 1)
+    return damage / instance.get_weapon_cooldown(weapon_type, buff_stacks)
+
+
+@lru_cache(maxsize=None)
+def reaper_unit_dps(attack_upgrade: int, has_raven_buff: bool, target_type: str,
+                    target_armor: int, armor_reduction: int) -> float:
+    """单个托什死神对目标的DPS（army批量内核，护甲按目标类型和护甲值结算）
+
+    Args:
+        attack_upgrade: 攻击升级等级
+        has_raven_buff: 是否有夜枭安全力场
+        target_type: 目标类型
+        target_armor: 目标护甲
+        armor_reduction: 编队提供的护甲减免
+
+    Returns:
+        DPS值
+    """
+    catalog = default_catalog()
+    context = ArmyContext(armor_reduction, frozenset({AURA_SAFETY_FIELD}) if has_raven_buff else frozenset())
+    table = unit_dps_table(catalog, context, [(target_type, target_armor)],
+                           (*DEFAULT_MODIFIERS, AttackUpgrade(attack_upgrade)))
+    return float(table[catalog.index["reaper"], 0])
+
+
+def _armor_reduction(units: Dict[str, int], rank: int) -> int:
+    """编队中最大的护甲减免（多个减免不叠加）"""
+    reduction = 0
+    for spec, count in units.items():
+        unit, _, weapon_name = spec.partition(".")
+        if count > 0 and unit in GESTALT_UNITS:
+            weapon = _gestalt_instance(unit, rank).weapons[GESTALT_UNITS[unit][1][weapon_name]]
+            reduction = max(reduction, getattr(weapon, "armor_reduction", 0))
+    return reduction
+
+
+def validate_scenario(scenario: Dict[str, Any], index: int):
+    """校验场景中的单位写法
+
+    Raises:
+        ValueError: 场景格式错误
+    """
+    name = scenario.get("name", f"#{index}")
+    units = scenario.get("units")
+    if not isinstance(units, dict) or not units:
+        raise ValueError(f"场景{name}: units应为非空对象")
+    for spec, count in units.items():
+        if not isinstance(count, int) or count < 0:
+            raise ValueError(f"场景{name}: {spec}的数量应为非负整数")
+        unit, _, weapon_name = spec.partition(".")
+        if unit == "reaper" and not weapon_name:
+            continue
+        if unit not in GESTALT_UNITS or weapon_name not in GESTALT_UNITS[unit][1].__members__:
+            raise ValueError(f"场景{name}: 未知单位 {spec}")
+
+
+def evaluate_scenario(scenario: Dict[str, Any], defaults: Dict[str, Any],
+                      targets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """计算一个场景对每个目标的DPS
+
+    Returns:
+        每个目标一行结果
+    """
+    params = {**DEFAULT_PARAMS, **defaults, **{k: v for k, v in scenario.items()
+                                                 if k not in ("name", "units", "targets")}}
+    units: Dict[str, int] = scenario["units"]
+    reduction = _armor_reduction(units, params["rank"])
+    rows = []
+    for target in scenario.get("targets", targets):
+        target_type = target.get("type", "普通")
+        target_armor = target.get("armor", 0)
+        breakdown = {}
+        for spec, count in units.items():
+            unit, _, weapon_name = spec.partition(".")
+            if unit == "reaper":
+                per_unit = reaper_unit_dps(params["attack_upgrade"], params["has_raven_buff"], target_type,
+                                           target_armor, reduction)
+            else:
+                per_unit = gestalt_unit_dps(unit, weapon_name, params["rank"], params["buff_stacks"],
+                                            target_type, target_armor, reduction)
+            breakdown[spec] = per_unit * count
+        rows.append({
+            "name": scenario.get("name", ""),
+            "target_type": target_type,
+            "target_armor": target_armor,
+            "dps": sum(breakdown.values()),
+            "breakdown": breakdown,
+        })
+    return rows
+
+
+def run_scenarios(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """计算场景文件中的全部场景"""
+    defaults = document.get("defaults", {})
+    targets = document.get("targets", DEFAULT_TARGETS)
+    scenarios = document.get("scenarios", [])
+    for i, scenario in enumerate(scenarios):
+        validate_scenario(scenario, i)
+    rows = []
+    for scenario in scenarios:
+        rows.extend(evaluate_scenario(scenario, defaults, targets))
+    return rows
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    """格式化为文本表格"""
+    headers = ("场景", "目标类型", "护甲", "DPS")
+    body: List[Tuple[str, ...]] = [
+        (row["name"], row["target_type"], str(row["target_armor"]), f"{row['dps']:.1f}") for row in rows
+    ]
+
+    def width(text: str) -> int:
+        # 中文字符按两个宽度计算
+        return sum(2 if ord(c) > 0x2E80 else 1 for c in text)
+
+    widths = [max(width(r[i]) for r in [headers] + body) for i in range(len(headers))]
+
+    def line(cells: Tuple[str, ...]) -> str:
+        return "  ".join(c + " " * (w - width(c)) for c, w in zip(cells, widths)).rstrip()
+
+    lines = [line(headers), "  ".join("-" * w for w in widths)]
+    lines.extend(line(r) for r in body)
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="批量计算场景文件中的编队DPS")
+    parser.add_argument("scenario_file", help="场景文件（JSON），-表示从标准输入读取")
+    parser.add_argument("--format", choices=("table", "json"), default="table", help="输出格式")
+    parser.add_argument("--output", "-o", help="输出文件，默认打印到标准输出")
+    args = parser.parse_args(argv)
+
+    if args.scenario_file == "-":
+        document = json.load(sys.stdin)
+    else:
+        with open(args.scenario_file, encoding="utf-8") as f:
+            document = json.load(f)
+
+    try:
+        rows = run_scenarios(document)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.format == "json":
+        text = json.dumps(rows, ensure_ascii=False, indent=2)
+    else:
+        text = format_table(rows)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""DPS查询服务客户端与压测工具
+
+用法：
+    python dps_client.py /reaper '{"attack_upgrade": 3}'
+    python dps_client.py --load-test --concurrency 64 --requests 5000
+    python dps_client.py /jobs '{"kind": "pareto", "params": {"supply": 200}}' --follow
+    python dps_client.py /jobs                     # 自己提交的任务
+    python dps_client.py --cancel <任务id>
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+import argparse
+import asyncio
+import http.client
+import json
+import random
+import time
+
+from job_queue import TERMINAL_STATES, default_owner, format_event  # 只依赖标准库
+
+# 与dps_service保持一致（不直接导入，避免客户端加载计算模块和matplotlib）
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class DPSClient:
+    """同步客户端（保持长连接）"""
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 30):
+        self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def query(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """发送查询
+
+        Args:
+            path: 接口路径
+            params: 请求参数
+
+        Returns:
+            接口返回的result字段
+
+        Raises:
+            RuntimeError: 服务返回错误
+        """
+        body = json.dumps(params or {}, ensure_ascii=False).encode("utf-8")
+        self.connection.request("POST", path, body, {"Content-Type": "application/json"})
+        return self._result()
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET查询（参数放在查询字符串中）"""
+        query = urlencode({k: v if isinstance(v, str) else json.dumps(v) for k, v in (params or {}).items()})
+        self.connection.request("GET", f"{path}?{query}" if query else path)
+        return self._result()
+
+    def _result(self) -> Any:
+        response = self.connection.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(f"{response.status}: {payload.get('error')}")
+        return payload["result"]
+
+    def submit_job(self, kind: str, params: Optional[Dict[str, Any]] = None,
+                   owner: Optional[str] = None) -> Dict[str, Any]:
+        """提交后台任务，返回任务记录"""
+        return self.query("/jobs", {"kind": kind, "params": params or {}, "owner": owner or default_owner()})
+
+    def jobs(self, owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.get("/jobs", {"owner": owner} if owner else None)
+
+    def job(self, job_id: str) -> Dict[str, Any]:
+        return self.get(f"/jobs/{job_id}")
+
+    def cancel_job(self, job_id: str, owner: Optional[str] = None) -> Dict[str, Any]:
+        return self.query(f"/jobs/{job_id}/cancel", {"owner": owner or default_owner()})
+
+    def follow_job(self, job_id: str, wait: float = 10.0) -> Iterator[Dict[str, Any]]:
+        """逐条产出任务事件直到任务结束（长轮询）"""
+        after = 0
+        while True:
+            page = self.get(f"/jobs/{job_id}/events", {"after": after, "wait": wait})
+            yield from page["events"]
+            after = page["next"]
+            if page["state"] in TERMINAL_STATES:
+                return
+
+    def health(self) -> Dict[str, Any]:
+        self.connection.request("GET", "/health")
+        return json.loads(self.connection.getresponse().read())
+
+    def close(self):
+        self.connection.close()
+
+
+def sample_queries(count: int, seed: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+    """生成压测用的随机查询（参数空间有限，可以观察缓存与批处理效果）"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(("/reaper", {"attack_upgrade": rng.randint(0, 3),
+                                        "has_raven_buff": rng.random() < 0.5}))
+        elif kind < 0.7:
+            queries.append(("/squad", {"ghost_count": rng.randint(0, 10),
+                                       "storm_marine_count": rng.randint(0, 40),
+                                       "target_type": rng.choice(["普通", "重甲"]),
+                                       "target_armor": rng.randint(0, 6)}))
+        elif kind < 0.9:
+            queries.append(("/gestalt/unit", {"unit": rng.choice(["marine", "ghost"]),
+                                              "rank": rng.randint(1, 3),
+                                              "buff_stacks": rng.randint(0, 5)}))
+        else:
+            queries.append(("/reaper/supply", {"max_supply": rng.choice([40, 80, 120, 160, 200]),
+                                               "attack_upgrade": rng.randint(0, 3)}))
+    return queries
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                   host: str, path: str, params: Dict[str, Any]) -> int:
+    body = json.dumps(params, ensure_ascii=False).encode("utf-8")
+    writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def load_test(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    concurrency: int = 32, requests: int = 2000) -> Dict[str, float]:
+    """并发压测
+
+    Args:
+        host: 服务地址
+        port: 服务端口
+        concurrency: 并发连接数
+        requests: 请求总数
+
+    Returns:
+        吞吐量与延迟统计
+    """
+    queries = sample_queries(requests)
+    latencies: List[float] = []
+    errors = 0
+    position = 0
+
+    async def worker():
+        nonlocal errors, position
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while position < len(queries):
+                path, params = queries[position]
+                position += 1
+                start = time.perf_counter()
+                status = await _request(reader, writer, host, path, params)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DPS查询服务客户端")
+    parser.add_argument("path", nargs="?", default="/health")
+    parser.add_argument("params", nargs="?", default="{}")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--load-test", action="store_true", help="运行压测")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--follow", action="store_true", help="提交任务后显示进度直到结束")
+    parser.add_argument("--cancel", metavar="JOB_ID", help="取消任务")
+    parser.add_argument("--owner", default=None, help="任务提交者，默认当前用户")
+    args = parser.parse_args()
+
+    if args.load_test:
+        stats = asyncio.run(load_test(args.host, args.port, args.concurrency, args.requests))
+        print(f"请求数: {stats['requests']}  错误: {stats['errors']}")
+        print(f"耗时: {stats['seconds']:.2f}秒  吞吐量: {stats['throughput']:.0f}请求/秒")
+        print(f"延迟: p50 {stats['p50_ms']:.2f}ms  p99 {stats['p99_ms']:.2f}ms")
+        return
+
+    client = DPSClient(args.host, args.port)
+    try:
+        params = json.loads(args.params)
+        if args.cancel:
+            result = client.cancel_job(args.cancel, args.owner)
+        elif args.path == "/health":
+            result = client.health()
+        elif args.path == "/jobs" and not params:
+            result = client.jobs(args.owner or default_owner())
+        elif args.path == "/jobs":
+            result = client.submit_job(params.get("kind", ""), params.get("params"), args.owner or params.get("owner"))
+            if args.follow:
+                print(f"任务 {result['id']}（{result['kind']}）")
+                try:
+                    for event in client.follow_job(result["id"]):
+                        print(format_event(event))
+                except KeyboardInterrupt:
+                    client.close()
+                    client = DPSClient(args.host, args.port)  # 中断时连接可能停在半个响应上
+                    client.cancel_job(result["id"], result["owner"])
+                    print("已请求取消")
+                result = client.job(result["id"])
+        else:
+            result = client.query(args.path, params)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""DPS查询服务
+
+基于asyncio的本地HTTP/JSON服务，把死神、格式塔零和编队计算器暴露为接口：
+
+    GET  /health               健康检查与统计
+    POST /reaper               单个死神DPS {"attack_upgrade": 3, "has_raven_buff": true}
+    POST /reaper/supply        死神船队人口曲线 {"max_supply": 160, ...}
+    POST /gestalt/unit         格式塔零单位武器DPS {"unit": "marine", "weapon": "HEAVY_LASER", ...}
+    POST /squad                格式塔零编队DPS {"ghost_count": 5, "storm_marine_count": 30, ...}
+    POST /squads               批量比较编队 {"squads": [{...}, ...], "target_armor": 2}
+    POST /armor/sweep          编队在不同护甲下的DPS {"squad": {...}, "armors": [0, 1, 2]}
+
+    POST /jobs                 提交后台任务 {"kind": "pareto", "params": {...}, "owner": "alice"}
+    GET  /jobs?owner=alice     任务列表
+    GET  /jobs/<id>            任务状态与结果
+    GET  /jobs/<id>/events     进度事件（长轮询）?after=已读条数&wait=最长等待秒数
+    POST /jobs/<id>/cancel     取消任务 {"owner": "alice"}
+
+同一接口在很短时间窗口内到达的请求会合并为一批计算，相同参数只算一次；
+结果进入内存LRU缓存；计算都交给进程池执行，不阻塞事件循环。
+分钟级的扫描、模拟和图表作为后台任务由 job_queue 调度（独立的进程池，状态落盘）。
+
+用法：
+    python dps_service.py --port 8765
+"""
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import gestalt_squad_analysis
+import tosh_reaper_squad_analysis
+from gestalt_ghost import GestaltGhost, WeaponType as GhostWeapon
+from gestalt_marine import GestaltMarine, WeaponType as MarineWeapon
+from job_queue import JOB_WORKERS, JOBS_DIR, JobError, JobQueue, default_owner
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+BATCH_WINDOW = 0.002  # 批处理等待窗口（秒）
+MAX_BATCH_SIZE = 256
+CACHE_SIZE = 4096
+MAX_BODY_BYTES = 1024 * 1024
+MAX_EVENT_WAIT = 25.0  # 任务事件长轮询的最长等待（秒）
+
+
+class RequestError(Exception):
+    """请求参数错误，返回400"""
+
+
+# ---------------------------------------------------------------- 计算接口
+
+def _reaper(attack_upgrade: int = 3, has_raven_buff: bool = True) -> Dict[str, float]:
+    return tosh_reaper_squad_analysis.calculate_reaper_dps(attack_upgrade, has_raven_buff)
+
+
+def _reaper_supply(max_supply: int = 160, attack_upgrade: int = 3,
+                   has_raven_buff: bool = True) -> Dict[str, List[float]]:
+    supplies, light, heavy = tosh_reaper_squad_analysis.calculate_dps_by_supply(
+        max_supply, attack_upgrade, has_raven_buff)
+    return {"supply": supplies, "light_armor": light, "heavy_armor": heavy}
+
+
+_GESTALT_UNITS = {
+    "marine": (GestaltMarine, MarineWeapon),
+    "ghost": (GestaltGhost, GhostWeapon),
+}
+
+
+def _gestalt_unit(unit: str = "marine", weapon: Optional[str] = None, rank: int = 3,
+                  target_type: str = "普通", buff_stacks: int = 0) -> Dict[str, Any]:
+    if unit not in _GESTALT_UNITS:
+        raise RequestError(f"未知单位: {unit}")
+    unit_cls, weapon_enum = _GESTALT_UNITS[unit]
+    instance = unit_cls()
+    if not isinstance(rank, int) or not 1 <= rank <= instance.max_rank:
+        raise RequestError(f"军衔应为1-{instance.max_rank}的整数: {rank}")
+    if not isinstance(buff_stacks, int) or buff_stacks < 0:
+        raise RequestError(f"攻速buff层数应为非负整数: {buff_stacks}")
+    instance.rank = rank
+    weapons = [weapon_enum[weapon]] if weapon else instance.get_available_weapons()
+    return {
+        w.name: {
+            "name": w.value,
+            "dps": instance.get_weapon_dps(w, target_type, buff_stacks),
+            "cooldown": instance.get_weapon_cooldown(w, buff_stacks),
+        }
+        for w in weapons
+    }
+
+
+def _squad(ghost_count: int = 0, storm_marine_count: int = 0, laser_marine_count: int = 0,
+           target_type: str = "普通", target_armor: int = 0) -> Dict[str, float]:
+    # calculate_squad_dps会打印明细，服务中丢弃
+    with contextlib.redirect_stdout(io.StringIO()):
+        dps = gestalt_squad_analysis.calculate_squad_dps(
+            ghost_count, storm_marine_count, laser_marine_count, target_type, target_armor)
+    return {"dps": dps}
+
+
+def _squads(squads: List[Dict[str, int]], target_type: str = "普通",
+            target_armor: int = 0) -> List[Dict[str, Any]]:
+    results = []
+    for squad in squads:
+        dps = _squad(target_type=target_type, target_armor=target_armor, **squad)["dps"]
+        results.append({"squad": squad, "dps": dps})
+    return sorted(results, key=lambda r: r["dps"], reverse=True)
+
+
+def _armor_sweep(squad: Dict[str, int], armors: List[int],
+                 target_type: str = "普通") -> Dict[str, List[float]]:
+    return {
+        "armor": list(armors),
+        "dps": [_squad(target_type=target_type, target_armor=a, **squad)["dps"] for a in armors],
+    }
+
+
+# 路径 -> 计算函数
+ENDPOINTS: Dict[str, Callable[..., Any]] = {
+    "/reaper": _reaper,
+    "/reaper/supply": _reaper_supply,
+    "/gestalt/unit": _gestalt_unit,
+    "/squad": _squad,
+    "/squads": _squads,
+    "/armor/sweep": _armor_sweep,
+}
+
+
+def evaluate_batch(path: str, batch: List[Dict[str, Any]]) -> List[Tuple[bool, Any]]:
+    """计算一批同接口请求（在执行器中执行）
+
+    Returns:
+        每个请求的 (是否成功, 结果或错误信息)
+    """
+    func = ENDPOINTS[path]
+    results = []
+    for params in batch:
+        try:
+            results.append((True, func(**params)))
+        except Exception as e:  # 逐个请求捕获，一个请求出错不影响同批的其他请求
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+
+# ---------------------------------------------------------------- 缓存与批处理
+
+class LRUCache:
+    """内存LRU缓存"""
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self.data: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return True, self.data[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key: str, value: Any):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_size:
+            self.data.popitem(last=False)
+
+
+class RequestBatcher:
+    """按接口合并短时间内到达的请求，相同参数只计算一次"""
+    def __init__(self, executor: Executor, cache: LRUCache,
+                 window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH_SIZE):
+        self.executor = executor
+        self.cache = cache
+        self.window = window
+        self.max_batch = max_batch
+        self.pending: Dict[str, "OrderedDict[str, List[asyncio.Future]]"] = {}
+        self.params: Dict[str, Dict[str, Any]] = {}
+        self.flush_tasks: Dict[str, asyncio.Task] = {}
+        self.running: set = set()  # 持有正在计算的批次，防止任务被回收
+        self.batches = 0
+
+    async def submit(self, path: str, params: Dict[str, Any]) -> Any:
+        key = path + "?" + json.dumps(params, sort_keys=True, ensure_ascii=False)
+        hit, value = self.cache.get(key)
+        if hit:
+            return value
+
+        future = asyncio.get_running_loop().create_future()
+        waiting = self.pending.setdefault(path, OrderedDict())
+        waiting.setdefault(key, []).append(future)
+        self.params[key] = params
+        if len(waiting) >= self.max_batch:
+            self._flush(path)
+        elif path not in self.flush_tasks:
+            self.flush_tasks[path] = asyncio.create_task(self._flush_later(path))
+        return await future
+
+    async def _flush_later(self, path: str):
+        await asyncio.sleep(self.window)
+        self.flush_tasks.pop(path, None)
+        self._flush(path)
+
+    def _flush(self, path: str):
+        task = self.flush_tasks.pop(path, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        waiting = self.pending.pop(path, None)
+        if waiting:
+            task = asyncio.create_task(self._run(path, waiting))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def _run(self, path: str, waiting: "OrderedDict[str, List[asyncio.Future]]"):
+        keys = list(waiting)
+        batch = [self.params.pop(key) for key in keys]
+        self.batches += 1
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self.executor, evaluate_batch, path, batch)
+        except Exception as e:  # 执行器异常时整批失败
+            results = [(False, f"{type(e).__name__}: {e}")] * len(keys)
+
+        for key, (ok, value) in zip(keys, results):
+            if ok:
+                self.cache.put(key, value)
+            for future in waiting[key]:
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(RequestError(value))
+
+
+# ---------------------------------------------------------------- HTTP
+
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _query_value(value: str) -> Any:
+    """查询字符串的值按JSON解析（数字、布尔、列表），解析失败则作为字符串"""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+class DPSService:
+    """DPS查询服务"""
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None,
+                 window: float = BATCH_WINDOW, cache_size: int = CACHE_SIZE,
+                 job_workers: int = JOB_WORKERS, jobs_dir: str = JOBS_DIR):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.cache = LRUCache(cache_size)
+        self.executor: Optional[Executor] = None
+        self.batcher: Optional[RequestBatcher] = None
+        self.window = window
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.jobs: Optional[JobQueue] = JobQueue(jobs_dir, job_workers) if job_workers else None
+        self.requests = 0
+        self.started = time.time()
+
+    async def start(self):
+        """启动服务（workers=0时不使用进程池，job_workers=0时不启用任务队列）
+
+        workers=0时在单个后台线程中计算：仍不阻塞事件循环，且一次只有一批在执行
+        （_squad 用 redirect_stdout 替换的是进程级的 sys.stdout，不能多线程并发）。
+        """
+        if self.workers != 0:
+            # forkserver：工作进程不继承已打开的客户端连接，否则连接关闭后对端要等工作进程退出才能收到EOF
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context("forkserver"))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        if self.jobs is not None:
+            await self.jobs.start()
+        self.batcher = RequestBatcher(self.executor, self.cache, self.window)
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """停止服务"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+        if self.jobs is not None:
+            await self.jobs.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"DPS查询服务已启动: http://{self.host}:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "batches": self.batcher.batches if self.batcher else 0,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "endpoints": sorted(ENDPOINTS),
+            "jobs": self.jobs.stats() if self.jobs is not None else None,
+        }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "请求行格式错误"}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.upper() == "HTTP/1.1")
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # 无法确定请求体边界，不能继续复用连接
+                    await self._respond(writer, 400, {"error": "Content-Length无效"}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "请求体过大"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self._dispatch(method.upper(), target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        self.requests += 1
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, self.stats()
+        is_job = url.path == "/jobs" or url.path.startswith("/jobs/")
+        if not is_job and url.path not in ENDPOINTS:
+            return 404, {"error": f"未知接口: {url.path}"}
+
+        if method == "POST":
+            try:
+                params = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                return 400, {"error": f"JSON格式错误: {e}"}
+            if not isinstance(params, dict):
+                return 400, {"error": "请求体应为JSON对象"}
+        elif method == "GET":
+            params = {k: _query_value(v) for k, v in parse_qsl(url.query)}
+        else:
+            return 405, {"error": f"不支持的方法: {method}"}
+
+        if is_job:
+            return await self._dispatch_job(method, url.path, params)
+        try:
+            return 200, {"result": await self.batcher.submit(url.path, params)}
+        except RequestError as e:
+            return 400, {"error": str(e)}
+
+    async def _dispatch_job(self, method: str, path: str, params: Dict[str, Any]) -> Tuple[int, Any]:
+        if self.jobs is None:
+            return 404, {"error": "任务队列未启用"}
+        parts = path.strip("/").split("/")
+        action = parts[2] if len(parts) > 2 else ""
+        try:
+            if len(parts) == 1:
+                if method == "POST":
+                    job = self.jobs.submit(params.get("kind", ""), params.get("params"),
+                                           params.get("owner") or default_owner())
+                    return 200, {"result": job.to_dict()}
+                jobs = self.jobs.list(params.get("owner"))
+                return 200, {"result": [j.to_dict(include_result=False) for j in jobs]}
+            if len(parts) > 3 or action not in ("", "events", "cancel"):
+                return 404, {"error": f"未知接口: {path}"}
+            job_id = parts[1]
+            if action == "cancel":
+                if method != "POST":
+                    return 405, {"error": f"不支持的方法: {method}"}
+                if not params.get("owner"):
+                    raise JobError("取消任务需要提供owner")
+                return 200, {"result": self.jobs.cancel(job_id, params["owner"]).to_dict()}
+            if action == "events":
+                after = int(params.get("after", 0))
+                wait = min(float(params.get("wait", 0)), MAX_EVENT_WAIT)
+                events, state = await self.jobs.next_events(job_id, after, wait)
+                return 200, {"result": {"events": events, "next": after + len(events), "state": state}}
+            return 200, {"result": self.jobs.get(job_id).to_dict()}
+        except KeyError as e:
+            return 404, {"error": e.args[0]}
+        except PermissionError as e:
+            return 403, {"error": str(e)}
+        except (JobError, TypeError, ValueError) as e:
+            return 400, {"error": str(e)}
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DPS查询服务")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="进程池大小，0表示不用进程池")
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW, help="批处理窗口（秒）")
+    parser.add_argument("--job-workers", type=int, default=JOB_WORKERS, help="后台任务进程数，0表示不启用任务队列")
+    parser.add_argument("--jobs-dir", default=JOBS_DIR, help="任务状态目录")
+    args = parser.parse_args()
+
+    service = DPSService(args.host, args.port, args.workers, args.batch_window,
+                         job_workers=args.job_workers, jobs_dir=args.jobs_dir)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""资源-时间经济模拟
+
+给定收入速率和生产建筑数量，按建造顺序计算每个单位/升级的开始和完成时间，
+并得到DPS随时间变化的曲线。
+
+模拟是事件驱动的：每一项只需求出"资源够用""建筑空闲""前置完成"三个时间点中的
+最大值，不需要逐秒推进，因此评估一条建造顺序只需几微秒，可以用于搜索。
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import heapq
+
+import numpy as np
+
+from tosh_reaper_squad_analysis import calculate_reaper_dps
+from unit_data import unit_attributes, upgrade_cost
+
+
+@dataclass(frozen=True)
+class BuildItem:
+    """可建造项目"""
+    name: str
+    minerals: float
+    gas: float
+    time: float  # 建造时间
+    structure: str  # 生产建筑
+    supply: int = 0
+    requires: Optional[str] = None  # 前置项目（需已完成）
+
+
+@dataclass
+class Economy:
+    """经济状态"""
+    mineral_rate: float = 20.0  # 每秒矿物收入
+    gas_rate: float = 8.0  # 每秒气体收入
+    minerals: float = 50.0  # 初始矿物
+    gas: float = 0.0  # 初始气体
+    structures: Dict[str, int] = field(default_factory=lambda: {"barracks": 1, "starport": 1, "engineering_bay": 1})
+    supply_cap: int = 200
+
+
+@dataclass
+class BuildEvent:
+    """建造事件"""
+    name: str
+    start: float
+    finish: float
+
+
+@dataclass
+class BuildResult:
+    """建造顺序模拟结果"""
+    events: List[BuildEvent]
+    feasible: bool = True  # 是否所有项目都能完成（缺建筑/前置/人口时为False）
+
+    def completion_times(self, name: str) -> List[float]:
+        """某个项目的所有完成时间（升序）"""
+        return sorted(e.finish for e in self.events if e.name == name)
+
+    @property
+    def finish_time(self) -> float:
+        return max((e.finish for e in self.events), default=0.0)
+
+
+@lru_cache(maxsize=None)
+def item_catalog() -> Dict[str, BuildItem]:
+    """可建造项目表（数据来自 data/*.json）"""
+    catalog = {}
+    for name, unit, structure in (("reaper", "tosh_reaper", "barracks"),
+                                  ("medivac", "tosh_medivac", "starport"),
+                                  ("raven", "tosh_raven", "starport")):
+        stats = unit_attributes(unit)
+        catalog[name] = BuildItem(name, stats["cost_minerals"], stats["cost_gas"], stats["build_time"],
+                                  structure, stats.get("supply", 2))
+    for level in range(1, 4):
+        cost = upgrade_cost("attack", level)
+        catalog[f"attack_{level}"] = BuildItem(f"attack_{level}", cost["minerals"], cost["gas"], cost["time"],
+                                               "engineering_bay",
+                                               requires=f"attack_{level - 1}" if level > 1 else None)
+    return catalog
+
+
+def _resource_time(amount: float, initial: float, rate: float, spent: float, now: float) -> float:
+    """在恒定收入下，资源攒够amount的最早时间"""
+    needed = spent + amount - initial
+    if needed <= 0:
+        return now
+    if rate <= 0:
+        return float("inf")
+    return max(now, needed / rate)
+
+
+class BuildState:
+    """建造过程中的经济状态，可逐项推进（搜索时复制后继续扩展）"""
+    __slots__ = ("free_at", "finished", "spent_minerals", "spent_gas", "supply", "now", "events")
+
+    def __init__(self, economy: Economy):
+        # 每种建筑一个最小堆，保存各建筑的空闲时间
+        self.free_at: Dict[str, List[float]] = {name: [0.0] * count for name, count in economy.structures.items()}
+        self.finished: Dict[str, float] = {}  # 各项目最早完成时间
+        self.spent_minerals = 0.0
+        self.spent_gas = 0.0
+        self.supply = 0
+        self.now = 0.0  # 最近一项的开工时间
+        self.events: List[BuildEvent] = []
+
+    def copy(self) -> "BuildState":
+        state = BuildState.__new__(BuildState)
+        state.free_at = {name: list(queue) for name, queue in self.free_at.items()}
+        state.finished = dict(self.finished)
+        state.spent_minerals = self.spent_minerals
+        state.spent_gas = self.spent_gas
+        state.supply = self.supply
+        state.now = self.now
+        state.events = list(self.events)
+        return state
+
+    def start_time(self, item: BuildItem, economy: Economy) -> float:
+        """项目最早开工时间，无法建造时为inf"""
+        queue = self.free_at.get(item.structure)
+        if not queue or self.supply + item.supply > economy.supply_cap:
+            return float("inf")
+        if item.requires is not None and item.requires not in self.finished:
+            return float("inf")
+        return max(
+            self.now,
+            _resource_time(item.minerals, economy.minerals, economy.mineral_rate, self.spent_minerals, self.now),
+            _resource_time(item.gas, economy.gas, economy.gas_rate, self.spent_gas, self.now),
+            queue[0],
+            self.finished.get(item.requires, 0.0),
+        )
+
+    def add(self, item: BuildItem, economy: Economy) -> bool:
+        """开工一个项目
+
+        Returns:
+            是否能够建造
+        """
+        start = self.start_time(item, economy)
+        if start == float("inf"):
+            return False
+        finish = start + item.time
+        heapq.heapreplace(self.free_at[item.structure], finish)
+        self.spent_minerals += item.minerals
+        self.spent_gas += item.gas
+        self.supply += item.supply
+        self.finished[item.name] = min(finish, self.finished.get(item.name, finish))
+        self.events.append(BuildEvent(item.name, start, finish))
+        self.now = start
+        return True
+
+
+def simulate_build_order(build_order: Sequence[str], economy: Optional[Economy] = None,
+                         catalog: Optional[Dict[str, BuildItem]] = None) -> BuildResult:
+    """按顺序模拟建造
+
+    项目严格按顺序开工（后一项不会早于前一项开工），每项在资源足够、
+    对应建筑空闲且前置完成后立即开工。
+
+    Args:
+        build_order: 项目名列表
+        economy: 经济参数
+        catalog: 项目表，默认为item_catalog()
+
+    Returns:
+        模拟结果
+    """
+    economy = economy or Economy()
+    catalog = catalog or item_catalog()
+    state = BuildState(economy)
+    for name in build_order:
+        if not state.add(catalog[name], economy):
+            return BuildResult(state.events, feasible=False)
+    return BuildResult(state.events)
+
+
+@lru_cache(maxsize=None)
+def per_reaper_dps(key: str) -> np.ndarray:
+    """每个(攻击升级, 是否有渡鸦buff)组合的单兵DPS表"""
+    return np.array([[calculate_reaper_dps(level, buff)[key] for buff in (False, True)]
+                     for level in range(4)])
+
+
+def dps_curve(result: BuildResult, times: Sequence[float], target_type: str = "轻甲") -> np.ndarray:
+    """根据建造结果计算死神部队DPS随时间的变化
+
+    Args:
+        result: 建造模拟结果
+        times: 时间采样点
+        target_type: 轻甲或重甲
+
+    Returns:
+        各时间点的DPS
+    """
+    times = np.asarray(times, dtype=np.float64)
+    key = "heavy_armor" if target_type == "重甲" else "light_armor"
+
+    reapers = np.searchsorted(result.completion_times("reaper"), times, side="right")
+    ravens = result.completion_times("raven")
+    has_raven = times >= ravens[0] if ravens else np.zeros(len(times), dtype=bool)
+    attack_level = np.zeros(len(times), dtype=np.int64)
+    for level in range(1, 4):
+        done = result.completion_times(f"attack_{level}")
+        if done:
+            attack_level[times >= done[0]] = level
+
+    return reapers * per_reaper_dps(key)[attack_level, has_raven.astype(np.int64)]
+
+
+def simulate_many(build_orders: Sequence[Sequence[str]], deadline: float,
+                  economy: Optional[Economy] = None, target_type: str = "轻甲") -> np.ndarray:
+    """批量评估建造顺序在截止时间的DPS
+
+    Returns:
+        每条建造顺序在deadline时的DPS（不可行的为-inf）
+    """
+    economy = economy or Economy()
+    catalog = item_catalog()
+    scores = np.empty(len(build_orders))
+    for i, order in enumerate(build_orders):
+        result = simulate_build_order(order, economy, catalog)
+        scores[i] = dps_curve(result, [deadline], target_type)[0] if result.feasible else -np.inf
+    return scores
+
+
+def format_timeline(result: BuildResult) -> str:
+    """格式化建造时间线"""
+    lines = []
+    for e in result.events:
+        lines.append(f"{int(e.start) // 60}:{int(e.start) % 60:02d} - {int(e.finish) // 60}:{int(e.finish) % 60:02d}  {e.name}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    economy = Economy(mineral_rate=20, gas_rate=8, structures={"barracks": 2, "starport": 1, "engineering_bay": 1})
+    order = ["reaper"] * 4 + ["attack_1"] + ["reaper"] * 4 + ["raven"] + ["reaper"] * 8
+    result = simulate_build_order(order, economy)
+    print(format_timeline(result))
+    times = np.arange(0, 601, 60)
+    for t, dps in zip(times, dps_curve(result, times)):
+        print(f"{int(t) // 60}:00  DPS {dps:.1f}")
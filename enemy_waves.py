@@ -0,0 +1,257 @@
+"""敌方波次目录
+
+目标不再是临时写的 ("普通"/"轻甲"/"重甲", 护甲) 字符串，而是 data/waves/*.json 中定义的
+敌方单位（生命值、护甲、标签、空中/地面）和波次（各单位数量）。
+
+加载时为所有部队上下文（护甲减免 × 光环组合）预先算好稠密矩阵：
+    单兵DPS[上下文, 我方单位, 波次条目]
+条目是某一波中的某种敌方单位。武器对带多个标签的敌人取伤害最高的标签，
+不能对空/对地的武器对相应条目DPS为0。之后任意部队对任意波次的评估都只是矩阵乘法：
+    DPS[部队, 条目] = 数量[部队] @ 单兵DPS[上下文(部队)]
+    清场时间[部队, 波次] = Σ_条目 ∈ 波次 数量 × 生命值 / DPS    （依次集火，不计溢出伤害）
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+import glob
+import itertools
+import json
+import os
+
+import numpy as np
+
+from army import (AURAS, DEFAULT_MODIFIERS, DEFAULT_TARGET_TYPE, Army, ArmyContext, Modifier, UnitCatalog,
+                  army_contexts, default_catalog, unit_dps_table)
+from profiling import profiled
+from survivability import EnemyProfile
+from unit_data import DATA_DIR, SCHEMA_VERSION, check_field, check_record
+
+WAVES_DIR = os.path.join(DATA_DIR, "waves")
+
+# 决定伤害加成和护甲类型的标签（按优先级）
+ARMOR_TAGS = ("重甲", "轻甲")
+
+# 敌方单位字段模式：字段名 -> (类型, 默认值)，默认值为None表示必填
+WAVE_UNIT_SCHEMA: Dict[str, Tuple[type, object]] = {
+    "hp": (float, None),
+    "armor": (int, 0),
+    "cooldown": (float, 1.0),
+    "multi_attack": (int, 1),
+    "is_air": (bool, False),
+    "can_attack_air": (bool, True),
+    "can_attack_ground": (bool, True),
+}
+
+
+@dataclass(frozen=True)
+class WaveUnit:
+    """敌方单位类型"""
+    name: str
+    hp: float
+    armor: int = 0
+    tags: Tuple[str, ...] = ()
+    is_air: bool = False
+    damage: Dict[str, float] = field(default_factory=dict)  # 护甲类型 -> 每次命中伤害，"普通"为默认值
+    cooldown: float = 1.0
+    multi_attack: int = 1
+    can_attack_air: bool = True
+    can_attack_ground: bool = True
+
+    @property
+    def armor_type(self) -> str:
+        return next((t for t in ARMOR_TAGS if t in self.tags), DEFAULT_TARGET_TYPE)
+
+    def enemy(self, count: int = 1) -> EnemyProfile:
+        """转换为生存能力模型使用的敌方火力"""
+        return EnemyProfile(self.name, dict(self.damage), self.cooldown, count, self.multi_attack,
+                            self.can_attack_air, self.can_attack_ground, self.hp, self.armor, self.armor_type)
+
+
+@dataclass(frozen=True)
+class Wave:
+    """一波敌人：各单位类型及数量"""
+    name: str
+    units: Tuple[Tuple[WaveUnit, int], ...]
+
+    @property
+    def total_hp(self) -> float:
+        return sum(unit.hp * count for unit, count in self.units)
+
+    def enemies(self) -> Tuple[EnemyProfile, ...]:
+        """整波敌人作为一个混合敌方火力（可直接用于 survivability / lanchester）"""
+        return tuple(unit.enemy(count) for unit, count in self.units)
+
+
+def validate_waves(document: Dict, source: str = "<waves>") -> Dict:
+    """校验波次文件
+
+    Raises:
+        ValueError: 数据不符合模式
+    """
+    if document.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"{source}: schema_version应为{SCHEMA_VERSION}")
+    units = document.get("units", {})
+    for name, record in units.items():
+        path = f"{source}:units.{name}"
+        check_record(path, record, WAVE_UNIT_SCHEMA, extra=("tags", "damage"))
+        if not isinstance(record.get("tags", []), list) or not all(isinstance(t, str) for t in record.get("tags", [])):
+            raise ValueError(f"{path}.tags: 应为字符串列表")
+        for armor_type, damage in record.get("damage", {}).items():
+            check_field(f"{path}.damage.{armor_type}", damage, float)
+    for wave, members in document.get("waves", {}).items():
+        if not isinstance(members, dict) or not members:
+            raise ValueError(f"{source}:waves.{wave}: 应为非空对象")
+        for name, count in members.items():
+            if name not in units:
+                raise ValueError(f"{source}:waves.{wave}: 未知单位 {name}")
+            check_field(f"{source}:waves.{wave}.{name}", count, int)
+            if count <= 0:
+                raise ValueError(f"{source}:waves.{wave}.{name}: 数量应为正整数，实际为{count}")
+    return document
+
+
+def _parse(document: Dict) -> List[Wave]:
+    units = {}
+    for name, record in document.get("units", {}).items():
+        values = check_record(name, record, WAVE_UNIT_SCHEMA, extra=("tags", "damage"))
+        units[name] = WaveUnit(name, tags=tuple(record.get("tags", ())),
+                               damage={k: float(v) for k, v in record.get("damage", {}).items()}, **values)
+    return [Wave(name, tuple((units[unit], count) for unit, count in members.items()))
+            for name, members in document.get("waves", {}).items()]
+
+
+def load_wave_definitions(waves_dir: str = WAVES_DIR) -> List[Wave]:
+    """读取目录下所有波次文件（按文件名顺序）"""
+    waves = []
+    for path in sorted(glob.glob(os.path.join(waves_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            waves.extend(_parse(validate_waves(json.load(f), os.path.basename(path))))
+    return waves
+
+
+def all_contexts(catalog: UnitCatalog) -> List[ArmyContext]:
+    """目录中所有可能出现的部队上下文"""
+    reductions = sorted({0, *(int(r) for r in catalog.armor_reduction)})
+    aura_sets = [frozenset(c) for n in range(len(AURAS) + 1) for c in itertools.combinations(AURAS, n)]
+    return [ArmyContext(r, a) for r in reductions for a in aura_sets]
+
+
+@dataclass
+class WaveReport:
+    """部队对波次的评估结果"""
+    waves: List[str]
+    dps: np.ndarray  # (部队数, 条目数) 对每个条目中单个敌人的部队DPS
+    clear_time: np.ndarray  # (部队数, 波次数) 清场时间（秒），有打不到的敌人时为inf
+    effective_dps: np.ndarray  # (部队数, 波次数) 整波总生命值 / 清场时间
+
+
+class WaveCatalog:
+    """波次目录与预计算的单兵DPS矩阵"""
+    def __init__(self, waves: Sequence[Wave], catalog: Optional[UnitCatalog] = None,
+                 modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS):
+        self.waves = list(waves)
+        self.catalog = catalog or default_catalog()
+        self.index = {w.name: i for i, w in enumerate(self.waves)}
+        entries = [(w, unit, count) for w in range(len(self.waves)) for unit, count in self.waves[w].units]
+        self.entry_wave = np.array([w for w, _, _ in entries], dtype=np.int64)
+        self.entry_units = [unit for _, unit, _ in entries]
+        self.entry_hp = np.array([unit.hp * count for _, unit, count in entries], dtype=np.float64)
+        self.wave_starts = np.searchsorted(self.entry_wave, np.arange(len(self.waves)))
+        self.wave_hp = np.add.reduceat(self.entry_hp, self.wave_starts) if entries else np.zeros(0)
+
+        # 每个条目展开为 (标签, 护甲) 目标，单兵DPS取各标签中的最大值
+        targets, owners = [], []
+        for e, unit in enumerate(self.entry_units):
+            for tag in (DEFAULT_TARGET_TYPE,) + unit.tags:
+                targets.append((tag, unit.armor))
+                owners.append(e)
+        starts = np.searchsorted(owners, np.arange(len(entries)))
+        profiles = self.catalog.profiles
+        reachable = np.array([[(p.can_attack_air if unit.is_air else p.can_attack_ground) for unit in self.entry_units]
+                              for p in profiles], dtype=bool).reshape(len(profiles), len(entries))
+        self.contexts = all_contexts(self.catalog)
+        self._context_index = {c: i for i, c in enumerate(self.contexts)}
+        self.matrices = np.stack([
+            np.where(reachable, np.maximum.reduceat(unit_dps_table(self.catalog, c, targets, modifiers), starts, axis=1), 0.0)
+            for c in self.contexts]) if entries else np.zeros((len(self.contexts), len(profiles), 0))
+
+    def __len__(self) -> int:
+        return len(self.waves)
+
+    def wave(self, name: str) -> Wave:
+        """Raises:
+            KeyError: 未知波次
+        """
+        if name not in self.index:
+            raise KeyError(f"未知波次 {name}，可选 {list(self.index)}")
+        return self.waves[self.index[name]]
+
+    @profiled
+    def dps(self, counts: np.ndarray) -> np.ndarray:
+        """部队对每个条目中单个敌人的DPS
+
+        Args:
+            counts: (部队数, 单位数) 数量矩阵，列顺序与目录一致
+
+        Returns:
+            (部队数, 条目数)
+        """
+        counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+        contexts, context_index = army_contexts(counts, self.catalog)
+        result = np.empty((len(counts), self.matrices.shape[2]))
+        for c, context in enumerate(contexts):
+            rows = context_index == c
+            result[rows] = counts[rows] @ self.matrices[self._context_index[context]]
+        return result
+
+    def evaluate(self, counts: np.ndarray) -> WaveReport:
+        """部队对所有波次的DPS与清场时间"""
+        dps = self.dps(counts)
+        with np.errstate(divide="ignore"):
+            entry_time = np.where(dps > 0, self.entry_hp / np.where(dps > 0, dps, 1), np.inf)
+        clear_time = np.add.reduceat(entry_time, self.wave_starts, axis=1)
+        with np.errstate(divide="ignore"):
+            effective = self.wave_hp / clear_time
+        return WaveReport([w.name for w in self.waves], dps, clear_time, effective)
+
+    def evaluate_armies(self, armies: Sequence[Army]) -> WaveReport:
+        counts = np.array([self.catalog.vector(a.units) for a in armies]).reshape(len(armies), len(self.catalog))
+        return self.evaluate(counts)
+
+
+@lru_cache(maxsize=None)
+def default_waves() -> WaveCatalog:
+    """data/waves 中的波次目录（默认单位目录和修正层）"""
+    return WaveCatalog(load_wave_definitions())
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    catalog = default_waves()
+    print(f"加载{len(catalog)}波敌人、{len(catalog.entry_units)}个条目，"
+          f"预计算{len(catalog.contexts)}种上下文的DPS矩阵，用时{(time.perf_counter() - start) * 1000:.1f}ms")
+
+    squads = [
+        Army({"ghost.FISSION_RIFLE": 5, "marine.STORM_RIFLE": 30}, "风暴裂解5+30"),
+        Army({"marine.HEAVY_LASER": 35}, "7枪重型激光炮"),
+        Army({"ghost.HELLFIRE": 35}, "7鬼炼狱火"),
+        Army({"reaper": 128, "raven": 1}, "死神船队"),
+    ]
+    report = catalog.evaluate_armies(squads)
+    print("\n清场时间（秒）: " + "  ".join(f"{w:>6}" for w in report.waves))
+    for army, times in zip(squads, report.clear_time):
+        print(f"{army.name:<10} " + "  ".join(f"{t:>8.1f}" if np.isfinite(t) else f"{'打不到':>6}" for t in times))
+
+    from army import composition_counts, expand_counts
+    keys = ["reaper", "raven", "marine.STORM_RIFLE", "ghost.FISSION_RIFLE", "ghost.HELLFIRE"]
+    counts = expand_counts(composition_counts(keys, 60, step=4), keys)
+    start = time.perf_counter()
+    report = catalog.evaluate(counts)
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(counts)}支部队 × {len(catalog)}波 = {report.clear_time.size}个组合，用时{elapsed * 1000:.1f}ms")
+    best = np.argmin(report.clear_time, axis=0)
+    for w, name in enumerate(report.waves):
+        units = " + ".join(f"{int(c)}{k}" for k, c in zip(keys, counts[best[w], [catalog.catalog.index[k] for k in keys]]) if c)
+        print(f"  {name}: 最快清场 {report.clear_time[best[w], w]:.1f}s  [{units}]")
@@ -0,0 +1,97 @@
+"""定点数伤害运算
+
+游戏内伤害按定点数结算，而DPS模型里 6.6/8.6 的升级加成、1.2 的托什倍率和
+2.0749999999999997 这样的攻击间隔都是浮点数：同一个编队换一种加法顺序，结果就会在
+最后几位不同，按结果做缓存键或按相等去重时会把相同的方案当成不同的。
+
+这里把伤害、护甲和攻击间隔都表示为以 1/SCALE 为单位的整数（int64 NumPy数组）：
+    定点值 = round(实际值 × SCALE)                  数据里的小数（最多4位）都能精确表示
+    倍率化为有理数 分子/分母，相乘后向下取整        如托什加成 1.2 = 6/5
+    护甲结算 max(伤害 - 护甲, 0.5)，0.5 = HALF       负护甲增伤不设下限
+    DPS = 每次伤害 × 命中次数 × SCALE // 攻击间隔    向下取整
+
+整数运算与加法顺序无关，相同输入总是得到相同的位模式，可以直接作为缓存键或按行去重；
+需要浮点数时用 from_fixed 转换（同一个整数总是转换为同一个浮点数）。
+"""
+from fractions import Fraction
+from typing import Tuple
+import math
+
+import numpy as np
+
+SCALE = 10_000  # 定点数精度：1/10000
+HALF = SCALE // 2  # 护甲结算后的最低伤害0.5
+MAX_DENOMINATOR = 1000  # 倍率有理化时的分母上限（吸收浮点误差，如1.2000000000000002 -> 6/5）
+RATIO_TOLERANCE = 1e-9  # 有理化前后允许的浮点误差
+
+
+def to_fixed(values) -> np.ndarray:
+    """实际值 -> 定点值（四舍五入到 1/SCALE）"""
+    return np.rint(np.asarray(values, dtype=np.float64) * SCALE).astype(np.int64)
+
+
+def from_fixed(values) -> np.ndarray:
+    """定点值 -> 实际值"""
+    return np.asarray(values, dtype=np.int64) / SCALE
+
+
+def ratio(multiplier: float) -> Tuple[int, int]:
+    """倍率 -> (分子, 分母)
+
+    只吸收浮点误差，不做近似：分母限制在 MAX_DENOMINATOR 以内后与原值不等的倍率直接报错。
+
+    Raises:
+        ValueError: 倍率为负，或无法用分母不超过 MAX_DENOMINATOR 的分数表示
+    """
+    if multiplier < 0:
+        raise ValueError(f"倍率不能为负: {multiplier}")
+    value = Fraction(multiplier).limit_denominator(MAX_DENOMINATOR)
+    if not math.isclose(float(value), multiplier, rel_tol=RATIO_TOLERANCE, abs_tol=RATIO_TOLERANCE):
+        raise ValueError(f"倍率无法用分母不超过{MAX_DENOMINATOR}的分数精确表示: {multiplier}")
+    return value.numerator, value.denominator
+
+
+def scale_by(values: np.ndarray, numerator, denominator) -> np.ndarray:
+    """定点值乘以有理倍率（向下取整），numerator/denominator可为可广播的数组"""
+    return np.asarray(values, dtype=np.int64) * numerator // denominator
+
+
+def armored_damage(damage: np.ndarray, armor: np.ndarray) -> np.ndarray:
+    """每次命中的护甲结算（定点）：正护甲减伤且最低0.5，负护甲增伤"""
+    reduced = damage - armor
+    return np.where(armor >= 0, np.maximum(HALF, reduced), reduced)
+
+
+def fixed_dps(per_hit: np.ndarray, attacks: np.ndarray, cooldown: np.ndarray) -> np.ndarray:
+    """单兵DPS（定点）
+
+    Args:
+        per_hit: (单位数, 目标数) 护甲结算后的每次命中伤害
+        attacks: (单位数,) 每次攻击命中次数
+        cooldown: (单位数,) 攻击间隔，0表示不攻击
+
+    Returns:
+        (单位数, 目标数) 单兵DPS，不攻击的单位为0
+    """
+    attacking = cooldown > 0
+    damage = per_hit * (attacks * attacking)[:, None] * SCALE
+    return damage // np.where(attacking, cooldown, 1)[:, None]
+
+
+def format_fixed(value: int, digits: int = 1) -> str:
+    """定点值的十进制文本"""
+    return f"{value / SCALE:.{digits}f}"
+
+
+if __name__ == "__main__":
+    # 浮点数：同样三个数换一种加法顺序结果不同
+    values = [0.1, 0.2, 0.3]
+    print(f"浮点数: {sum(values)!r} vs {sum(reversed(values))!r}")
+    fixed = to_fixed(values)
+    print(f"定点数: {int(fixed.sum())} vs {int(fixed[::-1].sum())}  -> {from_fixed(fixed.sum())}")
+
+    # 死神：(16 × 6/5 + 10) 对2甲，攻击间隔1.1
+    damage = scale_by(to_fixed([[16, 36]]), *ratio(1.2)) + to_fixed(10)
+    per_hit = armored_damage(damage, to_fixed(2))
+    dps = fixed_dps(per_hit, np.array([1]), to_fixed([1.1]))
+    print(f"死神每次伤害 {[format_fixed(v) for v in per_hit[0]]}，DPS {[format_fixed(v, 4) for v in dps[0]]}")
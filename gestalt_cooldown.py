@@ -0,0 +1,123 @@
+"""格式塔零攻击间隔模型
+
+预先计算 (武器 × 军衔 × 攻速buff层数) 的攻击间隔表，所有DPS计算都直接查表，
+保证各处结果一致。不在表中的基础间隔（rank_cooldown）使用同一组军衔倍率和buff除数、
+同样的层数上限和参数检查，结果与查表逐位相同。
+"""
+from enum import Enum
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+# 各军衔的攻击间隔倍率（只有三级军衔有0.83倍攻速加成）
+RANK_COOLDOWN_MULTIPLIER: Dict[int, float] = {1: 1.0, 2: 1.0, 3: 0.83}
+
+# 攻速buff每层提升的攻击速度，多层叠加后攻击间隔 = 间隔 / (1 + 层数 × 加成)
+ATTACK_SPEED_BONUS_PER_STACK = 0.1
+MAX_ATTACK_SPEED_STACKS = 5
+
+
+def _rank_multipliers(max_rank: int) -> np.ndarray:
+    """各军衔的攻击间隔倍率（0号位不使用）"""
+    return np.array([RANK_COOLDOWN_MULTIPLIER.get(r, 1.0) for r in range(max_rank + 1)])
+
+
+def _buff_divisors(max_stacks: int) -> np.ndarray:
+    """各攻速buff层数的攻击间隔除数"""
+    return 1 + np.arange(max_stacks + 1) * ATTACK_SPEED_BONUS_PER_STACK
+
+
+def _check_rank_stacks(rank: int, buff_stacks: int, max_rank: int):
+    if not 1 <= rank <= max_rank:
+        raise ValueError(f"军衔应在1-{max_rank}之间: {rank}")
+    if buff_stacks < 0:
+        raise ValueError(f"攻速buff层数不能为负: {buff_stacks}")
+
+
+_MAX_RANK = max(RANK_COOLDOWN_MULTIPLIER)
+_RANK_MULTIPLIERS = _rank_multipliers(_MAX_RANK)
+_BUFF_DIVISORS = _buff_divisors(MAX_ATTACK_SPEED_STACKS)
+
+
+def rank_cooldown(base_cooldown: float, rank: int, buff_stacks: int = 0) -> float:
+    """任意基础间隔的攻击间隔（自定义武器或修改过的属性使用，与查表结果一致）
+
+    Args:
+        base_cooldown: 基础攻击间隔
+        rank: 军衔等级
+        buff_stacks: 攻速buff层数（超过上限按上限计算）
+
+    Returns:
+        实际攻击间隔
+
+    Raises:
+        ValueError: 军衔不在1到最大军衔之间，或buff层数为负
+    """
+    _check_rank_stacks(rank, buff_stacks, _MAX_RANK)
+    return float(base_cooldown * _RANK_MULTIPLIERS[rank] / _BUFF_DIVISORS[min(buff_stacks, MAX_ATTACK_SPEED_STACKS)])
+
+
+def build_cooldown_table(base_cooldowns: Sequence[float],
+                         max_rank: int = 3,
+                         max_stacks: int = MAX_ATTACK_SPEED_STACKS) -> np.ndarray:
+    """构建攻击间隔表
+
+    Args:
+        base_cooldowns: 各武器的基础攻击间隔
+        max_rank: 最大军衔
+        max_stacks: 最大攻速buff层数
+
+    Returns:
+        形状为 (武器数, max_rank + 1, max_stacks + 1) 的攻击间隔表，军衔0号位不使用
+    """
+    base = np.asarray(base_cooldowns, dtype=np.float64)
+    return base[:, None, None] * _rank_multipliers(max_rank)[None, :, None] / _buff_divisors(max_stacks)[None, None, :]
+
+
+class CooldownTable:
+    """攻击间隔查找表"""
+    def __init__(self, weapons: List[Enum], base_cooldowns: Sequence[float],
+                 max_rank: int = 3, max_stacks: int = MAX_ATTACK_SPEED_STACKS):
+        self.weapons = weapons
+        self.index: Dict[Enum, int] = {w: i for i, w in enumerate(weapons)}
+        self.max_stacks = max_stacks
+        self.table = build_cooldown_table(base_cooldowns, max_rank, max_stacks)
+
+    def get(self, weapon_type: Enum, rank: int, buff_stacks: int = 0) -> float:
+        """查询攻击间隔
+
+        Args:
+            weapon_type: 武器类型
+            rank: 军衔等级
+            buff_stacks: 攻速buff层数（超过上限按上限计算）
+
+        Returns:
+            攻击间隔
+
+        Raises:
+            ValueError: 军衔不在1到最大军衔之间，或buff层数为负
+        """
+        _check_rank_stacks(rank, buff_stacks, self.table.shape[1] - 1)
+        stacks = min(buff_stacks, self.max_stacks)
+        return float(self.table[self.index[weapon_type], rank, stacks])
+
+
+_TABLE_CACHE: Dict[Tuple, CooldownTable] = {}
+
+
+def cooldown_table_for(weapons: Dict[Enum, object], max_rank: int = 3) -> CooldownTable:
+    """获取武器字典对应的攻击间隔表（相同属性的单位共享同一张表）
+
+    Args:
+        weapons: 武器类型 -> 武器属性（需有attack_speed字段）
+        max_rank: 最大军衔
+
+    Returns:
+        攻击间隔表
+    """
+    key = (max_rank,) + tuple((w, stats.attack_speed) for w, stats in weapons.items())
+    table = _TABLE_CACHE.get(key)
+    if table is None:
+        weapon_list = list(weapons)
+        table = CooldownTable(weapon_list, [weapons[w].attack_speed for w in weapon_list], max_rank)
+        _TABLE_CACHE[key] = table
+    return table
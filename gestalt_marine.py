@@ -1,7 +1,10 @@
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Optional, Dict
-import time
+from typing import List, Optional, Dict, Tuple
+from gestalt_cooldown import CooldownTable, cooldown_table_for, rank_cooldown
+from profiling import profiled
+from sim_clock import Clock, get_clock
+from unit_data import unit_attributes, unit_weapons
 
 class WeaponType(Enum):
     """武器类型枚举"""
@@ -12,6 +15,22 @@ class WeaponType(Enum):
     PUNISHER = "火神震击炮"  # 三级军衔
     HEAVY_LASER = "重型激光炮"  # 三级军衔
 
+# 各军衔可用武器（预先计算，军衔越高可用武器越多）
+RANK_WEAPONS: Dict[int, Tuple[WeaponType, ...]] = {
+    1: (WeaponType.ASSAULT_RIFLE, WeaponType.MISSILE_RIFLE),
+    2: (WeaponType.ASSAULT_RIFLE, WeaponType.MISSILE_RIFLE,
+        WeaponType.STORM_RIFLE, WeaponType.FLAMETHROWER),
+    3: (WeaponType.ASSAULT_RIFLE, WeaponType.MISSILE_RIFLE,
+        WeaponType.STORM_RIFLE, WeaponType.FLAMETHROWER,
+        WeaponType.PUNISHER, WeaponType.HEAVY_LASER),
+}
+
+# 武器位掩码：第i位表示WeaponType中第i个武器
+WEAPON_BITS: Dict[WeaponType, int] = {w: 1 << i for i, w in enumerate(WeaponType)}
+RANK_WEAPON_MASKS: Dict[int, int] = {
+    rank: sum(WEAPON_BITS[w] for w in weapons) for rank, weapons in RANK_WEAPONS.items()
+}
+
 @dataclass
 class WeaponStats:
     """武器属性"""
@@ -27,97 +46,67 @@ class WeaponStats:
 
 class GestaltMarine:
     """格式塔零先驱者类"""
-    def __init__(self):
-        # 基础属性
-        self.hp = 125  # 生命值
-        self.max_hp = 125  # 最大生命值
-        self.armor = 1  # 护甲值
-        self.armor_type = "轻甲"  # 护甲类型
-        self.movement_speed = 2.25  # 移动速度
+    @profiled
+    def __init__(self, clock: Optional[Clock] = None):
+        # 基础属性（来自 data/gestalt.json）
+        stats = unit_attributes("gestalt_marine")
+        self.hp = stats["hp"]  # 生命值
+        self.max_hp = stats["max_hp"]  # 最大生命值
+        self.armor = stats["armor"]  # 护甲值
+        self.armor_type = stats["armor_type"]  # 护甲类型
+        self.movement_speed = stats["movement_speed"]  # 移动速度
         
         # 军衔系统
         self.rank = 1  # 当前军衔
-        self.max_rank = 3  # 最大军衔
+        self.max_rank = stats["max_rank"]  # 最大军衔
         
         # 武器系统
-        self.weapons: Dict[WeaponType, WeaponStats] = {
-            WeaponType.ASSAULT_RIFLE: WeaponStats(
-                base_damage=14,
-                bonus_damage={},
-                attack_speed=0.7,
-                range=7
-            ),
-            WeaponType.MISSILE_RIFLE: WeaponStats(
-                base_damage=20,
-                bonus_damage={"重甲": 45},
-                attack_speed=1.4,
-                range=10
-            ),
-            WeaponType.STORM_RIFLE: WeaponStats(
-                base_damage=7,
-                bonus_damage={},
-                attack_speed=0.2,
-                range=6,
-                multi_attack=2
-            ),
-            WeaponType.FLAMETHROWER: WeaponStats(
-                base_damage=6,
-                bonus_damage={"轻甲": 9},
-                attack_speed=0.2,
-                range=5,
-                can_attack_air=False,
-                is_splash=True,
-                splash_radius=2
-            ),
-            WeaponType.PUNISHER: WeaponStats(
-                base_damage=35,
-                bonus_damage={"轻甲": 50},
-                attack_speed=1.0,
-                range=6
-            ),
-            WeaponType.HEAVY_LASER: WeaponStats(
-                base_damage=80,
-                bonus_damage={"重甲": 110},
-                attack_speed=2.5,
-                range=10
-            )
-        }
+        self.weapons: Dict[WeaponType, WeaponStats] = unit_weapons("gestalt_marine", WeaponType, WeaponStats)
         
         # 当前武器
         self.current_weapon = WeaponType.ASSAULT_RIFLE
         
         # 状态
-        self.last_update_time = time.time()
+        self.clock = clock or get_clock()
+        self.last_update_time = self.clock.now()
+
+    @property
+    def cooldowns(self) -> CooldownTable:
+        """攻击间隔表（按当前武器属性查找，相同属性的单位共享；修改attack_speed后自动换表）"""
+        return cooldown_table_for(self.weapons, self.max_rank)
 
     def get_available_weapons(self) -> List[WeaponType]:
         """获取当前军衔可用的武器"""
-        available = [WeaponType.ASSAULT_RIFLE]  # 初始武器始终可用
-        
-        if self.rank >= 1:
-            available.append(WeaponType.MISSILE_RIFLE)
-        
-        if self.rank >= 2:
-            available.extend([WeaponType.STORM_RIFLE, WeaponType.FLAMETHROWER])
-            
-        if self.rank >= 3:
-            available.extend([WeaponType.PUNISHER, WeaponType.HEAVY_LASER])
-            
-        return available
+        return list(RANK_WEAPONS[self.rank])
+
+    def get_attack_speed_with_rank(self, base_speed: float, buff_stacks: int = 0) -> float:
+        """计算包含军衔加成的攻击速度（与攻击间隔表使用同一组倍率）"""
+        return rank_cooldown(base_speed, self.rank, buff_stacks)
 
-    def get_attack_speed_with_rank(self, base_speed: float) -> float:
-        """计算包含军衔加成的攻击速度"""
-        # 三级军衔攻速加成为0.83倍
-        if base_speed <= 0.2:  # 如果基础攻速已经很快，则不再提升
-            return base_speed
-        return base_speed * 0.83
+    def get_weapon_cooldown(self, weapon_type: Optional[WeaponType] = None,
+                            buff_stacks: int = 0) -> float:
+        """查表获取武器当前军衔下的攻击间隔
+
+        Args:
+            weapon_type: 武器类型，默认为当前武器
+            buff_stacks: 攻速buff层数
+
+        Returns:
+            攻击间隔
+        """
+        if weapon_type is None:
+            weapon_type = self.current_weapon
+        return self.cooldowns.get(weapon_type, self.rank, buff_stacks)
 
+    @profiled
     def get_weapon_dps(self, weapon_type: Optional[WeaponType] = None, 
-                      target_type: str = "普通") -> float:
+                      target_type: str = "普通", buff_stacks: int = 0) -> float:
         """计算武器DPS
         
         Args:
             weapon_type: 要计算的武器类型，默认为当前武器
             target_type: 目标类型（普通/轻甲/重甲）
+            buff_stacks: 攻速buff层数
         
         Returns:
             DPS值
@@ -137,8 +126,8 @@ class GestaltMarine:
         # 多重攻击
         damage *= weapon.multi_attack
             
-        # 计算攻速
-        attack_speed = self.get_attack_speed_with_rank(weapon.attack_speed)
+        # 查表获取攻速
+        attack_speed = self.get_weapon_cooldown(weapon_type, buff_stacks)
         
         return damage / attack_speed
 
@@ -175,7 +164,7 @@ class GestaltMarine:
         status.append(f"当前武器: {self.current_weapon.value}")
         
         weapon = self.weapons[self.current_weapon]
-        attack_speed = self.get_attack_speed_with_rank(weapon.attack_speed)
+        attack_speed = self.get_weapon_cooldown()
         
         status.append(f"基础伤害: {weapon.base_damage}")
         if weapon.bonus_damage:
@@ -209,7 +198,7 @@ class GestaltMarine:
                     info.append(f"- 对{target}伤害: {damage}")
             if weapon.multi_attack > 1:
                 info.append(f"- 多重攻击: {weapon.multi_attack}次")
-            attack_speed = self.get_attack_speed_with_rank(weapon.attack_speed)
+            attack_speed = self.get_weapon_cooldown(weapon_type)
             info.append(f"- 攻击速度: {attack_speed:.2f}")
             info.append(f"- 射程: {weapon.range}")
             if weapon.is_splash:
@@ -0,0 +1,169 @@
+"""格式塔零军衔成长时间线模拟
+
+根据每个单位的升衔时间（或经验获取速率），一次性向量化计算整场任务中
+各单位的军衔、可用武器位掩码、最佳武器以及编队总DPS随时间的变化。
+"""
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional, Sequence, Type, Union
+import numpy as np
+
+import gestalt_ghost
+import gestalt_marine
+from gestalt_ghost import GestaltGhost
+from gestalt_marine import GestaltMarine
+
+GestaltUnit = Union[GestaltMarine, GestaltGhost]
+
+# 升到2级/3级所需的累计经验
+RANK_EXP_THRESHOLDS = (100.0, 300.0)
+
+# 单位类对应的武器表模块
+_UNIT_MODULES = {
+    GestaltMarine: gestalt_marine,
+    GestaltGhost: gestalt_ghost,
+}
+
+
+@dataclass
+class RankProfile:
+    """单位在各军衔下的预计算数据（下标为军衔，0号位不使用）"""
+    weapons: List[Enum]  # 武器列表，顺序与位掩码一致
+    masks: np.ndarray  # 各军衔可用武器位掩码
+    best_weapon: np.ndarray  # 各军衔最佳武器下标
+    best_dps: np.ndarray  # 各军衔最佳武器DPS
+
+
+@dataclass
+class RankTimeline:
+    """军衔时间线计算结果，单位维度在前、时间维度在后"""
+    times: np.ndarray  # 时间采样点 (T,)
+    ranks: np.ndarray  # 各单位军衔 (N, T)
+    available_masks: np.ndarray  # 各单位可用武器位掩码 (N, T)
+    best_weapon: np.ndarray  # 各单位最佳武器下标 (N, T)
+    unit_dps: np.ndarray  # 各单位DPS (N, T)
+    squad_dps: np.ndarray  # 编队总DPS (T,)
+    weapons: List[Enum]  # 武器下标对应的武器类型
+
+    def best_weapon_names(self, unit_index: int) -> List[str]:
+        """获取某个单位各时间点的最佳武器名称"""
+        return [self.weapons[i].value for i in self.best_weapon[unit_index]]
+
+
+def build_rank_profile(unit_cls: Type[GestaltUnit], target_type: str = "普通") -> RankProfile:
+    """预计算单位各军衔的可用武器掩码和最佳武器
+
+    Args:
+        unit_cls: 单位类（GestaltMarine/GestaltGhost）
+        target_type: 目标类型
+
+    Returns:
+        军衔预计算数据
+    """
+    module = _UNIT_MODULES[unit_cls]
+    weapons = list(module.WeaponType)
+    unit = unit_cls()
+    max_rank = unit.max_rank
+
+    masks = np.zeros(max_rank + 1, dtype=np.int64)
+    best_weapon = np.zeros(max_rank + 1, dtype=np.int64)
+    best_dps = np.zeros(max_rank + 1, dtype=np.float64)
+    for rank in range(1, max_rank + 1):
+        unit.rank = rank
+        masks[rank] = module.RANK_WEAPON_MASKS[rank]
+        dps = [unit.get_weapon_dps(w, target_type) for w in module.RANK_WEAPONS[rank]]
+        best = int(np.argmax(dps))
+        best_weapon[rank] = weapons.index(module.RANK_WEAPONS[rank][best])
+        best_dps[rank] = dps[best]
+
+    return RankProfile(weapons, masks, best_weapon, best_dps)
+
+
+def rank_up_times_from_exp(exp_rates: Sequence[float],
+                           start_times: Optional[Sequence[float]] = None,
+                           thresholds: Sequence[float] = RANK_EXP_THRESHOLDS) -> np.ndarray:
+    """根据经验获取速率计算升衔时间
+
+    Args:
+        exp_rates: 各单位每秒获得的经验
+        start_times: 各单位出场时间，默认为0
+        thresholds: 各级军衔所需的累计经验
+
+    Returns:
+        升衔时间 (N, 军衔数-1)，永远升不上去的为inf
+    """
+    rates = np.asarray(exp_rates, dtype=np.float64)
+    starts = np.zeros_like(rates) if start_times is None else np.asarray(start_times, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        delays = np.asarray(thresholds, dtype=np.float64)[None, :] / rates[:, None]
+    return starts[:, None] + delays
+
+
+def simulate_rank_timeline(unit_cls: Type[GestaltUnit],
+                           rank_up_times: np.ndarray,
+                           times: Sequence[float],
+                           target_type: str = "普通",
+                           profile: Optional[RankProfile] = None) -> RankTimeline:
+    """模拟一组同类单位的军衔成长时间线
+
+    Args:
+        unit_cls: 单位类
+        rank_up_times: 升衔时间 (N, 军衔数-1)，第k列为升到k+2级的时间
+        times: 时间采样点
+        target_type: 目标类型
+        profile: 预计算的军衔数据，默认按目标类型现算
+
+    Returns:
+        军衔时间线
+    """
+    if profile is None:
+        profile = build_rank_profile(unit_cls, target_type)
+    times = np.asarray(times, dtype=np.float64)
+    rank_up_times = np.atleast_2d(np.asarray(rank_up_times, dtype=np.float64))
+
+    # 分段函数：军衔 = 1 + 已经过的升衔时间点个数
+    ranks = 1 + (times[None, :, None] >= rank_up_times[:, None, :]).sum(axis=-1)
+    unit_dps = profile.best_dps[ranks]
+
+    return RankTimeline(
+        times=times,
+        ranks=ranks,
+        available_masks=profile.masks[ranks],
+        best_weapon=profile.best_weapon[ranks],
+        unit_dps=unit_dps,
+        squad_dps=unit_dps.sum(axis=0),
+        weapons=profile.weapons,
+    )
+
+
+def simulate_squad_timeline(groups: Dict[Type[GestaltUnit], np.ndarray],
+                            times: Sequence[float],
+                            target_type: str = "普通") -> np.ndarray:
+    """模拟混编编队的总DPS时间线
+
+    Args:
+        groups: 单位类 -> 升衔时间 (N, 军衔数-1)
+        times: 时间采样点
+        target_type: 目标类型
+
+    Returns:
+        编队总DPS (T,)
+    """
+    total = np.zeros(len(times), dtype=np.float64)
+    for unit_cls, rank_up_times in groups.items():
+        total += simulate_rank_timeline(unit_cls, rank_up_times, times, target_type).squad_dps
+    return total
+
+
+if __name__ == "__main__":
+    # 30个枪兵和5个鬼子，经验获取速率随机分布，模拟20分钟任务
+    rng = np.random.default_rng(0)
+    times = np.arange(0, 1201, 60)
+    marine_times = rank_up_times_from_exp(rng.uniform(0.2, 0.6, 30))
+    ghost_times = rank_up_times_from_exp(rng.uniform(0.2, 0.6, 5))
+
+    marines = simulate_rank_timeline(GestaltMarine, marine_times, times)
+    print("枪兵1号最佳武器变化:", marines.best_weapon_names(0))
+    squad = simulate_squad_timeline({GestaltMarine: marine_times, GestaltGhost: ghost_times}, times)
+    for t, dps in zip(times, squad):
+        print(f"{t:5.0f}秒: 编队DPS {dps:.1f}")
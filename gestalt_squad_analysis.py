@@ -1,10 +1,16 @@
 from gestalt_ghost import GestaltGhost, WeaponType as GhostWeapon
 from gestalt_marine import GestaltMarine, WeaponType as MarineWeapon
+from army import Army, evaluate_armies
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 import platform
 
+from chart_render import ChartSpec, NoteBox, RenderOptions, Series, output_paths, render_chart
+from profiling import profiled
+from result_cache import cached_figure
+from tosh_reaper_squad_analysis import TOSH_DAMAGE_MULTIPLIER
+
 # 设置中文字体
 if platform.system() == 'Darwin':  # macOS
     plt.rcParams['font.family'] = ['Arial Unicode MS']
@@ -20,6 +26,11 @@ BYTEDANCE_COLORS = {
     'gray': '#1C1C1E'
 }
 
+# 攻击间隔表（三级军衔数据在所有DPS计算中共用）
+MARINE_COOLDOWNS = GestaltMarine().cooldowns
+GHOST_COOLDOWNS = GestaltGhost().cooldowns
+
+@profiled
 def calculate_actual_damage(base_damage: float, target_armor: int, armor_reduction: int = 0) -> float:
     """计算考虑护甲后的实际伤害
     
@@ -38,6 +49,7 @@ def calculate_actual_damage(base_damage: float, target_armor: int, armor_reducti
         actual_damage = base_damage + abs(effective_armor)  # 负护甲增加伤害
     return actual_damage
 
+@profiled
 def calculate_squad_dps(ghost_count: int = 0, 
                        storm_marine_count: int = 0,
                        laser_marine_count: int = 0,
@@ -68,7 +80,7 @@ def calculate_squad_dps(ghost_count: int = 0,
         
         # 裂解步枪是固定伤害，不受护甲影响
         actual_damage = base_damage
-        attack_speed = ghost.get_attack_speed_with_rank(weapon.attack_speed)
+        attack_speed = ghost.get_weapon_cooldown(GhostWeapon.FISSION_RIFLE)
         actual_dps = actual_damage / attack_speed
         total_dps += actual_dps * ghost_count
         
@@ -95,7 +107,7 @@ def calculate_squad_dps(ghost_count: int = 0,
         base_damage *= weapon.multi_attack
         
         actual_damage = calculate_actual_damage(base_damage, target_armor, armor_reduction)
-        attack_speed = marine.get_attack_speed_with_rank(weapon.attack_speed)
+        attack_speed = marine.get_weapon_cooldown(MarineWeapon.STORM_RIFLE)
         actual_dps = actual_damage / attack_speed
         total_dps += actual_dps * storm_marine_count
         
@@ -118,7 +130,7 @@ def calculate_squad_dps(ghost_count: int = 0,
             base_damage = weapon.bonus_damage[target_type]
             
         actual_damage = calculate_actual_damage(base_damage, target_armor, armor_reduction)
-        attack_speed = marine.get_attack_speed_with_rank(weapon.attack_speed)
+        attack_speed = marine.get_weapon_cooldown(MarineWeapon.HEAVY_LASER)
         actual_dps = actual_damage / attack_speed
         total_dps += actual_dps * laser_marine_count
         
@@ -171,19 +183,22 @@ def calculate_hellfire_ghost_dps(target_armor: int, is_mechanical: bool = False)
         DPS值
     """
     base_damage = 100.0 if is_mechanical else 60.0  # 对机械单位100伤害，普通单位60伤害
-    attack_speed = 0.83  # 3级军衔的攻击速度
+    attack_speed = GHOST_COOLDOWNS.get(GhostWeapon.HELLFIRE, 3)  # 3级军衔的攻击速度
     if target_armor >= 0:
         actual_damage = max(0.5, base_damage - target_armor)
     else:
         actual_damage = base_damage + abs(target_armor)
     return actual_damage / attack_speed
 
-def calculate_reaper_dps(target_armor: int, target_type: str = "普通") -> float:
+@profiled
+def calculate_reaper_dps(target_armor: int, target_type: str = "普通",
+                         damage_multiplier: float = TOSH_DAMAGE_MULTIPLIER) -> float:
     """计算单个死神的DPS
     
     Args:
         target_armor: 目标护甲值
         target_type: 目标类型（普通/轻甲）
+        damage_multiplier: 托什指挥官伤害倍率（与 tosh_reaper_squad_analysis.calculate_reaper_dps 相同）
         
     Returns:
         DPS值
@@ -194,9 +209,8 @@ def calculate_reaper_dps(target_armor: int, target_type: str = "普通") -> floa
     else:
         base_damage = 8   # 对普通目标的基础伤害
     
-    # 托什20%加成（作用在基础值上）
-    tosh_bonus = base_damage * 0.2
-    total_base = base_damage + tosh_bonus
+    # 托什伤害倍率（作用在基础值上）
+    total_base = base_damage * damage_multiplier
     
     # 安全力场加成（+5点固定伤害）
     total_damage = total_base + 5
@@ -230,161 +244,68 @@ def calculate_reaper_squad_dps(target_armor: int) -> tuple[float, float]:
     light_dps = calculate_reaper_dps(target_armor, "轻甲") * 128
     return normal_dps, light_dps
 
+@profiled
+@cached_figure('格式塔零和托什不同部队组合DPS对比.png', '格式塔零和托什不同部队组合相对DPS对比.png',
+               modules=('gestalt_marine', 'gestalt_ghost', 'gestalt_cooldown', 'army', 'chart_render'),
+               stats=lambda: (GestaltMarine().weapons, GestaltGhost().weapons),
+               options=RenderOptions, expand=output_paths)
 def plot_dps_comparison():
     """绘制不同护甲值下的DPS对比图"""
-    # 准备数据
+    # 准备数据（所有编队用同一个批量内核计算）
     armor_values = np.arange(0, 9, 1)  # 护甲范围0-8
-    squad1_normal = []
-    squad1_heavy = []
-    squad2_normal = []
-    squad2_heavy = []
-    squad3_normal = []
-    squad3_mechanical = []
-    reaper_normal_dps = []
-    reaper_light_dps = []
+    squads = [
+        Army({"ghost.FISSION_RIFLE": 5, "marine.STORM_RIFLE": 30}),  # 5个鬼子和30个枪兵
+        Army({"marine.HEAVY_LASER": 35}),  # 35个重激光
+        Army({"ghost.HELLFIRE": 35}),  # 35个炼狱火鬼兵
+        Army({"reaper": 128, "raven": 1}),  # 128个死神（安全力场）
+    ]
+    target_types = ("普通", "重甲", "机械", "轻甲")
+    targets = [(t, int(a)) for t in target_types for a in armor_values]
+    dps = evaluate_armies(squads, targets).reshape(len(squads), len(target_types), len(armor_values))
+    squad1_normal, squad1_heavy = dps[0, 0], dps[0, 1]
+    squad2_normal, squad2_heavy = dps[1, 0], dps[1, 1]
+    squad3_normal, squad3_mechanical = dps[2, 0], dps[2, 2]
+    reaper_normal_dps, reaper_light_dps = dps[3, 0], dps[3, 3]
 
-    for armor in armor_values:
-        # 计算编队1对普通目标的DPS
-        ghost_dps = calculate_ghost_dps(armor)
-        marine_dps = calculate_marine_dps(armor)
-        squad1_normal.append(ghost_dps * 5 + marine_dps * 30)  # 5个鬼子和30个枪兵
-        squad1_heavy.append(ghost_dps * 5 + marine_dps * 30)
+    # 每条曲线的数据、样式和图例（绝对DPS图的前几条带编队说明）
+    curves = [
+        (squad1_normal, '风暴裂解"5+30" vs普通目标', '\n(5裂解步枪鬼子+30风暴步枪枪兵)', '-', BYTEDANCE_COLORS['blue'], 'o', 6),
+        (squad1_heavy, '风暴裂解"5+30" vs重甲目标', '', '--', BYTEDANCE_COLORS['green'], 's', 6),
+        (squad2_normal, '7枪重型激光炮 vs普通目标', '\n(35重型激光炮枪兵)', '-', BYTEDANCE_COLORS['yellow'], '^', 6),
+        (squad2_heavy, '7枪重型激光炮 vs重甲目标', '', '--', BYTEDANCE_COLORS['red'], 'D', 6),
+        (squad3_normal, '7鬼炼狱火 vs普通目标', '\n(35炼狱火鬼兵)', '-', 'purple', '*', 8),
+        (squad3_mechanical, '7鬼炼狱火 vs机械目标', '', '--', 'darkviolet', 'p', 8),
+        (reaper_normal_dps, '托什死神船队 vs普通目标', '\n(128死神)', '-', 'brown', 'v', 6),
+        (reaper_light_dps, '托什死神船队 vs轻甲目标', '', '--', 'orange', '>', 6),
+    ]
 
-        # 计算编队2对普通目标的DPS
-        squad2_normal.append(calculate_heavy_laser_dps(armor, is_heavy_target=False) * 35)  # 35个重激光
-        squad2_heavy.append(calculate_heavy_laser_dps(armor, is_heavy_target=True) * 35)
+    # 绝对DPS图
+    series = [Series(label + detail, armor_values, values, color, style, 2.5, marker, markersize)
+              for values, label, detail, style, color, marker, markersize in curves]
+    # 死神曲线沿用原来的线宽
+    series[-2].linewidth = series[-1].linewidth = 2
+    spec = _comparison_chart(
+        '格式塔零和托什不同部队组合在不同护甲下的DPS对比\n', 'DPS输出', series,
+        '说明：\n- 裂解步枪提供4点护甲减免\n- 风暴步枪每次射击2发\n- 重激光对重甲伤害提升\n- 炼狱火对机械伤害提升\n- 死神满buff包含：\n  · 3级攻防升级\n  · 托什20%加成\n  · 5层安全力场')
+    render_chart(spec, '格式塔零和托什不同部队组合DPS对比.png')
 
-        # 计算编队3的DPS
-        hellfire_dps_normal = calculate_hellfire_ghost_dps(armor, is_mechanical=False)
-        hellfire_dps_mechanical = calculate_hellfire_ghost_dps(armor, is_mechanical=True)
-        squad3_normal.append(hellfire_dps_normal * 35)  # 35个炼狱火鬼兵
-        squad3_mechanical.append(hellfire_dps_mechanical * 35)
-        
-        # 计算死神编队DPS
-        normal, light = calculate_reaper_squad_dps(armor)
-        reaper_normal_dps.append(normal)
-        reaper_light_dps.append(light)
+    # 相对DPS图（每个编队以自己的最大DPS为基准）
+    series = [Series(label, armor_values, np.asarray(values) / np.max(values) * 100, color, style, 2.5, marker, markersize)
+              for values, label, _, style, color, marker, markersize in curves]
+    spec = _comparison_chart(
+        '格式塔零和托什不同部队组合在不同护甲下的相对DPS变化\n', '相对DPS (%)', series,
+        '说明：\n- 相对DPS = (当前DPS/最大DPS) × 100%\n- 每个编队以自己的最大DPS为基准\n- 展示不同护甲下DPS的相对变化',
+        ylim=(0, 105))  # 留出一些空间显示标签
+    render_chart(spec, '格式塔零和托什不同部队组合相对DPS对比.png')
 
-    # 创建图表
-    _, ax = plt.subplots(figsize=(12, 8))
-    
-    # 设置背景网格
-    ax.grid(True, linestyle='--', alpha=0.7)
-    ax.set_facecolor('#f0f0f0')
-    
-    # 绘制主要数据线
-    ax.plot(armor_values, squad1_normal, '-', label='风暴裂解"5+30" vs普通目标\n(5裂解步枪鬼子+30风暴步枪枪兵)', 
-            color=BYTEDANCE_COLORS['blue'], linewidth=2.5, marker='o', markersize=6)
-    ax.plot(armor_values, squad1_heavy, '--', label='风暴裂解"5+30" vs重甲目标', 
-            color=BYTEDANCE_COLORS['green'], linewidth=2.5, marker='s', markersize=6)
-    ax.plot(armor_values, squad2_normal, '-', label='7枪重型激光炮 vs普通目标\n(35重型激光炮枪兵)', 
-            color=BYTEDANCE_COLORS['yellow'], linewidth=2.5, marker='^', markersize=6)
-    ax.plot(armor_values, squad2_heavy, '--', label='7枪重型激光炮 vs重甲目标', 
-            color=BYTEDANCE_COLORS['red'], linewidth=2.5, marker='D', markersize=6)
-    ax.plot(armor_values, squad3_normal, '-', label='7鬼炼狱火 vs普通目标\n(35炼狱火鬼兵)', 
-            color='purple', linewidth=2.5, marker='*', markersize=8)
-    ax.plot(armor_values, squad3_mechanical, '--', label='7鬼炼狱火 vs机械目标', 
-            color='darkviolet', linewidth=2.5, marker='p', markersize=8)
-    # 添加死神编队DPS曲线
-    ax.plot(armor_values, reaper_normal_dps, color='brown', linestyle='-', marker='v', 
-            label='托什死神船队 vs普通目标\n(128死神)', linewidth=2)
-    ax.plot(armor_values, reaper_light_dps, color='orange', linestyle='--', marker='>', 
-            label='托什死神船队 vs轻甲目标', linewidth=2)
-    
-    # 设置坐标轴
-    ax.set_xlabel('敌方单位护甲值 (0到8)', fontsize=12, fontweight='bold')
-    ax.set_ylabel('DPS输出', fontsize=12, fontweight='bold')
-    
-    # 设置刻度
-    ax.tick_params(axis='both', which='major', labelsize=10)
-    
-    # 添加标题
-    ax.set_title('格式塔零和托什不同部队组合在不同护甲下的DPS对比\n', fontsize=14, fontweight='bold')
-    
-    # 添加图例和说明
-    # 先添加说明文本框
-    ax.text(1.02, 0.98, '说明：\n- 裂解步枪提供4点护甲减免\n- 风暴步枪每次射击2发\n- 重激光对重甲伤害提升\n- 炼狱火对机械伤害提升\n- 死神满buff包含：\n  · 3级攻防升级\n  · 托什20%加成\n  · 5层安全力场',
-            transform=ax.transAxes, fontsize=10, verticalalignment='top',
-            bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
-    
-    # 在说明下方添加图例
-    ax.legend(loc='center left', bbox_to_anchor=(1.02, 0.45), fontsize=10)
-    
-    # 调整布局以适应说明和图例
-    plt.subplots_adjust(right=0.8)
-    
-    # 保存图表
-    plt.savefig('格式塔零和托什不同部队组合DPS对比.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # 绘制相对DPS变化图
-    _, ax = plt.subplots(figsize=(12, 8))
-    
-    # 设置背景网格
-    ax.grid(True, linestyle='--', alpha=0.7)
-    ax.set_facecolor('#f0f0f0')
-    
-    # 计算相对DPS（每个编队以自己的最大DPS为基准）
-    squad1_normal_max = max(squad1_normal)
-    squad1_heavy_max = max(squad1_heavy)
-    squad2_normal_max = max(squad2_normal)
-    squad2_heavy_max = max(squad2_heavy)
-    squad3_normal_max = max(squad3_normal)
-    squad3_mechanical_max = max(squad3_mechanical)
-    reaper_normal_max = max(reaper_normal_dps)
-    reaper_light_max = max(reaper_light_dps)
-
-    squad1_normal_relative = [x/squad1_normal_max * 100 for x in squad1_normal]
-    squad1_heavy_relative = [x/squad1_heavy_max * 100 for x in squad1_heavy]
-    squad2_normal_relative = [x/squad2_normal_max * 100 for x in squad2_normal]
-    squad2_heavy_relative = [x/squad2_heavy_max * 100 for x in squad2_heavy]
-    squad3_normal_relative = [x/squad3_normal_max * 100 for x in squad3_normal]
-    squad3_mechanical_relative = [x/squad3_mechanical_max * 100 for x in squad3_mechanical]
-    reaper_normal_relative = [x/reaper_normal_max * 100 for x in reaper_normal_dps]
-    reaper_light_relative = [x/reaper_light_max * 100 for x in reaper_light_dps]
-
-    # 绘制相对DPS曲线
-    ax.plot(armor_values, squad1_normal_relative, '-', label='风暴裂解"5+30" vs普通目标', 
-            color=BYTEDANCE_COLORS['blue'], linewidth=2.5, marker='o', markersize=6)
-    ax.plot(armor_values, squad1_heavy_relative, '--', label='风暴裂解"5+30" vs重甲目标', 
-            color=BYTEDANCE_COLORS['green'], linewidth=2.5, marker='s', markersize=6)
-    ax.plot(armor_values, squad2_normal_relative, '-', label='7枪重型激光炮 vs普通目标', 
-            color=BYTEDANCE_COLORS['yellow'], linewidth=2.5, marker='^', markersize=6)
-    ax.plot(armor_values, squad2_heavy_relative, '--', label='7枪重型激光炮 vs重甲目标', 
-            color=BYTEDANCE_COLORS['red'], linewidth=2.5, marker='D', markersize=6)
-    ax.plot(armor_values, squad3_normal_relative, '-', label='7鬼炼狱火 vs普通目标', 
-            color='purple', linewidth=2.5, marker='*', markersize=8)
-    ax.plot(armor_values, squad3_mechanical_relative, '--', label='7鬼炼狱火 vs机械目标', 
-            color='darkviolet', linewidth=2.5, marker='p', markersize=8)
-    ax.plot(armor_values, reaper_normal_relative, '-', label='托什死神船队 vs普通目标', 
-            color='brown', linewidth=2.5, marker='v', markersize=6)
-    ax.plot(armor_values, reaper_light_relative, '--', label='托什死神船队 vs轻甲目标', 
-            color='orange', linewidth=2.5, marker='>', markersize=6)
-
-    # 设置坐标轴
-    ax.set_xlabel('敌方单位护甲值 (0到8)', fontsize=12, fontweight='bold')
-    ax.set_ylabel('相对DPS (%)', fontsize=12, fontweight='bold')
-    ax.set_ylim(0, 105)  # 设置y轴范围，留出一些空间显示标签
-    
-    # 设置刻度
-    ax.tick_params(axis='both', which='major', labelsize=10)
-    
-    # 添加标题
-    ax.set_title('格式塔零和托什不同部队组合在不同护甲下的相对DPS变化\n', fontsize=14, fontweight='bold')
-    
-    # 添加图例和说明
-    ax.text(1.02, 0.98, '说明：\n- 相对DPS = (当前DPS/最大DPS) × 100%\n- 每个编队以自己的最大DPS为基准\n- 展示不同护甲下DPS的相对变化',
-            transform=ax.transAxes, fontsize=10, verticalalignment='top',
-            bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
-    
-    ax.legend(loc='center left', bbox_to_anchor=(1.02, 0.45), fontsize=10)
-    
-    # 调整布局
-    plt.subplots_adjust(right=0.8)
-    
-    # 保存图表
-    plt.savefig('格式塔零和托什不同部队组合相对DPS对比.png', dpi=300, bbox_inches='tight')
-    plt.close()
+def _comparison_chart(title: str, ylabel: str, series: list, note: str, ylim: tuple = None) -> ChartSpec:
+    """护甲-DPS对比图的样式：说明文本框在坐标轴右侧，图例在说明下方"""
+    return ChartSpec(title, '敌方单位护甲值 (0到8)', ylabel, series,
+                     notes=[NoteBox(note, x=1.02, boxstyle='round')],
+                     axes_facecolor='#f0f0f0', title_fontsize=14, title_pad=6, label_fontsize=12,
+                     tick_fontsize=10, bold_labels=True, grid={'linestyle': '--', 'alpha': 0.7},
+                     legend={'loc': 'center left', 'bbox_to_anchor': (1.02, 0.45), 'fontsize': 10},
+                     ylim=ylim, right_margin=0.8)
 
 def calculate_ghost_dps(target_armor: int) -> float:
     """计算裂解步枪鬼子的DPS
@@ -396,7 +317,7 @@ def calculate_ghost_dps(target_armor: int) -> float:
         DPS值
     """
     base_damage = 12.0  # 固定伤害
-    attack_speed = 0.58  # 3级军衔攻速加成
+    attack_speed = GHOST_COOLDOWNS.get(GhostWeapon.FISSION_RIFLE, 3)  # 3级军衔攻速加成
     return base_damage / attack_speed  # 裂解步枪是固定伤害，不受护甲影响
 
 def calculate_marine_dps(target_armor: int) -> float:
@@ -409,7 +330,7 @@ def calculate_marine_dps(target_armor: int) -> float:
         DPS值
     """
     base_damage = 7.0  # 每发7伤害，每次射击2发
-    attack_speed = 0.20  # 3级军衔攻速加成
+    attack_speed = MARINE_COOLDOWNS.get(MarineWeapon.STORM_RIFLE, 3)  # 3级军衔攻速加成
     shots_per_attack = 2  # 每次射击2发
     effective_armor = target_armor - 4  # 受益于鬼子的护甲减免
     
@@ -430,7 +351,7 @@ def calculate_heavy_laser_dps(target_armor: int, is_heavy_target: bool = False)
         DPS值
     """
     base_damage = 110.0 if is_heavy_target else 80.0  # 对重甲伤害提升
-    attack_speed = 2.07  # 3级军衔攻速加成
+    attack_speed = MARINE_COOLDOWNS.get(MarineWeapon.HEAVY_LASER, 3)  # 3级军衔攻速加成
     
     if target_armor >= 0:
         actual_damage = max(0.5, base_damage - target_armor)
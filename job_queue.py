@@ -0,0 +1,647 @@
+"""后台任务队列
+
+大扫描、战斗模拟和整套图表（tosh_reaper_squad_analysis.main）要跑几十秒到几分钟，
+直接运行会占住终端且没有进度。这里把它们作为任务提交到本机的进程池：
+
+    - 任务按提交者（owner）轮转调度，多人共用一台机器时先提交大批任务的人不会占满所有工作进程
+    - 工作进程在计算过程中汇报进度和阶段性结果，调用方可以边算边看（JobQueue.watch / HTTP长轮询）
+    - 取消是协作式的：排队中的任务直接取消，运行中的任务在下一次汇报进度时结束
+    - 任务状态落盘，服务重启后未完成的任务重新排队
+
+任务目录（默认 .dps_jobs，环境变量 DPS_JOBS_DIR）：
+    <id>.json           任务记录（先写临时文件再替换）
+    <id>.events.jsonl   事件日志，每行一个JSON：状态变化由调度进程追加，进度由工作进程追加
+    <id>.cancel         取消标记，工作进程在汇报进度时检查
+    <id>/               任务写出的文件（如 tosh_charts 的图表）
+    runner.pid          持有该目录的调度进程，同一目录只允许一个调度进程
+
+任务类型见 JOB_KINDS，计算模块只在工作进程中导入，客户端导入本模块不会加载numpy和matplotlib。
+工作进程共享同一份内存映射的预计算DPS表（见 shared_tables），进程数增加时内存基本不变。
+通过 dps_service 的 /jobs 接口共享给多人使用，也可以在本地直接运行：
+    python job_queue.py pareto '{"keys": ["reaper", "raven", "medivac"], "supply": 200}'
+    python job_queue.py tosh_charts
+运行中按 Ctrl+C 取消任务。
+"""
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import contextlib
+import getpass
+import glob
+import inspect
+import io
+import json
+import multiprocessing
+import os
+import secrets
+import signal
+import sys
+import time
+
+JOBS_DIR = os.environ.get("DPS_JOBS_DIR", ".dps_jobs")
+JOB_WORKERS = 2  # 默认工作进程数
+POLL_INTERVAL = 0.2  # 调度进程读取事件日志的间隔（秒）
+PROGRESS_INTERVAL = 0.2  # 工作进程写进度事件的最小间隔（秒），带阶段性结果的事件不受限制
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = (DONE, FAILED, CANCELLED)
+
+
+def default_owner() -> str:
+    """当前用户名，作为任务默认的提交者"""
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return "default"
+
+
+class JobError(ValueError):
+    """任务类型或参数错误"""
+
+
+class JobCancelled(Exception):
+    """任务被取消（在工作进程中由 JobContext.progress 抛出）"""
+
+
+@dataclass
+class Job:
+    """任务记录"""
+    id: str
+    kind: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    owner: str = "default"
+    state: str = QUEUED
+    created: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    done: float = 0.0  # 进度
+    total: float = 0.0
+    message: str = ""
+    partial: Any = None  # 最近一次的阶段性结果
+    result: Any = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+
+    @property
+    def terminal(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        record = asdict(self)
+        if not include_result:
+            record.pop("result")
+            record.pop("partial")
+        return record
+
+
+# ---------------------------------------------------------------- 事件日志
+
+def _json_default(obj: Any) -> Any:
+    """numpy标量和数组转换为JSON类型"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"无法序列化 {type(obj).__name__}")
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+
+def append_event(path: str, event: Dict[str, Any]):
+    """追加一条事件（整行一次写入，调度进程和工作进程可以同时追加）"""
+    line = (_dumps({"time": time.time(), **event}) + "\n").encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def read_events(path: str, after: int = 0) -> List[Dict[str, Any]]:
+    """读取第after条之后的事件（忽略还没写完的最后一行）"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    lines = data.split(b"\n")[:-1]
+    return [json.loads(line) for line in lines[after:]]
+
+
+class JobContext:
+    """工作进程中传给任务函数的上下文"""
+    def __init__(self, directory: str, job_id: str):
+        directory = os.path.abspath(directory)
+        self.events_path = os.path.join(directory, f"{job_id}.events.jsonl")
+        self.cancel_path = os.path.join(directory, f"{job_id}.cancel")
+        self.output_dir = os.path.join(directory, job_id)  # 任务写出的文件（图表等）
+        self._last = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return os.path.exists(self.cancel_path)
+
+    def progress(self, done: float, total: float, message: str = "", partial: Any = None):
+        """汇报进度，可附带阶段性结果
+
+        Raises:
+            JobCancelled: 任务已被取消
+        """
+        if self.cancelled:
+            raise JobCancelled()
+        now = time.monotonic()
+        if partial is None and done < total and now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        event = {"type": "progress", "done": done, "total": total, "message": message}
+        if partial is not None:
+            event["partial"] = partial
+        append_event(self.events_path, event)
+
+
+# ---------------------------------------------------------------- 任务类型
+
+# 任务类型 -> 任务函数 func(ctx, **params)，返回值需可JSON序列化
+JOB_KINDS: Dict[str, Callable[..., Any]] = {}
+
+
+def job_kind(name: str):
+    """注册任务类型的装饰器"""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        JOB_KINDS[name] = func
+        return func
+    return decorator
+
+
+@job_kind("pareto")
+def _pareto_job(ctx: JobContext, keys: List[str] = ("reaper", "raven", "medivac"), supply: float = 200,
+                step: int = 1, attack_levels: List[int] = (0, 1, 2, 3), objectives: Optional[List[str]] = None,
+                limit: int = 50, exact: bool = False) -> Dict[str, Any]:
+    """帕累托前沿扫描，按编队块汇报进度"""
+    import pareto
+
+    table = pareto.explore(keys, supply, step, attack_levels, objectives=objectives,
+                           progress=lambda done, total: ctx.progress(done, total, "评估编队"), exact=exact)
+    table = table.sorted_by(table.objectives[0].name)
+    rows = list(table.records())
+    return {"candidates": table.candidates, "frontier": len(table), "rows": rows[:limit]}
+
+
+@job_kind("waves")
+def _waves_job(ctx: JobContext, keys: List[str] = ("reaper", "raven", "marine.STORM_RIFLE", "ghost.FISSION_RIFLE"),
+               supply: float = 100, step: int = 2, waves: Optional[List[str]] = None,
+               chunk_size: int = 20_000) -> Dict[str, Any]:
+    """按人口枚举编队，找出清场每一波最快的编队；每块汇报当前最优"""
+    import numpy as np
+    from army import composition_counts, expand_counts
+    from enemy_waves import default_waves
+
+    catalog = default_waves()
+    selected = [catalog.waves.index(catalog.wave(name)) for name in waves] if waves else list(range(len(catalog)))
+    compositions = composition_counts(keys, supply, step, catalog.catalog)
+    best_time = np.full(len(catalog), np.inf)
+    best_row = np.full(len(catalog), -1)
+
+    def best() -> Dict[str, Any]:
+        return {catalog.waves[w].name: {
+            "clear_time": float(best_time[w]) if np.isfinite(best_time[w]) else None,
+            "units": ({k: int(c) for k, c in zip(keys, compositions[best_row[w]]) if c} if best_row[w] >= 0 else {}),
+        } for w in selected}
+
+    for start in range(0, len(compositions), chunk_size):
+        block = compositions[start:start + chunk_size]
+        clear_time = catalog.evaluate(expand_counts(block, keys, catalog.catalog)).clear_time
+        rows = np.argmin(clear_time, axis=0)
+        times = clear_time[rows, np.arange(len(catalog))]
+        better = times < best_time
+        best_time[better] = times[better]
+        best_row[better] = start + rows[better]
+        ctx.progress(start + len(block), len(compositions), "评估编队", partial=best())
+    return {"compositions": len(compositions), "best": best()}
+
+
+@job_kind("battles")
+def _battles_job(ctx: JobContext, armies: List[Dict[str, Any]], waves: Optional[List[str]] = None,
+                 seeds: List[int] = (0,), max_time: float = 600.0) -> List[Dict[str, Any]]:
+    """部队 × 波次 × 随机种子的离散事件战斗模拟，每场战斗作为阶段性结果汇报
+
+    armies中每项为 {"units": {单位写法: 数量}, "name": 名称}
+    """
+    from army import Army
+    from battle_sim import simulate_battle
+    from enemy_waves import default_waves
+
+    catalog = default_waves()
+    wave_list = [catalog.wave(name) for name in waves] if waves else catalog.waves
+    army_list = [Army(a["units"], a.get("name", "")) for a in armies]
+    total = len(army_list) * len(wave_list) * len(seeds)
+    results = []
+    for army in army_list:
+        for wave in wave_list:
+            for seed in seeds:
+                battle = simulate_battle(army, wave.enemies(), catalog.catalog, seed=seed, max_time=max_time)
+                results.append({"army": army.name, "wave": wave.name, "seed": seed, "winner": battle.winner,
+                                "duration": battle.duration, "hp_fraction": battle.hp_fraction,
+                                "enemy_hp_fraction": battle.enemy_hp_fraction})
+                ctx.progress(len(results), total, f"{army.name} vs {wave.name}", partial=results[-1])
+    return results
+
+
+TOSH_CHARTS = ("死神船队DPS人口分析.png", "死神升级效率分析.png", "死神等人口DPS分析.png")
+
+
+@job_kind("tosh_charts")
+def _tosh_charts_job(ctx: JobContext, reaper_count: int = 30) -> Dict[str, Any]:
+    """死神分析报告和图表（tosh_reaper_squad_analysis.main 的各步骤），每步汇报一次"""
+    import tosh_reaper_squad_analysis as tosh
+
+    steps = [
+        ("升级收益", lambda: tosh.analyze_upgrade_benefits(reaper_count), None),
+        ("升级效率", lambda: tosh.analyze_upgrade_efficiency(reaper_count), None),
+        ("DPS人口曲线", lambda: tosh.plot_dps_supply_curves(ctx.output_dir), TOSH_CHARTS[0]),
+        ("升级效率曲线", lambda: tosh.plot_upgrade_efficiency_curves(ctx.output_dir), TOSH_CHARTS[1]),
+        ("等人口DPS曲线", lambda: tosh.plot_resource_equivalent_curves(ctx.output_dir), TOSH_CHARTS[2]),
+    ]
+    # 图片写到任务自己的输出目录，并发任务互不覆盖
+    os.makedirs(ctx.output_dir, exist_ok=True)
+    files = [os.path.join(ctx.output_dir, p) for p in TOSH_CHARTS]
+    report = io.StringIO()
+    for i, (name, step, output) in enumerate(steps):
+        ctx.progress(i, len(steps), name)
+        with contextlib.redirect_stdout(report):
+            step()
+        ctx.progress(i + 1, len(steps), name,
+                     partial={"file": files[TOSH_CHARTS.index(output)]} if output else None)
+    return {"report": report.getvalue(), "files": files}
+
+
+def _prepare_tables():
+    """调度进程在创建进程池前生成（或确认）共享的预计算DPS表并打开内存映射，工作进程启动时不再计算"""
+    import shared_tables
+    shared_tables.ensure_tables()
+    shared_tables.load_shared_table()
+
+
+def _init_worker():
+    """工作进程忽略Ctrl+C（由调度进程通过取消标记结束任务），并以只读方式挂载共享DPS表"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import shared_tables
+    shared_tables.attach()
+
+
+def _run_job(directory: str, job_id: str, kind: str, params: Dict[str, Any]) -> Tuple[str, Any]:
+    """在工作进程中执行任务
+
+    Returns:
+        (结束状态, 结果或错误信息)
+    """
+    ctx = JobContext(directory, job_id)
+    try:
+        # 计算函数的打印输出在工作进程中丢弃
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = JOB_KINDS[kind](ctx, **params)
+        return DONE, json.loads(_dumps(result))
+    except JobCancelled:
+        return CANCELLED, None
+    except Exception as e:
+        return FAILED, f"{type(e).__name__}: {e}"
+
+
+# ---------------------------------------------------------------- 调度
+
+class JobQueue:
+    """任务队列（在asyncio事件循环中调度，任务在进程池中执行）"""
+    def __init__(self, directory: str = JOBS_DIR, workers: int = JOB_WORKERS, poll: float = POLL_INTERVAL):
+        self.directory = os.path.abspath(directory)  # 工作进程与调度进程的工作目录可能不同
+        self.workers = workers
+        self.poll = poll
+        self.jobs: Dict[str, Job] = {}
+        self.pending: "OrderedDict[str, Deque[str]]" = OrderedDict()  # 提交者 -> 排队任务，轮转调度
+        self.running: Dict[str, asyncio.Task] = {}
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._absorbed: Dict[str, int] = {}  # 已读取的事件条数
+        self._stopping = False
+
+    # ------------------------------------------------------------ 生命周期
+
+    async def start(self):
+        """占用任务目录，加载已有任务，未完成的重新排队
+
+        Raises:
+            RuntimeError: 目录已被其他调度进程占用
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock()
+        await asyncio.get_running_loop().run_in_executor(None, _prepare_tables)
+        # forkserver：工作进程不继承服务已打开的客户端连接
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            mp_context=multiprocessing.get_context("forkserver"))
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            with open(path, encoding="utf-8") as f:
+                job = Job(**json.load(f))
+            self.jobs[job.id] = job
+            self._absorbed[job.id] = len(read_events(self._events_path(job.id)))
+            if job.state == RUNNING:
+                # 上次运行中被中断的任务从头开始
+                self._remove(self._cancel_path(job.id))
+                job.started = None
+                job.cancel_requested = False
+                self._transition(job, QUEUED, "重启后重新排队")
+        for job in sorted(self.jobs.values(), key=lambda j: j.created):
+            if job.state == QUEUED:
+                self.pending.setdefault(job.owner, deque()).append(job.id)
+        self._schedule()
+
+    async def stop(self):
+        """停止调度：运行中的任务在下一次汇报进度时结束，并保持排队状态以便下次启动继续"""
+        self._stopping = True
+        for job_id in self.running:
+            open(self._cancel_path(job_id), "w").close()
+        if self.running:
+            await asyncio.wait(list(self.running.values()))
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+        self._remove(os.path.join(self.directory, "runner.pid"))
+
+    def _lock(self):
+        path = os.path.join(self.directory, "runner.pid")
+        try:
+            with open(path) as f:
+                pid = int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            pid = 0
+        if pid and pid != os.getpid():
+            try:
+                os.kill(pid, 0)
+                alive = True
+            except ProcessLookupError:
+                alive = False
+            except PermissionError:  # 其他用户的进程
+                alive = True
+            if alive:
+                raise RuntimeError(f"任务目录 {self.directory} 已被进程{pid}使用")
+        with open(path, "w") as f:
+            f.write(str(os.getpid()))
+
+    # ------------------------------------------------------------ 提交与查询
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None, owner: Optional[str] = None) -> Job:
+        """提交任务
+
+        Args:
+            kind: 任务类型（见 JOB_KINDS）
+            params: 任务函数的参数
+            owner: 提交者，默认当前用户
+
+        Returns:
+            新任务
+
+        Raises:
+            JobError: 未知任务类型或参数不匹配
+        """
+        params = dict(params or {})
+        if kind not in JOB_KINDS:
+            raise JobError(f"未知任务类型: {kind}，可选 {sorted(JOB_KINDS)}")
+        try:
+            inspect.signature(JOB_KINDS[kind]).bind(None, **params)
+        except TypeError as e:
+            raise JobError(f"{kind}参数错误: {e}") from e
+        job = Job(f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}", kind, params,
+                  owner or default_owner(), created=time.time())
+        self.jobs[job.id] = job
+        self._absorbed[job.id] = 0
+        self._transition(job, QUEUED)
+        self.pending.setdefault(job.owner, deque()).append(job.id)
+        self._schedule()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """Raises:
+            KeyError: 未知任务
+        """
+        if job_id not in self.jobs:
+            raise KeyError(f"未知任务: {job_id}")
+        return self.jobs[job_id]
+
+    def list(self, owner: Optional[str] = None) -> List[Job]:
+        """按提交时间排列的任务（可只看某个提交者的）"""
+        jobs = [j for j in self.jobs.values() if owner is None or j.owner == owner]
+        return sorted(jobs, key=lambda j: j.created)
+
+    def cancel(self, job_id: str, owner: str) -> Job:
+        """取消任务（已结束的任务不受影响）
+
+        Args:
+            job_id: 任务编号
+            owner: 取消者，必须是任务的提交者
+
+        Raises:
+            KeyError: 未知任务
+            PermissionError: 不是该任务的提交者
+        """
+        job = self.get(job_id)
+        if owner != job.owner:
+            raise PermissionError(f"任务 {job_id} 属于 {job.owner}")
+        if job.state == QUEUED:
+            queue = self.pending[job.owner]
+            queue.remove(job_id)
+            if not queue:
+                del self.pending[job.owner]
+            job.finished = time.time()
+            self._transition(job, CANCELLED)
+        elif job.state == RUNNING and not job.cancel_requested:
+            open(self._cancel_path(job_id), "w").close()
+            job.cancel_requested = True
+            self._save(job)
+        return job
+
+    def events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        """任务的第after条之后的事件"""
+        self.get(job_id)
+        return read_events(self._events_path(job_id), after)
+
+    async def next_events(self, job_id: str, after: int = 0,
+                          timeout: float = 0.0) -> Tuple[List[Dict[str, Any]], str]:
+        """等待新事件（长轮询），最多等待timeout秒
+
+        Returns:
+            (新事件, 读取事件之前的任务状态)；状态已结束时事件中包含全部剩余事件
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self.get(job_id).state
+            events = self.events(job_id, after)
+            if events or state in TERMINAL_STATES or time.monotonic() >= deadline:
+                return events, state
+            await asyncio.sleep(self.poll)
+
+    async def watch(self, job_id: str, after: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出任务事件直到任务结束"""
+        while True:
+            events, state = await self.next_events(job_id, after, timeout=1.0)
+            for event in events:
+                yield event
+            after += len(events)
+            if state in TERMINAL_STATES:
+                return
+
+    async def wait(self, job_id: str) -> Job:
+        """等待任务结束"""
+        async for _ in self.watch(job_id, len(self.events(job_id))):
+            pass
+        return self.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        states: Dict[str, int] = {}
+        for job in self.jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {"workers": self.workers, "owners": len(self.pending), "states": states,
+                "kinds": sorted(JOB_KINDS)}
+
+    # ------------------------------------------------------------ 执行
+
+    def _schedule(self):
+        """有空闲工作进程时按提交者轮转取出排队任务"""
+        while self.pending and len(self.running) < self.workers and not self._stopping:
+            owner, queue = next(iter(self.pending.items()))
+            job = self.jobs[queue.popleft()]
+            if queue:
+                self.pending.move_to_end(owner)
+            else:
+                del self.pending[owner]
+            self.running[job.id] = asyncio.get_running_loop().create_task(self._execute(job))
+
+    async def _execute(self, job: Job):
+        job.started = time.time()
+        self._transition(job, RUNNING)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, _run_job, self.directory, job.id, job.kind, job.params)
+        try:
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=self.poll)
+                self._absorb(job)
+                if done:
+                    break
+        except asyncio.CancelledError:
+            # 事件循环退出（如服务被Ctrl+C中断）：让工作进程尽快结束，任务记录保持运行中，下次启动重新排队
+            open(self._cancel_path(job.id), "w").close()
+            raise
+        try:
+            state, value = future.result()
+        except Exception as e:  # 工作进程异常退出
+            state, value = FAILED, f"{type(e).__name__}: {e}"
+
+        self.running.pop(job.id, None)
+        self._remove(self._cancel_path(job.id))
+        if state == CANCELLED and self._stopping and not job.cancel_requested:
+            job.started = None
+            self._transition(job, QUEUED, "调度停止，下次启动继续")
+        else:
+            job.finished = time.time()
+            if state == DONE:
+                job.result = value
+            elif state == FAILED:
+                job.error = value
+            self._transition(job, state)
+        self._schedule()
+
+    def _absorb(self, job: Job):
+        """把工作进程写入的进度事件合并到任务记录"""
+        events = read_events(self._events_path(job.id), self._absorbed.get(job.id, 0))
+        self._absorbed[job.id] = self._absorbed.get(job.id, 0) + len(events)
+        progress = [e for e in events if e.get("type") == "progress"]
+        if not progress:
+            return
+        last = progress[-1]
+        job.done, job.total, job.message = last["done"], last["total"], last["message"]
+        partial = [e["partial"] for e in progress if "partial" in e]
+        if partial:
+            job.partial = partial[-1]
+        self._save(job)
+
+    def _transition(self, job: Job, state: str, message: str = ""):
+        job.state = state
+        append_event(self._events_path(job.id), {"type": "state", "state": state, "message": message})
+        self._absorbed[job.id] = self._absorbed.get(job.id, 0) + 1
+        self._save(job)
+
+    # ------------------------------------------------------------ 文件
+
+    def _events_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.events.jsonl")
+
+    def _cancel_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.cancel")
+
+    def _save(self, job: Job):
+        """先写临时文件再替换，避免中断时留下半个任务记录"""
+        path = os.path.join(self.directory, f"{job.id}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(_dumps(job.to_dict()))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# ---------------------------------------------------------------- 命令行
+
+def format_event(event: Dict[str, Any]) -> str:
+    """事件的单行文本"""
+    if event.get("type") == "state":
+        return f"[{event['state']}] {event.get('message', '')}".rstrip()
+    total = event.get("total") or 0
+    percent = f"{event['done'] / total * 100:5.1f}%" if total else "  ..."
+    line = f"{percent} {event.get('message', '')}"
+    if "partial" in event:
+        line += "  " + _dumps(event["partial"])
+    return line
+
+
+async def _run_local(kind: str, params: Dict[str, Any], directory: str, workers: int) -> Job:
+    queue = JobQueue(directory, workers)
+    await queue.start()
+    try:
+        job = queue.submit(kind, params)
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGINT, queue.cancel, job.id, job.owner)
+        print(f"任务 {job.id}（{kind}）")
+        async for event in queue.watch(job.id):
+            print(format_event(event))
+        return queue.get(job.id)
+    finally:
+        await queue.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在本地进程池中运行任务并显示进度")
+    parser.add_argument("kind", choices=sorted(JOB_KINDS))
+    parser.add_argument("params", nargs="?", default="{}", help="任务参数（JSON对象）")
+    parser.add_argument("--jobs-dir", default=JOBS_DIR)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        job = asyncio.run(_run_local(args.kind, json.loads(args.params), args.jobs_dir, args.workers))
+    except (JobError, RuntimeError) as e:
+        sys.exit(f"错误: {e}（共享任务目录时请通过 dps_service 的 /jobs 接口提交）")
+    if job.state == DONE:
+        print(json.dumps(job.result, ensure_ascii=False, indent=2))
+    elif job.state == FAILED:
+        sys.exit(f"任务失败: {job.error}")
+
+
+if __name__ == "__main__":
+    main()
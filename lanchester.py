@@ -0,0 +1,250 @@
+"""兰彻斯特平方律战斗结果快速估计
+
+完整模拟筛选上千种编队太慢，这里用解析解一次估计大量对局。
+双方都以"满编时击杀对方所需时间"参数化：
+    T_A = 敌方满编时击杀我方的时间（survivability 的集火阵亡时间，含护甲、恢复和增益）
+    T_B = 我方满编时击杀敌方的时间 = Σ_敌方单位 生命值合计 / 我方对该目标的DPS（army 内核）
+假设双方输出都与剩余兵力比例成正比（平方律），记 x、y 为双方剩余比例：
+    dx/dt = -y / T_A,  dy/dt = -x / T_B
+令 ρ = T_B / T_A：
+    ρ < 1 时我方获胜，剩余比例 √(1-ρ)，用时 T_B × artanh(√ρ)/√ρ
+    ρ > 1 时敌方获胜，剩余比例 √(1-1/ρ)，用时 T_A × artanh(√(1/ρ))/√(1/ρ)
+全部运算都是 (部队数, 波次数) 数组，几万场对局也只需毫秒级。
+calibrate() 用 battle_sim 的离散事件模拟对比胜负、剩余兵力和战斗时长。
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from army import DEFAULT_MODIFIERS, Army, Modifier, UnitCatalog, default_catalog, evaluate_counts
+from battle_sim import DRAW, SIDE_ARMY, SIDE_ENEMY, simulate_battle
+from profiling import profiled
+from survivability import (DEFAULT_DEFENSE_MODIFIERS, DefenseModifier, EnemyProfile, evaluate_durability,
+                           force_name)
+
+# 一波敌军：几种敌方单位（含数量）
+Wave = Sequence[EnemyProfile]
+
+
+def _atanh_ratio(s: np.ndarray) -> np.ndarray:
+    """artanh(s)/s，s→0 时为1，s≥1 时为inf"""
+    s = np.asarray(s, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.where(s < 1, np.arctanh(np.minimum(s, 1 - 1e-16)) / np.where(s > 0, s, 1), np.inf)
+    return np.where(s > 1e-8, value, 1.0)
+
+
+@dataclass
+class BattleEstimate:
+    """对局估计（各数组为 (部队数, 波次数)）"""
+    time_to_lose: np.ndarray  # T_A：敌方满编时击杀我方的时间
+    time_to_win: np.ndarray  # T_B：我方满编时击杀敌方的时间
+    winner: np.ndarray  # "A" / "B" / "draw"
+    duration: np.ndarray  # 战斗时长（秒），平局为inf
+    fraction: np.ndarray  # 我方剩余兵力比例
+    enemy_fraction: np.ndarray  # 敌方剩余兵力比例
+
+    @property
+    def ratio(self) -> np.ndarray:
+        """ρ = T_B / T_A，小于1时我方获胜"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.time_to_win / self.time_to_lose
+
+    def survivors(self, counts: np.ndarray) -> np.ndarray:
+        """我方各单位的估计存活数（按剩余比例折算，向下取整）
+
+        Args:
+            counts: (部队数, 单位数) 数量矩阵
+
+        Returns:
+            (部队数, 波次数, 单位数)
+        """
+        return np.floor(np.asarray(counts)[:, None, :] * self.fraction[:, :, None] + 1e-9)
+
+
+@profiled
+def estimate_battles(counts: np.ndarray, waves: Sequence[Wave], catalog: Optional[UnitCatalog] = None,
+                     modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS,
+                     defense_modifiers: Sequence[DefenseModifier] = DEFAULT_DEFENSE_MODIFIERS) -> BattleEstimate:
+    """批量估计对局结果
+
+    Args:
+        counts: (部队数, 单位数) 数量矩阵
+        waves: 敌方波次列表
+        catalog: 单位目录
+        modifiers: 输出修正层
+        defense_modifiers: 防御修正层
+
+    Returns:
+        对局估计
+    """
+    catalog = catalog or default_catalog()
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+    waves = [[e for e in wave if e.count > 0] for wave in waves]
+
+    time_to_lose = evaluate_durability(counts, waves, catalog, defense_modifiers).time_to_die
+    targets = sorted({e.target for wave in waves for e in wave})
+    dps = evaluate_counts(counts, targets, catalog, modifiers) if targets else np.zeros((len(counts), 0))
+    time_to_win = np.zeros((len(counts), len(waves)))
+    with np.errstate(divide="ignore"):
+        for w, wave in enumerate(waves):
+            for enemy in wave:
+                target_dps = dps[:, targets.index(enemy.target)]
+                time_to_win[:, w] += np.where(target_dps > 0, enemy.count * enemy.hp / np.where(
+                    target_dps > 0, target_dps, 1), np.inf)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = time_to_win / time_to_lose
+    both_infinite = np.isinf(time_to_win) & np.isinf(time_to_lose)
+    ratio = np.where(both_infinite, 1.0, ratio)
+    army_wins = ratio < 1
+    enemy_wins = ratio > 1
+
+    with np.errstate(invalid="ignore"):
+        fraction = np.where(army_wins, np.sqrt(np.clip(1 - ratio, 0, 1)), 0.0)
+        enemy_fraction = np.where(enemy_wins, np.sqrt(np.clip(1 - 1 / ratio, 0, 1)), 0.0)
+        duration = np.where(army_wins, time_to_win * _atanh_ratio(np.sqrt(np.where(army_wins, ratio, 0))),
+                            np.where(enemy_wins, time_to_lose * _atanh_ratio(np.sqrt(1 / np.where(enemy_wins, ratio, 1))),
+                                     np.inf))
+    winner = np.where(army_wins, SIDE_ARMY, np.where(enemy_wins, SIDE_ENEMY, DRAW))
+    return BattleEstimate(time_to_lose, time_to_win, winner, duration, fraction, enemy_fraction)
+
+
+def estimate_army_battles(armies: Sequence[Army], waves: Sequence[Wave], catalog: Optional[UnitCatalog] = None,
+                          modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS,
+                          defense_modifiers: Sequence[DefenseModifier] = DEFAULT_DEFENSE_MODIFIERS
+                          ) -> BattleEstimate:
+    """批量估计多支部队对多个波次的对局结果"""
+    catalog = catalog or default_catalog()
+    counts = np.array([catalog.vector(a.units) for a in armies]).reshape(len(armies), len(catalog))
+    return estimate_battles(counts, waves, catalog, modifiers, defense_modifiers)
+
+
+# ---------------------------------------------------------------------------
+# 校准
+# ---------------------------------------------------------------------------
+
+@dataclass
+class CalibrationRow:
+    """一场对局的估计值与模拟值（模拟值为多个种子的平均）"""
+    army: str
+    wave: str
+    winner: str
+    simulated_winner: str
+    duration: float
+    simulated_duration: float
+    fraction: float  # 胜方剩余兵力比例
+    simulated_fraction: float
+
+
+@dataclass
+class CalibrationReport:
+    rows: List[CalibrationRow]
+
+    @property
+    def winner_accuracy(self) -> float:
+        """胜负预测正确率"""
+        return float(np.mean([r.winner == r.simulated_winner for r in self.rows])) if self.rows else 0.0
+
+    def _agreeing(self) -> List[CalibrationRow]:
+        return [r for r in self.rows if r.winner == r.simulated_winner and r.winner != DRAW]
+
+    @property
+    def duration_error(self) -> float:
+        """胜负一致的对局中战斗时长的相对误差中位数"""
+        rows = self._agreeing()
+        if not rows:
+            return float("nan")
+        return float(np.median([abs(r.duration - r.simulated_duration) / max(r.simulated_duration, 1e-9)
+                                for r in rows]))
+
+    @property
+    def fraction_error(self) -> float:
+        """胜负一致的对局中胜方剩余比例的平均绝对误差"""
+        rows = self._agreeing()
+        if not rows:
+            return float("nan")
+        return float(np.mean([abs(r.fraction - r.simulated_fraction) for r in rows]))
+
+    def format(self) -> str:
+        lines = [f"{'部队':<14}{'敌方':<18}{'胜方':>6}{'模拟':>6}{'时长':>8}{'模拟':>8}{'剩余':>7}{'模拟':>7}"]
+        for r in self.rows:
+            lines.append(f"{r.army:<14}{r.wave:<18}{r.winner:>6}{r.simulated_winner:>6}{r.duration:>8.1f}"
+                         f"{r.simulated_duration:>8.1f}{r.fraction:>7.0%}{r.simulated_fraction:>7.0%}")
+        lines.append(f"胜负正确率 {self.winner_accuracy:.0%}，时长相对误差中位数 {self.duration_error:.0%}，"
+                     f"剩余比例平均误差 {self.fraction_error:.2f}")
+        return "\n".join(lines)
+
+
+def calibrate(armies: Sequence[Army], waves: Sequence[Wave], seeds: Sequence[int] = (0, 1, 2),
+              catalog: Optional[UnitCatalog] = None,
+              modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS,
+              defense_modifiers: Sequence[DefenseModifier] = DEFAULT_DEFENSE_MODIFIERS) -> CalibrationReport:
+    """用离散事件模拟校准解析估计
+
+    Args:
+        armies: 部队列表
+        waves: 敌方波次列表
+        seeds: 每场对局模拟使用的随机种子
+        catalog: 单位目录
+        modifiers: 输出修正层
+        defense_modifiers: 防御修正层
+
+    Returns:
+        校准报告（每场对局一行）
+    """
+    catalog = catalog or default_catalog()
+    estimate = estimate_army_battles(armies, waves, catalog, modifiers, defense_modifiers)
+    rows = []
+    for i, army in enumerate(armies):
+        for w, wave in enumerate(waves):
+            results = [simulate_battle(army, wave, catalog, modifiers, defense_modifiers, seed=s) for s in seeds]
+            winners = [r.winner for r in results]
+            simulated_winner = max(set(winners), key=winners.count)
+            winning = [r for r in results if r.winner == simulated_winner]
+            simulated_fraction = np.mean([r.hp_fraction if simulated_winner == SIDE_ARMY else r.enemy_hp_fraction
+                                          for r in winning]) if simulated_winner != DRAW else 0.0
+            winner = str(estimate.winner[i, w])
+            rows.append(CalibrationRow(
+                army=army.name or " + ".join(f"{n}{k}" for k, n in army.units.items()),
+                wave=" + ".join(force_name(e) for e in wave),
+                winner=winner,
+                simulated_winner=simulated_winner,
+                duration=float(estimate.duration[i, w]),
+                simulated_duration=float(np.mean([r.duration for r in winning])),
+                fraction=float(estimate.fraction[i, w] if winner == SIDE_ARMY else estimate.enemy_fraction[i, w]),
+                simulated_fraction=float(simulated_fraction),
+            ))
+    return CalibrationReport(rows)
+
+
+if __name__ == "__main__":
+    import time
+
+    from army import supply_compositions
+    from survivability import ENEMY_PROFILES
+
+    hydra, ultra, tank, zergling = (ENEMY_PROFILES[n] for n in ("刺蛇", "雷兽", "攻城坦克", "跳虫"))
+    waves = [
+        [hydra.scaled(30), ultra.scaled(4)],
+        [zergling.scaled(80), ultra.scaled(6)],
+        [tank.scaled(10), hydra.scaled(20)],
+    ]
+    armies = [
+        Army({"reaper": 32, "raven": 1}, "32死神+夜枭"),
+        Army({"reaper": 16}, "16死神"),
+        Army({"ghost.FISSION_RIFLE": 5, "marine.STORM_RIFLE": 30}, "风暴裂解5+30"),
+        Army({"marine.HEAVY_LASER": 20}, "20重型激光炮"),
+        Army({"ghost.HELLFIRE": 12}, "12炼狱火"),
+    ]
+    print(calibrate(armies, waves).format())
+
+    compositions = supply_compositions(["reaper", "raven", "marine.STORM_RIFLE", "ghost.FISSION_RIFLE"], 60, step=2)
+    start = time.perf_counter()
+    estimate = estimate_army_battles(compositions, waves)
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(compositions)}种编队 × {len(waves)}个波次 = {estimate.winner.size}场对局，用时{elapsed * 1000:.1f}ms")
+    for w in range(len(waves)):
+        wins = estimate.winner[:, w] == SIDE_ARMY
+        print(f"波次{w + 1}: {wins.sum()}种编队获胜")
@@ -0,0 +1,337 @@
+"""运输船隐形与战术折跃的覆盖率模型
+
+ToshMedivac.activate_cloak 每次隐形 cloak_duration 秒，冷却 cloak_cooldown 秒（从激活时算起），
+冷却好就重新激活时第i艘运输船的隐形区间为：
+    [o_i + k·P, o_i + k·P + D)    P = max(冷却, 持续), D = 持续, o_i 为首次激活时间
+解析结果：
+    [a, b] 内隐形时长 = G(b) - G(a)，G(x) = ⌊(x-o)/P⌋·D + min(D, (x-o) mod P)（x ≥ o）
+    稳态下任一运输船隐形的比例 = Σ_i min(D, 间隔_i) / P（按首次激活时间在周期上环形排序）
+    稳态下全部隐形的比例 = max(0, D - (P - 最大间隔)) / P
+运输船在隐形期间不会被攻击，所以敌方火力只落在暴露窗口上：
+    承受伤害_i = Σ_w DPS_w × (窗口长度_w - 隐形时长_i,w)
+战术折跃每 tactical_jump_cooldown 秒一次，按固定间隔接战时能用折跃撤出的接战比例为 1/⌈冷却/间隔⌉。
+
+simulate_cloak_schedules() 用 SimulationClock 驱动真实的 ToshMedivac 对象批量验证解析结果，
+CloakProtection 把暴露比例交给 survivability，drop_report() 给出人口-DPS-生存对照表。
+"""
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from army import ArmyContext, default_catalog, evaluate_counts
+from sim_clock import SimulationClock
+from supply_curve import medivac_rule, supply_curve
+from survivability import DEFAULT_DEFENSE_MODIFIERS, DefenseModifier, DefenseProfile, EnemyForce, \
+    evaluate_durability, force_name
+from tosh_medivac import ToshMedivac
+from unit_data import unit_attributes
+
+
+@dataclass(frozen=True)
+class AbilityTiming:
+    """技能的持续时间和冷却时间"""
+    duration: float
+    cooldown: float
+
+    @property
+    def period(self) -> float:
+        """冷却好就施放时的周期"""
+        return max(self.duration, self.cooldown)
+
+    @property
+    def uptime(self) -> float:
+        """单个单位的稳态覆盖率"""
+        return min(1.0, self.duration / self.period) if self.period > 0 else 1.0
+
+
+@lru_cache(maxsize=None)
+def cloak_timing() -> AbilityTiming:
+    """运输船隐形（数据来自 data/tosh.json）"""
+    medivac = unit_attributes("tosh_medivac")
+    return AbilityTiming(medivac["cloak_duration"], medivac["cloak_cooldown"])
+
+
+@lru_cache(maxsize=None)
+def jump_timing() -> AbilityTiming:
+    """战术折跃（瞬间生效，只有冷却）"""
+    return AbilityTiming(0.0, unit_attributes("tosh_medivac")["tactical_jump_cooldown"])
+
+
+def staggered_offsets(medivacs: int, timing: Optional[AbilityTiming] = None, stagger: bool = True) -> np.ndarray:
+    """各运输船的首次激活时间：错开时均匀分布在一个周期内，否则同时激活"""
+    timing = timing or cloak_timing()
+    if not stagger:
+        return np.zeros(medivacs)
+    return np.arange(medivacs) * timing.period / max(medivacs, 1)
+
+
+def _covered_until(x: np.ndarray, offsets: np.ndarray, timing: AbilityTiming) -> np.ndarray:
+    elapsed = np.maximum(x - offsets, 0.0)
+    cycles = np.floor(elapsed / timing.period)
+    return cycles * timing.duration + np.minimum(timing.duration, elapsed - cycles * timing.period)
+
+
+def covered_time(offsets: np.ndarray, windows: np.ndarray, timing: Optional[AbilityTiming] = None) -> np.ndarray:
+    """各运输船在各时间窗口内的隐形时长
+
+    Args:
+        offsets: (..., 运输船数) 首次激活时间
+        windows: (窗口数, 2) 每行为 [开始, 结束]
+        timing: 技能时间
+
+    Returns:
+        (..., 运输船数, 窗口数) 隐形时长（秒）
+    """
+    timing = timing or cloak_timing()
+    offsets = np.asarray(offsets, dtype=np.float64)[..., None]
+    windows = np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+    return _covered_until(windows[:, 1], offsets, timing) - _covered_until(windows[:, 0], offsets, timing)
+
+
+@dataclass
+class CoverageStats:
+    """一支运输船编队的隐形覆盖"""
+    per_medivac: np.ndarray  # 各运输船在区间内的隐形比例
+    any_cloaked: float  # 稳态下至少一艘隐形的时间比例
+    all_cloaked: float  # 稳态下全部隐形的时间比例
+
+    @property
+    def mean(self) -> float:
+        return float(self.per_medivac.mean()) if len(self.per_medivac) else 0.0
+
+
+def cloak_coverage(offsets: np.ndarray, horizon: float, timing: Optional[AbilityTiming] = None) -> CoverageStats:
+    """运输船编队在 [0, horizon] 内的隐形覆盖
+
+    Args:
+        offsets: (运输船数,) 首次激活时间
+        horizon: 统计时长
+        timing: 技能时间
+    """
+    timing = timing or cloak_timing()
+    offsets = np.asarray(offsets, dtype=np.float64)
+    per_medivac = covered_time(offsets, [[0.0, horizon]], timing)[:, 0] / horizon
+    if not len(offsets):
+        return CoverageStats(per_medivac, 0.0, 0.0)
+    # 首次激活时间在周期上环形排序，相邻间隔决定并集和交集
+    phases = np.sort(np.mod(offsets, timing.period))
+    gaps = np.diff(np.append(phases, phases[0] + timing.period))
+    any_cloaked = min(1.0, np.minimum(timing.duration, gaps).sum() / timing.period)
+    all_cloaked = max(0.0, timing.duration - (timing.period - gaps.max())) / timing.period
+    return CoverageStats(per_medivac, float(any_cloaked), float(all_cloaked))
+
+
+def exposed_damage(offsets: np.ndarray, windows: np.ndarray, dps: np.ndarray,
+                   timing: Optional[AbilityTiming] = None) -> np.ndarray:
+    """各运输船在敌方火力窗口中暴露时承受的伤害
+
+    Args:
+        offsets: (..., 运输船数) 首次激活时间
+        windows: (窗口数, 2) 敌方火力的时间窗口
+        dps: (窗口数,) 各窗口对单艘运输船的DPS
+        timing: 技能时间
+
+    Returns:
+        (..., 运输船数) 承受伤害
+    """
+    windows = np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+    exposed = (windows[:, 1] - windows[:, 0]) - covered_time(offsets, windows, timing)
+    return exposed @ np.asarray(dps, dtype=np.float64)
+
+
+def exposure_fraction(offsets: np.ndarray, windows: np.ndarray, dps: np.ndarray,
+                      timing: Optional[AbilityTiming] = None) -> float:
+    """编队平均承受的伤害占不隐形时的比例"""
+    windows = np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+    full = float((windows[:, 1] - windows[:, 0]) @ np.asarray(dps, dtype=np.float64))
+    offsets = np.asarray(offsets, dtype=np.float64)
+    if full <= 0 or not offsets.size:
+        return 1.0
+    return float(exposed_damage(offsets, windows, dps, timing).mean() / full)
+
+
+def jump_availability(engagement_interval: Union[float, np.ndarray],
+                      timing: Optional[AbilityTiming] = None) -> np.ndarray:
+    """按固定间隔接战时，能用战术折跃撤出的接战比例"""
+    timing = timing or jump_timing()
+    interval = np.asarray(engagement_interval, dtype=np.float64)
+    return 1.0 / np.maximum(1.0, np.ceil(timing.cooldown / interval - 1e-9))
+
+
+# ---------------------------------------------------------------------------
+# 事件模拟验证
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SimulatedSchedule:
+    """一支编队的模拟结果"""
+    intervals: List[List[Tuple[float, float]]]  # 各运输船的隐形区间
+    per_medivac: np.ndarray  # 各运输船在 [0, horizon] 内的隐形比例
+    exposed_damage: np.ndarray  # 各运输船承受的伤害
+
+
+def simulate_cloak_schedules(offset_sets: Sequence[np.ndarray], horizon: float,
+                             windows: Optional[np.ndarray] = None,
+                             dps: Optional[np.ndarray] = None) -> List[SimulatedSchedule]:
+    """用离散事件时钟驱动 ToshMedivac，批量模拟多支编队的隐形时间表
+
+    每艘运输船在首次激活时间调用 activate_cloak，成功后安排 duration 秒后解除隐形，
+    并在冷却结束时再次尝试激活。所有编队共用一个 SimulationClock。
+
+    Args:
+        offset_sets: 每支编队各运输船的首次激活时间
+        horizon: 模拟时长
+        windows: (窗口数, 2) 敌方火力窗口，默认为整个 [0, horizon]
+        dps: (窗口数,) 各窗口对单艘运输船的DPS，默认为1
+
+    Returns:
+        每支编队的模拟结果
+    """
+    windows = np.array([[0.0, horizon]]) if windows is None else np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+    dps = np.ones(len(windows)) if dps is None else np.asarray(dps, dtype=np.float64)
+    clock = SimulationClock()
+    fleets = []
+
+    def activate(medivac: ToshMedivac, intervals: List[Tuple[float, float]]):
+        now = clock.now()
+        if medivac.activate_cloak(now):
+            intervals.append((now, min(now + medivac.cloak_duration, horizon)))
+            clock.call_later(medivac.cloak_duration, medivac.deactivate_cloak)
+            retry = max(medivac.cloak_cooldown, medivac.cloak_duration)
+        else:
+            retry = medivac.cloak_cooldown - (now - medivac.last_cloak_time)
+        if now + retry < horizon:
+            clock.call_later(retry, activate, medivac, intervals)
+
+    for offsets in offset_sets:
+        fleet = []
+        for offset in offsets:
+            medivac = ToshMedivac(clock)
+            intervals: List[Tuple[float, float]] = []
+            if offset < horizon:
+                clock.call_at(float(offset), activate, medivac, intervals)
+            fleet.append(intervals)
+        fleets.append(fleet)
+    clock.run_until(horizon)
+
+    results = []
+    for fleet in fleets:
+        covered = np.zeros((len(fleet), len(windows)))
+        for i, intervals in enumerate(fleet):
+            for start, end in intervals:
+                covered[i] += np.clip(np.minimum(end, windows[:, 1]) - np.maximum(start, windows[:, 0]), 0, None)
+        total = np.array([sum(end - start for start, end in intervals) for intervals in fleet])
+        exposed = ((windows[:, 1] - windows[:, 0]) - covered) @ dps
+        results.append(SimulatedSchedule(fleet, total / horizon, exposed))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# 生存能力与人口报告
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class CloakProtection(DefenseModifier):
+    """运输船隐形：只承受暴露窗口内的伤害"""
+    exposure: float = 1.0  # 承受伤害占不隐形时的比例
+
+    def apply(self, profile: DefenseProfile, context: ArmyContext) -> DefenseProfile:
+        if profile.key != "medivac":
+            return profile
+        return replace(profile, damage_taken=profile.damage_taken * self.exposure)
+
+
+@dataclass
+class DropReportRow:
+    """一个人口点的死神空投评估"""
+    supply: float
+    reapers: int
+    medivacs: int
+    dps: float
+    cloak_uptime: float  # 编队中至少一艘隐形的比例
+    exposure: float  # 运输船平均承受伤害比例
+    time_to_die: float  # 不隐形时的集火坚持时间
+    time_to_die_cloaked: float  # 错开隐形时的集火坚持时间
+
+
+def drop_report(max_supply: int, enemy: EnemyForce, target: Tuple[str, int] = ("轻甲", 0),
+                engagement: float = 30.0, stagger: bool = True, step: int = 8) -> List[DropReportRow]:
+    """死神船队各人口点的DPS与生存时间（含运输船隐形）
+
+    Args:
+        max_supply: 最大人口
+        enemy: 敌方火力
+        target: 计算DPS用的 (目标类型, 护甲)
+        engagement: 接战时长（敌方火力窗口为 [0, engagement]）
+        stagger: 运输船是否错开隐形
+        step: 每隔多少个死神取一个点
+
+    Returns:
+        各人口点的评估
+    """
+    catalog = default_catalog()
+    curve = supply_curve({"reaper": 1}, {}, max_supply, medivac_rule())
+    keep = (curve.groups % step == 0) | (curve.groups == curve.groups[-1])
+    reapers, medivacs, supplies = curve.groups[keep], curve.transports[keep], curve.supply[keep]
+    counts = np.zeros((len(reapers), len(catalog)))
+    counts[:, catalog.index["reaper"]] = reapers
+    counts[:, catalog.index["medivac"]] = medivacs
+
+    dps = evaluate_counts(counts, [target], catalog)[:, 0]
+    plain = evaluate_durability(counts, [enemy], catalog).time_to_die[:, 0]
+    cloaked = np.empty(len(counts))
+    uptime = np.empty(len(counts))
+    exposure = np.empty(len(counts))
+    window = np.array([[0.0, engagement]])
+    for m in np.unique(medivacs):
+        rows = medivacs == m
+        offsets = staggered_offsets(int(m), stagger=stagger)
+        exposure[rows] = exposure_fraction(offsets, window, [1.0])
+        uptime[rows] = cloak_coverage(offsets, engagement).any_cloaked if m else 0.0
+        modifiers = DEFAULT_DEFENSE_MODIFIERS + (CloakProtection(exposure[rows][0]),)
+        cloaked[rows] = evaluate_durability(counts[rows], [enemy], catalog, modifiers).time_to_die[:, 0]
+    return [DropReportRow(float(s), int(r), int(m), float(d), float(u), float(e), float(p), float(c))
+            for s, r, m, d, u, e, p, c in zip(supplies, reapers, medivacs, dps, uptime, exposure, plain, cloaked)]
+
+
+def format_drop_report(rows: Sequence[DropReportRow], enemy_name: str = "") -> str:
+    lines = [f"敌方: {enemy_name}" if enemy_name else "",
+             f"{'人口':>6}{'死神':>6}{'运输船':>6}{'DPS':>9}{'隐形覆盖':>9}{'暴露比例':>9}{'坚持(秒)':>10}{'隐形后':>9}"]
+    for r in rows:
+        lines.append(f"{r.supply:>8.0f}{r.reapers:>8}{r.medivacs:>8}{r.dps:>10.0f}{r.cloak_uptime:>11.0%}"
+                     f"{r.exposure:>11.0%}{r.time_to_die:>11.1f}{r.time_to_die_cloaked:>10.1f}")
+    return "\n".join(line for line in lines if line)
+
+
+if __name__ == "__main__":
+    import time
+
+    from survivability import ENEMY_PROFILES
+
+    timing = cloak_timing()
+    print(f"隐形 {timing.duration:.0f}秒/冷却{timing.cooldown:.0f}秒，单船覆盖率{timing.uptime:.0%}；"
+          f"每40秒接战一次时战术折跃可用比例{float(jump_availability(40)):.0%}")
+
+    horizon = 300.0
+    windows = np.array([[10.0, 25.0], [60.0, 90.0], [200.0, 230.0]])
+    dps = np.array([80.0, 120.0, 60.0])
+    fleets = [staggered_offsets(m, stagger=s) for m in (1, 2, 3, 4, 8) for s in (False, True)]
+    start = time.perf_counter()
+    simulated = simulate_cloak_schedules(fleets, horizon, windows, dps)
+    elapsed = time.perf_counter() - start
+    worst = 0.0
+    print(f"\n{'运输船':>4}{'错开':>4}{'单船覆盖':>8}{'任一隐形':>8}{'全部隐形':>8}{'承受伤害':>9}{'模拟':>8}")
+    for offsets, sim in zip(fleets, simulated):
+        stats = cloak_coverage(offsets, horizon)
+        analytic = exposed_damage(offsets, windows, dps)
+        worst = max(worst, float(np.abs(analytic - sim.exposed_damage).max()),
+                    float(np.abs(stats.per_medivac - sim.per_medivac).max()))
+        staggered = len(offsets) > 1 and offsets[1] > 0
+        print(f"{len(offsets):>6}{'是' if staggered else '否':>4}{stats.mean:>10.1%}{stats.any_cloaked:>10.0%}"
+              f"{stats.all_cloaked:>10.0%}{analytic.mean():>11.0f}{sim.exposed_damage.mean():>10.0f}")
+    print(f"解析与事件模拟最大偏差 {worst:.2e}（模拟用时{elapsed * 1000:.1f}ms）\n")
+
+    enemy = ENEMY_PROFILES["刺蛇"].scaled(20)
+    print(format_drop_report(drop_report(160, enemy, step=32), force_name(enemy)))
@@ -0,0 +1,389 @@
+"""多目标帕累托前沿
+
+升级效率分析只用"每100矿等价资源的DPS提升"一个标量排序，这里同时考虑多个目标：
+    对轻甲/重甲DPS（越高越好）、矿、气、人口（越低越好）、有效生命值（越高越好）
+候选方案是 编队 × 升级组合，编队由 army.composition_counts 枚举，
+DPS和有效生命值由 army / survivability 的批量内核计算。
+地面单位需要运输船（supply_curve.medivac_rule）：参与组合的单位中有运输船时只保留运得下的编队，
+没有时按载员位补上所需的运输船（计入人口和资源），超出人口上限的编队剔除。
+
+非支配排序：
+    - 两个目标时按第一个目标降序扫描，第二个目标超过此前所有点的才在前沿上（O(N log N)）
+    - 多个目标时按各目标名次之和降序分块处理：一个点只可能被名次和更大的点支配，
+      所以每块只需与已确定的前沿及块内的点比较；前沿按剔除次数排序，
+      大部分点与前几十个前沿点比较后就被剔除
+候选按块生成和评估，每块先求块内前沿，最后在各块前沿的并集上再求一次，
+内存只与块大小和前沿大小有关，可以扫描百万级的候选。
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import csv
+
+import numpy as np
+
+from army import (DEFAULT_MODIFIERS, MAX_ATTACK_LEVEL, AttackUpgrade, Modifier, UnitCatalog, composition_counts,
+                  default_catalog, evaluate_counts, expand_counts)
+from chart_render import ChartSpec, Series, render_chart
+from profiling import profiled, stage
+from supply_curve import TransportRule, medivac_rule, unit_footprint
+from survivability import (DEFAULT_DEFENSE_MODIFIERS, ENEMY_PROFILES, DefenseModifier, EnemyForce,
+                           evaluate_durability, force_name)
+from unit_data import upgrade_cost
+
+DEFAULT_TARGETS = (("轻甲", 0), ("重甲", 1))
+DEFAULT_ENEMY = ENEMY_PROFILES["刺蛇"].scaled(20)
+TRANSPORT_KEY = "medivac"
+CHUNK_SIZE = 200_000  # 每块评估的编队数
+_BLOCK_SIZE = 2048  # 非支配排序每块的点数
+_FIRST_SEGMENT = 64  # 每块先比较的前沿点数
+_COMPARE_BUDGET = 16_000_000  # 一次比较的点对数上限
+
+
+def attack_upgrade_cost(level: int) -> Dict[str, float]:
+    """升到level级攻击的累计消耗"""
+    total = {"minerals": 0.0, "gas": 0.0}
+    for lv in range(1, level + 1):
+        cost = upgrade_cost("attack", lv)
+        total["minerals"] += cost["minerals"]
+        total["gas"] += cost["gas"]
+    return total
+
+
+@dataclass(frozen=True)
+class Objective:
+    """一个优化目标"""
+    name: str
+    label: str
+    maximize: bool
+
+
+def default_objectives(targets: Sequence[Tuple[str, int]] = DEFAULT_TARGETS) -> List[Objective]:
+    """默认目标：对各目标的DPS、矿、气、人口、有效生命值"""
+    return ([Objective(f"dps_{t}{a}", f"DPS(vs{t}{a})", True) for t, a in targets]
+            + [Objective("minerals", "矿", False), Objective("gas", "气", False),
+               Objective("supply", "人口", False), Objective("effective_hp", "有效生命值", True)])
+
+
+# ---------------------------------------------------------------------------
+# 非支配排序
+# ---------------------------------------------------------------------------
+
+def _front_2d(values: np.ndarray) -> np.ndarray:
+    """两个目标的前沿：按第一个目标降序（并列时第二个降序）扫描，第二个目标超过此前所有点的才在前沿上"""
+    order = np.lexsort((-values[:, 1], -values[:, 0]))
+    ordered = values[order]
+    best_before = np.concatenate(([-np.inf], np.maximum.accumulate(ordered[:, 1])[:-1]))
+    first = ordered[:, 1] > best_before
+    # 完全相同的点相邻，跟随同组第一个点
+    same = np.concatenate(([False], (ordered[1:] == ordered[:-1]).all(axis=1)))
+    group_start = np.maximum.accumulate(np.where(same, 0, np.arange(len(ordered))))
+    mask = np.zeros(len(values), dtype=bool)
+    mask[order] = first[group_start]
+    return mask
+
+
+def _dominance(reference: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """(点数, 参考点数) reference中的点是否支配points中的点（逐个目标比较，只生成二维的点对矩阵）"""
+    no_worse = np.ones((len(points), len(reference)), dtype=bool)
+    better = np.zeros_like(no_worse)
+    for j in range(points.shape[1]):
+        no_worse &= reference[None, :, j] >= points[:, None, j]
+        better |= reference[None, :, j] > points[:, None, j]
+    return no_worse & better
+
+
+def non_dominated(values: np.ndarray, maximize: Optional[Sequence[bool]] = None) -> np.ndarray:
+    """帕累托前沿（布尔掩码）
+
+    一个点被支配：存在另一个点在所有目标上都不差且至少一个目标更好。
+    完全相同的点互不支配，会同时保留。
+
+    Args:
+        values: (点数, 目标数)
+        maximize: 每个目标是否越大越好，默认全部越大越好
+
+    Returns:
+        (点数,) 是否在前沿上
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    n, k = values.shape
+    if maximize is not None:
+        values = values * np.where(np.asarray(maximize, dtype=bool), 1.0, -1.0)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    if k == 1:
+        return values[:, 0] == values[:, 0].max()
+    if k == 2:
+        return _front_2d(values)
+
+    # 支配者在每个目标上的名次都不低、且至少一个更高，所以名次之和严格更大（名次是整数，不受inf和舍入影响）
+    ranks = np.column_stack([np.unique(values[:, j], return_inverse=True)[1].ravel() for j in range(k)])
+    order = np.argsort(-ranks.sum(axis=1), kind="stable")
+    sorted_values = values[order]
+    front = np.empty((0, k))
+    kills = np.zeros(0)  # 每个前沿点剔除过的点数
+    keep = np.zeros(n, dtype=bool)
+    for start in range(0, n, _BLOCK_SIZE):
+        block = sorted_values[start:start + _BLOCK_SIZE]
+        # 与已有前沿分段比较，已被支配的点立即剔除。大部分点能被少数几个前沿点剔除，
+        # 所以前沿按剔除次数排序，第一段很小，之后逐段加倍
+        by_kills = np.argsort(-kills, kind="stable")
+        front, kills = front[by_kills], kills[by_kills]
+        alive = np.arange(len(block))
+        checked, step = 0, _FIRST_SEGMENT
+        while checked < len(front) and len(alive):
+            segment = front[checked:checked + step]
+            dominates = _dominance(segment, block[alive])
+            dead = dominates.any(axis=1)
+            kills[checked:checked + len(segment)] += np.bincount(dominates[dead].argmax(axis=1),
+                                                                 minlength=len(segment))
+            alive = alive[~dead]
+            checked += len(segment)
+            step = min(step * 2, max(_FIRST_SEGMENT, _COMPARE_BUDGET // max(1, len(alive))))
+        candidates = block[alive]
+        survivors = ~_dominance(candidates, candidates).any(axis=1)  # 块内互相支配
+        keep[start + alive[survivors]] = True
+        front = np.concatenate([front, candidates[survivors]])
+        kills = np.concatenate([kills, np.zeros(int(survivors.sum()))])
+    mask = np.zeros(n, dtype=bool)
+    mask[order] = keep
+    return mask
+
+
+# ---------------------------------------------------------------------------
+# 候选方案评估
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ParetoTable:
+    """帕累托前沿上的方案"""
+    keys: List[str]  # 编队中的单位写法
+    counts: np.ndarray  # (方案数, len(keys))
+    attack_level: np.ndarray  # (方案数,)
+    objectives: List[Objective]
+    values: np.ndarray  # (方案数, 目标数)
+    candidates: int = 0  # 扫描过的候选方案数
+    enemy: str = ""  # 计算有效生命值的敌方火力
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, [o.name for o in self.objectives].index(name)]
+
+    def composition(self, row: int) -> str:
+        units = " + ".join(f"{int(c)}{k}" for k, c in zip(self.keys, self.counts[row]) if c)
+        return f"{units} ({int(self.attack_level[row])}攻)"
+
+    def sorted_by(self, name: str, descending: bool = True) -> "ParetoTable":
+        order = np.argsort(self.column(name), kind="stable")
+        order = order[::-1] if descending else order
+        return ParetoTable(self.keys, self.counts[order], self.attack_level[order], self.objectives,
+                           self.values[order], self.candidates, self.enemy)
+
+    def records(self) -> Iterator[Dict[str, float]]:
+        """逐行输出 {列名: 值}"""
+        for row in range(len(self)):
+            record = {k: int(c) for k, c in zip(self.keys, self.counts[row])}
+            record["attack_level"] = int(self.attack_level[row])
+            record.update({o.name: float(v) for o, v in zip(self.objectives, self.values[row])})
+            yield record
+
+    def write_csv(self, path: str) -> str:
+        """导出为CSV（列：各单位数量、攻击等级、各目标）"""
+        columns = list(self.keys) + ["attack_level"] + [o.name for o in self.objectives]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(self.records())
+        return path
+
+    def format(self, limit: Optional[int] = 20) -> str:
+        lines = [f"扫描{self.candidates}个方案，前沿上{len(self)}个" + (f"（有效生命值对抗{self.enemy}）" if self.enemy else ""),
+                 "  ".join(f"{o.label:>12}" for o in self.objectives) + "  编队"]
+        for row in range(len(self) if limit is None else min(limit, len(self))):
+            lines.append("  ".join(f"{v:>12.0f}" for v in self.values[row]) + "  " + self.composition(row))
+        return "\n".join(lines)
+
+
+def transport_compositions(counts: np.ndarray, keys: Sequence[str], supply: float,
+                           rule: TransportRule) -> Tuple[np.ndarray, List[str]]:
+    """按运输规则筛选或补全编队
+
+    Args:
+        counts: composition_counts 的结果
+        keys: 各列的单位写法
+        supply: 人口上限
+        rule: 运输规则
+
+    Returns:
+        (编队, 单位写法)。keys中有运输船时只保留运输船够用的行；没有时追加一列所需的运输船，
+        并剔除加上运输船后超出人口上限的行
+    """
+    cargo = counts @ np.array([unit_footprint(k)["cargo"] for k in keys])
+    needed = rule.count(cargo)
+    if TRANSPORT_KEY in keys:
+        return counts[counts[:, list(keys).index(TRANSPORT_KEY)] >= needed], list(keys)
+    if not needed.any():
+        return counts, list(keys)
+    total = counts @ np.array([unit_footprint(k)["supply"] for k in keys]) + needed * rule.supply
+    keep = total <= supply
+    return np.column_stack([counts, needed])[keep], list(keys) + [TRANSPORT_KEY]
+
+
+def _evaluate_block(counts: np.ndarray, keys: Sequence[str], levels: Sequence[int],
+                    targets: Sequence[Tuple[str, int]], enemy: EnemyForce, catalog: UnitCatalog,
+                    modifiers: Sequence[Modifier], defense_modifiers: Sequence[DefenseModifier],
+                    exact: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """一块编队在各攻击等级下的目标值
+
+    Returns:
+        (编队序号, 攻击等级, 目标值)，按攻击等级分段排列
+    """
+    full = expand_counts(counts, keys, catalog)
+    minerals = full @ catalog.minerals
+    gas = full @ catalog.gas
+    supply = full @ catalog.supply
+    with stage("durability"):
+        effective_hp = evaluate_durability(full, [enemy], catalog, defense_modifiers).effective_hp[:, 0]
+    tosh = (full[:, [p.commander == "tosh" and bool(p.damage) for p in catalog.profiles]] > 0).any(axis=1)
+    rows, level_column, blocks = [], [], []
+    lowest = min(levels)
+    for level in levels:
+        # 没有托什输出单位的编队升级没有意义，只保留最低等级
+        selected = np.arange(len(full)) if level == lowest else np.flatnonzero(tosh)
+        with stage("dps"):
+            dps = evaluate_counts(full[selected], targets, catalog, (*modifiers, AttackUpgrade(level)), exact)
+        cost = attack_upgrade_cost(level)
+        blocks.append(np.column_stack([dps, minerals[selected] + cost["minerals"], gas[selected] + cost["gas"],
+                                       supply[selected], effective_hp[selected]]))
+        rows.append(selected)
+        level_column.append(np.full(len(selected), level))
+    return np.concatenate(rows), np.concatenate(level_column), np.concatenate(blocks)
+
+
+@profiled
+def explore(keys: Sequence[str], supply: float, step: int = 1, attack_levels: Sequence[int] = range(4),
+            targets: Sequence[Tuple[str, int]] = DEFAULT_TARGETS, enemy: EnemyForce = DEFAULT_ENEMY,
+            objectives: Optional[Sequence[str]] = None, catalog: Optional[UnitCatalog] = None,
+            modifiers: Sequence[Modifier] = DEFAULT_MODIFIERS,
+            defense_modifiers: Sequence[DefenseModifier] = DEFAULT_DEFENSE_MODIFIERS,
+            chunk_size: int = CHUNK_SIZE, progress: Optional[Callable[[int, int], None]] = None,
+            exact: bool = False, require_transport: bool = True) -> ParetoTable:
+    """扫描 编队 × 攻击等级 的所有方案，求帕累托前沿
+
+    Args:
+        keys: 参与组合的单位写法
+        supply: 人口上限
+        step: 每种单位数量的步长
+        attack_levels: 托什攻击升级等级（升级消耗计入矿和气）
+        targets: 计算DPS的 (目标类型, 护甲)，每个目标一个DPS目标
+        enemy: 计算有效生命值的敌方火力
+        objectives: 参与排序的目标名（见 default_objectives），默认全部
+        catalog: 单位目录
+        modifiers: 输出修正层（攻击等级修正层由本函数追加）
+        defense_modifiers: 防御修正层
+        chunk_size: 每块评估的编队数
+        progress: 每块评估后调用 progress(已评估编队数, 编队总数)
+        exact: DPS按定点数计算，DPS相同的方案在不同块、不同加法顺序下逐位相等
+        require_transport: 地面单位需要运输船（见 transport_compositions）
+
+    Returns:
+        前沿上的方案（目标值包含全部目标，keys中没有运输船而需要运输时会追加一列）
+
+    Raises:
+        ValueError: 未知目标名
+    """
+    catalog = catalog or default_catalog()
+    all_objectives = default_objectives(targets)
+    names = [o.name for o in all_objectives]
+    selected = list(objectives) if objectives is not None else names
+    unknown = set(selected) - set(names)
+    if unknown:
+        raise ValueError(f"未知目标 {sorted(unknown)}，可选 {names}")
+    columns = [names.index(n) for n in selected]
+    maximize = [all_objectives[c].maximize for c in columns]
+
+    with stage("compositions"):
+        compositions = composition_counts(keys, supply, step, catalog)
+        if require_transport:
+            compositions, keys = transport_compositions(compositions, keys, supply, medivac_rule())
+    kept_counts, kept_levels, kept_values = [], [], []
+    candidates = 0
+    for start in range(0, len(compositions), chunk_size):
+        block = compositions[start:start + chunk_size]
+        rows, levels, values = _evaluate_block(block, keys, attack_levels, targets, enemy, catalog,
+                                               modifiers, defense_modifiers, exact)
+        candidates += len(rows)
+        with stage("non_dominated"):
+            mask = non_dominated(values[:, columns], maximize)
+        kept_counts.append(block[rows[mask]])
+        kept_levels.append(levels[mask])
+        kept_values.append(values[mask])
+        if progress is not None:
+            progress(start + len(block), len(compositions))
+
+    counts = np.concatenate(kept_counts) if kept_counts else np.zeros((0, len(keys)), dtype=np.int64)
+    levels = np.concatenate(kept_levels) if kept_levels else np.zeros(0, dtype=np.int64)
+    values = np.concatenate(kept_values) if kept_values else np.zeros((0, len(all_objectives)))
+    if len(kept_counts) > 1:
+        with stage("non_dominated"):
+            mask = non_dominated(values[:, columns], maximize)
+        counts, levels, values = counts[mask], levels[mask], values[mask]
+    return ParetoTable(list(keys), counts, levels, all_objectives, values, candidates, force_name(enemy))
+
+
+# ---------------------------------------------------------------------------
+# 图表
+# ---------------------------------------------------------------------------
+
+LEVEL_COLORS = ('#9AC9DB', '#2878B5', '#F8AC8C', '#C82423')
+
+
+def plot_frontier(table: ParetoTable, x: str = "supply", y: Optional[str] = None,
+                  output: str = "帕累托前沿.png") -> List[str]:
+    """把前沿投影到两个目标上绘制，按攻击等级着色，并连出这两个目标的二维前沿
+
+    Returns:
+        写出的文件路径
+    """
+    y = y or table.objectives[0].name
+    objectives = {o.name: o for o in table.objectives}
+    xs, ys = table.column(x), table.column(y)
+    series = []
+    for level in np.unique(table.attack_level):
+        rows = table.attack_level == level
+        series.append(Series(f'{int(level)}级攻击', xs[rows], ys[rows], LEVEL_COLORS[int(level) % len(LEVEL_COLORS)],
+                             linestyle='', marker='o', markersize=5))
+    front = non_dominated(np.column_stack([xs, ys]), [objectives[x].maximize, objectives[y].maximize])
+    order = np.argsort(xs[front])
+    series.append(Series(f'{objectives[x].label}-{objectives[y].label}前沿', xs[front][order], ys[front][order],
+                         '#6956E5', marker='o', markersize=4))
+    spec = ChartSpec(f'帕累托前沿（{len(table)}/{table.candidates}个方案）', objectives[x].label,
+                     objectives[y].label, series, legend={'loc': 'upper left', 'fontsize': 10})
+    return render_chart(spec, output)
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    # 数据文件中格式塔零单位没有资源消耗，混编时只能按人口比较，这里只扫描托什单位
+    keys = ["reaper", "raven", "medivac"]
+    start = time.perf_counter()
+    table = explore(keys, 200)
+    elapsed = time.perf_counter() - start
+    print(table.sorted_by(table.objectives[0].name).format(15))
+    print(f"用时{elapsed:.2f}s（{table.candidates / elapsed:,.0f}方案/秒）")
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = table.write_csv(os.path.join(directory, "帕累托前沿.csv"))
+        outputs = plot_frontier(table, "supply", table.objectives[0].name, os.path.join(directory, "帕累托前沿.png"))
+        print(f"导出 {os.path.basename(csv_path)}（{len(table)}行）和 {', '.join(os.path.basename(p) for p in outputs)}")
+
+    # 只看输出和资源时前沿小得多
+    start = time.perf_counter()
+    cheap = explore(keys, 200, objectives=[table.objectives[0].name, "minerals", "gas"])
+    print(f"\n只考虑轻甲DPS/矿/气: {cheap.candidates}个方案中{len(cheap)}个在前沿上，用时{time.perf_counter() - start:.2f}s")
+    print(cheap.sorted_by(cheap.objectives[0].name).format(8))
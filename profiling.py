@@ -0,0 +1,192 @@
+"""轻量级性能剖析
+
+为计算函数和流水线阶段记录调用次数、总耗时和自身耗时，并导出火焰图可用的
+折叠栈（folded stacks，每行 "a;b;c 微秒数"，可直接交给 flamegraph.pl 或 speedscope）。
+
+关闭时被装饰函数只多一次标志判断，stage()返回共享的空上下文，几乎没有开销。
+
+开启方式：
+    环境变量 DPS_PROFILE=1（进程退出时打印汇总表并写出折叠栈）
+    或在代码中调用 enable() / disable()
+
+环境变量：
+    DPS_PROFILE: 设为1时开启
+    DPS_PROFILE_OUT: 折叠栈输出文件，默认为 dps_profile.folded
+"""
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import atexit
+import os
+import threading
+import time
+
+PROFILE_OUTPUT = os.environ.get("DPS_PROFILE_OUT", "dps_profile.folded")
+
+_enabled = os.environ.get("DPS_PROFILE", "0") not in ("", "0")
+_lock = threading.Lock()
+_local = threading.local()
+_NULL_CONTEXT = nullcontext()
+
+
+@dataclass
+class FunctionStats:
+    """单个函数/阶段的统计"""
+    calls: int = 0
+    total: float = 0.0  # 总耗时（秒，含子调用）
+    self_time: float = 0.0  # 自身耗时（秒，不含被剖析的子调用）
+
+
+_stats: Dict[str, FunctionStats] = {}
+_stacks: Dict[str, float] = {}  # 折叠栈 -> 自身耗时（秒）
+_counters: Dict[str, int] = {}
+
+
+def enable():
+    """开启剖析"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """关闭剖析（已记录的数据保留）"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """清空已记录的数据"""
+    with _lock:
+        _stats.clear()
+        _stacks.clear()
+        _counters.clear()
+
+
+def _frames() -> List[list]:
+    frames = getattr(_local, "frames", None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+@contextmanager
+def _record(name: str) -> Iterator[None]:
+    frames = _frames()
+    frame = [name, 0.0]  # [名称, 子调用耗时]
+    frames.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        frames.pop()
+        self_time = elapsed - frame[1]
+        # 递归调用只在最外层计入总耗时
+        recursive = any(f[0] == name for f in frames)
+        stack = ";".join([f[0] for f in frames] + [name])
+        with _lock:
+            stats = _stats.get(name)
+            if stats is None:
+                stats = _stats[name] = FunctionStats()
+            stats.calls += 1
+            if not recursive:
+                stats.total += elapsed
+            stats.self_time += self_time
+            _stacks[stack] = _stacks.get(stack, 0.0) + self_time
+        if frames:
+            frames[-1][1] += elapsed
+
+
+def stage(name: str):
+    """流水线阶段计时
+
+    用法：
+        with stage("绘图"):
+            plt.savefig(...)
+    """
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _record(name)
+
+
+def profiled(func: Optional[Callable] = None, *, name: Optional[str] = None):
+    """函数计时装饰器，可直接使用@profiled或@profiled(name="...")"""
+    def decorator(f: Callable) -> Callable:
+        label = name or f.__qualname__
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return f(*args, **kwargs)
+            with _record(label):
+                return f(*args, **kwargs)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def count(name: str, n: int = 1):
+    """累加计数器（如缓存命中次数）"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot() -> Tuple[Dict[str, FunctionStats], Dict[str, int]]:
+    """当前的函数统计和计数器（副本）"""
+    with _lock:
+        return ({k: FunctionStats(v.calls, v.total, v.self_time) for k, v in _stats.items()},
+                dict(_counters))
+
+
+def folded_stacks() -> List[str]:
+    """折叠栈文本行（耗时单位为微秒）"""
+    with _lock:
+        return [f"{stack} {max(1, int(round(seconds * 1e6)))}" for stack, seconds in sorted(_stacks.items())]
+
+
+def export_folded(path: str = PROFILE_OUTPUT) -> str:
+    """写出折叠栈文件
+
+    Returns:
+        输出文件路径
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(folded_stacks()) + "\n")
+    return path
+
+
+def summary_table(limit: Optional[int] = None) -> str:
+    """按总耗时排序的汇总表"""
+    stats, counters = snapshot()
+    rows = sorted(stats.items(), key=lambda kv: kv[1].total, reverse=True)[:limit]
+    width = max([len(name) for name, _ in rows] + [len("函数/阶段")])
+    # 表头中文字符按两个宽度计算
+    lines = [f"{'函数/阶段':<{width - 5}}  {'调用次数':>8}  {'总耗时ms':>9}  {'自身ms':>10}  {'单次us':>8}"]
+    for label, s in rows:
+        per_call = s.total / s.calls * 1e6 if s.calls else 0.0
+        lines.append(f"{label:<{width}}  {s.calls:>12}  {s.total * 1000:>12.2f}  {s.self_time * 1000:>12.2f}  {per_call:>10.1f}")
+    if counters:
+        lines.append("")
+        lines.extend(f"{label:<{width}}  {value:>12}" for label, value in sorted(counters.items()))
+    return "\n".join(lines)
+
+
+def report(path: str = PROFILE_OUTPUT):
+    """打印汇总表并写出折叠栈"""
+    if not _stats and not _counters:
+        return
+    print(summary_table())
+    print(f"折叠栈已写入 {export_folded(path)}")
+
+
+if _enabled:
+    atexit.register(report)
@@ -0,0 +1,340 @@
+"""分析结果磁盘缓存
+
+按内容寻址：缓存键由单位属性表、分析参数、代码版本和单位数据文件（data/*.json）共同哈希得到，
+任何一项变化都会自动失效。缓存目录超过容量上限时按最近最少使用淘汰。
+写入时只累加估计的缓存大小，估计值超过上限时才扫描目录，淘汰到上限的 EVICT_TARGET 以下。
+
+环境变量：
+    DPS_CACHE: 设为0时关闭缓存
+    DPS_CACHE_DIR: 缓存目录，默认为 .dps_cache
+    DPS_CACHE_MAX_BYTES: 缓存容量上限，默认256MB
+"""
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import ast
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+
+import numpy as np
+
+from profiling import count
+from unit_data import DATA_DIR, source_digest, source_files
+
+CACHE_ENABLED = os.environ.get("DPS_CACHE", "1") != "0"
+CACHE_DIR = os.path.abspath(os.environ.get("DPS_CACHE_DIR", ".dps_cache"))  # 导入时解析，之后切换工作目录不影响
+MAX_CACHE_BYTES = int(os.environ.get("DPS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+EVICT_TARGET = 0.9  # 淘汰后保留的容量比例，避免缓存满后每次写入都扫描目录
+
+
+def _canonical(obj: Any) -> Any:
+    """把属性表、参数等转换为可稳定序列化的结构"""
+    if isinstance(obj, Enum):
+        return f"{type(obj).__name__}.{obj.name}"
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return {"__type__": type(obj).__name__,
+                **{f.name: _canonical(getattr(obj, f.name)) for f in fields(obj)}}
+    if isinstance(obj, dict):
+        items = [[_canonical(k), _canonical(v)] for k, v in obj.items()]
+        return sorted(items, key=lambda kv: json.dumps(kv[0], sort_keys=True))
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((_canonical(v) for v in obj), key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(obj, np.ndarray):
+        return {"dtype": str(obj.dtype), "shape": obj.shape, "data": obj.tolist()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "__dict__") and not callable(obj):
+        return {"__type__": type(obj).__name__,
+                **{k: _canonical(v) for k, v in vars(obj).items()}}
+    return obj
+
+
+_CODE_VERSIONS: Dict[str, str] = {}
+
+
+def code_version(module_names: Sequence[str]) -> str:
+    """计算模块源码的哈希作为代码版本"""
+    digest = hashlib.sha256()
+    for name in sorted(module_names):
+        version = _CODE_VERSIONS.get(name)
+        if version is None:
+            module = sys.modules.get(name) or __import__(name)
+            with open(inspect.getsourcefile(module), "rb") as f:
+                version = hashlib.sha256(f.read()).hexdigest()
+            _CODE_VERSIONS[name] = version
+        digest.update(name.encode())
+        digest.update(version.encode())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def module_dependencies(module_names: Tuple[str, ...]) -> Tuple[str, ...]:
+    """模块及其直接或间接导入的本仓库模块
+
+    按源码中的 import 语句查找（包括函数内的延迟导入），只保留与本文件同目录的模块。
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    found = set()
+    stack = list(module_names)
+    while stack:
+        name = stack.pop()
+        path = os.path.join(root, f"{name}.py")
+        if name in found or not os.path.exists(path):
+            continue
+        found.add(name)
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                stack.extend(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                stack.append(node.module.split(".")[0])
+    return tuple(sorted(found))
+
+
+_DATA_VERSION: Dict[str, Any] = {}
+
+
+def data_version() -> str:
+    """单位数据文件（data/*.json）的摘要，文件未变化（大小和修改时间相同）时复用上次的结果"""
+    paths = source_files(DATA_DIR)
+    signature = [(p, os.stat(p).st_size, os.stat(p).st_mtime_ns) for p in paths]
+    if _DATA_VERSION.get("signature") != signature:
+        _DATA_VERSION.update(signature=signature, digest=source_digest(paths))
+    return _DATA_VERSION["digest"]
+
+
+def make_key(name: str, stats: Any = None, params: Any = None,
+             modules: Sequence[str] = ()) -> str:
+    """生成缓存键
+
+    Args:
+        name: 分析名称（通常为函数名）
+        stats: 单位属性表
+        params: 分析参数
+        modules: 参与计算的模块名，源码变化时缓存失效
+
+    Returns:
+        十六进制哈希字符串（单位数据文件变化时也会变化）
+    """
+    payload = json.dumps(
+        [name, _canonical(stats), _canonical(params), code_version(modules), data_version()],
+        sort_keys=True, ensure_ascii=False, default=repr,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """按内容寻址、容量受限的磁盘缓存"""
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None  # 估计的缓存大小（首次写入时扫描目录得到，之后按写入累加）
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def _touch(self, path: str):
+        """更新访问时间，用于LRU淘汰"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _write(self, path: str, writer: Callable[[str], None]):
+        """先写临时文件再替换，避免中断时留下半个缓存文件"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        writer(tmp_path)
+        os.replace(tmp_path, path)
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """读取缓存结果
+
+        Returns:
+            (是否命中, 缓存值)
+        """
+        path = self._path(key, ".pkl")
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.misses += 1
+            count("result_cache.miss")
+            return False, None
+        self._touch(path)
+        self.hits += 1
+        count("result_cache.hit")
+        return True, value
+
+    def put(self, key: str, value: Any):
+        """写入缓存结果"""
+        def writer(tmp_path: str):
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._write(self._path(key, ".pkl"), writer)
+
+    def restore_file(self, key: str, output_path: str) -> bool:
+        """把缓存的文件（如图表）复制到输出路径
+
+        Returns:
+            是否命中
+        """
+        path = self._path(key, os.path.splitext(output_path)[1])
+        if not os.path.exists(path):
+            self.misses += 1
+            count("result_cache.miss")
+            return False
+        shutil.copyfile(path, output_path)
+        self._touch(path)
+        self.hits += 1
+        count("result_cache.hit")
+        return True
+
+    def store_file(self, key: str, output_path: str):
+        """缓存已生成的文件"""
+        path = self._path(key, os.path.splitext(output_path)[1])
+        self._write(path, lambda tmp_path: shutil.copyfile(output_path, tmp_path))
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """缓存文件的 (修改时间, 大小, 路径)，不含其他进程正在写入的临时文件"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """超过容量上限时删除最久未使用的缓存文件，直到不超过上限的 EVICT_TARGET"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes * EVICT_TARGET:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        self._size = total
+
+    def clear(self):
+        """清空缓存"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._size = None
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def get_cache() -> ResultCache:
+    """获取默认缓存实例"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+
+def _call_params(func: Callable, args: tuple, kwargs: dict) -> Dict[str, Any]:
+    """把调用参数（含默认值）整理为字典，保证不同写法得到同一个键"""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def cached_result(modules: Sequence[str] = (), stats: Optional[Callable[[], Any]] = None):
+    """缓存计算结果的装饰器
+
+    每组参数单独缓存，参数不变的切片直接命中，只有变化的切片重新计算。
+
+    Args:
+        modules: 额外参与计算的模块名（函数所在模块总是包含在内）
+        stats: 返回单位属性表的函数
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not CACHE_ENABLED:
+                return func(*args, **kwargs)
+            key = make_key(func.__qualname__,
+                           stats() if stats is not None else None,
+                           _call_params(func, args, kwargs),
+                           (func.__module__,) + tuple(modules))
+            cache = get_cache()
+            hit, value = cache.get(key)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            cache.put(key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def cached_figure(*output_paths: str, modules: Sequence[str] = (),
+                  stats: Optional[Callable[[], Any]] = None, options: Optional[Callable[[], Any]] = None,
+                  expand: Optional[Callable[[str, Any], Sequence[str]]] = None):
+    """缓存图表文件的装饰器，命中时直接复制缓存的图片而不重新绘制
+
+    渲染选项计入缓存键，按选项写出的所有文件（如额外的 .svg 和 .html）都一起缓存和恢复。
+    被装饰函数有 output_dir 参数时，图片路径相对于它，且 output_dir 不计入缓存键（不同目录共用缓存）。
+
+    Args:
+        output_paths: 被装饰函数生成的图片路径（相对于 output_dir）
+        modules: 额外参与计算的模块名
+        stats: 返回单位属性表的函数
+        options: 返回当前渲染选项的函数（如 chart_render.RenderOptions）
+        expand: expand(图片路径, 渲染选项) 返回按选项写出的全部文件（如 chart_render.output_paths），
+            默认只有图片本身
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not CACHE_ENABLED:
+                return func(*args, **kwargs)
+            render_options = options() if options is not None else None
+            cache = get_cache()
+            params = _call_params(func, args, kwargs)
+            output_dir = params.pop("output_dir", ".")
+            base_key = make_key(func.__qualname__,
+                                stats() if stats is not None else None,
+                                [params, render_options],
+                                (func.__module__,) + tuple(modules))
+            paths = [p for path in output_paths
+                     for p in (expand(path, render_options) if expand is not None else [path])]
+            keys = [make_key(base_key, params=path) for path in paths]
+            paths = [os.path.join(output_dir, path) for path in paths]
+            if all(cache.restore_file(key, path) for key, path in zip(keys, paths)):
+                return None
+            result = func(*args, **kwargs)
+            for key, path in zip(keys, paths):
+                if os.path.exists(path):
+                    cache.store_file(key, path)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,299 @@
+"""进程间共享的预计算DPS表
+
+扫描任务分发到多个进程时，每个工作进程都会重新导入模块、重建单位属性，并各自为每个
+部队上下文重新计算一份单兵DPS表（enemy_waves 的矩阵、pareto 每块的DPS都来自
+army.unit_dps_table）。这里把所有常用参数组合的单兵DPS一次算好：
+
+    DPS[上下文, 军衔, 攻速buff层数, 攻击等级, 单位(武器), 目标类型, 护甲]
+
+与属性表一样写入 data/.compiled/dps/（浮点和定点各一个 .npy），工作进程以只读内存映射
+打开并注册到 army（register_table_source）。之后 unit_dps_table / unit_dps_table_fixed
+在参数落在表内时直接切片，结果与逐次计算逐位相同；表外的参数（自定义目录或修正层、
+超出范围的护甲等）照常计算。
+
+所有进程映射同一个文件，表只占一份页缓存，进程池内存不随进程数增长；工作进程启动时
+只打开文件，不做任何计算。单位数据或相关代码变化后由调度进程（ensure_tables）重新生成。
+
+用法：
+    ProcessPoolExecutor(initializer=attach)   # 调度进程先调用 ensure_tables()
+    python shared_tables.py --workers 8       # 对比共享表与各进程自行计算的内存占用
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse
+import json
+import os
+
+import numpy as np
+
+from army import (DEFAULT_TARGET_TYPE, MAX_ATTACK_LEVEL, ArmyContext, AttackUpgrade, GestaltRank, Modifier,
+                  SafetyField, TableSource, ToshDamageBonus, UnitCatalog, compute_unit_dps_table,
+                  compute_unit_dps_table_fixed, default_catalog, register_table_source)
+from enemy_waves import all_contexts
+from gestalt_cooldown import MAX_ATTACK_SPEED_STACKS, RANK_COOLDOWN_MULTIPLIER
+from result_cache import code_version, module_dependencies
+from unit_data import COMPILED_DIR_NAME, DATA_DIR, source_digest, source_files
+
+TABLES_DIR = os.path.join(DATA_DIR, COMPILED_DIR_NAME, "dps")
+ARMOR_RANGE = (-5, 15)  # 表中的目标护甲（含两端）
+TABLE_NAMES = ("dps", "dps_fixed")
+# 生成表的代码：本模块直接或间接导入的所有模块（含 TOSH_DAMAGE_MULTIPLIER 所在的分析脚本、
+# 单位类和单位数据加载），任何一个变化后重新生成
+CODE_MODULES = module_dependencies(("shared_tables",))
+
+
+@dataclass(frozen=True)
+class TableAxes:
+    """表的各个维度"""
+    contexts: Tuple[ArmyContext, ...]
+    ranks: Tuple[int, ...]
+    buff_stacks: Tuple[int, ...]
+    levels: Tuple[int, ...]
+    units: Tuple[str, ...]
+    target_types: Tuple[str, ...]  # 第一个为默认类型，不在其中的目标类型与默认类型伤害相同
+    armors: Tuple[int, ...]
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return (len(self.contexts), len(self.ranks), len(self.buff_stacks), len(self.levels),
+                len(self.units), len(self.target_types), len(self.armors))
+
+    def to_dict(self) -> Dict:
+        return {"contexts": [[c.armor_reduction, sorted(c.auras)] for c in self.contexts],
+                "ranks": list(self.ranks), "buff_stacks": list(self.buff_stacks), "levels": list(self.levels),
+                "units": list(self.units), "target_types": list(self.target_types), "armors": list(self.armors)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TableAxes":
+        return cls(tuple(ArmyContext(r, frozenset(a)) for r, a in data["contexts"]), tuple(data["ranks"]),
+                   tuple(data["buff_stacks"]), tuple(data["levels"]), tuple(data["units"]),
+                   tuple(data["target_types"]), tuple(data["armors"]))
+
+
+def default_axes(catalog: Optional[UnitCatalog] = None) -> TableAxes:
+    """默认目录的所有上下文、军衔、buff层数、攻击等级和目录中出现的目标类型"""
+    catalog = catalog or default_catalog()
+    types = sorted({t for p in catalog.profiles for t in p.damage} - {DEFAULT_TARGET_TYPE})
+    return TableAxes(tuple(all_contexts(catalog)), tuple(sorted(RANK_COOLDOWN_MULTIPLIER)),
+                     tuple(range(MAX_ATTACK_SPEED_STACKS + 1)), tuple(range(MAX_ATTACK_LEVEL + 1)),
+                     tuple(p.key for p in catalog.profiles), (DEFAULT_TARGET_TYPE, *types),
+                     tuple(range(ARMOR_RANGE[0], ARMOR_RANGE[1] + 1)))
+
+
+def table_modifiers(rank: int, buff_stacks: int, level: int) -> Tuple[Modifier, ...]:
+    """表中每个格子对应的修正层（默认修正层 + 攻击等级）"""
+    return ToshDamageBonus(), SafetyField(), GestaltRank(rank, buff_stacks), AttackUpgrade(level)
+
+
+def _modifier_key(modifiers: Sequence[Modifier]) -> Optional[Tuple[int, int, int]]:
+    """修正层 -> (军衔, buff层数, 攻击等级)，不是表中的修正层组合时返回None"""
+    modifiers = list(modifiers)
+    level = MAX_ATTACK_LEVEL
+    if modifiers and isinstance(modifiers[-1], AttackUpgrade):
+        upgrade = modifiers.pop()
+        if upgrade != AttackUpgrade(upgrade.level):
+            return None
+        level = upgrade.level
+    if (len(modifiers) != 3 or modifiers[0] != ToshDamageBonus() or modifiers[1] != SafetyField()
+            or not isinstance(modifiers[2], GestaltRank)):
+        return None
+    return modifiers[2].rank, modifiers[2].buff_stacks, level
+
+
+def build_tables(axes: TableAxes, catalog: Optional[UnitCatalog] = None) -> Dict[str, np.ndarray]:
+    """逐格计算（每个 上下文 × 军衔 × buff × 攻击等级 调用一次 army 的计算内核）
+
+    Returns:
+        表名 -> 数组，dps为float64，dps_fixed为int64（单位 1/fixed_point.SCALE）
+    """
+    catalog = catalog or default_catalog()
+    targets = [(t, a) for t in axes.target_types for a in axes.armors]
+    tables = {"dps": np.empty(axes.shape), "dps_fixed": np.empty(axes.shape, dtype=np.int64)}
+    cell = (len(axes.units), len(axes.target_types), len(axes.armors))
+    for c, context in enumerate(axes.contexts):
+        for r, rank in enumerate(axes.ranks):
+            for s, stacks in enumerate(axes.buff_stacks):
+                for l, level in enumerate(axes.levels):
+                    modifiers = table_modifiers(rank, stacks, level)
+                    tables["dps"][c, r, s, l] = compute_unit_dps_table(
+                        catalog, context, targets, modifiers).reshape(cell)
+                    tables["dps_fixed"][c, r, s, l] = compute_unit_dps_table_fixed(
+                        catalog, context, targets, modifiers).reshape(cell)
+    return tables
+
+
+class SharedDPSTable(TableSource):
+    """预计算DPS表（通常为只读内存映射）"""
+    def __init__(self, axes: TableAxes, tables: Dict[str, np.ndarray]):
+        self.axes = axes
+        self.tables = tables
+        self._context = {c: i for i, c in enumerate(axes.contexts)}
+        self._rank = {v: i for i, v in enumerate(axes.ranks)}
+        self._stacks = {v: i for i, v in enumerate(axes.buff_stacks)}
+        self._level = {v: i for i, v in enumerate(axes.levels)}
+        self._type = {v: i for i, v in enumerate(axes.target_types)}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(t.nbytes for t in self.tables.values())
+
+    def lookup(self, catalog: UnitCatalog, context: ArmyContext, targets: Sequence[Tuple[str, int]],
+               modifiers: Sequence[Modifier], exact: bool = False) -> Optional[np.ndarray]:
+        """(单位数, 目标数) 单兵DPS，参数不在表内时返回None"""
+        key = _modifier_key(modifiers) if catalog is default_catalog() else None
+        armors = [a for _, a in targets]
+        if (key is None or context not in self._context or key[0] not in self._rank
+                or key[1] not in self._stacks or key[2] not in self._level
+                or not all(isinstance(a, (int, np.integer)) and self.axes.armors[0] <= a <= self.axes.armors[-1]
+                           for a in armors)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        rank, stacks, level = key
+        cell = self.tables["dps_fixed" if exact else "dps"][
+            self._context[context], self._rank[rank], self._stacks[stacks], self._level[level]]
+        types = [self._type.get(t, 0) for t, _ in targets]
+        return np.array(cell[:, types, np.array(armors, dtype=np.int64) - self.axes.armors[0]])
+
+
+# ---------------------------------------------------------------------------
+# 文件
+# ---------------------------------------------------------------------------
+
+def _digest(axes: TableAxes) -> str:
+    """单位数据 + 生成代码 + 表维度"""
+    data = source_digest(source_files(DATA_DIR))
+    return f"{data}:{code_version(CODE_MODULES)}:{json.dumps(axes.to_dict(), ensure_ascii=False, sort_keys=True)}"
+
+
+def _write_tables(tables: Dict[str, np.ndarray], axes: TableAxes, tables_dir: str, digest: str):
+    os.makedirs(tables_dir, exist_ok=True)
+    for name, table in tables.items():
+        tmp_path = os.path.join(tables_dir, f"{name}.{os.getpid()}.tmp.npy")
+        np.save(tmp_path, table)
+        os.replace(tmp_path, os.path.join(tables_dir, f"{name}.npy"))
+    tmp_path = os.path.join(tables_dir, f"axes.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(axes.to_dict(), f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(tables_dir, "axes.json"))
+    # 摘要最后写入，读到摘要即说明所有表都已写完
+    tmp_path = os.path.join(tables_dir, f"digest.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(digest)
+    os.replace(tmp_path, os.path.join(tables_dir, "digest"))
+
+
+def _up_to_date(tables_dir: str, digest: str) -> bool:
+    try:
+        with open(os.path.join(tables_dir, "digest"), encoding="utf-8") as f:
+            return f.read() == digest
+    except OSError:
+        return False
+
+
+def ensure_tables(tables_dir: str = TABLES_DIR) -> bool:
+    """表不存在或已过期时重新生成（在创建进程池之前调用）
+
+    Returns:
+        是否重新生成了表（目录只读无法写入时返回False）
+    """
+    axes = default_axes()
+    digest = _digest(axes)
+    if _up_to_date(tables_dir, digest):
+        return False
+    try:
+        _write_tables(build_tables(axes), axes, tables_dir, digest)
+    except OSError:
+        return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def load_shared_table(tables_dir: str = TABLES_DIR) -> SharedDPSTable:
+    """以只读内存映射打开预计算表（过期时先重新生成，目录只读时在内存中计算）"""
+    axes = default_axes()
+    digest = _digest(axes)
+    if not _up_to_date(tables_dir, digest):
+        tables = build_tables(axes)
+        try:
+            _write_tables(tables, axes, tables_dir, digest)
+        except OSError:
+            return SharedDPSTable(axes, tables)
+    with open(os.path.join(tables_dir, "axes.json"), encoding="utf-8") as f:
+        axes = TableAxes.from_dict(json.load(f))
+    return SharedDPSTable(axes, {name: np.load(os.path.join(tables_dir, f"{name}.npy"), mmap_mode="r")
+                                 for name in TABLE_NAMES})
+
+
+def attach(tables_dir: str = TABLES_DIR) -> SharedDPSTable:
+    """打开预计算表并注册到 army（可直接作为进程池的initializer）"""
+    table = load_shared_table(tables_dir)
+    register_table_source(table)
+    return table
+
+
+# ---------------------------------------------------------------------------
+# 内存对比
+# ---------------------------------------------------------------------------
+
+def process_memory() -> Dict[str, float]:
+    """当前进程的内存（MB）：rss常驻、pss按共享进程数分摊、private私有（仅Linux）"""
+    result = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    result[name] = int(value.split()[0]) / 1024
+    except OSError:
+        return {}
+    return {"rss": result["Rss"], "pss": result["Pss"],
+            "private": result["Private_Clean"] + result["Private_Dirty"]}
+
+
+def _worker_memory(shared: bool) -> Dict[str, float]:
+    """工作进程：使用共享表或自行计算一份表，然后把整张表读一遍（模拟扫描）"""
+    if shared:
+        table = attach()
+    else:
+        axes = default_axes()
+        table = SharedDPSTable(axes, build_tables(axes))
+    checksum = sum(float(np.asarray(t).sum()) for t in table.tables.values())
+    return {**process_memory(), "pid": os.getpid(), "checksum": checksum}
+
+
+def main(argv: List[str] = None):
+    from concurrent.futures import ProcessPoolExecutor
+    import time
+
+    parser = argparse.ArgumentParser(description="生成预计算DPS表并对比进程池内存")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--build", action="store_true", help="只生成表")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rebuilt = ensure_tables()
+    table = load_shared_table()
+    print(f"预计算表 {table.axes.shape}  {table.nbytes / 2 ** 20:.1f}MB  "
+          f"{'已重新生成' if rebuilt else '已是最新'}，用时{(time.perf_counter() - start) * 1000:.0f}ms")
+    if args.build:
+        return
+
+    for shared in (False, True):
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=attach if shared else None) as executor:
+            # 每个进程各处理一个任务
+            futures = [executor.submit(_worker_memory, shared) for _ in range(args.workers)]
+            rows = list({r["pid"]: r for r in (f.result() for f in futures)}.values())
+        elapsed = time.perf_counter() - start
+        print(f"\n{'共享内存映射' if shared else '各进程自行计算'}（{len(rows)}个进程，{elapsed:.2f}s）")
+        if rows and "pss" in rows[0]:
+            print(f"  每进程 私有{np.mean([r['private'] for r in rows]):.1f}MB  "
+                  f"分摊后合计(PSS) {sum(r['pss'] for r in rows):.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
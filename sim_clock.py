@@ -0,0 +1,202 @@
+"""可注入的时钟
+
+单位、技能和冷却都通过 Clock.now() 取当前时间，而不是直接调用 time.time()：
+    WallClock        真实时间（默认，行为与以前一致）
+    ManualClock      手动设置/推进的时间，用于逐步调试和重放
+    SimulationClock  离散事件时钟：按时间顺序执行安排好的回调，时间直接跳到下一个事件，
+                     模拟速度只取决于事件数量，与真实时间无关，且同样的输入总是得到同样的结果
+
+单位在构造时接收 clock 参数，未指定时使用 get_clock() 返回的全局时钟，
+可以用 use_clock() 临时替换：
+    with use_clock(SimulationClock()) as clock:
+        raven = ToshRaven()
+        clock.call_every(1.0, raven.update)
+        clock.run_until(600)
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+import heapq
+import itertools
+import time
+
+
+class Clock(ABC):
+    """时钟接口"""
+    @abstractmethod
+    def now(self) -> float:
+        raise NotImplementedError
+
+
+class WallClock(Clock):
+    """真实时间"""
+    def now(self) -> float:
+        return time.time()
+
+
+class ManualClock(Clock):
+    """手动推进的时钟"""
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+
+    def now(self) -> float:
+        return self._now
+
+    def set(self, when: float):
+        """把时间设为when
+
+        Raises:
+            ValueError: 时间倒退
+        """
+        if when < self._now:
+            raise ValueError(f"时钟不能倒退: {when} < {self._now}")
+        self._now = float(when)
+
+    def advance(self, seconds: float):
+        """时间前进seconds秒"""
+        self.set(self._now + seconds)
+
+
+class SimulationClock(ManualClock):
+    """离散事件时钟
+
+    回调按 (时间, 安排顺序) 执行，同一时刻的事件按安排的先后执行，保证可重放。
+    回调执行时 now() 等于该事件的时间。
+    """
+    def __init__(self, start: float = 0.0):
+        super().__init__(start)
+        self._queue: List[Tuple[float, int, Callable[..., Any], tuple]] = []
+        self._sequence = itertools.count()
+        self.events = 0  # 已执行的事件数
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def call_at(self, when: float, callback: Callable[..., Any], *args):
+        """在when时刻执行callback(*args)
+
+        Raises:
+            ValueError: when早于当前时间
+        """
+        if when < self._now:
+            raise ValueError(f"不能安排过去的事件: {when} < {self._now}")
+        heapq.heappush(self._queue, (float(when), next(self._sequence), callback, args))
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args):
+        """delay秒后执行callback(*args)"""
+        self.call_at(self._now + delay, callback, *args)
+
+    def call_every(self, interval: float, callback: Callable[[float], Any], start: Optional[float] = None,
+                   until: Optional[float] = None):
+        """从start开始每隔interval秒执行callback(当前时间)，回调返回False时停止
+
+        Raises:
+            ValueError: interval不大于0
+        """
+        if interval <= 0:
+            raise ValueError("interval必须大于0")
+
+        def tick():
+            if callback(self._now) is False:
+                return
+            if until is None or self._now + interval <= until:
+                self.call_later(interval, tick)
+
+        self.call_at(self._now if start is None else start, tick)
+
+    def step(self) -> bool:
+        """执行下一个事件
+
+        Returns:
+            是否有事件被执行
+        """
+        if not self._queue:
+            return False
+        when, _, callback, args = heapq.heappop(self._queue)
+        self._now = when
+        self.events += 1
+        callback(*args)
+        return True
+
+    def run_until(self, when: float) -> int:
+        """执行when之前（含）的所有事件，然后把时间推进到when
+
+        Returns:
+            执行的事件数
+        """
+        executed = 0
+        while self._queue and self._queue[0][0] <= when:
+            self.step()
+            executed += 1
+        self.set(max(when, self._now))
+        return executed
+
+    def run(self, max_events: Optional[int] = None) -> int:
+        """执行所有事件（或最多max_events个）
+
+        Returns:
+            执行的事件数
+        """
+        executed = 0
+        while (max_events is None or executed < max_events) and self.step():
+            executed += 1
+        return executed
+
+
+_clock: Clock = WallClock()
+
+
+def get_clock() -> Clock:
+    """全局默认时钟"""
+    return _clock
+
+
+def set_clock(clock: Clock) -> Clock:
+    """替换全局默认时钟
+
+    Returns:
+        原来的时钟
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+@contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    """在with块内使用指定的全局时钟"""
+    previous = set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
+
+
+if __name__ == "__main__":
+    from tosh_raven import ToshRaven, Unit
+
+    def run(seconds: float) -> Tuple[int, List[float], float, int]:
+        # 直接运行本文件时模块名为__main__，单位模块看到的是另一份全局时钟，所以显式注入
+        clock = SimulationClock()
+        raven = ToshRaven(clock)
+        target = Unit(clock)
+        casts = []
+
+        def tick(now: float):
+            raven.update()
+            target.update()
+            target.hp = max(1.0, target.hp - 1.5)  # 持续受到每秒3点伤害
+            if raven.cast_safety_field(target):
+                casts.append(now)
+
+        clock.call_every(0.5, tick)
+        clock.run_until(seconds)
+        return len(casts), casts[:3], target.hp, clock.events
+
+    start = time.perf_counter()
+    first = run(3600)
+    elapsed = time.perf_counter() - start
+    print(f"模拟1小时: 安全力场施放{first[0]}次（前三次在 {first[1]} 秒），目标剩余生命{first[2]:.1f}，"
+          f"{first[3]}个事件，用时{elapsed * 1000:.0f}ms（{3600 / elapsed:,.0f}倍实时）")
+    print(f"重放结果一致: {run(3600) == first}")
@@ -0,0 +1,174 @@
+"""蜘蛛雷伤害模型
+
+死神开战时用初始能量一次性布雷（爆发），之后按能量恢复速度持续补雷（持续输出）。
+一颗雷的期望伤害取决于敌方密度 λ（每平方单位的敌方单位数，按泊松分布近似）：
+    触发概率 = 1 - exp(-λπR侦测²)          侦测范围内至少有一个敌人
+    追击时间 = E[最近敌人距离 | 在侦测范围内] / 追击速度
+    命中数   = 1 + λπR溅射²                触发目标加上溅射范围内的其他敌人
+    单雷伤害 = 触发概率 × 命中数 × max(0.5, 伤害 × 倍率 - 护甲)
+每颗雷从布设到爆炸需要 布设时间 + 追击时间，补雷速度受能量恢复和同时存在上限共同限制：
+    补雷速度 = min(能量恢复 / 能量消耗, 上限 / (布设时间 + 追击时间))
+所有量对死神数量都是数组运算，可以直接叠加到人口-DPS曲线上。
+雷的平均DPS强烈依赖场景（密度越高溅射命中越多，不限敌方总生命值时大船队的爆发远超实际可造成的伤害），
+叠加到曲线上时由调用方给出 MineScenario，总伤害按敌方总生命值封顶。
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Union
+import math
+
+import numpy as np
+
+from supply_curve import SupplyCurve, medivac_rule, supply_curve
+from tosh_reaper import SpiderMine
+from unit_data import unit_attributes
+
+DEFAULT_ENEMY_DENSITY = 0.2  # 每平方单位的敌方单位数
+DEFAULT_WINDOW = 30.0  # 计算平均DPS的战斗时长（秒）
+
+_erf = np.vectorize(math.erf, otypes=[np.float64])
+
+
+@dataclass(frozen=True)
+class MineFieldModel:
+    """蜘蛛雷与布雷死神的属性"""
+    damage: float
+    splash_radius: float
+    arm_time: float
+    detection_radius: float
+    chase_speed: float
+    cost: float  # 每颗雷的能量消耗
+    max_count: int  # 每个死神同时存在的上限
+    energy: float  # 死神初始能量
+    energy_regen: float  # 死神每秒能量恢复
+
+    @property
+    def burst_mines(self) -> int:
+        """开战时每个死神能立即布下的雷数"""
+        return int(min(self.max_count, self.energy // self.cost))
+
+
+@dataclass(frozen=True)
+class MineScenario:
+    """计算蜘蛛雷平均DPS的战斗场景"""
+    enemy_hp: float  # 敌方总生命值，战斗时长内雷的总伤害不超过它
+    enemy_density: float = DEFAULT_ENEMY_DENSITY
+    window: float = DEFAULT_WINDOW
+    target_armor: float = 0
+
+    def label(self) -> str:
+        return f'密度{self.enemy_density:g}, {self.window:g}秒, 敌方{self.enemy_hp:g}生命'
+
+
+@lru_cache(maxsize=None)
+def default_mine_model() -> MineFieldModel:
+    """蜘蛛雷模型（数据来自 data/tosh.json）"""
+    mine = SpiderMine()
+    reaper = unit_attributes("tosh_reaper")
+    return MineFieldModel(mine.damage, mine.splash_radius, mine.arm_time, mine.detection_radius,
+                          mine.movement_speed, mine.cost, mine.max_count, reaper["energy"], reaper["energy_regen"])
+
+
+def trigger_probability(density: Union[float, np.ndarray], model: Optional[MineFieldModel] = None) -> np.ndarray:
+    """侦测范围内至少有一个敌人的概率"""
+    model = model or default_mine_model()
+    return 1 - np.exp(-np.asarray(density, dtype=np.float64) * math.pi * model.detection_radius ** 2)
+
+
+def chase_time(density: Union[float, np.ndarray], model: Optional[MineFieldModel] = None) -> np.ndarray:
+    """触发后追上最近敌人的期望时间
+
+    二维泊松分布下最近邻距离的概率密度为 2a·r·exp(-a·r²)（a = λπ），
+    在侦测半径R内截断后的期望为：
+        (√π/(2√a)·erf(√a·R) - R·exp(-a·R²)) / (1 - exp(-a·R²))
+    """
+    model = model or default_mine_model()
+    a = np.asarray(density, dtype=np.float64) * math.pi
+    radius = model.detection_radius
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inside = 1 - np.exp(-a * radius ** 2)
+        distance = (np.sqrt(math.pi) / (2 * np.sqrt(a)) * _erf(np.sqrt(a) * radius)
+                    - radius * np.exp(-a * radius ** 2)) / inside
+    return np.where(a > 0, distance, radius) / model.chase_speed
+
+
+@dataclass
+class MineContribution:
+    """蜘蛛雷对死神船队的贡献（各数组与输入的死神数量一一对应）"""
+    burst_damage: np.ndarray  # 开战布雷的总伤害
+    sustained_dps: np.ndarray  # 持续补雷的DPS
+    average_dps: np.ndarray  # 战斗时长内的平均DPS（爆发 + 持续）
+    delay: float  # 布雷到爆炸的时间（布设 + 追击）
+
+
+def mine_contribution(reapers: Union[int, np.ndarray], enemy_density: float = DEFAULT_ENEMY_DENSITY,
+                      window: float = DEFAULT_WINDOW, target_armor: float = 0, damage_multiplier: float = 1.0,
+                      enemy_hp: Optional[float] = None,
+                      model: Optional[MineFieldModel] = None) -> MineContribution:
+    """计算不同死神数量下蜘蛛雷的爆发伤害和持续DPS
+
+    Args:
+        reapers: 死神数量（可以是数组）
+        enemy_density: 敌方密度（每平方单位的敌方单位数）
+        window: 计算平均DPS的战斗时长（秒）
+        target_armor: 目标护甲
+        damage_multiplier: 伤害倍率（托什加成由调用方传入 TOSH_DAMAGE_MULTIPLIER）
+        enemy_hp: 敌方总生命值，给出时战斗时长内的总伤害不超过它
+        model: 蜘蛛雷模型
+
+    Returns:
+        蜘蛛雷贡献
+
+    Raises:
+        ValueError: 战斗时长不是正数
+    """
+    if not window > 0:
+        raise ValueError(f"战斗时长应为正数: {window}")
+    model = model or default_mine_model()
+    reapers = np.asarray(reapers, dtype=np.float64)
+    per_target = max(0.5, model.damage * damage_multiplier - target_armor)
+    hits = 1 + enemy_density * math.pi * model.splash_radius ** 2
+    per_mine = float(trigger_probability(enemy_density, model)) * hits * per_target
+    delay = model.arm_time + float(chase_time(enemy_density, model))
+
+    rate = min(model.energy_regen / model.cost, model.max_count / delay)  # 每个死神每秒补雷数
+    burst = reapers * model.burst_mines * per_mine
+    sustained = reapers * rate * per_mine
+    total = np.where(window >= delay, burst + sustained * max(0.0, window - delay), 0.0)
+    if enemy_hp is not None:
+        total = np.minimum(total, enemy_hp)
+    return MineContribution(burst, sustained, total / window, delay)
+
+
+def mine_dps_by_supply(max_supply: int = 160, enemy_density: float = DEFAULT_ENEMY_DENSITY,
+                       window: float = DEFAULT_WINDOW, damage_multiplier: float = 1.0,
+                       model: Optional[MineFieldModel] = None, enemy_hp: Optional[float] = None,
+                       target_armor: float = 0) -> SupplyCurve:
+    """死神船队（含运输船）各人口下蜘蛛雷的平均DPS，与 calculate_dps_by_supply 的人口点一致
+
+    蜘蛛雷对轻甲和重甲伤害相同，dps 中两个类别的值一样。
+    enemy_hp 为敌方总生命值，给出时总伤害按它封顶（见 mine_contribution）。
+    """
+    curve = supply_curve({"reaper": 1}, {}, max_supply, medivac_rule())
+    dps = mine_contribution(curve.groups, enemy_density, window, target_armor, damage_multiplier, enemy_hp,
+                            model).average_dps
+    curve.dps = {"light_armor": dps, "heavy_armor": dps}
+    return curve
+
+
+if __name__ == "__main__":
+    import time
+
+    model = default_mine_model()
+    print(f"每个死神开战布雷{model.burst_mines}颗，之后每{model.cost / model.energy_regen:.1f}秒补一颗")
+    fleets = np.array([8, 32, 64, 128])
+    for density in (0.05, 0.2, 0.5):
+        result = mine_contribution(fleets, density, damage_multiplier=1.2)
+        print(f"\n敌方密度{density}: 触发概率{float(trigger_probability(density)):.0%}，布雷到爆炸{result.delay:.1f}秒")
+        for n, burst, sustained, average in zip(fleets, result.burst_damage, result.sustained_dps, result.average_dps):
+            print(f"  {n:>4}死神  爆发{burst:>9.0f}  持续DPS{sustained:>7.0f}  {DEFAULT_WINDOW:.0f}秒平均DPS{average:>7.0f}")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        mine_dps_by_supply(160)
+    print(f"\n1-160人口蜘蛛雷曲线: {(time.perf_counter() - start) * 1000:.1f}us/次")
@@ -0,0 +1,152 @@
+"""人口-DPS曲线
+
+任意单位组合按固定配比（一"组"）成倍增加，运输船按载员位向上取整（阶梯函数）。
+单兵DPS不随数量变化，所以整条曲线可以用数组一次算出：
+    人口(n) = n × 组人口 + ⌈n × 组载员位 / 运输船容量⌉ × 运输船人口
+    DPS(n)  = n × 组DPS
+给定人口上限时的最大组数用 searchsorted 在单调的人口数组上查找。
+几千人口的整条曲线也只需几微秒到几十微秒。
+
+单位写法与 army / dps_cli 一致（reaper、marine.STORM_RIFLE、ghost.FISSION_RIFLE 等）。
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from tosh_medivac import UnitType as CargoType
+from unit_data import unit_attributes
+
+# 单位写法前缀 -> 数据文件中的单位名
+_DATA_UNITS = {
+    "reaper": "tosh_reaper",
+    "raven": "tosh_raven",
+    "medivac": "tosh_medivac",
+    "marine": "gestalt_marine",
+    "ghost": "gestalt_ghost",
+}
+
+# 单位写法前缀 -> 占用的载员位（空中单位不需要运输）
+_CARGO = {
+    "reaper": CargoType.DEATH_HEAD.value,
+    "marine": CargoType.MARINE.value,
+    "ghost": CargoType.GHOST.value,
+}
+
+
+def data_unit(key: str) -> str:
+    """单位写法对应的数据文件单位名（如 marine.STORM_RIFLE -> gestalt_marine）
+
+    Raises:
+        ValueError: 未知单位
+    """
+    prefix = key.partition(".")[0]
+    if prefix not in _DATA_UNITS:
+        raise ValueError(f"未知单位 {key}")
+    return _DATA_UNITS[prefix]
+
+
+@dataclass(frozen=True)
+class TransportRule:
+    """运输规则：地面单位需要多少运输船"""
+    capacity: int  # 每艘运输船的载员位
+    supply: float
+    minerals: float
+    gas: float
+
+    def count(self, cargo: Union[int, np.ndarray]) -> Union[int, np.ndarray]:
+        """装下cargo个载员位需要的运输船数（向上取整）"""
+        return -(-cargo // self.capacity)
+
+
+@lru_cache(maxsize=None)
+def medivac_rule() -> TransportRule:
+    """托什运输船（数据来自 data/tosh.json）"""
+    medivac = unit_attributes("tosh_medivac")
+    return TransportRule(int(medivac["max_cargo_size"]), medivac["supply"],
+                         medivac["cost_minerals"], medivac["cost_gas"])
+
+
+@lru_cache(maxsize=None)
+def unit_footprint(key: str) -> Dict[str, float]:
+    """单位的人口、资源和载员位
+
+    Raises:
+        ValueError: 未知单位
+    """
+    stats = unit_attributes(data_unit(key))
+    return {
+        "supply": stats["supply"],
+        "minerals": stats.get("cost_minerals", 0),
+        "gas": stats.get("cost_gas", 0),
+        "cargo": _CARGO.get(key.partition(".")[0], 0),
+    }
+
+
+@dataclass
+class SupplyCurve:
+    """人口-DPS曲线（按组数递增，各数组一一对应）"""
+    groups: np.ndarray  # 组数
+    supply: np.ndarray  # 总人口（含运输船）
+    transports: np.ndarray  # 运输船数
+    minerals: np.ndarray
+    gas: np.ndarray
+    dps: Dict[str, np.ndarray]  # DPS类别（如light_armor）-> DPS
+
+    def at_supply(self, supplies: Union[Sequence[float], np.ndarray]) -> "SupplyCurve":
+        """各人口上限下能达到的最大组数对应的点（人口不够一组时组数为0）"""
+        index = np.searchsorted(self.supply, np.asarray(supplies), side="right") - 1
+        present = index >= 0
+        index = np.maximum(index, 0)
+
+        def pick(values: np.ndarray) -> np.ndarray:
+            return np.where(present, values[index], 0) if len(values) else np.zeros(len(index))
+
+        return SupplyCurve(pick(self.groups), pick(self.supply), pick(self.transports), pick(self.minerals),
+                           pick(self.gas), {k: pick(v) for k, v in self.dps.items()})
+
+
+def supply_curve(mix: Mapping[str, int], group_dps: Mapping[str, float], max_supply: float,
+                 transport: Optional[TransportRule] = None, min_supply: float = 0) -> SupplyCurve:
+    """计算单位组合的人口-DPS曲线
+
+    Args:
+        mix: 一组的单位配比，如 {"reaper": 1} 或 {"ghost.FISSION_RIFLE": 1, "marine.STORM_RIFLE": 6}
+        group_dps: 一组的DPS，如 {"light_armor": 33.6, "heavy_armor": 16.8}
+        max_supply: 人口上限（曲线只包含不超过上限的点）
+        transport: 运输规则，None表示不需要运输
+        min_supply: 只保留人口不低于此值的点
+
+    Returns:
+        曲线
+    """
+    footprint = {key: unit_footprint(key) for key in mix}
+    group_supply = sum(footprint[k]["supply"] * n for k, n in mix.items())
+    group_cargo = sum(footprint[k]["cargo"] * n for k, n in mix.items())
+    if group_supply <= 0:
+        raise ValueError("单位组合的人口必须大于0")
+
+    groups = np.arange(1, int(max_supply // group_supply) + 1)
+    transports = transport.count(groups * group_cargo) if transport and group_cargo else np.zeros_like(groups)
+    transport_supply = transport.supply if transport else 0.0
+    supply = groups * group_supply + transports * transport_supply
+    keep = (supply <= max_supply) & (supply >= min_supply)
+    groups, transports, supply = groups[keep], transports[keep], supply[keep]
+
+    minerals = groups * sum(footprint[k]["minerals"] * n for k, n in mix.items())
+    gas = groups * sum(footprint[k]["gas"] * n for k, n in mix.items())
+    if transport:
+        minerals = minerals + transports * transport.minerals
+        gas = gas + transports * transport.gas
+    return SupplyCurve(groups, supply, transports, minerals, gas,
+                       {name: groups * value for name, value in group_dps.items()})
+
+
+def max_dps_at_supply(mix: Mapping[str, int], group_dps: Mapping[str, float],
+                      supplies: Union[Sequence[float], np.ndarray],
+                      transport: Optional[TransportRule] = None) -> SupplyCurve:
+    """给定各人口上限时，单位组合能达到的最大DPS（含运输船人口）"""
+    supplies = np.asarray(supplies)
+    curve = supply_curve(mix, group_dps, float(supplies.max(initial=0)), transport)
+    return curve.at_supply(supplies)
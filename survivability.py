@@ -0,0 +1,393 @@
+"""生存能力模型：有效生命值与阵亡时间
+
+现有分析只看输出，这里评估部队在给定敌方火力下能坚持多久。
+每次命中按护甲结算（与 calculate_actual_damage 相同，最低0.5），
+再扣除生命恢复：
+    承受DPS[单位, 敌方] = 命中频率[敌方] × max(0.5, 单次伤害[敌方, 护甲类型(单位)] - 护甲[单位])
+    阵亡时间[单位, 敌方] = 生命值[单位] / (承受DPS - 生命恢复[单位])
+    有效生命值 = 阵亡时间 × 敌方原始DPS（即需要多少未减免的伤害才能击杀）
+安全力场等增益按覆盖率（持续时间/冷却时间）在有/无增益两种状态间加权。
+
+敌方集火时单位依次阵亡，尚未被攻击的单位保持满血，所以部队坚持的时间是
+各单位阵亡时间按数量求和：
+    部队阵亡时间[部队, 敌方] = Σ_单位 数量[部队, 单位] × 阵亡时间[上下文(部队), 单位, 敌方]
+与 army 的DPS内核一样，每种部队上下文只需算一张单兵表，
+因此可以一次评估大量编队，并与DPS一起给出 DPS×生存 的帕累托前沿。
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from army import (AURA_SAFETY_FIELD, Army, ArmyContext, UnitCatalog, army_contexts, default_catalog,
+                  evaluate_counts)
+from profiling import profiled, stage
+from supply_curve import data_unit
+from tosh_raven import SafetyField as RavenSafetyField
+from unit_data import unit_attributes
+
+DEFAULT_DAMAGE_TYPE = "普通"
+
+# 空中单位（只能被对空武器攻击）
+AIR_UNITS = {"raven", "medivac"}
+
+
+@dataclass(frozen=True)
+class DefenseProfile:
+    """单位的防御属性（修正层作用之前）"""
+    key: str  # 单位写法，与 army.UnitProfile.key 一致
+    commander: str  # tosh / gestalt
+    hp: float
+    armor: float
+    armor_type: str
+    is_air: bool = False
+    hp_regen: float = 0.0  # 每秒生命恢复（已按增益覆盖率平均）
+    buff_armor: float = 0.0  # 增益期间额外护甲
+    buff_uptime: float = 0.0  # 增益覆盖率（0~1）
+    damage_taken: float = 1.0  # 实际承受的伤害比例（如隐形期间不受攻击）
+
+
+@dataclass(frozen=True)
+class EnemyProfile:
+    """敌方火力：一种敌方单位及其数量"""
+    name: str
+    damage: Dict[str, float] = field(default_factory=dict)  # 护甲类型 -> 每次命中伤害，"普通"为默认值
+    cooldown: float = 1.0  # 攻击间隔
+    count: int = 1
+    multi_attack: int = 1
+    can_attack_air: bool = True
+    can_attack_ground: bool = True
+    # 敌方单位自身的防御属性（计算我方对其DPS和击杀时间用）
+    hp: float = 0.0
+    armor: int = 0
+    armor_type: str = DEFAULT_DAMAGE_TYPE
+
+    @property
+    def hits_per_second(self) -> float:
+        return self.count * self.multi_attack / self.cooldown
+
+    def damage_against(self, armor_type: str) -> float:
+        return self.damage.get(armor_type, self.damage.get(DEFAULT_DAMAGE_TYPE, 0.0))
+
+    def scaled(self, count: int) -> "EnemyProfile":
+        return replace(self, count=count)
+
+    @property
+    def target(self) -> Tuple[str, int]:
+        """作为我方攻击目标时的 (目标类型, 护甲)"""
+        return self.armor_type, self.armor
+
+
+# 常见敌方单位（单位数量为1，用 scaled() 调整）
+ENEMY_PROFILES: Dict[str, EnemyProfile] = {p.name: p for p in [
+    EnemyProfile("跳虫", {DEFAULT_DAMAGE_TYPE: 5}, 0.497, can_attack_air=False, hp=35, armor_type="轻甲"),
+    EnemyProfile("刺蛇", {DEFAULT_DAMAGE_TYPE: 12}, 0.59, hp=90, armor_type="轻甲"),
+    EnemyProfile("雷兽", {DEFAULT_DAMAGE_TYPE: 35}, 0.61, can_attack_air=False, hp=500, armor=2, armor_type="重甲"),
+    EnemyProfile("陆战队员", {DEFAULT_DAMAGE_TYPE: 6}, 0.61, hp=45, armor_type="轻甲"),
+    EnemyProfile("掠夺者", {DEFAULT_DAMAGE_TYPE: 10, "重甲": 20}, 1.07, can_attack_air=False,
+                 hp=125, armor=1, armor_type="重甲"),
+    EnemyProfile("攻城坦克", {DEFAULT_DAMAGE_TYPE: 40, "重甲": 70}, 2.14, can_attack_air=False,
+                 hp=175, armor=1, armor_type="重甲"),
+]}
+
+# 敌方火力：单一敌方单位，或几种敌方单位组成的混合部队（同时集火）
+EnemyForce = Union[EnemyProfile, Sequence[EnemyProfile]]
+
+
+def force_units(force: EnemyForce) -> Tuple[EnemyProfile, ...]:
+    """敌方火力包含的各敌方单位"""
+    return (force,) if isinstance(force, EnemyProfile) else tuple(force)
+
+
+def force_name(force: EnemyForce) -> str:
+    return "+".join(f"{e.count}{e.name}" if e.count != 1 else e.name for e in force_units(force))
+
+
+class DefenseModifier(ABC):
+    """防御修正层基类：按部队上下文调整单位防御属性"""
+    @abstractmethod
+    def apply(self, profile: DefenseProfile, context: ArmyContext) -> DefenseProfile:
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class DefenseUpgrade(DefenseModifier):
+    """步兵防御升级：地面单位每级+1护甲"""
+    level: int = 0
+
+    def apply(self, profile: DefenseProfile, context: ArmyContext) -> DefenseProfile:
+        if profile.is_air or not self.level:
+            return profile
+        return replace(profile, armor=profile.armor + self.level)
+
+
+@dataclass(frozen=True)
+class SafetyFieldProtection(DefenseModifier):
+    """夜枭安全力场：部队中有夜枭时托什单位获得护甲和生命恢复
+
+    Attributes:
+        stacks: 同时作用的力场层数
+        uptime: 覆盖率，默认1.0与输出分析的"常驻安全力场"假设一致；
+            单只夜枭轮流施放时可用 safety_field_uptime()
+    """
+    stacks: int = 1
+    uptime: float = 1.0
+
+    def apply(self, profile: DefenseProfile, context: ArmyContext) -> DefenseProfile:
+        if profile.commander != "tosh" or AURA_SAFETY_FIELD not in context.auras:
+            return profile
+        spell = RavenSafetyField()
+        return replace(profile,
+                       hp_regen=profile.hp_regen + spell.bonus_hp_regen * self.stacks * self.uptime,
+                       buff_armor=profile.buff_armor + spell.bonus_armor * self.stacks,
+                       buff_uptime=max(profile.buff_uptime, self.uptime))
+
+
+DEFAULT_DEFENSE_MODIFIERS: Tuple[DefenseModifier, ...] = (SafetyFieldProtection(),)
+
+
+def safety_field_uptime() -> float:
+    """单次施放的安全力场覆盖率（持续时间/冷却时间）"""
+    spell = RavenSafetyField()
+    return min(1.0, spell.duration / spell.cooldown)
+
+
+@lru_cache(maxsize=None)
+def _base_profiles(catalog: UnitCatalog) -> Tuple[DefenseProfile, ...]:
+    profiles = []
+    for unit in catalog.profiles:
+        stats = unit_attributes(data_unit(unit.key))
+        profiles.append(DefenseProfile(unit.key, unit.commander, stats["hp"], stats["armor"], stats["armor_type"],
+                                       is_air=unit.key.partition(".")[0] in AIR_UNITS))
+    return tuple(profiles)
+
+
+def defense_profiles(catalog: UnitCatalog, context: ArmyContext,
+                     modifiers: Sequence[DefenseModifier] = DEFAULT_DEFENSE_MODIFIERS) -> List[DefenseProfile]:
+    """某个上下文下目录中每个单位的防御属性"""
+    profiles = []
+    for profile in _base_profiles(catalog):
+        for modifier in modifiers:
+            profile = modifier.apply(profile, context)
+        profiles.append(profile)
+    return profiles
+
+
+@dataclass
+class DurabilityTable:
+    """单兵生存表（各数组为 (单位数, 敌方数)）"""
+    incoming_dps: np.ndarray  # 护甲结算后承受的DPS
+    net_dps: np.ndarray  # 扣除生命恢复后的净掉血速度
+    time_to_die: np.ndarray  # 阵亡时间（秒），无法被攻击或恢复大于伤害时为inf
+    effective_hp: np.ndarray  # 有效生命值
+    targetable: np.ndarray  # 是否能被该敌方攻击
+
+
+def durability_table(profiles: Sequence[DefenseProfile], enemies: Sequence[EnemyForce]) -> DurabilityTable:
+    """单兵对每种敌方火力的生存表
+
+    混合部队中各敌方单位的承受DPS相加后再扣除一次生命恢复。
+
+    Args:
+        profiles: 单位防御属性（已作用修正层）
+        enemies: 敌方火力列表
+
+    Returns:
+        生存表
+    """
+    hp = np.array([p.hp for p in profiles], dtype=np.float64)[:, None]
+    armor = np.array([p.armor for p in profiles], dtype=np.float64)[:, None]
+    buff_armor = np.array([p.buff_armor for p in profiles], dtype=np.float64)[:, None]
+    uptime = np.array([p.buff_uptime for p in profiles], dtype=np.float64)[:, None]
+    regen = np.array([p.hp_regen for p in profiles], dtype=np.float64)[:, None]
+    taken = np.array([p.damage_taken for p in profiles], dtype=np.float64)[:, None]
+
+    forces = [force_units(f) for f in enemies]
+    units = [e for force in forces for e in force]
+    # 敌方单位 -> 所属火力的归属矩阵
+    membership = np.zeros((len(units), len(forces)))
+    membership[np.arange(len(units)), np.repeat(np.arange(len(forces)), [len(f) for f in forces])] = 1
+
+    armor_types = sorted({p.armor_type for p in profiles})
+    per_type = np.array([[e.damage_against(t) for e in units] for t in armor_types]).reshape(
+        len(armor_types), len(units))
+    damage = per_type[[armor_types.index(p.armor_type) for p in profiles]]  # (单位, 敌方单位)
+    rate = np.array([e.hits_per_second for e in units])[None, :]
+    # 敌方单位能否攻击我方单位：空中单位看 can_attack_air，地面单位看 can_attack_ground
+    hits = np.where(np.array([p.is_air for p in profiles])[:, None],
+                    np.array([e.can_attack_air for e in units])[None, :],
+                    np.array([e.can_attack_ground for e in units])[None, :])
+
+    def per_hit(total_armor: np.ndarray) -> np.ndarray:
+        # 与 calculate_actual_damage 相同：正护甲减伤（最低0.5），负护甲增伤
+        return np.where(total_armor >= 0, np.maximum(0.5, damage - total_armor), damage - total_armor)
+
+    mitigated = (1 - uptime) * per_hit(armor) + uptime * per_hit(armor + buff_armor)
+    incoming = np.where(hits, mitigated * rate * taken, 0.0) @ membership
+    targetable = (hits.astype(np.float64) @ membership) > 0
+    net = incoming - regen
+    with np.errstate(divide="ignore"):
+        time_to_die = np.where(net > 0, hp / np.where(net > 0, net, 1), np.inf)
+    raw = np.where(hits, damage * rate, 0.0) @ membership
+    with np.errstate(invalid="ignore"):
+        effective_hp = np.where(np.isfinite(time_to_die), time_to_die * raw, np.inf)
+    return DurabilityTable(incoming, net, time_to_die, effective_hp, targetable)
+
+
+@dataclass
+class SquadDurability:
+    """部队生存能力（各数组为 (部队数, 敌方数)）"""
+    time_to_die: np.ndarray  # 集火下全部可被攻击单位阵亡的时间（秒）
+    effective_hp: np.ndarray  # 有效生命值合计
+    total_hp: np.ndarray  # 生命值合计（部队数,）
+
+
+@profiled
+def evaluate_durability(counts: np.ndarray, enemies: Sequence[EnemyForce],
+                        catalog: Optional[UnitCatalog] = None,
+                        modifiers: Sequence[DefenseModifier] = DEFAULT_DEFENSE_MODIFIERS) -> SquadDurability:
+    """批量计算部队对多种敌方火力的生存能力
+
+    Args:
+        counts: (部队数, 单位数) 数量矩阵，列顺序与目录一致
+        enemies: 敌方火力列表
+        catalog: 单位目录
+        modifiers: 防御修正层
+
+    Returns:
+        部队生存能力
+    """
+    catalog = catalog or default_catalog()
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+    contexts, context_index = army_contexts(counts, catalog)
+    time_to_die = np.empty((len(counts), len(enemies)))
+    effective_hp = np.empty_like(time_to_die)
+    total_hp = counts @ np.array([p.hp for p in _base_profiles(catalog)], dtype=np.float64)
+    for c, context in enumerate(contexts):
+        table = durability_table(defense_profiles(catalog, context, modifiers), enemies)
+        rows = counts[context_index == c]
+        # 数量为0或无法被攻击的单位不参与（0×inf 的结果被丢弃）
+        counted = (rows[:, :, None] > 0) & table.targetable[None]
+        with np.errstate(invalid="ignore"):
+            time_to_die[context_index == c] = np.where(
+                counted, rows[:, :, None] * table.time_to_die[None], 0).sum(axis=1)
+            effective_hp[context_index == c] = np.where(
+                counted, rows[:, :, None] * table.effective_hp[None], 0).sum(axis=1)
+    return SquadDurability(time_to_die, effective_hp, total_hp)
+
+
+def evaluate_armies_durability(armies: Sequence[Army], enemies: Sequence[EnemyForce],
+                               catalog: Optional[UnitCatalog] = None,
+                               modifiers: Sequence[DefenseModifier] = DEFAULT_DEFENSE_MODIFIERS
+                               ) -> SquadDurability:
+    """计算多支部队对多种敌方火力的生存能力"""
+    catalog = catalog or default_catalog()
+    counts = np.array([catalog.vector(a.units) for a in armies]).reshape(len(armies), len(catalog))
+    return evaluate_durability(counts, enemies, catalog, modifiers)
+
+
+def pareto_front(dps: np.ndarray, durability: np.ndarray) -> np.ndarray:
+    """DPS和生存时间都不被其他点同时超过的点（布尔掩码）"""
+    dps = np.asarray(dps, dtype=np.float64)
+    durability = np.asarray(durability, dtype=np.float64)
+    # 按DPS降序（相同DPS时生存时间降序）扫描，生存时间超过此前所有点的才在前沿上
+    order = np.lexsort((-durability, -dps))
+    sorted_durability = durability[order]
+    best_before = np.concatenate(([-np.inf], np.maximum.accumulate(sorted_durability)[:-1]))
+    mask = np.zeros(len(dps), dtype=bool)
+    mask[order] = sorted_durability > best_before
+    return mask
+
+
+@dataclass
+class Frontier:
+    """一种敌方火力下各部队的 DPS×生存 点"""
+    enemy: str
+    dps: np.ndarray
+    time_to_die: np.ndarray
+    on_front: np.ndarray  # 是否在帕累托前沿上
+
+    @property
+    def damage_before_death(self) -> np.ndarray:
+        """阵亡前打出的伤害上限（DPS×阵亡时间，不计阵亡带来的DPS衰减）"""
+        return self.dps * self.time_to_die
+
+
+def durability_frontiers(armies: Sequence[Army], enemies: Sequence[EnemyForce], target: Tuple[str, int],
+                         catalog: Optional[UnitCatalog] = None,
+                         modifiers: Sequence[DefenseModifier] = DEFAULT_DEFENSE_MODIFIERS) -> List[Frontier]:
+    """各部队对目标的DPS与对各敌方火力的生存时间
+
+    Args:
+        armies: 部队列表
+        enemies: 敌方火力列表
+        target: 计算DPS用的 (目标类型, 护甲)
+        catalog: 单位目录
+        modifiers: 防御修正层（输出修正层使用 army 的默认值）
+
+    Returns:
+        每种敌方火力一个前沿
+    """
+    catalog = catalog or default_catalog()
+    counts = np.array([catalog.vector(a.units) for a in armies]).reshape(len(armies), len(catalog))
+    dps = evaluate_counts(counts, [target], catalog)[:, 0]
+    durability = evaluate_durability(counts, enemies, catalog, modifiers)
+    return [Frontier(force_name(enemy), dps, durability.time_to_die[:, e], pareto_front(dps, durability.time_to_die[:, e]))
+            for e, enemy in enumerate(enemies)]
+
+
+def plot_dps_durability(armies: Sequence[Army], enemies: Sequence[EnemyForce], target: Tuple[str, int] = ("普通", 1),
+                        output: str = "部队DPS生存前沿.png"):
+    """绘制各部队的 DPS×生存时间 散点图，每种敌方火力一个子图，前沿点用折线连接"""
+    import matplotlib.pyplot as plt
+
+    frontiers = durability_frontiers(armies, enemies, target)
+    fig, axes = plt.subplots(1, len(frontiers), figsize=(6 * len(frontiers), 6), squeeze=False)
+    for ax, frontier in zip(axes[0], frontiers):
+        ax.scatter(frontier.time_to_die, frontier.dps, color='#9AC9DB', edgecolor='#2878B5')
+        order = np.argsort(frontier.time_to_die[frontier.on_front])
+        ax.plot(frontier.time_to_die[frontier.on_front][order], frontier.dps[frontier.on_front][order],
+                '-o', color='#C82423', linewidth=2)
+        for army, x, y in zip(armies, frontier.time_to_die, frontier.dps):
+            if army.name:
+                ax.annotate(army.name, (x, y), textcoords="offset points", xytext=(5, 5), fontsize=9)
+        ax.set_title(f'对抗{frontier.enemy}', fontsize=13, fontweight='bold')
+        ax.set_xlabel('集火下坚持时间(秒)', fontsize=12)
+        ax.set_ylabel(f'DPS (目标{target[0]}，护甲{target[1]})', fontsize=12)
+    plt.tight_layout()
+    with stage("savefig"):
+        plt.savefig(output, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+if __name__ == "__main__":
+    import time
+
+    enemies = [ENEMY_PROFILES["刺蛇"].scaled(20), ENEMY_PROFILES["雷兽"].scaled(6),
+               ENEMY_PROFILES["攻城坦克"].scaled(8)]
+    squads = [
+        Army({"ghost.FISSION_RIFLE": 5, "marine.STORM_RIFLE": 30}, "风暴裂解5+30"),
+        Army({"marine.HEAVY_LASER": 35}, "7枪重型激光炮"),
+        Army({"ghost.HELLFIRE": 35}, "7鬼炼狱火"),
+        Army({"reaper": 128, "raven": 1}, "死神船队"),
+        Army({"reaper": 128}, "死神(无夜枭)"),
+    ]
+    print("敌方: " + "  ".join(force_name(e) for e in enemies))
+    for modifiers, label in [(DEFAULT_DEFENSE_MODIFIERS, "常驻安全力场"),
+                             ((SafetyFieldProtection(uptime=safety_field_uptime()), DefenseUpgrade(3)),
+                              f"力场覆盖{safety_field_uptime():.0%} + 3防")]:
+        result = evaluate_armies_durability(squads, enemies, modifiers=modifiers)
+        print(f"\n{label}（坚持时间秒 / 有效生命值）")
+        for army, ttd, ehp in zip(squads, result.time_to_die, result.effective_hp):
+            print(f"{army.name:<12} " + "  ".join(f"{t:>7.1f}s {h:>8.0f}" for t, h in zip(ttd, ehp)))
+
+    from army import supply_compositions
+    compositions = supply_compositions(["reaper", "raven", "marine.STORM_RIFLE", "ghost.FISSION_RIFLE"], 100, step=2)
+    start = time.perf_counter()
+    frontiers = durability_frontiers(compositions, enemies, ("普通", 1))
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(compositions)}种编队 × {len(enemies)}种敌方，用时{elapsed * 1000:.1f}ms")
+    for frontier in frontiers:
+        print(f"对抗{frontier.enemy}: 前沿{frontier.on_front.sum()}个点")
@@ -1,7 +1,9 @@
 from enum import Enum
 from typing import List, Optional, Tuple
 from dataclasses import dataclass
-import time
+
+from sim_clock import Clock, get_clock
+from unit_data import unit_attributes
 
 class UnitType(Enum):
     """单位类型枚举"""
@@ -26,31 +28,35 @@ class LoadedUnit:
 
 class ToshMedivac:
     """特别行动运输船类"""
-    def __init__(self):
-        # 基础属性
-        self.hp = 280  # 生命值
-        self.max_hp = 280  # 最大生命值
-        self.armor = 1  # 护甲值
-        self.armor_type = "重甲"  # 护甲类型
-        self.movement_speed = 2.75  # 移动速度
-        self.cost_minerals = 150  # 矿物消耗
-        self.cost_gas = 100  # 气体消耗
-        self.build_time = 40  # 建造时间
+    def __init__(self, clock: Optional[Clock] = None):
+        # 基础属性（来自 data/tosh.json）
+        stats = unit_attributes("tosh_medivac")
+        self.hp = stats["hp"]  # 生命值
+        self.max_hp = stats["max_hp"]  # 最大生命值
+        self.armor = stats["armor"]  # 护甲值
+        self.armor_type = stats["armor_type"]  # 护甲类型
+        self.movement_speed = stats["movement_speed"]  # 移动速度
+        self.cost_minerals = stats["cost_minerals"]  # 矿物消耗
+        self.cost_gas = stats["cost_gas"]  # 气体消耗
+        self.build_time = stats["build_time"]  # 建造时间
         
         # 装载系统
-        self.max_cargo_size = 8  # 最大载员位
+        self.max_cargo_size = stats["max_cargo_size"]  # 最大载员位
         self.loaded_units: List[LoadedUnit] = []  # 已装载单位列表
         
         # 隐形系统
-        self.cloak_duration = 6  # 隐形持续时间
-        self.cloak_cooldown = 18  # 隐形冷却时间
-        self.last_cloak_time = 0  # 上次隐形时间
+        self.cloak_duration = stats["cloak_duration"]  # 隐形持续时间
+        self.cloak_cooldown = stats["cloak_cooldown"]  # 隐形冷却时间
+        self.last_cloak_time = float("-inf")  # 上次隐形时间（开局即可使用）
         self.is_cloaked = False  # 是否隐形
         
         # 战术折跃
         self.has_tactical_jump = False  # 是否有战术折跃升级
-        self.tactical_jump_cooldown = 60  # 战术折跃冷却时间
-        self.last_jump_time = 0  # 上次使用战术折跃时间
+        self.tactical_jump_cooldown = stats["tactical_jump_cooldown"]  # 战术折跃冷却时间
+        self.last_jump_time = float("-inf")  # 上次使用战术折跃时间
+        
+        # 时钟
+        self.clock = clock or get_clock()
 
     @property
     def current_cargo_size(self) -> int:
@@ -87,8 +93,10 @@ class ToshMedivac:
         self.loaded_units.clear()
         return returnable, grounded
 
-    def activate_cloak(self, current_time: float) -> bool:
-        """激活隐形"""
+    def activate_cloak(self, current_time: Optional[float] = None) -> bool:
+        """激活隐形（current_time默认取运输船的时钟）"""
+        if current_time is None:
+            current_time = self.clock.now()
         if current_time - self.last_cloak_time >= self.cloak_cooldown:
             self.is_cloaked = True
             self.last_cloak_time = current_time
@@ -99,8 +107,10 @@ class ToshMedivac:
         """解除隐形"""
         self.is_cloaked = False
 
-    def tactical_jump(self, current_time: float) -> bool:
-        """使用战术折跃"""
+    def tactical_jump(self, current_time: Optional[float] = None) -> bool:
+        """使用战术折跃（current_time默认取运输船的时钟）"""
+        if current_time is None:
+            current_time = self.clock.now()
         if (self.has_tactical_jump and 
             current_time - self.last_jump_time >= self.tactical_jump_cooldown):
             self.last_jump_time = current_time
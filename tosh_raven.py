@@ -1,7 +1,9 @@
 from dataclasses import dataclass
 from enum import Enum
 from typing import List, Optional, Set
-import time
+
+from sim_clock import Clock, get_clock
+from unit_data import unit_attributes
 
 class EffectType(Enum):
     """效果类型枚举"""
@@ -21,12 +23,14 @@ class Effect:
 
 class Unit:
     """基础单位类"""
-    def __init__(self):
+    def __init__(self, clock: Optional[Clock] = None):
         self.hp = 100
         self.max_hp = 100
         self.armor = 0
         self.movement_speed = 2.25
         self.effects: List[Effect] = []
+        self.clock = clock or get_clock()
+        self.last_effect_time = self.clock.now()
 
     def apply_effect(self, effect: Effect):
         """应用效果"""
@@ -36,22 +40,30 @@ class Unit:
         """移除效果"""
         self.effects = [e for e in self.effects if e.type != effect_type]
 
-    def update(self, current_time: float):
-        """更新状态"""
-        # 移除过期效果
-        self.effects = [e for e in self.effects if current_time - e.start_time < e.duration]
+    def update(self, current_time: Optional[float] = None):
+        """更新状态（current_time默认取单位的时钟）"""
+        if current_time is None:
+            current_time = self.clock.now()
+        time_passed = current_time - self.last_effect_time
+        self.last_effect_time = current_time
         
-        # 计算当前效果
+        # 计算当前效果（生命恢复按经过的时间结算，只计效果仍生效的部分）
         for effect in self.effects:
             if effect.type == EffectType.SAFETY_FIELD:
-                self.hp = min(self.max_hp, self.hp + effect.bonus_hp_regen)
+                active = min(current_time, effect.start_time + effect.duration) - max(
+                    current_time - time_passed, effect.start_time)
+                if active > 0:
+                    self.hp = min(self.max_hp, self.hp + effect.bonus_hp_regen * active)
+        
+        # 移除过期效果
+        self.effects = [e for e in self.effects if current_time - e.start_time < e.duration]
 
 class SafetyField:
     """安全力场类"""
     def __init__(self):
         self.duration = 10  # 持续10秒
         self.cooldown = 45  # 冷却45秒
-        self.last_cast_time = 0
+        self.last_cast_time = float("-inf")  # 开局即可施放
         self.bonus_damage = 5  # 伤害加成
         self.bonus_armor = 2  # 护甲加成
         self.bonus_hp_regen = 2  # 每秒生命恢复
@@ -82,7 +94,7 @@ class EMPTarget:
         self.affected_units: Set[Unit] = set()
         self.duration = 8  # 持续8秒
         self.cooldown = 30  # 冷却30秒
-        self.last_cast_time = 0
+        self.last_cast_time = float("-inf")  # 开局即可施放
 
     def can_cast(self, current_time: float) -> bool:
         """检查是否可以施放"""
@@ -112,32 +124,35 @@ class EMPTarget:
 
 class ToshRaven(Unit):
     """夜枭类"""
-    def __init__(self):
-        super().__init__()
-        # 基础属性
-        self.hp = 140
-        self.max_hp = 140
-        self.armor = 1
-        self.armor_type = "轻甲"
-        self.movement_speed = 2.25
-        self.cost_minerals = 100
-        self.cost_gas = 200
-        self.build_time = 60
+    def __init__(self, clock: Optional[Clock] = None):
+        super().__init__(clock)
+        # 基础属性（来自 data/tosh.json）
+        stats = unit_attributes("tosh_raven")
+        self.hp = stats["hp"]
+        self.max_hp = stats["max_hp"]
+        self.armor = stats["armor"]
+        self.armor_type = stats["armor_type"]
+        self.movement_speed = stats["movement_speed"]
+        self.cost_minerals = stats["cost_minerals"]
+        self.cost_gas = stats["cost_gas"]
+        self.build_time = stats["build_time"]
         
         # 能量系统
-        self.energy = 50
-        self.max_energy = 200
-        self.energy_regen = 0.5625  # 每秒能量恢复
+        self.energy = stats["energy"]
+        self.max_energy = stats["max_energy"]
+        self.energy_regen = stats["energy_regen"]  # 每秒能量恢复
         
         # 技能系统
         self.safety_field = SafetyField()  # 安全力场
         self.emp_target = EMPTarget()  # 电磁脉冲
         
         # 状态
-        self.last_update_time = time.time()
+        self.last_update_time = self.clock.now()
 
-    def update(self, current_time: float):
-        """更新状态"""
+    def update(self, current_time: Optional[float] = None):
+        """更新状态（current_time默认取单位的时钟）"""
+        if current_time is None:
+            current_time = self.clock.now()
         super().update(current_time)
         
         # 更新能量
@@ -152,7 +167,7 @@ class ToshRaven(Unit):
     def cast_safety_field(self, target: Unit) -> bool:
         """施放安全力场"""
         if self.energy >= 75:  # 能量消耗75
-            current_time = time.time()
+            current_time = self.clock.now()
             if self.safety_field.cast(current_time, target):
                 self.energy -= 75
                 return True
@@ -161,7 +176,7 @@ class ToshRaven(Unit):
     def cast_emp(self, targets: List[Unit]) -> bool:
         """施放电磁脉冲"""
         if self.energy >= 100:  # 能量消耗100
-            current_time = time.time()
+            current_time = self.clock.now()
             if self.emp_target.cast(current_time, targets):
                 self.energy -= 100
                 return True
@@ -169,7 +184,7 @@ class ToshRaven(Unit):
 
     def get_status(self) -> str:
         """获取状态信息"""
-        current_time = time.time()
+        current_time = self.clock.now()
         
         status = []
         status.append(f"生命值: {self.hp}/{self.max_hp}")
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
 from enum import Enum
 from typing import List, Optional, Dict
-import time
 import math
 
+from sim_clock import Clock, get_clock
+from unit_data import unit_attributes, unit_weapons
+
 class WeaponType(Enum):
     """武器类型枚举"""
     P55_SCYTHE = "P55镰刀电磁枪"
@@ -23,50 +25,37 @@ class WeaponStats:
 class SpiderMine:
     """蜘蛛雷类"""
     def __init__(self):
-        self.damage = 125  # 基础伤害
-        self.splash_radius = 1.5  # 爆炸范围
-        self.arm_time = 3  # 布设时间
-        self.detection_radius = 6  # 侦测范围
-        self.movement_speed = 2.5  # 追击速度
-        self.hp = 15  # 生命值
-        self.cost = 15  # 能量消耗
-        self.max_count = 3  # 最大同时存在数量
+        stats = unit_attributes("spider_mine")
+        self.damage = stats["damage"]  # 基础伤害
+        self.splash_radius = stats["splash_radius"]  # 爆炸范围
+        self.arm_time = stats["arm_time"]  # 布设时间
+        self.detection_radius = stats["detection_radius"]  # 侦测范围
+        self.movement_speed = stats["movement_speed"]  # 追击速度
+        self.hp = stats["hp"]  # 生命值
+        self.cost = stats["cost"]  # 能量消耗
+        self.max_count = stats["max_count"]  # 最大同时存在数量
 
 class ToshReaper:
     """死神之首类"""
-    def __init__(self):
-        # 基础属性
-        self.hp = 150  # 生命值
-        self.max_hp = 150  # 最大生命值
-        self.armor = 1  # 护甲值
-        self.armor_type = "轻甲"  # 护甲类型
-        self.movement_speed = 2.25  # 移动速度
-        self.cost_minerals = 50  # 矿物消耗
-        self.cost_gas = 50  # 气体消耗
-        self.build_time = 45  # 建造时间
+    def __init__(self, clock: Optional[Clock] = None):
+        # 基础属性（来自 data/tosh.json）
+        stats = unit_attributes("tosh_reaper")
+        self.hp = stats["hp"]  # 生命值
+        self.max_hp = stats["max_hp"]  # 最大生命值
+        self.armor = stats["armor"]  # 护甲值
+        self.armor_type = stats["armor_type"]  # 护甲类型
+        self.movement_speed = stats["movement_speed"]  # 移动速度
+        self.cost_minerals = stats["cost_minerals"]  # 矿物消耗
+        self.cost_gas = stats["cost_gas"]  # 气体消耗
+        self.build_time = stats["build_time"]  # 建造时间
         
         # 能量系统
-        self.energy = 50  # 初始能量
-        self.max_energy = 200  # 最大能量
-        self.energy_regen = 0.5625  # 每秒能量恢复
+        self.energy = stats["energy"]  # 初始能量
+        self.max_energy = stats["max_energy"]  # 最大能量
+        self.energy_regen = stats["energy_regen"]  # 每秒能量恢复
         
         # 武器系统
-        self.weapons: Dict[WeaponType, WeaponStats] = {
-            WeaponType.P55_SCYTHE: WeaponStats(
-                min_damage=8,
-                max_damage=18,
-                attack_speed=1.1,  # 每秒攻击次数
-                range=6
-            ),
-            WeaponType.D9_EXPLOSIVE: WeaponStats(
-                min_damage=20,
-                max_damage=40,
-                attack_speed=0.8,
-                range=2,
-                is_splash=True,
-                splash_radius=1.5
-            )
-        }
+        self.weapons: Dict[WeaponType, WeaponStats] = unit_weapons("tosh_reaper", WeaponType, WeaponStats)
         
         # 蜘蛛雷系统
         self.spider_mine = SpiderMine()
@@ -78,12 +67,15 @@ class ToshReaper:
         self.has_uranium_upgrade = False  # 是否有铀238升级
         
         # 状态追踪
-        self.last_update_time = time.time()
+        self.clock = clock or get_clock()
+        self.last_update_time = self.clock.now()
         self.current_weapon = WeaponType.P55_SCYTHE
         self.is_cloaked = False
 
-    def update(self, current_time: float):
-        """更新状态"""
+    def update(self, current_time: Optional[float] = None):
+        """更新状态（current_time默认取单位的时钟）"""
+        if current_time is None:
+            current_time = self.clock.now()
         # 更新能量
         time_passed = current_time - self.last_update_time
         self.energy = min(self.max_energy, self.energy + self.energy_regen * time_passed)
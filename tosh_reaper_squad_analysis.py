@@ -1,7 +1,16 @@
+import os
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from chart_render import ChartSpec, NoteBox, PointLabels, RenderOptions, Series, output_paths, render_chart
+from profiling import profiled
+from result_cache import cached_figure
+from spider_mines import MineScenario, mine_dps_by_supply
+from supply_curve import max_dps_at_supply, medivac_rule, supply_curve
+from unit_data import unit_attributes, upgrade_cost
 
 # 设置matplotlib样式
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'Microsoft YaHei']
@@ -33,12 +42,18 @@ font_path = fm.findfont(fm.FontProperties(family=['Arial Unicode MS', 'SimHei',
 if font_path:
     plt.rcParams['font.family'] = fm.FontProperties(fname=font_path).get_name()
 
-def calculate_reaper_dps(attack_upgrade: int = 0, has_raven_buff: bool = False) -> Dict[str, float]:
+# 托什指挥官20%伤害加成
+TOSH_DAMAGE_MULTIPLIER = 1.2
+
+@profiled
+def calculate_reaper_dps(attack_upgrade: int = 0, has_raven_buff: bool = False,
+                         damage_multiplier: float = TOSH_DAMAGE_MULTIPLIER) -> Dict[str, float]:
     """计算单个死神的DPS
     
     Args:
         attack_upgrade: 攻击升级等级(0-3)
         has_raven_buff: 是否有渡鸦buff(5层安全力场)
+        damage_multiplier: 托什指挥官伤害倍率
     
     Returns:
         包含对轻甲和重甲DPS的字典
@@ -52,8 +67,8 @@ def calculate_reaper_dps(attack_upgrade: int = 0, has_raven_buff: bool = False)
     max_damage = base_max + (attack_upgrade * 2)
     
     # 托什指挥官20%伤害加成
-    min_damage *= 1.2
-    max_damage *= 1.2
+    min_damage *= damage_multiplier
+    max_damage *= damage_multiplier
     
     # 安全力场加成（每层+1点，5层共+5点）
     if has_raven_buff:
@@ -73,6 +88,7 @@ def calculate_reaper_dps(attack_upgrade: int = 0, has_raven_buff: bool = False)
         "heavy_armor": heavy_armor_dps
     }
 
+@profiled
 def calculate_squad_cost(reapers: int) -> dict:
     """计算死神小队的资源消耗
     
@@ -85,14 +101,17 @@ def calculate_squad_cost(reapers: int) -> dict:
     # 死神：50矿50气，1人口
     # 运输船：150矿100气，2人口
     # 每艘运输船可以装载8个死神
-    medivacs = (reapers + 7) // 8  # 向上取整
+    reaper = unit_attributes("tosh_reaper")
+    medivac = unit_attributes("tosh_medivac")
+    medivacs = medivac_rule().count(reapers)  # 向上取整
     
     return {
-        "minerals": reapers * 50 + medivacs * 150,
-        "gas": reapers * 50 + medivacs * 100,
-        "supply": reapers * 1 + medivacs * 2
+        "minerals": reapers * reaper["cost_minerals"] + medivacs * medivac["cost_minerals"],
+        "gas": reapers * reaper["cost_gas"] + medivacs * medivac["cost_gas"],
+        "supply": reapers * reaper["supply"] + medivacs * medivac["supply"]
     }
 
+@profiled
 def calculate_dps_by_supply(max_supply: int = 160, attack_upgrade: int = 3, has_raven_buff: bool = True) -> Tuple[List[int], List[float], List[float]]:
     """计算不同人口下的DPS
     
@@ -104,39 +123,30 @@ def calculate_dps_by_supply(max_supply: int = 160, attack_upgrade: int = 3, has_
     Returns:
         (人口列表, 对轻甲DPS列表, 对重甲DPS列表)
     """
-    supplies = []
-    light_dps = []
-    heavy_dps = []
-    
-    # 从1个死神开始，直到达到最大人口
-    for reapers in range(1, max_supply):
-        cost = calculate_squad_cost(reapers)
-        if cost["supply"] > max_supply:
-            break
-            
-        dps = calculate_reaper_dps(attack_upgrade, has_raven_buff)
-        supplies.append(cost["supply"])
-        light_dps.append(dps["light_armor"] * reapers)
-        heavy_dps.append(dps["heavy_armor"] * reapers)
-    
-    return supplies, light_dps, heavy_dps
+    # 单兵DPS不随数量变化，整条曲线一次算出（从1个死神开始，直到达到最大人口）
+    dps = calculate_reaper_dps(attack_upgrade, has_raven_buff)
+    curve = supply_curve({"reaper": 1}, dps, max_supply, medivac_rule())
+    return curve.supply.tolist(), curve.dps["light_armor"].tolist(), curve.dps["heavy_armor"].tolist()
 
-def format_number(x, p):
-    """格式化数字标签为Times New Roman字体"""
-    return f'$\\mathregular{{{x:.0f}}}$'
+def _tosh_chart(title: str, xlabel: str, ylabel: str, series: List[Series],
+                points: Optional[List[PointLabels]] = None, notes: Optional[List[NoteBox]] = None,
+                legend_loc: str = 'upper left', legend_fontsize: int = 10) -> ChartSpec:
+    """本分析图表的统一样式（灰色背景、Times New Roman数字）"""
+    return ChartSpec(title, xlabel, ylabel, series, points or [], notes or [],
+                     facecolor=BYTEDANCE_COLORS['gray'], number_ticks=True,
+                     legend={'fontsize': legend_fontsize, 'loc': legend_loc,
+                             'facecolor': 'white', 'edgecolor': 'none'})
 
-def plot_dps_supply_curves():
-    """绘制DPS-人口曲线图"""
-    plt.figure(figsize=(12, 8), facecolor=BYTEDANCE_COLORS['gray'])
-    
-    # 设置背景色
-    ax = plt.gca()
-    ax.set_facecolor('white')
-    
-    # 设置刻度标签格式
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(format_number))
-    ax.xaxis.set_major_formatter(plt.FuncFormatter(format_number))
-    
+@profiled
+@cached_figure('死神船队DPS人口分析.png', modules=('supply_curve', 'spider_mines', 'chart_render'),
+               options=RenderOptions, expand=output_paths)
+def plot_dps_supply_curves(output_dir: str = ".", mine_scenario: Optional[MineScenario] = None):
+    """绘制DPS-人口曲线图（图片写到 output_dir 下）
+
+    Args:
+        output_dir: 输出目录
+        mine_scenario: 蜘蛛雷场景，给出时叠加蜘蛛雷曲线（总伤害按场景中的敌方总生命值封顶）
+    """
     # 计算数据
     supplies, light_dps_no_buff, heavy_dps_no_buff = calculate_dps_by_supply(
         max_supply=160,
@@ -150,33 +160,38 @@ def plot_dps_supply_curves():
         has_raven_buff=True
     )
     
-    # 绘制曲线
-    plt.plot(supplies, light_dps_no_buff, '-', label='对轻甲 (无buff)', color=BYTEDANCE_COLORS['blue'], linewidth=2)
-    plt.plot(supplies, heavy_dps_no_buff, '-', label='对重甲 (无buff)', color=BYTEDANCE_COLORS['light_blue'], linewidth=2)
-    plt.plot(supplies, light_dps_buff, '-', label='对轻甲 (满buff)', color=BYTEDANCE_COLORS['red'], linewidth=2)
-    plt.plot(supplies, heavy_dps_buff, '-', label='对重甲 (满buff)', color=BYTEDANCE_COLORS['orange'], linewidth=2)
-    
-    # 设置图表样式
-    plt.title('死神船队DPS随人口变化曲线 (3级攻击升级)', fontsize=16, pad=20)
-    plt.xlabel('人口数', fontsize=14)
-    plt.ylabel('DPS', fontsize=14)
-    plt.grid(True, linestyle='--', alpha=0.3)
-    plt.legend(fontsize=12, loc='upper left', frameon=True, facecolor='white', edgecolor='none')
-    
-    # 添加关键点标注
-    for supply in range(40, 161, 40):
-        idx = supplies.index(min(supplies, key=lambda x: abs(x - supply)))
-        plt.plot([supplies[idx]], [light_dps_buff[idx]], 'o', color=BYTEDANCE_COLORS['red'])
-        plt.text(supplies[idx], light_dps_buff[idx], f'$\\mathregular{{{light_dps_buff[idx]:.0f}}}$', 
-                ha='center', va='bottom', fontsize=10)
-        plt.plot([supplies[idx]], [heavy_dps_buff[idx]], 'o', color=BYTEDANCE_COLORS['orange'])
-        plt.text(supplies[idx], heavy_dps_buff[idx], f'$\\mathregular{{{heavy_dps_buff[idx]:.0f}}}$', 
-                ha='center', va='bottom', fontsize=10)
-    
-    # 保存图表
-    plt.tight_layout()
-    plt.savefig('死神船队DPS人口分析.png', dpi=300, bbox_inches='tight', facecolor=BYTEDANCE_COLORS['gray'])
-    plt.close()
+    series = [
+        Series('对轻甲 (无buff)', supplies, light_dps_no_buff, BYTEDANCE_COLORS['blue']),
+        Series('对重甲 (无buff)', supplies, heavy_dps_no_buff, BYTEDANCE_COLORS['light_blue']),
+        Series('对轻甲 (满buff)', supplies, light_dps_buff, BYTEDANCE_COLORS['red']),
+        Series('对重甲 (满buff)', supplies, heavy_dps_buff, BYTEDANCE_COLORS['orange']),
+    ]
+    if mine_scenario is not None:
+        # 蜘蛛雷平均DPS（人口点与上面一致），总伤害不超过场景中的敌方总生命值
+        mines = mine_dps_by_supply(160, mine_scenario.enemy_density, mine_scenario.window, TOSH_DAMAGE_MULTIPLIER,
+                                   enemy_hp=mine_scenario.enemy_hp, target_armor=mine_scenario.target_armor)
+        label = mine_scenario.label()
+        series += [
+            Series(f'对轻甲 (满buff+蜘蛛雷; {label})', supplies, np.array(light_dps_buff) + mines.dps["light_armor"],
+                   BYTEDANCE_COLORS['red'], '--'),
+            Series(f'对重甲 (满buff+蜘蛛雷; {label})', supplies, np.array(heavy_dps_buff) + mines.dps["heavy_armor"],
+                   BYTEDANCE_COLORS['orange'], '--'),
+        ]
+
+    # 关键点标注：40/80/120/160人口附近的人口点
+    supply_array = np.array(supplies)
+    key_idx = [int(np.abs(supply_array - supply).argmin()) for supply in range(40, 161, 40)]
+    key_supplies = supply_array[key_idx]
+    
+    spec = _tosh_chart(
+        '死神船队DPS随人口变化曲线 (3级攻击升级)', '人口数', 'DPS',
+        series=series,
+        points=[
+            PointLabels(key_supplies, np.array(light_dps_buff)[key_idx], BYTEDANCE_COLORS['red']),
+            PointLabels(key_supplies, np.array(heavy_dps_buff)[key_idx], BYTEDANCE_COLORS['orange']),
+        ],
+        legend_fontsize=12)
+    render_chart(spec, os.path.join(output_dir, '死神船队DPS人口分析.png'))
 
 def calculate_upgrade_cost(level: int) -> Dict[str, float]:
     """计算升级的资源消耗
@@ -187,12 +202,7 @@ def calculate_upgrade_cost(level: int) -> Dict[str, float]:
     Returns:
         包含资源消耗的字典
     """
-    costs = {
-        1: {"minerals": 100, "gas": 100, "time": 120},
-        2: {"minerals": 150, "gas": 150, "time": 160},
-        3: {"minerals": 200, "gas": 200, "time": 200}
-    }
-    return costs[level]
+    return upgrade_cost("attack", level)
 
 def analyze_upgrade_efficiency(reaper_count: int = 30) -> None:
     """分析升级的资源效率
@@ -276,32 +286,19 @@ def calculate_equivalent_unit_dps(supply: int, upgrade_level: int = 0, has_raven
     Returns:
         包含对轻甲和重甲DPS的字典
     """
-    # 计算最大可用运输船数量和死神数量
-    medivacs = (supply + 7) // 16  # 每个运输船占2人口，最多能装8个死神
-    reapers = supply - (medivacs * 2)  # 剩余人口用于死神
-    
-    if reapers <= 0:
-        return {"light_armor": 0, "heavy_armor": 0}
-    
-    # 计算DPS
+    # 运输船数量与calculate_squad_cost一致：每8个死神一艘，运输船人口也计入总人口
     dps = calculate_reaper_dps(upgrade_level, has_raven_buff)
+    best = max_dps_at_supply({"reaper": 1}, dps, [supply], medivac_rule())
     return {
-        "light_armor": dps["light_armor"] * reapers,
-        "heavy_armor": dps["heavy_armor"] * reapers
+        "light_armor": float(best.dps["light_armor"][0]),
+        "heavy_armor": float(best.dps["heavy_armor"][0])
     }
 
-def plot_resource_equivalent_curves():
-    """绘制等人口下的DPS对比曲线"""
-    plt.figure(figsize=(12, 8), facecolor=BYTEDANCE_COLORS['gray'])
-    
-    # 设置背景色
-    ax = plt.gca()
-    ax.set_facecolor('white')
-    
-    # 设置刻度标签格式
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(format_number))
-    ax.xaxis.set_major_formatter(plt.FuncFormatter(format_number))
-    
+@profiled
+@cached_figure('死神等人口DPS分析.png', modules=('chart_render',),
+               options=RenderOptions, expand=output_paths)
+def plot_resource_equivalent_curves(output_dir: str = "."):
+    """绘制等人口下的DPS对比曲线（图片写到 output_dir 下）"""
     # 准备数据
     supplies = list(range(20, 161, 20))  # 从20到160人口
     dps_data = {
@@ -318,42 +315,30 @@ def plot_resource_equivalent_curves():
             dps_data[key]["light"].append(dps["light_armor"])
             dps_data[key]["heavy"].append(dps["heavy_armor"])
     
-    # 绘制轻甲DPS曲线
-    plt.plot(supplies, dps_data["no_upgrade"]["light"], '-', 
-             label='纯造兵 vs轻甲', 
-             color=BYTEDANCE_COLORS['blue'], linewidth=2)
-    plt.plot(supplies, dps_data["attack1"]["light"], '-', 
-             label=f'1级攻击 vs轻甲 (100矿100气)', 
-             color=BYTEDANCE_COLORS['light_blue'], linewidth=2)
-    plt.plot(supplies, dps_data["attack2"]["light"], '-', 
-             label=f'2级攻击 vs轻甲 (总计250矿250气)', 
-             color=BYTEDANCE_COLORS['red'], linewidth=2)
-    plt.plot(supplies, dps_data["attack3"]["light"], '-', 
-             label=f'3级攻击 vs轻甲 (总计450矿450气)', 
-             color=BYTEDANCE_COLORS['purple'], linewidth=2)
-    
-    # 绘制重甲DPS曲线（虚线）
-    plt.plot(supplies, dps_data["no_upgrade"]["heavy"], '--', 
-             label='纯造兵 vs重甲', 
-             color=BYTEDANCE_COLORS['blue'], linewidth=2)
-    plt.plot(supplies, dps_data["attack1"]["heavy"], '--', 
-             label=f'1级攻击 vs重甲', 
-             color=BYTEDANCE_COLORS['light_blue'], linewidth=2)
-    plt.plot(supplies, dps_data["attack2"]["heavy"], '--', 
-             label=f'2级攻击 vs重甲', 
-             color=BYTEDANCE_COLORS['red'], linewidth=2)
-    plt.plot(supplies, dps_data["attack3"]["heavy"], '--', 
-             label=f'3级攻击 vs重甲', 
-             color=BYTEDANCE_COLORS['purple'], linewidth=2)
-    
-    # 添加关键点标注（只标注轻甲DPS）
-    for supply in supplies:
-        for upgrade, data in dps_data.items():
-            idx = supplies.index(supply)
-            plt.plot([supply], [data["light"][idx]], 'o', 
-                    color=plt.gca().lines[-1].get_color(), markersize=4)
-            plt.text(supply, data["light"][idx], f'$\\mathregular{{{data["light"][idx]:.0f}}}$', 
-                    ha='center', va='bottom', fontsize=8)
+    colors = {
+        "no_upgrade": BYTEDANCE_COLORS['blue'],
+        "attack1": BYTEDANCE_COLORS['light_blue'],
+        "attack2": BYTEDANCE_COLORS['red'],
+        "attack3": BYTEDANCE_COLORS['purple'],
+    }
+    light_labels = {
+        "no_upgrade": '纯造兵 vs轻甲',
+        "attack1": '1级攻击 vs轻甲 (100矿100气)',
+        "attack2": '2级攻击 vs轻甲 (总计250矿250气)',
+        "attack3": '3级攻击 vs轻甲 (总计450矿450气)',
+    }
+    heavy_labels = {
+        "no_upgrade": '纯造兵 vs重甲',
+        "attack1": '1级攻击 vs重甲',
+        "attack2": '2级攻击 vs重甲',
+        "attack3": '3级攻击 vs重甲',
+    }
+    
+    # 轻甲DPS为实线，重甲DPS为虚线；关键点只标注轻甲DPS
+    series = [Series(light_labels[key], supplies, data["light"], colors[key]) for key, data in dps_data.items()]
+    series += [Series(heavy_labels[key], supplies, data["heavy"], colors[key], '--') for key, data in dps_data.items()]
+    points = [PointLabels(supplies, data["light"], colors[key], markersize=4, fontsize=8)
+              for key, data in dps_data.items()]
     
     # 添加结论文本
     conclusion_text = (
@@ -362,36 +347,15 @@ def plot_resource_equivalent_curves():
         "2. 对重甲伤害恒为轻甲的50%\n"
         "3. 高级别升级性价比更高"
     )
-    plt.text(0.02, 0.98, conclusion_text,
-             transform=ax.transAxes,
-             verticalalignment='top',
-             bbox=dict(facecolor='white', alpha=0.8, edgecolor='none'),
-             fontsize=10)
-    
-    # 设置图表样式
-    plt.title('等人口下的DPS对比曲线', fontsize=16, pad=20)
-    plt.xlabel('人口数', fontsize=14)
-    plt.ylabel('DPS', fontsize=14)
-    plt.grid(True, linestyle='--', alpha=0.3)
-    plt.legend(fontsize=10, loc='upper left', frameon=True, facecolor='white', edgecolor='none')
-    
-    # 保存图表
-    plt.tight_layout()
-    plt.savefig('死神等人口DPS分析.png', dpi=300, bbox_inches='tight', facecolor=BYTEDANCE_COLORS['gray'])
-    plt.close()
+    spec = _tosh_chart('等人口下的DPS对比曲线', '人口数', 'DPS', series, points,
+                       notes=[NoteBox(conclusion_text)])
+    render_chart(spec, os.path.join(output_dir, '死神等人口DPS分析.png'))
 
-def plot_upgrade_efficiency_curves():
-    """绘制升级效率曲线图"""
-    plt.figure(figsize=(12, 8), facecolor=BYTEDANCE_COLORS['gray'])
-    
-    # 设置背景色
-    ax = plt.gca()
-    ax.set_facecolor('white')
-    
-    # 设置刻度标签格式
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(format_number))
-    ax.xaxis.set_major_formatter(plt.FuncFormatter(format_number))
-    
+@profiled
+@cached_figure('死神升级效率分析.png', modules=('chart_render',),
+               options=RenderOptions, expand=output_paths)
+def plot_upgrade_efficiency_curves(output_dir: str = "."):
+    """绘制升级效率曲线图（图片写到 output_dir 下）"""
     # 准备数据
     reapers = range(10, 121, 10)
     dps_gains = {
@@ -422,18 +386,19 @@ def plot_upgrade_efficiency_curves():
         dps_gains["raven"]["dps"].append(dps_buff - base_dps)
     
     # 绘制曲线
-    plt.plot(reapers, dps_gains["attack1"]["dps"], '-', 
-             label=f'1级攻击 ({dps_gains["attack1"]["cost"]["minerals"]}矿/{dps_gains["attack1"]["cost"]["gas"]}气/{dps_gains["attack1"]["cost"]["time"]}s)', 
-             color=BYTEDANCE_COLORS['blue'], linewidth=2)
-    plt.plot(reapers, dps_gains["attack2"]["dps"], '-', 
-             label=f'2级攻击 (总计{dps_gains["attack1"]["cost"]["minerals"]+dps_gains["attack2"]["cost"]["minerals"]}矿/{dps_gains["attack1"]["cost"]["gas"]+dps_gains["attack2"]["cost"]["gas"]}气)', 
-             color=BYTEDANCE_COLORS['light_blue'], linewidth=2)
-    plt.plot(reapers, dps_gains["attack3"]["dps"], '-', 
-             label=f'3级攻击 (总计{dps_gains["attack1"]["cost"]["minerals"]+dps_gains["attack2"]["cost"]["minerals"]+dps_gains["attack3"]["cost"]["minerals"]}矿/{dps_gains["attack1"]["cost"]["gas"]+dps_gains["attack2"]["cost"]["gas"]+dps_gains["attack3"]["cost"]["gas"]}气)', 
-             color=BYTEDANCE_COLORS['red'], linewidth=2)
-    plt.plot(reapers, dps_gains["raven"]["dps"], '--', 
-             label=f'渡鸦buff ({dps_gains["raven"]["cost"]["minerals"]}矿/{dps_gains["raven"]["cost"]["gas"]}气)', 
-             color=BYTEDANCE_COLORS['orange'], linewidth=2)
+    cost1, cost2, cost3 = (dps_gains[f"attack{level}"]["cost"] for level in (1, 2, 3))
+    raven_cost = dps_gains["raven"]["cost"]
+    series = [
+        Series(f'1级攻击 ({cost1["minerals"]}矿/{cost1["gas"]}气/{cost1["time"]}s)',
+               reapers, dps_gains["attack1"]["dps"], BYTEDANCE_COLORS['blue']),
+        Series(f'2级攻击 (总计{cost1["minerals"] + cost2["minerals"]}矿/{cost1["gas"] + cost2["gas"]}气)',
+               reapers, dps_gains["attack2"]["dps"], BYTEDANCE_COLORS['light_blue']),
+        Series(f'3级攻击 (总计{cost1["minerals"] + cost2["minerals"] + cost3["minerals"]}矿/'
+               f'{cost1["gas"] + cost2["gas"] + cost3["gas"]}气)',
+               reapers, dps_gains["attack3"]["dps"], BYTEDANCE_COLORS['red']),
+        Series(f'渡鸦buff ({raven_cost["minerals"]}矿/{raven_cost["gas"]}气)',
+               reapers, dps_gains["raven"]["dps"], BYTEDANCE_COLORS['orange'], '--'),
+    ]
     
     # 添加结论文本
     conclusion_text = (
@@ -442,37 +407,23 @@ def plot_upgrade_efficiency_curves():
         "2. 升级收益随死神数量线性增长\n"
         "3. 3级攻击总成本高但提升最大"
     )
-    plt.text(0.02, 0.98, conclusion_text,
-             transform=ax.transAxes,
-             verticalalignment='top',
-             bbox=dict(facecolor='white', alpha=0.8, edgecolor='none'),
-             fontsize=10)
-    
-    # 设置图表样式
-    plt.title('死神数量与升级DPS提升关系曲线', fontsize=16, pad=20)
-    plt.xlabel('死神数量', fontsize=14)
-    plt.ylabel('DPS提升', fontsize=14)
-    plt.grid(True, linestyle='--', alpha=0.3)
-    plt.legend(fontsize=10, loc='upper right', frameon=True, facecolor='white', edgecolor='none')
-    
-    # 保存图表
-    plt.tight_layout()
-    plt.savefig('死神升级效率分析.png', dpi=300, bbox_inches='tight', facecolor=BYTEDANCE_COLORS['gray'])
-    plt.close()
+    spec = _tosh_chart('死神数量与升级DPS提升关系曲线', '死神数量', 'DPS提升', series,
+                       notes=[NoteBox(conclusion_text)], legend_loc='upper right')
+    render_chart(spec, os.path.join(output_dir, '死神升级效率分析.png'))
 
 def main():
     """主函数"""
     # 计算并显示40/80/120/160人口时的数据
     print("\n死神船队人口分析：")
     for supply in [40, 80, 120, 160]:
-        reapers = (supply - 2 * ((supply + 7) // 8)) // 1  # 计算最大死神数量
+        reapers = int(max_dps_at_supply({"reaper": 1}, {}, [supply], medivac_rule()).groups[0])  # 计算最大死神数量
         cost = calculate_squad_cost(reapers)
         dps_no_buff = calculate_reaper_dps(3, False)
         dps_buff = calculate_reaper_dps(3, True)
         
         print(f"\n{supply}人口配置：")
         print(f"死神数量: {reapers}")
-        print(f"运输船数量: {(reapers + 7) // 8}")
+        print(f"运输船数量: {medivac_rule().count(reapers)}")
         print(f"资源消耗: {cost['minerals']}矿 {cost['gas']}气")
         print(f"实际人口: {cost['supply']}")
         print(f"总DPS (无buff): {dps_no_buff['light_armor'] * reapers:.1f} vs轻甲, {dps_no_buff['heavy_armor'] * reapers:.1f} vs重甲")
@@ -484,8 +435,10 @@ def main():
     # 分析升级效率
     analyze_upgrade_efficiency(30)  # 基于30个死神分析
     
-    # 绘制DPS曲线图
-    plot_dps_supply_curves()
+    # 绘制DPS曲线图（蜘蛛雷按20只刺蛇的总生命值封顶）
+    from survivability import ENEMY_PROFILES
+    hydras = ENEMY_PROFILES["刺蛇"].scaled(20)
+    plot_dps_supply_curves(mine_scenario=MineScenario(hydras.hp * hydras.count, target_armor=hydras.armor))
     print("\n已生成DPS曲线图：死神船队DPS人口分析.png")
     
     # 绘制升级效率曲线图
@@ -0,0 +1,321 @@
+"""单位/武器属性数据加载
+
+属性定义在 data/*.json 中，首次加载时按模式校验并编译为定长的NumPy结构化数组，
+保存在 data/.compiled/ 下。之后以内存映射方式只读打开，多个工作进程共享同一份
+页缓存，无需重复解析JSON。源文件变化后自动重新编译。
+"""
+from dataclasses import fields
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple, Type
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DATA_DIR = os.environ.get("DPS_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+COMPILED_DIR_NAME = ".compiled"
+SCHEMA_VERSION = 1
+
+# 武器字段模式：字段名 -> (类型, 默认值)，默认值为None表示必填
+WEAPON_SCHEMA: Dict[str, Tuple[type, Any]] = {
+    "base_damage": (float, 0.0),
+    "min_damage": (float, 0.0),
+    "max_damage": (float, 0.0),
+    "attack_speed": (float, None),
+    "range": (float, None),
+    "can_attack_air": (bool, True),
+    "can_attack_ground": (bool, True),
+    "is_splash": (bool, False),
+    "splash_radius": (float, 0.0),
+    "multi_attack": (int, 1),
+    "armor_reduction": (int, 0),
+}
+
+# 升级字段模式
+UPGRADE_SCHEMA: Dict[str, Tuple[type, Any]] = {
+    "minerals": (float, None),
+    "gas": (float, None),
+    "time": (float, None),
+}
+
+NAME_DTYPE = "U32"
+MAX_NAME_LENGTH = np.dtype(NAME_DTYPE).itemsize // np.dtype("U1").itemsize  # 编译后名称和文本属性的最大长度
+
+WEAPON_DTYPE = np.dtype(
+    [("unit", NAME_DTYPE), ("weapon", NAME_DTYPE)]
+    + [(name, {float: "f8", bool: "?", int: "i4"}[kind]) for name, (kind, _) in WEAPON_SCHEMA.items()]
+)
+BONUS_DTYPE = np.dtype([("unit", NAME_DTYPE), ("weapon", NAME_DTYPE), ("target", NAME_DTYPE), ("damage", "f8")])
+ATTRIBUTE_DTYPE = np.dtype([("unit", NAME_DTYPE), ("key", NAME_DTYPE), ("number", "f8"), ("text", NAME_DTYPE),
+                            ("is_text", "?")])
+UPGRADE_DTYPE = np.dtype([("kind", NAME_DTYPE), ("level", "i4")] + [(name, "f8") for name in UPGRADE_SCHEMA])
+
+TABLE_DTYPES = {
+    "weapons": WEAPON_DTYPE,
+    "bonus_damage": BONUS_DTYPE,
+    "attributes": ATTRIBUTE_DTYPE,
+    "upgrades": UPGRADE_DTYPE,
+}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def check_field(path: str, value: Any, kind: type):
+    """校验单个字段类型"""
+    if kind is bool:
+        ok = isinstance(value, bool)
+    elif kind is int:
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        ok = _is_number(value)
+    if not ok:
+        raise ValueError(f"{path}: 应为{kind.__name__}类型，实际为{value!r}")
+
+
+def check_record(path: str, record: Any, schema: Dict[str, Tuple[type, Any]],
+                  extra: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """按模式校验一条记录并补齐默认值"""
+    if not isinstance(record, dict):
+        raise ValueError(f"{path}: 应为对象")
+    unknown = set(record) - set(schema) - set(extra)
+    if unknown:
+        raise ValueError(f"{path}: 未知字段 {sorted(unknown)}")
+    result = {}
+    for name, (kind, default) in schema.items():
+        if name not in record:
+            if default is None:
+                raise ValueError(f"{path}: 缺少必填字段 {name}")
+            result[name] = default
+            continue
+        check_field(f"{path}.{name}", record[name], kind)
+        result[name] = record[name]
+    return result
+
+
+def _check_name(path: str, name: str):
+    """名称（及文本属性）不能超过编译后字符串列的长度，否则会被截断"""
+    if len(name) > MAX_NAME_LENGTH:
+        raise ValueError(f"{path}: 长度{len(name)}超过{MAX_NAME_LENGTH}个字符: {name!r}")
+
+
+def validate(document: Dict[str, Any], source: str = "<data>") -> Dict[str, Any]:
+    """校验一个数据文件的内容
+
+    Args:
+        document: 解析后的JSON
+        source: 文件名（用于错误信息）
+
+    Returns:
+        原样返回通过校验的文档
+
+    Raises:
+        ValueError: 数据不符合模式
+    """
+    if document.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"{source}: schema_version应为{SCHEMA_VERSION}")
+    for unit, spec in document.get("units", {}).items():
+        path = f"{source}:units.{unit}"
+        _check_name(path, unit)
+        for key, value in spec.get("attributes", {}).items():
+            if not (_is_number(value) or isinstance(value, str)):
+                raise ValueError(f"{path}.attributes.{key}: 应为数值或字符串")
+            _check_name(f"{path}.attributes", key)
+            if isinstance(value, str):
+                _check_name(f"{path}.attributes.{key}", value)
+        for weapon, record in spec.get("weapons", {}).items():
+            weapon_path = f"{path}.weapons.{weapon}"
+            _check_name(f"{path}.weapons", weapon)
+            check_record(weapon_path, record, WEAPON_SCHEMA, extra=("bonus_damage",))
+            for target, damage in record.get("bonus_damage", {}).items():
+                _check_name(f"{weapon_path}.bonus_damage", target)
+                check_field(f"{weapon_path}.bonus_damage.{target}", damage, float)
+    for kind, levels in document.get("upgrades", {}).items():
+        _check_name(f"{source}:upgrades", kind)
+        for level, record in levels.items():
+            if not level.isdigit():
+                raise ValueError(f"{source}:upgrades.{kind}.{level}: 等级应为整数")
+            check_record(f"{source}:upgrades.{kind}.{level}", record, UPGRADE_SCHEMA)
+    return document
+
+
+def source_files(data_dir: str = DATA_DIR) -> List[str]:
+    """数据目录下的所有数据文件（按文件名排序）"""
+    return sorted(glob.glob(os.path.join(data_dir, "*.json")))
+
+
+def source_digest(paths: List[str]) -> str:
+    """数据文件内容（含文件名和模式版本）的摘要"""
+    digest = hashlib.sha256(str(SCHEMA_VERSION).encode())
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compile_tables(data_dir: str = DATA_DIR) -> Dict[str, np.ndarray]:
+    """解析并校验所有数据文件，编译为结构化数组
+
+    Args:
+        data_dir: 数据目录
+
+    Returns:
+        表名 -> 结构化数组
+    """
+    rows: Dict[str, list] = {name: [] for name in TABLE_DTYPES}
+    for path in source_files(data_dir):
+        with open(path, encoding="utf-8") as f:
+            document = validate(json.load(f), os.path.basename(path))
+        for unit, spec in document.get("units", {}).items():
+            for key, value in spec.get("attributes", {}).items():
+                if isinstance(value, str):
+                    rows["attributes"].append((unit, key, np.nan, value, True))
+                else:
+                    rows["attributes"].append((unit, key, float(value), "", False))
+            for weapon, record in spec.get("weapons", {}).items():
+                values = check_record(weapon, record, WEAPON_SCHEMA, extra=("bonus_damage",))
+                rows["weapons"].append((unit, weapon) + tuple(values[name] for name in WEAPON_SCHEMA))
+                for target, damage in record.get("bonus_damage", {}).items():
+                    rows["bonus_damage"].append((unit, weapon, target, float(damage)))
+        for kind, levels in document.get("upgrades", {}).items():
+            for level, record in levels.items():
+                rows["upgrades"].append((kind, int(level)) + tuple(float(record[name]) for name in UPGRADE_SCHEMA))
+    return {name: np.array(rows[name], dtype=dtype) for name, dtype in TABLE_DTYPES.items()}
+
+
+def _write_compiled(tables: Dict[str, np.ndarray], compiled_dir: str, digest: str):
+    os.makedirs(compiled_dir, exist_ok=True)
+    for name, table in tables.items():
+        tmp_path = os.path.join(compiled_dir, f"{name}.{os.getpid()}.tmp.npy")
+        np.save(tmp_path, table)
+        os.replace(tmp_path, os.path.join(compiled_dir, f"{name}.npy"))
+    # 摘要最后写入，读到摘要即说明所有表都已写完
+    tmp_path = os.path.join(compiled_dir, f"digest.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(digest)
+    os.replace(tmp_path, os.path.join(compiled_dir, "digest"))
+
+
+@lru_cache(maxsize=None)
+def load_tables(data_dir: str = DATA_DIR) -> Dict[str, np.ndarray]:
+    """加载编译后的属性表（内存映射，只读）
+
+    Args:
+        data_dir: 数据目录
+
+    Returns:
+        表名 -> 结构化数组
+    """
+    compiled_dir = os.path.join(data_dir, COMPILED_DIR_NAME)
+    digest = source_digest(source_files(data_dir))
+    try:
+        with open(os.path.join(compiled_dir, "digest")) as f:
+            up_to_date = f.read() == digest
+    except OSError:
+        up_to_date = False
+
+    if not up_to_date:
+        tables = compile_tables(data_dir)
+        try:
+            _write_compiled(tables, compiled_dir, digest)
+        except OSError:
+            return tables  # 数据目录只读时直接使用内存中的表
+
+    return {name: np.load(os.path.join(compiled_dir, f"{name}.npy"), mmap_mode="r")
+            for name in TABLE_DTYPES}
+
+
+def _plain(value: Any) -> Any:
+    """整数值的浮点数还原为int，保持与手写属性一致"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+@lru_cache(maxsize=None)
+def _unit_attributes(unit: str) -> Dict[str, Any]:
+    table = load_tables()["attributes"]
+    rows = table[table["unit"] == unit]
+    if len(rows) == 0:
+        raise KeyError(f"未找到单位属性: {unit}")
+    result = {}
+    for row in rows:
+        if row["is_text"]:
+            result[str(row["key"])] = str(row["text"])
+        else:
+            result[str(row["key"])] = _plain(float(row["number"]))
+    return result
+
+
+def unit_attributes(unit: str) -> Dict[str, Any]:
+    """获取单位基础属性
+
+    Args:
+        unit: 单位名（如 gestalt_marine）
+
+    Returns:
+        属性名 -> 值（整数值以int返回）
+    """
+    return dict(_unit_attributes(unit))
+
+
+@lru_cache(maxsize=None)
+def _unit_weapons(unit: str) -> Dict[str, Dict[str, Any]]:
+    tables = load_tables()
+    weapons = tables["weapons"][tables["weapons"]["unit"] == unit]
+    bonus = tables["bonus_damage"][tables["bonus_damage"]["unit"] == unit]
+    result = {}
+    for row in weapons:
+        name = str(row["weapon"])
+        record = {field: _plain(row[field].item()) for field in WEAPON_SCHEMA}
+        record["bonus_damage"] = {str(b["target"]): _plain(float(b["damage"])) for b in bonus if b["weapon"] == name}
+        result[name] = record
+    return result
+
+
+def unit_weapons(unit: str, weapon_enum: Type, stats_cls: Type) -> Dict[Any, Any]:
+    """按单位模块的武器枚举和武器属性类构建武器字典
+
+    只保留stats_cls中定义的字段，因此不同单位的WeaponStats可以各取所需。
+
+    Args:
+        unit: 单位名
+        weapon_enum: 武器类型枚举
+        stats_cls: 武器属性dataclass
+
+    Returns:
+        武器类型 -> 武器属性
+    """
+    names = {f.name for f in fields(stats_cls)}
+    weapons = {}
+    for weapon, record in _unit_weapons(unit).items():
+        values = {k: (dict(v) if isinstance(v, dict) else v) for k, v in record.items() if k in names}
+        weapons[weapon_enum[weapon]] = stats_cls(**values)
+    return weapons
+
+
+def upgrade_cost(kind: str, level: int) -> Dict[str, float]:
+    """获取升级消耗
+
+    Args:
+        kind: 升级种类（如 attack）
+        level: 升级等级
+
+    Returns:
+        包含minerals/gas/time的字典
+    """
+    return dict(_upgrade_cost(kind, level))
+
+
+@lru_cache(maxsize=None)
+def _upgrade_cost(kind: str, level: int) -> Dict[str, float]:
+    table = load_tables()["upgrades"]
+    rows = table[(table["kind"] == kind) & (table["level"] == level)]
+    if len(rows) == 0:
+        raise KeyError(f"未找到升级: {kind} {level}级")
+    row = rows[0]
+    return {name: _plain(float(row[name])) for name in UPGRADE_SCHEMA}